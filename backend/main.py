@@ -1,3 +1,5 @@
+from contextlib import asynccontextmanager
+
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 
@@ -28,7 +30,31 @@ from routers import gcs
 from routers import weather
 from routers import gallery
 
-app = FastAPI()
+from supabase_client import close_supabase
+from utils.http_clients import close_http_clients
+from services.membership import MembershipScopeMiddleware
+from services.chat_broadcaster import chat_broadcaster
+from services.chat_backplane import chat_backplane
+from services.currency import fx_rates
+from services.image_prep import shutdown_image_pool
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    await chat_backplane.start()
+    await fx_rates.start()
+    yield
+    await fx_rates.close()
+    shutdown_image_pool()
+    await ai_chat.flush_pending_writes()
+    await ai_chat.prompt_cache.close()
+    await chat_backplane.close()
+    await chat_broadcaster.close()
+    await close_http_clients()
+    await close_supabase()
+
+
+app = FastAPI(lifespan=lifespan)
 
 app.add_middleware(
     CORSMiddleware,
@@ -36,7 +62,9 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Has-More", "X-Prev-Cursor", "X-Next-Cursor"],  # chat history paging
 )
+app.add_middleware(MembershipScopeMiddleware)  # per-request trip roster memo
 
 
 # Include routers
@@ -0,0 +1,26 @@
+-- Trip roster in a single round-trip.
+-- Used by services/membership.py to resolve (trip_id, user_id) -> role.
+-- Returns active trip_members rows, legacy group_member rows and the trip owner,
+-- each tagged with its source table.
+
+CREATE OR REPLACE FUNCTION public.trip_roster(p_trip_id UUID)
+RETURNS TABLE (user_id UUID, role TEXT, joined_at TIMESTAMPTZ, source TEXT)
+LANGUAGE sql
+STABLE
+AS $$
+    SELECT tm.user_id, tm.role, tm.joined_at, 'trip_members'
+    FROM public.trip_members tm
+    WHERE tm.trip_id = p_trip_id AND tm.left_at IS NULL
+
+    UNION ALL
+
+    SELECT gm.user_id, gm.role::TEXT, gm.join_datetime, 'group_member'
+    FROM public.group_member gm
+    WHERE gm.group_id = p_trip_id AND gm.left_datetime IS NULL
+
+    UNION ALL
+
+    SELECT t.owner_id, 'leader', NULL::TIMESTAMPTZ, 'owner'
+    FROM public.trips t
+    WHERE t.id = p_trip_id;
+$$;
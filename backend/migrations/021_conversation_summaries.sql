@@ -0,0 +1,66 @@
+-- Conversation summaries for the chat inbox in one round-trip.
+-- conversation carries the last-message fields and group_member a per-member
+-- unread counter. A trigger on message INSERT (chatbox.post_message) keeps
+-- both up to date incrementally; POST /api/conversations/{id}/read resets the
+-- caller's counter. Read by services/conversation_summaries.py.
+
+ALTER TABLE public.conversation
+  ADD COLUMN IF NOT EXISTS last_message_datetime TIMESTAMPTZ;
+
+ALTER TABLE public.conversation
+  ADD COLUMN IF NOT EXISTS last_message_from UUID;
+
+ALTER TABLE public.group_member
+  ADD COLUMN IF NOT EXISTS unread_count INTEGER NOT NULL DEFAULT 0;
+
+ALTER TABLE public.group_member
+  ADD COLUMN IF NOT EXISTS last_read_datetime TIMESTAMPTZ;
+
+CREATE INDEX IF NOT EXISTS idx_group_member_user_active
+  ON public.group_member(user_id)
+  WHERE left_datetime IS NULL;
+
+CREATE INDEX IF NOT EXISTS idx_group_member_conversation_active
+  ON public.group_member(conversation_id)
+  WHERE left_datetime IS NULL;
+
+-- Keep summaries current on every new message: bump everyone else's unread
+-- count and treat the sender as caught up.
+CREATE OR REPLACE FUNCTION public.conversation_summary_on_message()
+RETURNS TRIGGER
+LANGUAGE plpgsql
+AS $$
+BEGIN
+    UPDATE public.conversation
+       SET last_message_datetime = NEW.sent_datetime,
+           last_message_from = NEW.from_user
+     WHERE conversation_id = NEW.conversation_id
+       AND (last_message_datetime IS NULL OR last_message_datetime <= NEW.sent_datetime);
+
+    UPDATE public.group_member
+       SET unread_count = CASE WHEN user_id = NEW.from_user THEN 0 ELSE unread_count + 1 END,
+           last_read_datetime = CASE WHEN user_id = NEW.from_user THEN now() ELSE last_read_datetime END
+     WHERE conversation_id = NEW.conversation_id
+       AND left_datetime IS NULL;
+
+    RETURN NEW;
+END;
+$$;
+
+DROP TRIGGER IF EXISTS trg_message_conversation_summary ON public.message;
+CREATE TRIGGER trg_message_conversation_summary
+  AFTER INSERT ON public.message
+  FOR EACH ROW
+  EXECUTE FUNCTION public.conversation_summary_on_message();
+
+-- Backfill last-message fields for existing conversations (unread starts at 0)
+UPDATE public.conversation c
+   SET last_message_datetime = m.sent_datetime,
+       last_message_from = m.from_user
+  FROM (
+        SELECT DISTINCT ON (conversation_id) conversation_id, sent_datetime, from_user
+          FROM public.message
+         ORDER BY conversation_id, sent_datetime DESC
+       ) m
+ WHERE c.conversation_id = m.conversation_id
+   AND c.last_message_datetime IS NULL;
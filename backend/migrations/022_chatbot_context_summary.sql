@@ -0,0 +1,15 @@
+-- Bounded AI chat context (routers/ai_chat.py, services/ai_context.py).
+-- Each turn sends Gemini the last AI_CONTEXT_RECENT_TURNS turns verbatim plus
+-- a rolling summary of everything older. The summary is folded forward
+-- incrementally after replies; summary_through is the created_at of the
+-- newest message it covers.
+
+ALTER TABLE public.chatbot_conversations
+  ADD COLUMN IF NOT EXISTS summary TEXT;
+
+ALTER TABLE public.chatbot_conversations
+  ADD COLUMN IF NOT EXISTS summary_through TIMESTAMPTZ;
+
+-- Recent-window and fold queries both walk a conversation by created_at
+CREATE INDEX IF NOT EXISTS idx_chatbot_messages_conversation_created
+  ON public.chatbot_messages(conversation_id, created_at);
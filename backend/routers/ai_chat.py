@@ -1,12 +1,20 @@
 from fastapi import APIRouter, HTTPException, status, Depends
+from fastapi.responses import StreamingResponse
 from pydantic import BaseModel
 from typing import Optional, List
 from utils import oauth2
 from supabase_client import supabase
+from services.conversation_summaries import get_conversation_summaries
+from services import ai_context
+from services.ai_prompt_cache import PromptCache, is_cache_rejection
+from services.ai_tool_cache import tool_cache
+from services.currency import fx_rates
 from google import genai
 from google.genai import types
 import os
 import json
+import asyncio
+import time
 from dotenv import load_dotenv
 
 load_dotenv()
@@ -169,29 +177,22 @@ tool_declarations = [
 
 # --- Tool execution functions ---
 
-def execute_get_user_trips(user_id: str) -> str:
+async def execute_get_user_trips(user_id: str) -> str:
     try:
-        # Get groups/trips the user belongs to
-        memberships = supabase.table("group_member").select(
-            "conversation_id, role"
-        ).eq("user_id", user_id).is_("left_datetime", "null").execute()
+        # Groups/trips the user belongs to, with names and activity, in one query
+        summaries = await get_conversation_summaries(user_id)
 
-        if not memberships.data:
+        if not summaries:
             return json.dumps({"trips": [], "message": "No trips found."})
 
-        trip_ids = [m["conversation_id"] for m in memberships.data]
-        roles = {m["conversation_id"]: m["role"] for m in memberships.data}
-
-        trips = supabase.table("conversation").select(
-            "conversation_id, conversation_name"
-        ).in_("conversation_id", trip_ids).execute()
-
         result = []
-        for t in (trips.data or []):
+        for summary in summaries:
             result.append({
-                "trip_id": t["conversation_id"],
-                "name": t["conversation_name"],
-                "role": roles.get(t["conversation_id"], "member"),
+                "trip_id": summary["conversation_id"],
+                "name": summary["conversation_name"],
+                "role": summary["role"],
+                "last_message_datetime": summary["last_message_datetime"],
+                "unread_count": summary["unread_count"],
             })
 
         return json.dumps({"trips": result})
@@ -199,9 +200,9 @@ def execute_get_user_trips(user_id: str) -> str:
         return json.dumps({"error": str(e)})
 
 
-def execute_get_trip_bookings(trip_id: str) -> str:
+async def execute_get_trip_bookings(trip_id: str) -> str:
     try:
-        bookings = supabase.table("booking").select("*").eq(
+        bookings = await supabase.table("booking").select("*").eq(
             "trip_id", trip_id
         ).execute()
         return json.dumps({"bookings": bookings.data or []})
@@ -209,9 +210,9 @@ def execute_get_trip_bookings(trip_id: str) -> str:
         return json.dumps({"error": str(e)})
 
 
-def execute_get_user_expenses(user_id: str, limit: int = 10) -> str:
+async def execute_get_user_expenses(user_id: str, limit: int = 10) -> str:
     try:
-        expenses = supabase.table("expenses").select("*").eq(
+        expenses = await supabase.table("expenses").select("*").eq(
             "user_id", user_id
         ).order("created_at", desc=True).limit(limit).execute()
         return json.dumps({"expenses": expenses.data or []}, default=str)
@@ -232,34 +233,27 @@ def execute_search_nearby_places(query: str, location: str = None) -> str:
 
 
 def execute_convert_currency(amount: float, from_currency: str, to_currency: str) -> str:
-    """Use a free exchange rate API for conversion."""
-    try:
-        import urllib.request
-        url = f"https://open.er-api.com/v6/latest/{from_currency.upper()}"
-        with urllib.request.urlopen(url, timeout=5) as resp:
-            data = json.loads(resp.read().decode())
-        if data.get("result") == "success":
-            rate = data["rates"].get(to_currency.upper())
-            if rate:
-                converted = round(amount * rate, 2)
-                return json.dumps({
-                    "amount": amount,
-                    "from": from_currency.upper(),
-                    "to": to_currency.upper(),
-                    "rate": rate,
-                    "converted": converted,
-                })
-        return json.dumps({"error": f"Could not find rate for {to_currency}"})
-    except Exception as e:
-        return json.dumps({"error": f"Currency API unavailable: {str(e)}"})
+    """Convert with the in-memory FX table (services/currency.py) — no network call."""
+    rate = fx_rates.rate(from_currency, to_currency)
+    if rate is None:
+        return json.dumps({"error": f"Could not find rate for {from_currency} to {to_currency}"})
+    return json.dumps({
+        "amount": amount,
+        "from": from_currency.upper(),
+        "to": to_currency.upper(),
+        "rate": round(rate, 6),
+        "converted": round(amount * rate, 2),
+        "rates_updated_at": int(fx_rates.updated_at) or None,
+        "rates_stale": fx_rates.stale,
+    })
 
 
-def execute_get_saved_routes(user_id: str, trip_id: str = None) -> str:
+async def execute_get_saved_routes(user_id: str, trip_id: str = None) -> str:
     try:
         query = supabase.table("saved_routes").select("*").eq("created_by", user_id)
         if trip_id:
             query = query.eq("trip_id", trip_id)
-        routes = query.order("created_at", desc=True).limit(10).execute()
+        routes = await query.order("created_at", desc=True).limit(10).execute()
         items = []
         for r in (routes.data or []):
             items.append({
@@ -274,24 +268,28 @@ def execute_get_saved_routes(user_id: str, trip_id: str = None) -> str:
         return json.dumps({"error": str(e)})
 
 
-def execute_get_checklists(trip_id: str) -> str:
+async def execute_get_checklists(trip_id: str) -> str:
     try:
-        checklists = supabase.table("checklists").select("*").eq(
-            "trip_id", trip_id
-        ).execute()
-        return json.dumps({"checklists": checklists.data or []}, default=str)
+        # Same tables the checklists router writes (and invalidates the tool cache on)
+        checklists = await supabase.table("document_checklists").select(
+            "*, items:checklist_items(*)"
+        ).eq("trip_id", trip_id).order("created_at", desc=True).execute()
+        result = checklists.data or []
+        for cl in result:
+            cl["items"] = sorted(cl.get("items") or [], key=lambda item: str(item.get("created_at", "")))
+        return json.dumps({"checklists": result}, default=str)
     except Exception as e:
         return json.dumps({"error": str(e)})
 
 
-def run_tool(name: str, args: dict, user_id: str) -> str:
+async def _dispatch_tool(name: str, args: dict, user_id: str) -> str:
     """Dispatch a tool call to the appropriate function."""
     if name == "get_user_trips":
-        return execute_get_user_trips(user_id)
+        return await execute_get_user_trips(user_id)
     elif name == "get_trip_bookings":
-        return execute_get_trip_bookings(args.get("trip_id", ""))
+        return await execute_get_trip_bookings(args.get("trip_id", ""))
     elif name == "get_user_expenses":
-        return execute_get_user_expenses(user_id, args.get("limit", 10))
+        return await execute_get_user_expenses(user_id, args.get("limit", 10))
     elif name == "search_nearby_places":
         return execute_search_nearby_places(args.get("query", ""), args.get("location"))
     elif name == "convert_currency":
@@ -301,13 +299,37 @@ def run_tool(name: str, args: dict, user_id: str) -> str:
             args.get("to_currency", "EUR"),
         )
     elif name == "get_saved_routes":
-        return execute_get_saved_routes(user_id, args.get("trip_id"))
+        return await execute_get_saved_routes(user_id, args.get("trip_id"))
     elif name == "get_checklists":
-        return execute_get_checklists(args.get("trip_id", ""))
+        return await execute_get_checklists(args.get("trip_id", ""))
     else:
         return json.dumps({"error": f"Unknown tool: {name}"})
 
 
+def _tool_tags(name: str, args: dict, user_id: str) -> Optional[list]:
+    """Invalidation tags for the memoized data tools; None = always run."""
+    if name == "get_user_trips":
+        return []  # TTL only — unread counts move with every chat message
+    if name == "get_trip_bookings":
+        return [("booking", args.get("trip_id", ""))]
+    if name == "get_checklists":
+        return [("checklists", args.get("trip_id", ""))]
+    if name == "get_saved_routes":
+        return [("saved_routes", user_id)]
+    return None
+
+
+async def run_tool(name: str, args: dict, user_id: str, conversation_id: str) -> str:
+    """Run a tool call, answering repeat lookups from the per-conversation cache."""
+    tags = _tool_tags(name, args, user_id)
+    if tags is None:
+        return await _dispatch_tool(name, args, user_id)
+    return await tool_cache.get_or_run(
+        conversation_id, name, args, tags,
+        lambda: _dispatch_tool(name, args, user_id),
+    )
+
+
 # --- Request/Response models ---
 
 class ChatMessage(BaseModel):
@@ -320,21 +342,74 @@ class ChatHistoryItem(BaseModel):
     content: str
 
 
-# --- Endpoints ---
+# --- Reply pipeline ---
 
-@router.post("/send")
-async def send_message(
-    payload: ChatMessage,
-    current_user: dict = Depends(oauth2.get_current_user),
-):
-    """Send a message to the AI chatbot and get a response."""
+GEMINI_MODEL = "gemini-2.5-flash"
+MAX_TOOL_ROUNDS = 5
+FALLBACK_REPLY = "I'm sorry, I couldn't generate a response."
+ERROR_REPLY = "I'm having trouble processing your request right now. Please try again."
+
+# Static prefix (system prompt + tools), shared by every call — see services/ai_prompt_cache.py
+prompt_cache = PromptCache(client, GEMINI_MODEL, SYSTEM_PROMPT, tool_declarations, temperature=0.7)
+
+# Strong refs to fire-and-forget chatbot_messages writes (flushed on shutdown)
+_pending_writes: set = set()
+
+
+def _in_background(coro) -> asyncio.Task:
+    task = asyncio.create_task(coro)
+    _pending_writes.add(task)
+    task.add_done_callback(_pending_writes.discard)
+    return task
+
+
+async def flush_pending_writes() -> None:
+    """Wait for queued chatbot_messages writes. Called from the app lifespan on shutdown."""
+    if _pending_writes:
+        await asyncio.gather(*list(_pending_writes), return_exceptions=True)
+
+
+async def _store_message(conversation_id: str, role: str, content: str, after: Optional[asyncio.Task] = None):
+    """Insert one chatbot_messages row; `after` keeps the user row ahead of the reply."""
+    try:
+        if after is not None:
+            await after
+        await supabase.table("chatbot_messages").insert({
+            "conversation_id": conversation_id,
+            "role": role,
+            "content": content,
+        }).execute()
+    except Exception as e:
+        print(f"Error storing chatbot message: {e}")
+
+
+async def _store_reply(conversation_id: str, reply: str, user_saved: asyncio.Task):
+    """
+    Store the assistant reply, then fold turns that left the recent window into
+    the summary in the background. Awaited before a turn returns, so a quick
+    follow-up's load_context already sees this reply.
+    """
+    await _store_message(conversation_id, "assistant", reply, after=user_saved)
+    _in_background(ai_context.fold_older_turns(conversation_id, client, GEMINI_MODEL))
+
+
+async def _start_turn(payload: ChatMessage, current_user: dict) -> tuple:
+    """
+    Resolve (or create) the conversation, load its bounded context and queue the
+    user's message for storage. Returns (conversation_id, contents, user_saved).
+    """
     user_id = current_user.get("id") or current_user.get("user_id")
     username = current_user.get("username", "Traveler")
     conversation_id = payload.conversation_id
 
-    # 1. Create or retrieve conversation
-    if not conversation_id:
-        res = supabase.table("chatbot_conversations").insert({
+    summary, recent = None, []
+    if conversation_id:
+        context = await ai_context.load_context(conversation_id, user_id)
+        if context is None:
+            raise HTTPException(status_code=404, detail="Conversation not found")
+        summary, recent = context.summary, context.recent
+    else:
+        res = await supabase.table("chatbot_conversations").insert({
             "user_id": user_id,
             "title": payload.message[:50],
         }).execute()
@@ -342,99 +417,116 @@ async def send_message(
             raise HTTPException(status_code=500, detail="Failed to create conversation")
         conversation_id = res.data[0]["id"]
 
-    # 2. Store the user's message
-    supabase.table("chatbot_messages").insert({
-        "conversation_id": conversation_id,
-        "role": "user",
-        "content": payload.message,
-    }).execute()
+    # Rolling summary + recent turns + the new message (not the full history)
+    contents = ai_context.build_contents(summary, recent, payload.message)
+    # Per-user details ride on the message so the system prefix stays cacheable
+    contents[-1].parts.insert(0, types.Part.from_text(text=f"(The current user's name is {username}.)"))
 
-    # 3. Load conversation history
-    history_res = supabase.table("chatbot_messages").select(
-        "role, content"
-    ).eq("conversation_id", conversation_id).order("created_at").execute()
+    user_saved = _in_background(_store_message(conversation_id, "user", payload.message))
+    return conversation_id, contents, user_saved
 
-    # Build Gemini contents from history
-    contents = []
-    for msg in (history_res.data or []):
-        contents.append(
-            types.Content(
-                role="user" if msg["role"] == "user" else "model",
-                parts=[types.Part.from_text(text=msg["content"])],
-            )
-        )
 
-    # 4. Call Gemini with tools
+async def _run_tool_calls(calls: list, user_id: str, conversation_id: str) -> List[types.Part]:
+    """Run one round's function calls concurrently; responses keep the call order."""
+    results = await asyncio.gather(
+        *(run_tool(fc.name, dict(fc.args) if fc.args else {}, user_id, conversation_id) for fc in calls),
+        return_exceptions=True,
+    )
+    parts = []
+    for fc, result in zip(calls, results):
+        if isinstance(result, Exception):
+            result = json.dumps({"error": str(result)})
+        parts.append(types.Part.from_function_response(name=fc.name, response=json.loads(result)))
+    return parts
+
+
+async def _open_stream(contents: list) -> tuple:
+    """Start a streamed call on the cached prefix; falls back to the template if the cache is rejected."""
+    config = await prompt_cache.get_config()
     try:
-        response = client.models.generate_content(
-            model="gemini-2.5-flash",
+        stream = await client.aio.models.generate_content_stream(
+            model=GEMINI_MODEL,
             contents=contents,
-            config=types.GenerateContentConfig(
-                system_instruction=SYSTEM_PROMPT + f"\nThe current user's name is {username}.",
-                tools=tool_declarations,
-                temperature=0.7,
-            ),
+            config=config,
         )
-
-        # 5. Handle tool calls (loop up to 5 rounds)
-        max_rounds = 5
-        for _ in range(max_rounds):
-            # Check if the response has function calls
-            has_function_call = False
-            if response.candidates and response.candidates[0].content.parts:
-                for part in response.candidates[0].content.parts:
-                    if part.function_call:
-                        has_function_call = True
-                        break
-
-            if not has_function_call:
-                break
-
-            # Add the model's response (with function calls) to contents
-            contents.append(response.candidates[0].content)
-
-            # Execute each function call and build function responses
-            function_response_parts = []
-            for part in response.candidates[0].content.parts:
+    except Exception as e:
+        # Only a rejected cache is worth a retry; rate limits and outages propagate
+        if not config.cached_content or not is_cache_rejection(e):
+            raise
+        print(f"Gemini context cache rejected, retrying without it: {e}")
+        prompt_cache.invalidate()
+        config = prompt_cache.template
+        stream = await client.aio.models.generate_content_stream(
+            model=GEMINI_MODEL,
+            contents=contents,
+            config=config,
+        )
+    return stream, config
+
+
+async def _generate_reply(contents: list, conversation_id: str, user_id: str):
+    """
+    Async Gemini tool-calling loop. Yields reply text as it streams in; a round
+    that ends in function calls runs them concurrently and asks again (up to
+    MAX_TOOL_ROUNDS tool rounds).
+    """
+    turn_start = len(contents) - 1
+    for round_num in range(MAX_TOOL_ROUNDS + 1):
+        turn_start -= ai_context.enforce_budget(contents, turn_start)
+        model_parts = []
+        calls = []
+        started = time.monotonic()
+        first_chunk = None
+        usage = None
+        stream, config = await _open_stream(contents)
+        async for chunk in stream:
+            if first_chunk is None:
+                first_chunk = time.monotonic() - started
+            if chunk.usage_metadata is not None:
+                usage = chunk.usage_metadata
+            if not chunk.candidates or not chunk.candidates[0].content:
+                continue
+            for part in chunk.candidates[0].content.parts or []:
                 if part.function_call:
-                    fc = part.function_call
-                    tool_result = run_tool(fc.name, dict(fc.args) if fc.args else {}, user_id)
-                    function_response_parts.append(
-                        types.Part.from_function_response(
-                            name=fc.name,
-                            response=json.loads(tool_result),
-                        )
-                    )
-
-            # Add function responses to contents
-            contents.append(
-                types.Content(role="user", parts=function_response_parts)
-            )
-
-            # Call Gemini again with the tool results
-            response = client.models.generate_content(
-                model="gemini-2.5-flash",
-                contents=contents,
-                config=types.GenerateContentConfig(
-                    system_instruction=SYSTEM_PROMPT + f"\nThe current user's name is {username}.",
-                    tools=tool_declarations,
-                    temperature=0.7,
-                ),
-            )
-
-        # 6. Extract final text response
-        bot_reply = response.text.strip() if response.text else "I'm sorry, I couldn't generate a response."
+                    calls.append(part.function_call)
+                    model_parts.append(part)
+                elif part.text and not part.thought:
+                    model_parts.append(part)
+                    yield part.text
+
+        prompt_cache.record(conversation_id, usage, config, time.monotonic() - started, first_chunk or 0.0)
+
+        if not calls or round_num == MAX_TOOL_ROUNDS:
+            return
+
+        # Add the model's turn (with function calls) and the tool results, then go again
+        contents.append(types.Content(role="model", parts=model_parts))
+        contents.append(types.Content(role="user", parts=await _run_tool_calls(calls, user_id, conversation_id)))
+
 
+def _sse(event: str, data: dict) -> str:
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+
+# --- Endpoints ---
+
+@router.post("/send")
+async def send_message(
+    payload: ChatMessage,
+    current_user: dict = Depends(oauth2.get_current_user),
+):
+    """Send a message to the AI chatbot and get a response."""
+    user_id = current_user.get("id") or current_user.get("user_id")
+    conversation_id, contents, user_saved = await _start_turn(payload, current_user)
+
+    try:
+        chunks = [text async for text in _generate_reply(contents, conversation_id, user_id)]
+        bot_reply = "".join(chunks).strip() or FALLBACK_REPLY
     except Exception as e:
         print(f"Gemini AI Chat error: {e}")
-        bot_reply = "I'm having trouble processing your request right now. Please try again."
+        bot_reply = ERROR_REPLY
 
-    # 7. Store the bot's response
-    supabase.table("chatbot_messages").insert({
-        "conversation_id": conversation_id,
-        "role": "assistant",
-        "content": bot_reply,
-    }).execute()
+    await _store_reply(conversation_id, bot_reply, user_saved)
 
     return {
         "conversation_id": conversation_id,
@@ -442,13 +534,61 @@ async def send_message(
     }
 
 
+@router.post("/send/stream")
+async def send_message_stream(
+    payload: ChatMessage,
+    current_user: dict = Depends(oauth2.get_current_user),
+):
+    """
+    Same as /send, streamed as Server-Sent Events:
+      event: start  data: {"conversation_id"}
+      event: delta  data: {"text"}            — repeated as Gemini streams
+      event: error  data: {"message"}         — only if generation failed
+      event: done   data: {"conversation_id", "response"}
+    """
+    user_id = current_user.get("id") or current_user.get("user_id")
+    conversation_id, contents, user_saved = await _start_turn(payload, current_user)
+
+    async def events():
+        chunks = []
+        failed = False
+        saving = None
+        try:
+            yield _sse("start", {"conversation_id": conversation_id})
+            try:
+                async for text in _generate_reply(contents, conversation_id, user_id):
+                    chunks.append(text)
+                    yield _sse("delta", {"text": text})
+            except Exception as e:
+                print(f"Gemini AI Chat error: {e}")
+                failed = True
+                yield _sse("error", {"message": ERROR_REPLY})
+
+            bot_reply = "".join(chunks).strip() or (ERROR_REPLY if failed else FALLBACK_REPLY)
+            # Stored before "done"; shielded so a disconnect mid-insert can't cancel it
+            saving = _in_background(_store_reply(conversation_id, bot_reply, user_saved))
+            await asyncio.shield(saving)
+            yield _sse("done", {"conversation_id": conversation_id, "response": bot_reply})
+        finally:
+            if saving is None:
+                # Client disconnected mid-stream — keep whatever was generated
+                reply = "".join(chunks).strip() or (ERROR_REPLY if failed else FALLBACK_REPLY)
+                _in_background(_store_reply(conversation_id, reply, user_saved))
+
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
 @router.get("/conversations")
 async def get_conversations(
     current_user: dict = Depends(oauth2.get_current_user),
 ):
     """Get all AI chat conversations for the current user."""
     user_id = current_user.get("id") or current_user.get("user_id")
-    res = supabase.table("chatbot_conversations").select(
+    res = await supabase.table("chatbot_conversations").select(
         "id, title, created_at, updated_at"
     ).eq("user_id", user_id).order("updated_at", desc=True).execute()
     return res.data or []
@@ -463,18 +603,40 @@ async def get_conversation_messages(
     user_id = current_user.get("id") or current_user.get("user_id")
 
     # Verify the conversation belongs to the user
-    conv = supabase.table("chatbot_conversations").select("id").eq(
+    conv = await supabase.table("chatbot_conversations").select("id").eq(
         "id", conversation_id
     ).eq("user_id", user_id).execute()
     if not conv.data:
         raise HTTPException(status_code=404, detail="Conversation not found")
 
-    messages = supabase.table("chatbot_messages").select(
+    messages = await supabase.table("chatbot_messages").select(
         "id, role, content, created_at"
     ).eq("conversation_id", conversation_id).order("created_at").execute()
     return messages.data or []
 
 
+@router.get("/conversations/{conversation_id}/usage")
+async def get_conversation_usage(
+    conversation_id: str,
+    current_user: dict = Depends(oauth2.get_current_user),
+):
+    """Token/latency counters for a conversation, plus prompt and tool cache stats (this server process)."""
+    user_id = current_user.get("id") or current_user.get("user_id")
+
+    conv = await supabase.table("chatbot_conversations").select("id").eq(
+        "id", conversation_id
+    ).eq("user_id", user_id).execute()
+    if not conv.data:
+        raise HTTPException(status_code=404, detail="Conversation not found")
+
+    return {
+        "conversation_id": conversation_id,
+        **prompt_cache.get_usage(conversation_id),
+        "prompt_cache": prompt_cache.get_stats(),
+        "tool_cache": tool_cache.get_stats(),
+    }
+
+
 @router.delete("/conversations/{conversation_id}")
 async def delete_conversation(
     conversation_id: str,
@@ -483,16 +645,16 @@ async def delete_conversation(
     """Delete a conversation and its messages."""
     user_id = current_user.get("id") or current_user.get("user_id")
 
-    conv = supabase.table("chatbot_conversations").select("id").eq(
+    conv = await supabase.table("chatbot_conversations").select("id").eq(
         "id", conversation_id
     ).eq("user_id", user_id).execute()
     if not conv.data:
         raise HTTPException(status_code=404, detail="Conversation not found")
 
-    supabase.table("chatbot_messages").delete().eq(
+    await supabase.table("chatbot_messages").delete().eq(
         "conversation_id", conversation_id
     ).execute()
-    supabase.table("chatbot_conversations").delete().eq(
+    await supabase.table("chatbot_conversations").delete().eq(
         "id", conversation_id
     ).execute()
     return {"success": True}
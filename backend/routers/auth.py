@@ -1,4 +1,5 @@
 from fastapi import APIRouter, HTTPException, status
+from fastapi.concurrency import run_in_threadpool
 from supabase_client import supabase
 
 from schemas import SignupRequest, LoginRequest, OtpRequest, OtpVerifyRequest  
@@ -12,9 +13,9 @@ router = APIRouter(
 )
 
 
-def _get_or_create_user_symmetric_key(user_id: str) -> str:
+async def _get_or_create_user_symmetric_key(user_id: str) -> str:
     """Return the user's symmetric key, creating one on first signup/login."""
-    existing = (
+    existing = await (
         supabase
         .table("user_security_keys")
         .select("symmetric_key")
@@ -28,7 +29,7 @@ def _get_or_create_user_symmetric_key(user_id: str) -> str:
 
     symmetric_key = generate_conversation_key()
 
-    supabase.table("user_security_keys").insert(
+    await supabase.table("user_security_keys").insert(
         {
             "user_id": user_id,
             "symmetric_key": symmetric_key,
@@ -40,9 +41,9 @@ def _get_or_create_user_symmetric_key(user_id: str) -> str:
 # sign up for the new user
 
 @router.post("/signup", status_code=status.HTTP_201_CREATED)
-def signup(data: SignupRequest):
+async def signup(data: SignupRequest):
     # Check email uniqueness
-    existing_email = (
+    existing_email = await (
         supabase
         .table("users")
         .select("id")
@@ -53,7 +54,7 @@ def signup(data: SignupRequest):
         raise HTTPException(status_code=400, detail="Email already exists!")
 
     # Check username uniqueness
-    existing_username = (
+    existing_username = await (
         supabase
         .table("users")
         .select("id")
@@ -64,11 +65,11 @@ def signup(data: SignupRequest):
         raise HTTPException(status_code=400, detail="Username already exists!")
 
     # Hash the password before saving
-    hashed_password = hasing.hash_password(data.password)
+    hashed_password = await run_in_threadpool(hasing.hash_password, data.password)
 
     # Insert new user into Supabase
     # Add any extra fields you need (role, created_at, etc.)
-    res = (
+    res = await (
     supabase
     .table("users")
     .insert({
@@ -91,7 +92,7 @@ def signup(data: SignupRequest):
 
     new_user = res.data[0]
 
-    symmetric_key = _get_or_create_user_symmetric_key(new_user["id"])
+    symmetric_key = await _get_or_create_user_symmetric_key(new_user["id"])
 
 
     # auto-login after signup (issue token)
@@ -112,9 +113,9 @@ def signup(data: SignupRequest):
 # LOGIN
 # ----------------
 @router.post("/login")
-def login(data: LoginRequest):
+async def login(data: LoginRequest):
     # Get user by username
-    res = (
+    res = await (
         supabase
         .table("users")
         .select("*")
@@ -133,7 +134,7 @@ def login(data: LoginRequest):
 
     # Verify password (hashed vs plain)
     
-    is_valid = hasing.verify_password(data.password, user["password"])
+    is_valid = await run_in_threadpool(hasing.verify_password, data.password, user["password"])
     if not is_valid:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
@@ -143,7 +144,7 @@ def login(data: LoginRequest):
     #Create JWT token
    
     access_token = oauth2.create_access_token(data={"user_id": user["id"]})
-    symmetric_key = _get_or_create_user_symmetric_key(user["id"])
+    symmetric_key = await _get_or_create_user_symmetric_key(user["id"])
 
     return {
         "message": "Login successful",
@@ -156,7 +157,7 @@ def login(data: LoginRequest):
 
 
 @router.post("/resetpassword")
-def check_email_for_otp(data: OtpRequest):
+async def check_email_for_otp(data: OtpRequest):
     """Check email existence and generate/send OTP.
     
     After verifying the email exists:
@@ -166,7 +167,7 @@ def check_email_for_otp(data: OtpRequest):
     4. Return success message
     """
     try:
-        res = (
+        res = await (
             supabase
             .table("users")
             .select("id")
@@ -262,7 +263,7 @@ def verify_otp_code(data: OtpVerifyRequest):
 
 
 @router.post("/updatepassword")
-def update_password(payload: dict):
+async def update_password(payload: dict):
     """Update user password after OTP verification.
 
     Expected payload: { "email": str, "new_password": str }
@@ -275,10 +276,10 @@ def update_password(payload: dict):
             raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Email and new_password are required")
 
         # Hash the new password
-        hashed = hasing.hash_password(new_password)
+        hashed = await run_in_threadpool(hasing.hash_password, new_password)
 
         # Update the password in Supabase
-        res = (
+        res = await (
             supabase
             .table("users")
             .update({"password": hashed})
@@ -294,6 +295,9 @@ def update_password(payload: dict):
         if not res.data:
             raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="No user updated. Check the email provided.")
 
+        for row in res.data:
+            oauth2.invalidate_cached_user(row.get("id"), email=email)
+
         return {"success": True, "message": "Password updated successfully"}
 
     except HTTPException:
@@ -3,6 +3,7 @@ from typing import Optional
 
 import stripe
 from fastapi import APIRouter, Depends, HTTPException
+from fastapi.concurrency import run_in_threadpool
 from pydantic import BaseModel, Field
 
 from supabase_client import supabase
@@ -45,10 +46,10 @@ def _current_user_id(current_user: dict) -> str:
     return user_id
 
 
-def _get_or_create_stripe_customer(user: dict) -> str:
+async def _get_or_create_stripe_customer(user: dict) -> str:
     user_id = user["id"]
 
-    existing = (
+    existing = await (
         supabase.table("finance_funding_sources")
         .select("provider_reference")
         .eq("user_id", user_id)
@@ -60,13 +61,13 @@ def _get_or_create_stripe_customer(user: dict) -> str:
     if existing.data:
         return existing.data[0]["provider_reference"]
 
-    customer = stripe.Customer.create(
+    customer = await run_in_threadpool(stripe.Customer.create,
         email=user.get("email"),
         name=user.get("username") or "TravelerHub User",
         metadata={"user_id": user_id},
     )
 
-    supabase.table("finance_funding_sources").insert(
+    await supabase.table("finance_funding_sources").insert(
         {
             "user_id": user_id,
             "source_type": "external_transfer",
@@ -82,7 +83,7 @@ def _get_or_create_stripe_customer(user: dict) -> str:
 
 
 @router.post("/create-setup-session")
-def create_setup_session(current_user=Depends(oauth2.get_current_user)):
+async def create_setup_session(current_user=Depends(oauth2.get_current_user)):
     if not stripe.api_key:
         return {
             "mode": "manual",
@@ -91,13 +92,13 @@ def create_setup_session(current_user=Depends(oauth2.get_current_user)):
 
     try:
         user_id = _current_user_id(current_user)
-        customer_id = _get_or_create_stripe_customer(current_user)
+        customer_id = await _get_or_create_stripe_customer(current_user)
 
         frontend_base = os.getenv("FRONTEND_BASE_URL", "http://localhost:5173")
         success_url = f"{frontend_base}/profile?tab=payment&checkout=success&session_id={{CHECKOUT_SESSION_ID}}"
         cancel_url = f"{frontend_base}/profile?tab=payment&checkout=cancel"
 
-        session = stripe.checkout.Session.create(
+        session = await run_in_threadpool(stripe.checkout.Session.create,
             mode="setup",
             customer=customer_id,
             success_url=success_url,
@@ -115,7 +116,7 @@ def create_setup_session(current_user=Depends(oauth2.get_current_user)):
 
 
 @router.post("/payment-methods/manual")
-def add_manual_payment_method(payload: ManualCardPayload, current_user=Depends(oauth2.get_current_user)):
+async def add_manual_payment_method(payload: ManualCardPayload, current_user=Depends(oauth2.get_current_user)):
     """Store a manual/test card record when Stripe is not configured yet."""
     try:
         user_id = _current_user_id(current_user)
@@ -124,7 +125,7 @@ def add_manual_payment_method(payload: ManualCardPayload, current_user=Depends(o
             raise HTTPException(status_code=400, detail="last4 must contain exactly 4 digits")
 
         provider_reference = f"manual_{user_id}_{cleaned_last4}"
-        insert_res = (
+        insert_res = await (
             supabase.table("finance_funding_sources")
             .insert(
                 {
@@ -159,7 +160,7 @@ def add_manual_payment_method(payload: ManualCardPayload, current_user=Depends(o
 
 
 @router.post("/payment-methods/encrypted")
-def add_encrypted_payment_method(payload: EncryptedCardPayload, current_user=Depends(oauth2.get_current_user)):
+async def add_encrypted_payment_method(payload: EncryptedCardPayload, current_user=Depends(oauth2.get_current_user)):
     """Store encrypted card payload provided by the client using a shared symmetric key."""
     try:
         user_id = _current_user_id(current_user)
@@ -171,7 +172,7 @@ def add_encrypted_payment_method(payload: EncryptedCardPayload, current_user=Dep
         if len(payload.encrypted_payload) < 32:
             raise HTTPException(status_code=400, detail="encrypted_payload is invalid")
 
-        insert_res = (
+        insert_res = await (
             supabase.table("finance_funding_sources")
             .insert(
                 {
@@ -206,14 +207,14 @@ def add_encrypted_payment_method(payload: EncryptedCardPayload, current_user=Dep
 
 
 @router.post("/finalize-setup")
-def finalize_setup(payload: FinalizeSetupPayload, current_user=Depends(oauth2.get_current_user)):
+async def finalize_setup(payload: FinalizeSetupPayload, current_user=Depends(oauth2.get_current_user)):
     if not stripe.api_key:
         raise HTTPException(status_code=500, detail="Stripe is not configured")
 
     try:
         user_id = _current_user_id(current_user)
 
-        session = stripe.checkout.Session.retrieve(payload.session_id)
+        session = await run_in_threadpool(stripe.checkout.Session.retrieve, payload.session_id)
         if not session or session.mode != "setup":
             raise HTTPException(status_code=400, detail="Invalid setup session")
 
@@ -224,12 +225,12 @@ def finalize_setup(payload: FinalizeSetupPayload, current_user=Depends(oauth2.ge
         if not setup_intent_id:
             raise HTTPException(status_code=400, detail="No setup intent found")
 
-        setup_intent = stripe.SetupIntent.retrieve(setup_intent_id)
+        setup_intent = await run_in_threadpool(stripe.SetupIntent.retrieve, setup_intent_id)
         if setup_intent.status != "succeeded":
             raise HTTPException(status_code=400, detail="Card setup is not complete")
 
         payment_method_id = setup_intent.payment_method
-        payment_method = stripe.PaymentMethod.retrieve(payment_method_id)
+        payment_method = await run_in_threadpool(stripe.PaymentMethod.retrieve, payment_method_id)
 
         if payment_method.type != "card":
             raise HTTPException(status_code=400, detail="Only card payment methods are supported")
@@ -238,7 +239,7 @@ def finalize_setup(payload: FinalizeSetupPayload, current_user=Depends(oauth2.ge
         brand = card.get("brand")
         last4 = card.get("last4")
 
-        existing = (
+        existing = await (
             supabase.table("finance_funding_sources")
             .select("id")
             .eq("user_id", user_id)
@@ -249,7 +250,7 @@ def finalize_setup(payload: FinalizeSetupPayload, current_user=Depends(oauth2.ge
         )
 
         if existing.data:
-            supabase.table("finance_funding_sources").update(
+            await supabase.table("finance_funding_sources").update(
                 {
                     "status": "active",
                     "brand": brand,
@@ -257,7 +258,7 @@ def finalize_setup(payload: FinalizeSetupPayload, current_user=Depends(oauth2.ge
                 }
             ).eq("id", existing.data[0]["id"]).execute()
         else:
-            supabase.table("finance_funding_sources").insert(
+            await supabase.table("finance_funding_sources").insert(
                 {
                     "user_id": user_id,
                     "source_type": "debit_card",
@@ -286,11 +287,11 @@ def finalize_setup(payload: FinalizeSetupPayload, current_user=Depends(oauth2.ge
 
 
 @router.get("/payment-methods")
-def get_payment_methods(current_user=Depends(oauth2.get_current_user)):
+async def get_payment_methods(current_user=Depends(oauth2.get_current_user)):
     try:
         user_id = _current_user_id(current_user)
 
-        res = (
+        res = await (
             supabase.table("finance_funding_sources")
             .select("id, provider, provider_reference, status, last4, brand, created_at")
             .eq("user_id", user_id)
@@ -321,12 +322,12 @@ def get_payment_methods(current_user=Depends(oauth2.get_current_user)):
 
 
 @router.delete("/payment-methods/{funding_source_id}")
-def remove_payment_method(funding_source_id: str, current_user=Depends(oauth2.get_current_user)):
+async def remove_payment_method(funding_source_id: str, current_user=Depends(oauth2.get_current_user)):
     """Soft-delete a saved payment method for the authenticated user."""
     try:
         user_id = _current_user_id(current_user)
 
-        existing = (
+        existing = await (
             supabase.table("finance_funding_sources")
             .select("id, provider, provider_reference, status")
             .eq("id", funding_source_id)
@@ -345,11 +346,11 @@ def remove_payment_method(funding_source_id: str, current_user=Depends(oauth2.ge
         # Best-effort Stripe detach. We still mark removed even if detach fails.
         if row.get("provider") == "stripe" and stripe.api_key:
             try:
-                stripe.PaymentMethod.detach(row.get("provider_reference"))
+                await run_in_threadpool(stripe.PaymentMethod.detach, row.get("provider_reference"))
             except Exception as stripe_err:
                 print(f"Stripe detach warning: {stripe_err}")
 
-        supabase.table("finance_funding_sources").update({"status": "removed"}).eq("id", funding_source_id).eq(
+        await supabase.table("finance_funding_sources").update({"status": "removed"}).eq("id", funding_source_id).eq(
             "user_id", user_id
         ).execute()
 
@@ -363,14 +364,14 @@ def remove_payment_method(funding_source_id: str, current_user=Depends(oauth2.ge
 
 
 @router.post("/charge")
-def charge_saved_card(payload: ChargeCardPayload, current_user=Depends(oauth2.get_current_user)):
+async def charge_saved_card(payload: ChargeCardPayload, current_user=Depends(oauth2.get_current_user)):
     if not stripe.api_key:
         raise HTTPException(status_code=400, detail="Stripe is not configured. Charging is unavailable.")
 
     try:
         user_id = _current_user_id(current_user)
 
-        card_res = (
+        card_res = await (
             supabase.table("finance_funding_sources")
             .select("id")
             .eq("user_id", user_id)
@@ -384,9 +385,9 @@ def charge_saved_card(payload: ChargeCardPayload, current_user=Depends(oauth2.ge
         if not card_res.data:
             raise HTTPException(status_code=404, detail="Saved card not found")
 
-        customer_id = _get_or_create_stripe_customer(current_user)
+        customer_id = await _get_or_create_stripe_customer(current_user)
 
-        intent = stripe.PaymentIntent.create(
+        intent = await run_in_threadpool(stripe.PaymentIntent.create,
             amount=payload.amount_minor,
             currency=payload.currency.lower(),
             customer=customer_id,
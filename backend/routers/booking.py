@@ -2,6 +2,8 @@ from typing import Optional, Any, Dict, List
 from fastapi import APIRouter, HTTPException, Query, Depends
 from pydantic import BaseModel, Field
 from supabase_client import supabase
+from services import membership
+from services.ai_tool_cache import tool_cache
 from utils import oauth2
 
 router = APIRouter(prefix="/api/bookings", tags=["bookings"])
@@ -39,42 +41,23 @@ class CancelBody(BaseModel):
 
 # --- Helpers (membership check) ---
 
-def ensure_trip_member(trip_id: str, user_id: str) -> None:
-    """
-    Rename tables/columns to match your schema.
-    Option A: you have trip_member table (trip_id, user_id)
-    Option B: trip -> group_id, and group_member table (group_id, user_id)
-    """
-    # Example assumes: trips table has id, group_id
-    trip = supabase.table("trips").select("id,group_id").eq("id", trip_id).maybe_single().execute()
-    if not trip.data:
+async def ensure_trip_member(trip_id: str, user_id: str) -> None:
+    """404 for unknown trips, 403 for users who are not on the trip roster."""
+    if not await membership.trip_exists(trip_id):
         raise HTTPException(status_code=404, detail="Trip not found")
-
-    group_id = trip.data["group_id"]
-
-    # Example assumes: group_member has group_id, user_id
-    membership = (
-        supabase.table("group_member")
-        .select("id")
-        .eq("group_id", group_id)
-        .eq("user_id", user_id)
-        .limit(1)
-        .execute()
-    )
-    if not membership.data:
-        raise HTTPException(status_code=403, detail="Not a trip member")
+    await membership.ensure_trip_member(trip_id, user_id, detail="Not a trip member")
 
 
 # --- Routes ---
 
 @router.get("")
-def list_bookings(
+async def list_bookings(
     tripId: str = Query(...),
     current_user: dict = Depends(oauth2.get_current_user)
 ) -> List[Dict[str, Any]]:
-    ensure_trip_member(tripId, current_user["id"])
+    await ensure_trip_member(tripId, current_user["id"])
 
-    res = (
+    res = await (
         supabase.table("booking")
         .select("*")
         .eq("trip_id", tripId)
@@ -85,43 +68,44 @@ def list_bookings(
 
 
 @router.get("/{booking_id}")
-def get_booking(
+async def get_booking(
     booking_id: str,
     current_user: dict = Depends(oauth2.get_current_user)
 ) -> Dict[str, Any]:
-    b = supabase.table("booking").select("*").eq("id", booking_id).maybe_single().execute()
+    b = await supabase.table("booking").select("*").eq("id", booking_id).maybe_single().execute()
     if not b.data:
         raise HTTPException(status_code=404, detail="Booking not found")
 
-    ensure_trip_member(b.data["trip_id"], current_user["id"])
+    await ensure_trip_member(b.data["trip_id"], current_user["id"])
     return b.data
 
 
 @router.post("")
-def create_booking(
+async def create_booking(
     body: BookingCreate,
     current_user: dict = Depends(oauth2.get_current_user)
 ) -> Dict[str, Any]:
-    ensure_trip_member(body.trip_id, current_user["id"])
+    await ensure_trip_member(body.trip_id, current_user["id"])
 
     payload = body.model_dump()
     # If you want to enforce created_by from userId:
     payload["created_by"] = current_user["id"]
     payload.setdefault("status", "active")
 
-    res = supabase.table("booking").insert(payload).execute()
+    res = await supabase.table("booking").insert(payload).execute()
     if not res.data:
         raise HTTPException(status_code=500, detail="Insert failed")
+    tool_cache.invalidate("booking", body.trip_id)
     return res.data[0]
 
 
 @router.patch("/{booking_id}")
-def update_booking(
+async def update_booking(
     booking_id: str,
     body: BookingPatch,
     current_user: dict = Depends(oauth2.get_current_user)
 ) -> Dict[str, Any]:
-    current = (
+    current = await (
         supabase.table("booking")
         .select("*")
         .eq("id", booking_id)
@@ -131,7 +115,7 @@ def update_booking(
     if not current.data:
         raise HTTPException(status_code=404, detail="Booking not found")
 
-    ensure_trip_member(current.data["trip_id"], current_user["id"])
+    await ensure_trip_member(current.data["trip_id"], current_user["id"])
 
     # FIX: remove the stray "_" and filter out None values
     patch = {k: v for k, v in body.model_dump().items() if v is not None}
@@ -139,8 +123,9 @@ def update_booking(
     if not patch:
         return current.data
 
-    res = supabase.table("booking").update(patch).eq("id", booking_id).execute()
+    res = await supabase.table("booking").update(patch).eq("id", booking_id).execute()
     if not res.data:
         raise HTTPException(status_code=500, detail="Update failed")
+    tool_cache.invalidate("booking", current.data["trip_id"])
 
     return res.data[0]
@@ -10,7 +10,7 @@ router = APIRouter(
 
 
 @router.get("/events")
-def get_calendar_events(
+async def get_calendar_events(
     trip_id: Optional[str] = Query(None),
     current_user=Depends(oauth2.get_current_user),
 ):
@@ -28,7 +28,7 @@ def get_calendar_events(
             query = query.eq("trip_id", trip_id)
         else:
             query = query.eq("created_by", user_id)
-        bookings = query.execute()
+        bookings = await query.execute()
 
         for b in bookings.data or []:
             events.append({
@@ -55,7 +55,7 @@ def get_calendar_events(
         query = supabase.table("saved_routes").select("*").eq("created_by", user_id)
         if trip_id:
             query = query.eq("trip_id", trip_id)
-        routes = query.execute()
+        routes = await query.execute()
 
         for r in routes.data or []:
             events.append({
@@ -76,7 +76,7 @@ def get_calendar_events(
 
     # 3. Document checklists → calendar events
     try:
-        checklists = (
+        checklists = await (
             supabase.table("document_checklists")
             .select("*")
             .eq("user_id", user_id)
@@ -85,7 +85,7 @@ def get_calendar_events(
 
         for cl in checklists.data or []:
             # Count items
-            items = (
+            items = await (
                 supabase.table("checklist_items")
                 .select("id, is_completed")
                 .eq("checklist_id", cl["id"])
@@ -1,40 +1,40 @@
-from fastapi import APIRouter, HTTPException, Query, WebSocket, WebSocketDisconnect, Depends
-from typing import Dict, Set, Optional
+from fastapi import APIRouter, HTTPException, Query, Response, WebSocket, WebSocketDisconnect, Depends
+from typing import Optional
+from datetime import datetime, timezone
 import asyncio
-from datetime import datetime
+import base64
+import json
+import os
+import uuid
+from cachetools import TTLCache
 from supabase_client import supabase
+from services.membership import ensure_trip_member
+from services.chat_broadcaster import chat_broadcaster, serialize
+from services.chat_backplane import chat_backplane
+from services.conversation_summaries import get_conversation_summaries, mark_conversation_read
 import schemas
 from utils import oauth2
 
-# conversation_id -> set of connected websockets
-rooms: Dict[str, Set[WebSocket]] = {}
-rooms_lock = asyncio.Lock()
-
 
 async def broadcast_to_conversation(conversation_id: str, message: dict):
-    async with rooms_lock:
-        sockets = list(rooms.get(conversation_id, set()))
+    # Serialized once here; the backplane hands the frame to every worker's
+    # broadcaster, which queues it per socket (slow sockets can't stall the room)
+    await chat_backplane.publish(conversation_id, serialize(message))
 
-    dead = []
-    for ws in sockets:
-        try:
-            await ws.send_json(message)
-        except Exception:
-            dead.append(ws)
 
-    if dead:
-        async with rooms_lock:
-            for ws in dead:
-                rooms.get(conversation_id, set()).discard(ws)
-            if conversation_id in rooms and not rooms[conversation_id]:
-                rooms.pop(conversation_id, None)
+router = APIRouter(prefix="/api", tags=["chat"])
 
+CHAT_HISTORY_PAGE_SIZE = int(os.getenv("CHAT_HISTORY_PAGE_SIZE", "100"))
+CHAT_HISTORY_MAX_PAGE_SIZE = 500
+CHAT_REPLAY_MAX_MESSAGES = int(os.getenv("CHAT_REPLAY_MAX_MESSAGES", "1000"))
 
-router = APIRouter(prefix="/api", tags=["chat"])
+MESSAGE_COLUMNS = "message_id, from_user, content, sent_datetime, conversation_id, is_encrypted"
 
+_CLOSE_POLICY_VIOLATION = 1008
 
-def ensure_conversation_member(conversation_id: str, user_id: str):
-    membership = (
+
+async def ensure_conversation_member(conversation_id: str, user_id: str):
+    membership = await (
         supabase
         .from_("group_member")
         .select("conversation_id")
@@ -47,56 +47,138 @@ def ensure_conversation_member(conversation_id: str, user_id: str):
         raise HTTPException(status_code=403, detail="Not a member of this conversation")
 
 
-def ensure_trip_member(trip_id: str, user_id: str):
+# ── Message cursors ────────────────────────────────────────────────────────────
+# A cursor is the (sent_datetime, message_id) of a message, url-safe base64
+# encoded. Ordering on both columns keeps pages stable when timestamps tie.
+
+def encode_message_cursor(message: dict) -> str:
+    raw = f"{message['sent_datetime']}|{message['message_id']}"
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+
+def _sort_key(sent, message_id) -> tuple:
+    """(naive UTC datetime, uuid string); ValueError if either isn't its column type."""
+    sent = datetime.fromisoformat(str(sent).replace("Z", "+00:00"))
+    if sent.tzinfo is not None:
+        sent = sent.astimezone(timezone.utc).replace(tzinfo=None)
+    return sent, str(uuid.UUID(str(message_id)))
+
+
+def _decode_message_cursor(cursor: str) -> tuple:
     try:
-        membership = (
-            supabase
-            .from_("trip_members")
-            .select("id")
-            .eq("trip_id", trip_id)
-            .eq("user_id", user_id)
-            .is_("left_at", None)
-            .maybe_single()
-            .execute()
-        )
-        if membership.data:
-            return
-    except Exception:
-        pass
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)).decode()
+        sent, message_id = _sort_key(*raw.rsplit("|", 1))
+    except (ValueError, TypeError):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    # Re-serialized, so only a real timestamp and uuid reach the or_() filter
+    return sent.isoformat(), message_id
+
 
+def _message_key(message: dict) -> Optional[tuple]:
     try:
-        membership = (
-            supabase
-            .from_("group_member")
-            .select("id")
-            .eq("group_id", trip_id)
-            .eq("user_id", user_id)
-            .is_("left_datetime", None)
-            .maybe_single()
-            .execute()
-        )
-        if membership.data:
-            return
-    except Exception:
-        pass
+        return _sort_key(message["sent_datetime"], message["message_id"])
+    except (KeyError, TypeError, ValueError):
+        return None
+
 
-    owner = (
+async def _fetch_message_page(
+    conversation_id: str,
+    before: Optional[str] = None,
+    after: Optional[str] = None,
+    since: Optional[datetime] = None,
+    limit: int = CHAT_HISTORY_PAGE_SIZE,
+) -> tuple:
+    """One keyset page, oldest first. Returns (messages, has_more)."""
+    query = (
         supabase
-        .from_("trips")
-        .select("id")
-        .eq("id", trip_id)
-        .eq("owner_id", user_id)
-        .maybe_single()
+        .from_("message")
+        .select(MESSAGE_COLUMNS)
+        .eq("conversation_id", conversation_id)
+    )
+    if before:
+        sent, message_id = _decode_message_cursor(before)
+        query = query.or_(
+            f'sent_datetime.lt."{sent}",and(sent_datetime.eq."{sent}",message_id.lt."{message_id}")'
+        )
+    if after:
+        sent, message_id = _decode_message_cursor(after)
+        query = query.or_(
+            f'sent_datetime.gt."{sent}",and(sent_datetime.eq."{sent}",message_id.gt."{message_id}")'
+        )
+    if since:
+        # sent_datetime is stored as naive UTC
+        if since.tzinfo is not None:
+            since = since.astimezone(timezone.utc).replace(tzinfo=None)
+        query = query.gt("sent_datetime", since.isoformat())
+
+    # Forward (after / since) pages read oldest-first; otherwise newest-first
+    # from the end and flip, so the default page is the latest messages.
+    newest_first = not (after or since)
+    resp = await (
+        query
+        .order("sent_datetime", desc=newest_first)
+        .order("message_id", desc=newest_first)
+        .limit(limit + 1)
         .execute()
     )
-    if not owner.data:
-        raise HTTPException(status_code=403, detail="Not a member of this group")
+    rows = resp.data or []
+    has_more = len(rows) > limit
+    rows = rows[:limit]
+    if newest_first:
+        rows.reverse()
+    return rows, has_more
+
+
+# ── Public key cache ───────────────────────────────────────────────────────────
+# user_id -> public key. A re-key drops the entry on every worker through the
+# backplane: encrypting a session key for a stale public key would leave the
+# recipient unable to decrypt. The short TTL covers a backplane outage.
+PUBLIC_KEY_CACHE_TTL_SECONDS = int(os.getenv("PUBLIC_KEY_CACHE_TTL_SECONDS", "30"))
+PUBLIC_KEY_CACHE_MAX_SIZE = int(os.getenv("PUBLIC_KEY_CACHE_MAX_SIZE", "4096"))
+
+_public_key_cache: TTLCache = TTLCache(maxsize=PUBLIC_KEY_CACHE_MAX_SIZE, ttl=PUBLIC_KEY_CACHE_TTL_SECONDS)
+
+
+def _drop_public_key(user_id: Optional[str]) -> None:
+    """Backplane "public_key" handler; None (missed invalidations) drops every entry."""
+    if user_id is None:
+        _public_key_cache.clear()
+    else:
+        _public_key_cache.pop(user_id, None)
+
+
+chat_backplane.on_control("public_key", _drop_public_key)
+
+
+async def _get_public_keys(user_ids: list) -> dict:
+    """Public keys for the given users (cache first, one query for the rest); users without a key are omitted."""
+    keys = {}
+    misses = []
+    for uid in dict.fromkeys(str(u) for u in user_ids):
+        cached = _public_key_cache.get(uid)
+        if cached is not None:
+            keys[uid] = cached
+        else:
+            misses.append(uid)
+
+    if misses:
+        result = await (
+            supabase.from_("user_keypair")
+            .select("user_id, public_key")
+            .in_("user_id", misses)
+            .execute()
+        )
+        for row in result.data or []:
+            uid = str(row["user_id"])
+            keys[uid] = row["public_key"]
+            _public_key_cache[uid] = row["public_key"]
+    return keys
 
 
 # ── Keypair endpoints ──────────────────────────────────────────────────────────
 
 @router.post("/users/keypair")
-def store_public_key(
+async def store_public_key(
     payload: schemas.UserKeypair,
     current_user: dict = Depends(oauth2.get_current_user)
 ):
@@ -106,15 +188,18 @@ def store_public_key(
     Always upserts — ensures the server has the key matching the client's current private key.
     Private key never leaves the client.
     """
-    supabase.from_("user_keypair").upsert({
+    await supabase.from_("user_keypair").upsert({
         "user_id": current_user["id"],
         "public_key": payload.public_key
     }).execute()
+    user_id = str(current_user["id"])
+    _drop_public_key(user_id)
+    await chat_backplane.publish_control("public_key", user_id)
     return {"public_key": payload.public_key}
 
 
 @router.get("/users/{user_id}/public-key")
-def get_public_key(
+async def get_public_key(
     user_id: str,
     current_user: dict = Depends(oauth2.get_current_user)
 ):
@@ -122,21 +207,81 @@ def get_public_key(
     GET /api/users/{user_id}/public-key
     Fetch another user's public key so the caller can encrypt the session key for them.
     """
-    result = (
-        supabase.from_("user_keypair")
-        .select("public_key")
-        .eq("user_id", user_id)
-        .execute()
-    )
-    if not result.data:
+    keys = await _get_public_keys([user_id])
+    if user_id not in keys:
         raise HTTPException(status_code=404, detail="Public key not found for this user")
-    return {"public_key": result.data[0]["public_key"]}
+    return {"public_key": keys[user_id]}
+
+
+@router.get("/conversations/{conversation_id}/public-keys")
+async def get_member_public_keys(
+    conversation_id: str,
+    current_user: dict = Depends(oauth2.get_current_user)
+):
+    """
+    GET /api/conversations/{conversation_id}/public-keys
+    Every member's public key in one call, plus which members still need a
+    session key blob — so the client encrypts only for those.
+    """
+    await ensure_conversation_member(conversation_id, current_user["id"])
+
+    members_res, holders_res = await asyncio.gather(
+        supabase.from_("group_member")
+        .select("user_id")
+        .eq("conversation_id", conversation_id)
+        .is_("left_datetime", None)
+        .execute(),
+        supabase.from_("conversation_session_key")
+        .select("user_id")
+        .eq("conversation_id", conversation_id)
+        .execute(),
+    )
+    member_ids = list(dict.fromkeys(str(row["user_id"]) for row in (members_res.data or [])))
+    holders = {str(row["user_id"]) for row in (holders_res.data or [])}
+
+    keys = await _get_public_keys(member_ids)
+    return {
+        "public_keys": keys,
+        "missing_public_key": [uid for uid in member_ids if uid not in keys],
+        "missing_session_key": [uid for uid in member_ids if uid not in holders],
+    }
 
 
 # ── Session key endpoints ──────────────────────────────────────────────────────
 
+@router.get("/users/me/session-keys")
+async def get_my_session_keys(
+    current_user: dict = Depends(oauth2.get_current_user)
+):
+    """
+    GET /api/users/me/session-keys
+    The caller's encrypted session key blobs for every conversation they are
+    still a member of: {"session_keys": {conversation_id: encrypted_key}}.
+    """
+    memberships = await (
+        supabase.from_("group_member")
+        .select("conversation_id")
+        .eq("user_id", current_user["id"])
+        .is_("left_datetime", None)
+        .not_.is_("conversation_id", "null")
+        .execute()
+    )
+    conversation_ids = list({row["conversation_id"] for row in (memberships.data or [])})
+    if not conversation_ids:
+        return {"session_keys": {}}
+
+    result = await (
+        supabase.from_("conversation_session_key")
+        .select("conversation_id, encrypted_key")
+        .eq("user_id", current_user["id"])
+        .in_("conversation_id", conversation_ids)
+        .execute()
+    )
+    return {"session_keys": {row["conversation_id"]: row["encrypted_key"] for row in (result.data or [])}}
+
+
 @router.get("/conversations/{conversation_id}/session-key")
-def get_session_key(
+async def get_session_key(
     conversation_id: str,
     current_user: dict = Depends(oauth2.get_current_user)
 ):
@@ -145,9 +290,9 @@ def get_session_key(
     Returns the encrypted session key blob for this user.
     The client decrypts it with their local private key — server never sees plaintext.
     """
-    ensure_conversation_member(conversation_id, current_user["id"])
+    await ensure_conversation_member(conversation_id, current_user["id"])
 
-    result = (
+    result = await (
         supabase
         .from_("conversation_session_key")
         .select("encrypted_key")
@@ -175,13 +320,13 @@ async def store_session_keys(
     Only inserts blobs for members who don't have one yet — safe to call
     multiple times as new members upload their public keys.
     """
-    ensure_conversation_member(conversation_id, current_user["id"])
+    await ensure_conversation_member(conversation_id, current_user["id"])
 
     if not payload.keys:
         return {"message": "No keys provided", "stored": 0}
 
     # Find which members already have a key so we don't overwrite them
-    existing = (
+    existing = await (
         supabase
         .from_("conversation_session_key")
         .select("user_id")
@@ -201,13 +346,13 @@ async def store_session_keys(
     ]
 
     if rows:
-        supabase.from_("conversation_session_key").insert(rows).execute()
+        await supabase.from_("conversation_session_key").insert(rows).execute()
 
     return {"message": f"Stored {len(rows)} key(s)", "stored": len(rows)}
 
 
 @router.delete("/conversations/{conversation_id}/session-key")
-def delete_my_session_key(
+async def delete_my_session_key(
     conversation_id: str,
     current_user: dict = Depends(oauth2.get_current_user)
 ):
@@ -216,8 +361,8 @@ def delete_my_session_key(
     Remove the current user's encrypted session key blob so a new one can be stored.
     Used during keypair rotation when the private key no longer matches the stored blob.
     """
-    ensure_conversation_member(conversation_id, current_user["id"])
-    supabase.from_("conversation_session_key") \
+    await ensure_conversation_member(conversation_id, current_user["id"])
+    await supabase.from_("conversation_session_key") \
         .delete() \
         .eq("conversation_id", conversation_id) \
         .eq("user_id", current_user["id"]) \
@@ -228,52 +373,43 @@ def delete_my_session_key(
 # ── Conversation endpoints ─────────────────────────────────────────────────────
 
 @router.get("/conversations")
-def get_conversations(
+async def get_conversations(
     trip_id: Optional[str] = Query(None),
     current_user: dict = Depends(oauth2.get_current_user),
 ):
     """
     GET /api/conversations
-    Return conversations that the user is a member of.
+    Return conversations that the user is a member of, most recent activity
+    first, each with last_message_datetime / last_message_from and the
+    caller's unread_count.
     """
     try:
-        resp = (
-            supabase
-            .from_("group_member")
-            .select("""
-                conversation_id,
-                join_datetime,
-                left_datetime,
-                conversation:conversation_id (
-                  conversation_id,
-                                    conversation_name,
-                                    trip_id
-                )
-            """)
-            .eq("user_id", current_user["id"])
-            .is_("left_datetime", None)
-            .execute()
-        )
+        return await get_conversation_summaries(current_user["id"], trip_id)
 
-        if resp.data is None:
-            return []
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
 
-        convo_map = {}
-        for row in resp.data:
-            convo = row.get("conversation")
-            if convo and convo.get("conversation_id"):
-                if trip_id and str(convo.get("trip_id") or "") != str(trip_id):
-                    continue
-                convo_map[convo["conversation_id"]] = convo
 
-        return list(convo_map.values())
+@router.post("/conversations/{conversation_id}/read")
+async def mark_read(
+    conversation_id: str,
+    current_user: dict = Depends(oauth2.get_current_user),
+):
+    """
+    POST /api/conversations/{conversation_id}/read
+    Reset the caller's unread count for this conversation.
+    """
+    await ensure_conversation_member(conversation_id, current_user["id"])
+    try:
+        await mark_conversation_read(conversation_id, current_user["id"])
+        return {"conversation_id": conversation_id, "unread_count": 0}
 
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 
 @router.post("/conversations")
-def create_conversation(
+async def create_conversation(
     payload: schemas.ConversationCreate,
     current_user: dict = Depends(oauth2.get_current_user)
 ):
@@ -284,13 +420,13 @@ def create_conversation(
     """
     try:
         if payload.trip_id:
-            ensure_trip_member(payload.trip_id, current_user["id"])
+            await ensure_trip_member(payload.trip_id, current_user["id"])
 
         convo_data = {
             "conversation_name": payload.conversation_name or "New Conversation",
             "trip_id": payload.trip_id,
         }
-        res = supabase.from_("conversation").insert(convo_data).execute()
+        res = await supabase.from_("conversation").insert(convo_data).execute()
         if not res.data:
             raise HTTPException(status_code=500, detail="Failed to create conversation")
 
@@ -303,7 +439,7 @@ def create_conversation(
         if payload.trip_id and member_ids:
             allowed_rows = []
             try:
-                allowed_res = (
+                allowed_res = await (
                     supabase
                     .from_("trip_members")
                     .select("user_id")
@@ -313,7 +449,7 @@ def create_conversation(
                 )
                 allowed_rows = allowed_res.data or []
             except Exception:
-                allowed_res = (
+                allowed_res = await (
                     supabase
                     .from_("group_member")
                     .select("user_id")
@@ -335,9 +471,9 @@ def create_conversation(
             for uid in member_ids
         ]
 
-        m_res = supabase.from_("group_member").insert(members_to_insert).execute()
+        m_res = await supabase.from_("group_member").insert(members_to_insert).execute()
         if not m_res.data:
-            supabase.from_("conversation").delete().eq("conversation_id", conversation_id).execute()
+            await supabase.from_("conversation").delete().eq("conversation_id", conversation_id).execute()
             raise HTTPException(status_code=500, detail="Failed to add members")
 
         return conversation
@@ -349,7 +485,7 @@ def create_conversation(
 
 
 @router.post("/conversations/{conversation_id}/members")
-def add_member(
+async def add_member(
     conversation_id: str,
     user_id: str = Query(..., description="User ID to add"),
     current_user: dict = Depends(oauth2.get_current_user)
@@ -358,10 +494,10 @@ def add_member(
     POST /api/conversations/{conversation_id}/members?user_id=...
     Add a member to an existing conversation.
     """
-    ensure_conversation_member(conversation_id, current_user["id"])
+    await ensure_conversation_member(conversation_id, current_user["id"])
 
     try:
-        existing = (
+        existing = await (
             supabase.from_("group_member")
             .select("conversation_id")
             .eq("conversation_id", conversation_id)
@@ -373,7 +509,7 @@ def add_member(
             return {"message": "User is already a member"}
 
         now = datetime.utcnow().isoformat()
-        res = supabase.from_("group_member").insert({
+        res = await supabase.from_("group_member").insert({
             "conversation_id": conversation_id,
             "user_id": user_id,
             "join_datetime": now
@@ -391,7 +527,7 @@ def add_member(
 
 
 @router.get("/conversations/{conversation_id}/members")
-def get_members(
+async def get_members(
     conversation_id: str,
     current_user: dict = Depends(oauth2.get_current_user)
 ):
@@ -399,9 +535,9 @@ def get_members(
     GET /api/conversations/{conversation_id}/members
     Return all active users in a conversation.
     """
-    ensure_conversation_member(conversation_id, current_user["id"])
+    await ensure_conversation_member(conversation_id, current_user["id"])
     try:
-        resp = (
+        resp = await (
             supabase
             .from_("group_member")
             .select("""
@@ -435,49 +571,124 @@ def get_members(
 
 
 @router.get("/conversations/{conversation_id}/messages")
-def get_messages(
+async def get_messages(
     conversation_id: str,
+    response: Response,
+    before: Optional[str] = Query(None, description="Cursor — page of messages older than this one"),
+    after: Optional[str] = Query(None, description="Cursor — messages newer than this one"),
+    since: Optional[datetime] = Query(None, description="Delta sync — messages sent after this time"),
+    limit: int = Query(CHAT_HISTORY_PAGE_SIZE, ge=1, le=CHAT_HISTORY_MAX_PAGE_SIZE),
     current_user: dict = Depends(oauth2.get_current_user)
 ):
     """
     GET /api/conversations/{conversation_id}/messages
-    Return messages ordered by sent_datetime. Content is encrypted ciphertext.
+    Return one page of messages ordered by sent_datetime. Content is encrypted ciphertext.
+
+    Without cursors this is the latest `limit` messages. Page back with
+    ?before=<X-Prev-Cursor>; catch up after a reconnect with
+    ?after=<X-Next-Cursor> (or ?since=<timestamp>) until X-Has-More is false.
     """
-    ensure_conversation_member(conversation_id, current_user["id"])
+    await ensure_conversation_member(conversation_id, current_user["id"])
     try:
-        resp = (
-            supabase
-            .from_("message")
-            .select("message_id, from_user, content, sent_datetime, conversation_id, is_encrypted")
-            .eq("conversation_id", conversation_id)
-            .order("sent_datetime", desc=False)
-            .execute()
-        )
-        return resp.data or []
-
+        messages, has_more = await _fetch_message_page(conversation_id, before, after, since, limit)
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
+    response.headers["X-Has-More"] = "true" if has_more else "false"
+    if messages:
+        response.headers["X-Prev-Cursor"] = encode_message_cursor(messages[0])
+        response.headers["X-Next-Cursor"] = encode_message_cursor(messages[-1])
+    return messages
+
 
 # ── WebSocket ──────────────────────────────────────────────────────────────────
 
+async def _replay_missed(
+    websocket: WebSocket,
+    conversation_id: str,
+    after: Optional[str],
+    since: Optional[datetime],
+) -> Optional[str]:
+    """
+    Send messages missed since the client's cursor, oldest first, then a
+    {"type": "replay_complete"} frame. Returns the cursor of the last message
+    the client now has.
+    """
+    sent, has_more, cursor = 0, True, after
+    while has_more and sent < CHAT_REPLAY_MAX_MESSAGES:
+        page_size = min(CHAT_HISTORY_MAX_PAGE_SIZE, CHAT_REPLAY_MAX_MESSAGES - sent)
+        messages, has_more = await _fetch_message_page(
+            conversation_id, after=cursor, since=None if cursor else since, limit=page_size,
+        )
+        for message in messages:
+            await websocket.send_text(serialize(message))
+        if messages:
+            sent += len(messages)
+            cursor = encode_message_cursor(messages[-1])
+
+    # has_more here means the replay cap was hit — fetch the rest over REST
+    await websocket.send_text(serialize({"type": "replay_complete", "cursor": cursor, "has_more": has_more}))
+    return cursor
+
+
+def _replayed_before(cursor: Optional[str]):
+    """skip() for chat_broadcaster.resume: live frames at or below the replay cursor were already sent."""
+    if not cursor:
+        return None
+    last = _sort_key(*_decode_message_cursor(cursor))
+
+    def skip(text: str) -> bool:
+        try:
+            key = _message_key(json.loads(text))
+        except ValueError:
+            return False
+        return key is not None and key <= last
+
+    return skip
+
+
 @router.websocket("/ws/conversations/{conversation_id}")
-async def ws_conversation(websocket: WebSocket, conversation_id: str):
+async def ws_conversation(
+    websocket: WebSocket,
+    conversation_id: str,
+    after: Optional[str] = None,
+    since: Optional[datetime] = None,
+    token: Optional[str] = None,
+):
+    """
+    Live messages for a conversation. Reconnecting clients can pass
+    ?after=<cursor> (or ?since=<timestamp>) plus ?token=<jwt> to have missed
+    messages replayed before live delivery resumes.
+    """
     await websocket.accept()
+    replay = bool(after or since)
+    if replay:
+        # Checked before joining, so a bad request never holds a room slot
+        try:
+            if after:
+                _decode_message_cursor(after)
+            if not token:
+                raise HTTPException(status_code=401, detail="Replay needs a token")
+            user = await oauth2.get_current_user(token)
+            await ensure_conversation_member(conversation_id, user["id"])
+        except HTTPException:
+            await websocket.close(code=_CLOSE_POLICY_VIOLATION)
+            return
 
-    async with rooms_lock:
-        rooms.setdefault(conversation_id, set()).add(websocket)
-
+    # Live frames are held back during the replay so nothing falls in the gap
+    conn = chat_broadcaster.join(conversation_id, websocket, paused=replay)
     try:
+        if replay:
+            cursor = await _replay_missed(websocket, conversation_id, after, since)
+            chat_broadcaster.resume(conn, skip=_replayed_before(cursor))
         while True:
             await websocket.receive_text()
     except WebSocketDisconnect:
         pass
     finally:
-        async with rooms_lock:
-            rooms.get(conversation_id, set()).discard(websocket)
-            if conversation_id in rooms and not rooms[conversation_id]:
-                rooms.pop(conversation_id, None)
+        await chat_broadcaster.leave(conn)
 
 
 @router.post("/conversations/{conversation_id}/messages")
@@ -490,7 +701,7 @@ async def post_message(
     POST /api/conversations/{conversation_id}/messages
     Store an encrypted message. Content is an opaque ciphertext blob from the client.
     """
-    ensure_conversation_member(conversation_id, current_user["id"])
+    await ensure_conversation_member(conversation_id, current_user["id"])
     try:
         if not payload.content:
             raise HTTPException(status_code=400, detail="Missing content")
@@ -503,7 +714,7 @@ async def post_message(
             "is_encrypted": payload.is_encrypted if hasattr(payload, "is_encrypted") else True
         }
 
-        resp = supabase.from_("message").insert(new_message).execute()
+        resp = await supabase.from_("message").insert(new_message).execute()
         created = resp.data[0]
 
         await broadcast_to_conversation(conversation_id, created)
@@ -3,6 +3,7 @@ from pydantic import BaseModel
 from typing import List, Optional
 from utils import oauth2
 from supabase_client import supabase
+from services.ai_tool_cache import tool_cache
 
 router = APIRouter(
     prefix="/checklists",
@@ -29,7 +30,7 @@ class ChecklistItemToggle(BaseModel):
 # ---- Endpoints ----
 
 @router.post("/")
-def create_checklist(body: ChecklistCreate, current_user=Depends(oauth2.get_current_user)):
+async def create_checklist(body: ChecklistCreate, current_user=Depends(oauth2.get_current_user)):
     """Save a checklist extracted from document analysis."""
     user_id = current_user["id"]
 
@@ -44,7 +45,7 @@ def create_checklist(body: ChecklistCreate, current_user=Depends(oauth2.get_curr
     if body.trip_id:
         checklist_data["trip_id"] = body.trip_id
 
-    result = supabase.table("document_checklists").insert(checklist_data).execute()
+    result = await supabase.table("document_checklists").insert(checklist_data).execute()
     if not result.data:
         raise HTTPException(status_code=500, detail="Failed to create checklist")
 
@@ -56,17 +57,18 @@ def create_checklist(body: ChecklistCreate, current_user=Depends(oauth2.get_curr
         for item_text in body.items
     ]
     if items_data:
-        supabase.table("checklist_items").insert(items_data).execute()
+        await supabase.table("checklist_items").insert(items_data).execute()
+    tool_cache.invalidate("checklists", body.trip_id)
 
     return {"id": checklist_id, "items_count": len(body.items)}
 
 
 @router.get("/")
-def get_checklists(current_user=Depends(oauth2.get_current_user)):
+async def get_checklists(current_user=Depends(oauth2.get_current_user)):
     """List all checklists for the current user."""
     user_id = current_user["id"]
 
-    checklists = (
+    checklists = await (
         supabase.table("document_checklists")
         .select("*")
         .eq("user_id", user_id)
@@ -76,7 +78,7 @@ def get_checklists(current_user=Depends(oauth2.get_current_user)):
 
     result = []
     for cl in checklists.data or []:
-        items = (
+        items = await (
             supabase.table("checklist_items")
             .select("*")
             .eq("checklist_id", cl["id"])
@@ -90,12 +92,12 @@ def get_checklists(current_user=Depends(oauth2.get_current_user)):
 
 
 @router.patch("/items/{item_id}")
-def toggle_checklist_item(item_id: str, body: ChecklistItemToggle, current_user=Depends(oauth2.get_current_user)):
+async def toggle_checklist_item(item_id: str, body: ChecklistItemToggle, current_user=Depends(oauth2.get_current_user)):
     """Toggle a checklist item's completion status."""
     user_id = current_user["id"]
 
     # Verify the item belongs to the user
-    item = supabase.table("checklist_items").select("*, document_checklists!inner(user_id)").eq("id", item_id).execute()
+    item = await supabase.table("checklist_items").select("*, document_checklists!inner(user_id, trip_id)").eq("id", item_id).execute()
     if not item.data or item.data[0]["document_checklists"]["user_id"] != user_id:
         raise HTTPException(status_code=404, detail="Item not found")
 
@@ -106,20 +108,22 @@ def toggle_checklist_item(item_id: str, body: ChecklistItemToggle, current_user=
     else:
         update_data["completed_at"] = None
 
-    supabase.table("checklist_items").update(update_data).eq("id", item_id).execute()
+    await supabase.table("checklist_items").update(update_data).eq("id", item_id).execute()
+    tool_cache.invalidate("checklists", item.data[0]["document_checklists"].get("trip_id"))
     return {"status": "updated"}
 
 
 @router.delete("/{checklist_id}")
-def delete_checklist(checklist_id: str, current_user=Depends(oauth2.get_current_user)):
+async def delete_checklist(checklist_id: str, current_user=Depends(oauth2.get_current_user)):
     """Delete a checklist and its items."""
     user_id = current_user["id"]
 
     # Verify ownership
-    cl = supabase.table("document_checklists").select("*").eq("id", checklist_id).eq("user_id", user_id).execute()
+    cl = await supabase.table("document_checklists").select("*").eq("id", checklist_id).eq("user_id", user_id).execute()
     if not cl.data:
         raise HTTPException(status_code=404, detail="Checklist not found")
 
     # CASCADE will delete items automatically
-    supabase.table("document_checklists").delete().eq("id", checklist_id).execute()
+    await supabase.table("document_checklists").delete().eq("id", checklist_id).execute()
+    tool_cache.invalidate("checklists", cl.data[0].get("trip_id"))
     return {"status": "deleted"}
@@ -11,6 +11,7 @@ from fastapi import APIRouter, Depends, HTTPException, Query
 from typing import Optional, List
 from utils import oauth2
 from supabase_client import supabase
+from services.currency import dominant_currency, fx_rates
 
 router = APIRouter(
     prefix="/discovery",
@@ -29,9 +30,9 @@ def _parse_point(point_str) -> List[float]:
     return [0.0, 0.0]
 
 
-def _get_group_member_ids(group_id: str, current_user_id: str) -> List[str]:
+async def _get_group_member_ids(group_id: str, current_user_id: str) -> List[str]:
     """Return user_ids of all active members in a group. Verifies requester is a member."""
-    members_res = (
+    members_res = await (
         supabase.table("group_member")
         .select("user_id")
         .eq("group_id", group_id)
@@ -49,7 +50,7 @@ def _get_group_member_ids(group_id: str, current_user_id: str) -> List[str]:
 # ---- Endpoints ----
 
 @router.get("/group-activity/{group_id}")
-def get_group_activity(
+async def get_group_activity(
     group_id: str,
     category: Optional[str] = None,
     current_user=Depends(oauth2.get_current_user),
@@ -63,7 +64,7 @@ def get_group_activity(
     """
     try:
         user_id = current_user["id"]
-        member_ids = _get_group_member_ids(group_id, user_id)
+        member_ids = await _get_group_member_ids(group_id, user_id)
 
         # Fetch favorites for all group members
         query = (
@@ -74,10 +75,10 @@ def get_group_activity(
         if category:
             query = query.eq("category", category)
 
-        favorites_res = query.order("created_at", desc=True).execute()
+        favorites_res = await query.order("created_at", desc=True).execute()
 
         # Get usernames for display
-        users_res = (
+        users_res = await (
             supabase.table("users")
             .select("id, username")
             .in_("id", member_ids)
@@ -123,7 +124,7 @@ def get_group_activity(
 
 
 @router.get("/vibes/{group_id}")
-def get_group_vibes(
+async def get_group_vibes(
     group_id: str,
     current_user=Depends(oauth2.get_current_user),
 ):
@@ -136,10 +137,10 @@ def get_group_vibes(
     """
     try:
         user_id = current_user["id"]
-        member_ids = _get_group_member_ids(group_id, user_id)
+        member_ids = await _get_group_member_ids(group_id, user_id)
 
         # Fetch preferences for all members
-        prefs_res = (
+        prefs_res = await (
             supabase.table("user_preferences")
             .select("user_id, preferred_categories, price_preference, interests, avoid_types")
             .in_("user_id", member_ids)
@@ -149,7 +150,7 @@ def get_group_vibes(
         prefs = prefs_res.data or []
 
         # Get usernames
-        users_res = (
+        users_res = await (
             supabase.table("users")
             .select("id, username")
             .in_("id", member_ids)
@@ -207,7 +208,7 @@ def get_group_vibes(
 
 
 @router.get("/expense-markers")
-def get_expense_markers(
+async def get_expense_markers(
     trip_id: Optional[str] = None,
     current_user=Depends(oauth2.get_current_user),
 ):
@@ -229,7 +230,7 @@ def get_expense_markers(
         if trip_id:
             query = query.eq("trip_id", trip_id)
 
-        expenses_res = query.order("created_at", desc=True).limit(100).execute()
+        expenses_res = await query.order("created_at", desc=True).limit(100).execute()
 
         markers = []
         for exp in (expenses_res.data or []):
@@ -251,19 +252,22 @@ def get_expense_markers(
 
 
 @router.get("/group-expense-summary/{group_id}")
-def get_group_expense_summary(
+async def get_group_expense_summary(
     group_id: str,
+    currency: Optional[str] = Query(None, description="Currency all totals are reported in (default: the most used)"),
     current_user=Depends(oauth2.get_current_user),
 ):
     """
     Get spending summary by category for all group members — for "Wallet" integration.
     Shows average spend at places visited by the group.
+    Mixed-currency expenses are converted with the offline FX table into
+    `currency`, or into the group's most used currency when none is given.
     """
     try:
         user_id = current_user["id"]
-        member_ids = _get_group_member_ids(group_id, user_id)
+        member_ids = await _get_group_member_ids(group_id, user_id)
 
-        expenses_res = (
+        expenses_res = await (
             supabase.table("expenses")
             .select("merchant_name, total, currency, category, lat, lng")
             .in_("user_id", member_ids)
@@ -272,13 +276,20 @@ def get_group_expense_summary(
 
         expenses = expenses_res.data or []
 
+        # Convert every total into the report currency in one pass
+        currency = currency or dominant_currency(exp.get("currency") for exp in expenses)
+        totals, unconverted = fx_rates.convert_many(
+            (float(exp["total"]) if exp.get("total") else 0 for exp in expenses),
+            (exp.get("currency") for exp in expenses),
+            currency,
+        )
+
         # Aggregate by merchant
         merchant_stats = {}
         category_totals = {}
 
-        for exp in expenses:
+        for exp, total in zip(expenses, totals.tolist()):
             merchant = exp.get("merchant_name") or "Unknown"
-            total = float(exp["total"]) if exp.get("total") else 0
 
             if merchant not in merchant_stats:
                 merchant_stats[merchant] = {"count": 0, "total_spent": 0, "lat": exp.get("lat"), "lng": exp.get("lng")}
@@ -301,8 +312,11 @@ def get_group_expense_summary(
 
         return {
             "wallet_data": sorted(wallet_data, key=lambda x: -x["total_spent"]),
-            "category_breakdown": category_totals,
+            "category_breakdown": {cat: round(total, 2) for cat, total in category_totals.items()},
             "total_group_spend": round(sum(category_totals.values()), 2),
+            "currency": currency.upper(),
+            "unconverted_currencies": unconverted,
+            "rates_stale": fx_rates.stale,
         }
 
     except HTTPException:
@@ -69,7 +69,7 @@ def _format_favorite(row: dict) -> dict:
 # ---- Endpoints ----
 
 @router.post("/", status_code=status.HTTP_201_CREATED)
-def add_favorite(
+async def add_favorite(
     fav: FavoriteCreate,
     current_user=Depends(oauth2.get_current_user)
 ):
@@ -87,7 +87,7 @@ def add_favorite(
             "user_notes": fav.user_notes,
         }
 
-        res = supabase.table("favorite_places").insert(data).execute()
+        res = await supabase.table("favorite_places").insert(data).execute()
 
         if not res.data:
             raise HTTPException(status_code=500, detail="Failed to save favorite")
@@ -105,7 +105,7 @@ def add_favorite(
 
 
 @router.get("/", response_model=List[dict])
-def get_my_favorites(
+async def get_my_favorites(
     category: Optional[str] = None,
     current_user=Depends(oauth2.get_current_user)
 ):
@@ -121,7 +121,7 @@ def get_my_favorites(
         if category:
             query = query.eq("category", category)
 
-        res = query.order("created_at", desc=True).execute()
+        res = await query.order("created_at", desc=True).execute()
 
         return [_format_favorite(row) for row in (res.data or [])]
 
@@ -131,13 +131,13 @@ def get_my_favorites(
 
 
 @router.delete("/{place_id}")
-def remove_favorite(
+async def remove_favorite(
     place_id: str,
     current_user=Depends(oauth2.get_current_user)
 ):
     """Remove a place from favorites"""
     try:
-        res = (
+        res = await (
             supabase
             .table("favorite_places")
             .delete()
@@ -154,7 +154,7 @@ def remove_favorite(
 
 
 @router.put("/{place_id}")
-def update_favorite(
+async def update_favorite(
     place_id: str,
     update: FavoriteUpdate,
     current_user=Depends(oauth2.get_current_user)
@@ -170,7 +170,7 @@ def update_favorite(
         if not update_data:
             raise HTTPException(status_code=400, detail="Nothing to update")
 
-        res = (
+        res = await (
             supabase
             .table("favorite_places")
             .update(update_data)
@@ -192,13 +192,13 @@ def update_favorite(
 
 
 @router.get("/check/{place_id}")
-def check_favorite(
+async def check_favorite(
     place_id: str,
     current_user=Depends(oauth2.get_current_user)
 ):
     """Check if a place is in favorites"""
     try:
-        res = (
+        res = await (
             supabase
             .table("favorite_places")
             .select("id")
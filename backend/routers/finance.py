@@ -4,6 +4,7 @@ from fastapi import APIRouter, Depends, HTTPException
 from pydantic import BaseModel, Field
 
 from supabase_client import supabase
+from services.membership import ensure_trip_member, is_trip_leader
 from utils import oauth2
 
 router = APIRouter(
@@ -12,93 +13,6 @@ router = APIRouter(
 )
 
 
-def _ensure_trip_member(trip_id: str, user_id: str) -> None:
-    try:
-        member = (
-            supabase.table("trip_members")
-            .select("id")
-            .eq("trip_id", trip_id)
-            .eq("user_id", user_id)
-            .is_("left_at", None)
-            .maybe_single()
-            .execute()
-        )
-        if member.data:
-            return
-    except Exception:
-        pass
-
-    try:
-        member = (
-            supabase.table("group_member")
-            .select("id")
-            .eq("group_id", trip_id)
-            .eq("user_id", user_id)
-            .is_("left_datetime", None)
-            .maybe_single()
-            .execute()
-        )
-        if member.data:
-            return
-    except Exception:
-        pass
-
-    owner = (
-        supabase.table("trips")
-        .select("id")
-        .eq("id", trip_id)
-        .eq("owner_id", user_id)
-        .maybe_single()
-        .execute()
-    )
-    if not owner.data:
-        raise HTTPException(status_code=403, detail="Not a member of this group")
-
-
-def _is_trip_leader(trip_id: str, user_id: str) -> bool:
-    try:
-        member = (
-            supabase.table("trip_members")
-            .select("id")
-            .eq("trip_id", trip_id)
-            .eq("user_id", user_id)
-            .eq("role", "leader")
-            .is_("left_at", None)
-            .maybe_single()
-            .execute()
-        )
-        if member.data:
-            return True
-    except Exception:
-        pass
-
-    try:
-        member = (
-            supabase.table("group_member")
-            .select("id")
-            .eq("group_id", trip_id)
-            .eq("user_id", user_id)
-            .eq("role", "leader")
-            .is_("left_datetime", None)
-            .maybe_single()
-            .execute()
-        )
-        if member.data:
-            return True
-    except Exception:
-        pass
-
-    owner = (
-        supabase.table("trips")
-        .select("id")
-        .eq("id", trip_id)
-        .eq("owner_id", user_id)
-        .maybe_single()
-        .execute()
-    )
-    return bool(owner.data)
-
-
 class CreateTransactionPayload(BaseModel):
     description: str
     amount: float = Field(gt=0)
@@ -136,7 +50,7 @@ def _normalize_expense_row(row: dict):
 
 
 @router.get("/transactions")
-def get_transactions(
+async def get_transactions(
     trip_id: Optional[str] = None,
     current_user=Depends(oauth2.get_current_user),
 ):
@@ -152,12 +66,12 @@ def get_transactions(
         )
 
         if trip_id:
-            _ensure_trip_member(trip_id, user_id)
+            await ensure_trip_member(trip_id, user_id)
             query = query.eq("trip_id", trip_id)
         else:
             query = query.eq("user_id", user_id)
 
-        result = query.order("created_at", desc=True).limit(500).execute()
+        result = await query.order("created_at", desc=True).limit(500).execute()
 
         transactions = [_normalize_expense_row(row) for row in (result.data or [])]
 
@@ -171,7 +85,7 @@ def get_transactions(
 
 
 @router.post("/transactions")
-def create_transaction(
+async def create_transaction(
     payload: CreateTransactionPayload,
     current_user=Depends(oauth2.get_current_user),
 ):
@@ -182,7 +96,7 @@ def create_transaction(
             raise HTTPException(status_code=401, detail="Invalid token payload")
 
         if payload.trip_id:
-            _ensure_trip_member(payload.trip_id, user_id)
+            await ensure_trip_member(payload.trip_id, user_id)
 
         tx_type = payload.type if payload.type in {"expense", "income"} else "expense"
         amount = abs(float(payload.amount))
@@ -204,7 +118,7 @@ def create_transaction(
             },
         }
 
-        result = (
+        result = await (
             supabase.table("expenses")
             .insert(row)
             .execute()
@@ -223,7 +137,7 @@ def create_transaction(
 
 
 @router.delete("/transactions/{transaction_id}")
-def delete_transaction(
+async def delete_transaction(
     transaction_id: str,
     current_user=Depends(oauth2.get_current_user),
 ):
@@ -233,7 +147,7 @@ def delete_transaction(
         if not user_id:
             raise HTTPException(status_code=401, detail="Invalid token payload")
 
-        existing = (
+        existing = await (
             supabase.table("expenses")
             .select("id, user_id, trip_id")
             .eq("id", transaction_id)
@@ -250,13 +164,13 @@ def delete_transaction(
 
         allowed = owner_user_id == user_id
         if (not allowed) and row_trip_id:
-            _ensure_trip_member(row_trip_id, user_id)
-            allowed = _is_trip_leader(row_trip_id, user_id)
+            await ensure_trip_member(row_trip_id, user_id)
+            allowed = await is_trip_leader(row_trip_id, user_id)
 
         if not allowed:
             raise HTTPException(status_code=403, detail="You do not have permission to delete this transaction")
 
-        supabase.table("expenses").delete().eq("id", transaction_id).execute()
+        await supabase.table("expenses").delete().eq("id", transaction_id).execute()
         return {"success": True}
 
     except HTTPException:
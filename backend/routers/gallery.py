@@ -19,6 +19,7 @@ from typing import Optional
 from fastapi import APIRouter, UploadFile, File, Form, HTTPException, Depends
 from pydantic import BaseModel
 from supabase_client import supabase
+from services.membership import is_trip_leader
 from utils import oauth2
 
 router = APIRouter(
@@ -36,39 +37,6 @@ def _uid(current_user: dict) -> str:
     return user_id
 
 
-def _is_trip_leader(trip_id: str, user_id: str) -> bool:
-    try:
-        res = (
-            supabase.table("trip_members")
-            .select("role")
-            .eq("trip_id", trip_id)
-            .eq("user_id", user_id)
-            .is_("left_at", None)
-            .maybe_single()
-            .execute()
-        )
-        if res.data and res.data.get("role") == "leader":
-            return True
-    except Exception:
-        pass
-
-    try:
-        owner = (
-            supabase.table("trips")
-            .select("id")
-            .eq("id", trip_id)
-            .eq("owner_id", user_id)
-            .maybe_single()
-            .execute()
-        )
-        if owner.data:
-            return True
-    except Exception:
-        pass
-
-    return False
-
-
 # ── GET: Fetch all photos for a trip ──────────────────────────────────────────
 
 @router.get("/{trip_id}/media")
@@ -80,7 +48,7 @@ async def get_trip_media(
     try:
         user_id = _uid(current_user)
 
-        response = (
+        response = await (
             supabase.table("trip_media")
             .select("*")
             .eq("trip_id", trip_id)
@@ -94,7 +62,7 @@ async def get_trip_media(
         media_ids = [p["id"] for p in photos]
 
         # Fetch current user's likes
-        likes_res = (
+        likes_res = await (
             supabase.table("media_likes")
             .select("media_id")
             .eq("user_id", user_id)
@@ -104,7 +72,7 @@ async def get_trip_media(
         liked_ids = {r["media_id"] for r in (likes_res.data or [])}
 
         # Fetch current user's saves
-        saves_res = (
+        saves_res = await (
             supabase.table("media_saves")
             .select("media_id")
             .eq("user_id", user_id)
@@ -142,13 +110,13 @@ async def upload_trip_media(
 
     try:
         file_content = await file.read()
-        supabase.storage.from_(BUCKET_NAME).upload(
+        await supabase.storage.from_(BUCKET_NAME).upload(
             path=file_path,
             file=file_content,
             file_options={"content-type": file.content_type},
         )
 
-        public_url = supabase.storage.from_(BUCKET_NAME).get_public_url(file_path)
+        public_url = await supabase.storage.from_(BUCKET_NAME).get_public_url(file_path)
 
         db_record = {
             "trip_id": trip_id,
@@ -159,7 +127,7 @@ async def upload_trip_media(
             "caption": caption,
         }
 
-        db_res = supabase.table("trip_media").insert(db_record).execute()
+        db_res = await supabase.table("trip_media").insert(db_record).execute()
         saved = (db_res.data or [None])[0]
         if not saved:
             raise Exception("Database insert returned empty.")
@@ -189,7 +157,7 @@ async def update_media_caption(
     """Update the caption on a photo. Owner or trip leader can edit."""
     user_id = _uid(current_user)
 
-    existing = (
+    existing = await (
         supabase.table("trip_media")
         .select("id, uploaded_by")
         .eq("id", media_id)
@@ -201,10 +169,10 @@ async def update_media_caption(
         raise HTTPException(status_code=404, detail="Photo not found")
 
     is_owner = existing.data["uploaded_by"] == user_id
-    if not is_owner and not _is_trip_leader(trip_id, user_id):
+    if not is_owner and not await is_trip_leader(trip_id, user_id):
         raise HTTPException(status_code=403, detail="Only the uploader or trip leader can edit")
 
-    res = (
+    res = await (
         supabase.table("trip_media")
         .update({"caption": body.caption})
         .eq("id", media_id)
@@ -225,7 +193,7 @@ async def delete_trip_media(
     """Delete a photo. Owner or trip leader can delete."""
     user_id = _uid(current_user)
 
-    existing = (
+    existing = await (
         supabase.table("trip_media")
         .select("id, uploaded_by, storage_path")
         .eq("id", media_id)
@@ -237,16 +205,16 @@ async def delete_trip_media(
         raise HTTPException(status_code=404, detail="Photo not found")
 
     is_owner = existing.data["uploaded_by"] == user_id
-    if not is_owner and not _is_trip_leader(trip_id, user_id):
+    if not is_owner and not await is_trip_leader(trip_id, user_id):
         raise HTTPException(status_code=403, detail="Only the uploader or trip leader can delete")
 
     # Delete from storage
     try:
-        supabase.storage.from_(BUCKET_NAME).remove([existing.data["storage_path"]])
+        await supabase.storage.from_(BUCKET_NAME).remove([existing.data["storage_path"]])
     except Exception:
         pass  # Storage cleanup failure shouldn't block DB deletion
 
-    supabase.table("trip_media").delete().eq("id", media_id).execute()
+    await supabase.table("trip_media").delete().eq("id", media_id).execute()
 
     return {"success": True}
 
@@ -264,7 +232,7 @@ async def get_my_albums(
     trip_ids = set()
 
     try:
-        tm = (
+        tm = await (
             supabase.table("trip_members")
             .select("trip_id")
             .eq("user_id", user_id)
@@ -276,7 +244,7 @@ async def get_my_albums(
         pass
 
     try:
-        gm = (
+        gm = await (
             supabase.table("group_member")
             .select("group_id")
             .eq("user_id", user_id)
@@ -288,7 +256,7 @@ async def get_my_albums(
         pass
 
     try:
-        owned = (
+        owned = await (
             supabase.table("trips")
             .select("id")
             .eq("owner_id", user_id)
@@ -304,7 +272,7 @@ async def get_my_albums(
     trip_list = list(trip_ids)
 
     # Get trip names
-    trips_res = (
+    trips_res = await (
         supabase.table("trips")
         .select("id, name")
         .in_("id", trip_list)
@@ -315,7 +283,7 @@ async def get_my_albums(
     # Get photo counts and latest photo per trip
     albums = []
     for tid in trip_list:
-        media_res = (
+        media_res = await (
             supabase.table("trip_media")
             .select("id, public_url, created_at")
             .eq("trip_id", tid)
@@ -326,7 +294,7 @@ async def get_my_albums(
         photos = media_res.data or []
 
         # Get total count
-        all_res = (
+        all_res = await (
             supabase.table("trip_media")
             .select("id")
             .eq("trip_id", tid)
@@ -358,7 +326,7 @@ async def toggle_like(
     """Like or unlike a photo. Returns the new like state and count."""
     user_id = _uid(current_user)
 
-    existing = (
+    existing = await (
         supabase.table("media_likes")
         .select("id")
         .eq("media_id", media_id)
@@ -369,21 +337,21 @@ async def toggle_like(
 
     if existing.data:
         # Unlike
-        supabase.table("media_likes").delete().eq("id", existing.data["id"]).execute()
+        await supabase.table("media_likes").delete().eq("id", existing.data["id"]).execute()
         # Decrement count
-        photo = supabase.table("trip_media").select("like_count").eq("id", media_id).maybe_single().execute()
+        photo = await supabase.table("trip_media").select("like_count").eq("id", media_id).maybe_single().execute()
         new_count = max(0, (photo.data or {}).get("like_count", 1) - 1)
-        supabase.table("trip_media").update({"like_count": new_count}).eq("id", media_id).execute()
+        await supabase.table("trip_media").update({"like_count": new_count}).eq("id", media_id).execute()
         return {"liked": False, "like_count": new_count}
     else:
         # Like
-        supabase.table("media_likes").insert({
+        await supabase.table("media_likes").insert({
             "media_id": media_id,
             "user_id": user_id,
         }).execute()
-        photo = supabase.table("trip_media").select("like_count").eq("id", media_id).maybe_single().execute()
+        photo = await supabase.table("trip_media").select("like_count").eq("id", media_id).maybe_single().execute()
         new_count = ((photo.data or {}).get("like_count", 0) or 0) + 1
-        supabase.table("trip_media").update({"like_count": new_count}).eq("id", media_id).execute()
+        await supabase.table("trip_media").update({"like_count": new_count}).eq("id", media_id).execute()
         return {"liked": True, "like_count": new_count}
 
 
@@ -398,7 +366,7 @@ async def toggle_save(
     """Save or unsave a photo to personal collection."""
     user_id = _uid(current_user)
 
-    existing = (
+    existing = await (
         supabase.table("media_saves")
         .select("id")
         .eq("media_id", media_id)
@@ -408,10 +376,10 @@ async def toggle_save(
     )
 
     if existing.data:
-        supabase.table("media_saves").delete().eq("id", existing.data["id"]).execute()
+        await supabase.table("media_saves").delete().eq("id", existing.data["id"]).execute()
         return {"saved": False}
     else:
-        supabase.table("media_saves").insert({
+        await supabase.table("media_saves").insert({
             "media_id": media_id,
             "user_id": user_id,
         }).execute()
@@ -427,7 +395,7 @@ async def get_saved_photos(
     """Get all photos the user has saved/bookmarked across all trips."""
     user_id = _uid(current_user)
 
-    saves_res = (
+    saves_res = await (
         supabase.table("media_saves")
         .select("media_id")
         .eq("user_id", user_id)
@@ -439,7 +407,7 @@ async def get_saved_photos(
     if not media_ids:
         return []
 
-    photos_res = (
+    photos_res = await (
         supabase.table("trip_media")
         .select("*")
         .in_("id", media_ids)
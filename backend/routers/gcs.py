@@ -10,14 +10,17 @@ Features:
 """
 
 import os
-import math
+import asyncio
 import uuid
-import httpx
 from datetime import datetime, timedelta
 from typing import Optional, List
 from fastapi import APIRouter, HTTPException, Depends, Query
 from pydantic import BaseModel
 from utils import oauth2
+from utils.http_clients import get_http_client
+from services.geo_median import geometric_median
+from services.places_cache import places_cache, places_key, cacheable_legacy_response
+from services.route_cache import route_cache, route_key
 from supabase_client import supabase
 from dotenv import load_dotenv
 
@@ -66,45 +69,26 @@ class VetoCheckRequest(BaseModel):
 
 
 # ─────────────────────────────────────────────────────────────────────────────
-# 1. Geometric Median — Weiszfeld's Algorithm
+# 1. Geometric Median — Weiszfeld's Algorithm (services/geo_median.py)
 # ─────────────────────────────────────────────────────────────────────────────
 
-def _weiszfeld(points: List[tuple], max_iter: int = 100, tol: float = 1e-7) -> tuple:
-    """
-    Weiszfeld's iterative algorithm for the geometric median.
-    Input:  list of (lat, lng) tuples
-    Output: (lat, lng) that minimises total Euclidean distance to all points.
-    """
-    if len(points) == 1:
-        return points[0]
-    if len(points) == 2:
-        return ((points[0][0] + points[1][0]) / 2,
-                (points[0][1] + points[1][1]) / 2)
-
-    # Initialise with the centroid
-    x = sum(p[0] for p in points) / len(points)
-    y = sum(p[1] for p in points) / len(points)
-
-    for _ in range(max_iter):
-        weights = []
-        for p in points:
-            d = math.sqrt((p[0] - x) ** 2 + (p[1] - y) ** 2)
-            weights.append(1.0 / max(d, 1e-12))
-
-        total_w = sum(weights)
-        new_x = sum(w * p[0] for w, p in zip(weights, points)) / total_w
-        new_y = sum(w * p[1] for w, p in zip(weights, points)) / total_w
-
-        if math.sqrt((new_x - x) ** 2 + (new_y - y) ** 2) < tol:
-            break
-        x, y = new_x, new_y
+async def _google_route_request(endpoint: str, params: dict, timeout: float = 15.0) -> dict:
+    """Directions / Distance Matrix GET through the shared route cache (single-flight)."""
+    async def fetch():
+        client = get_http_client("google")
+        resp = await client.get(
+            f"https://maps.googleapis.com/maps/api/{endpoint}/json",
+            params=params,
+            timeout=timeout,
+        )
+        return resp.json()
 
-    return (x, y)
+    return await route_cache.get_or_fetch(route_key(endpoint, params), fetch)
 
 
-def _get_group_preference_intersection(member_ids: list) -> dict:
+async def _get_group_preference_intersection(member_ids: list) -> dict:
     """Find the intersection of group preferences — categories everyone likes."""
-    prefs_res = (
+    prefs_res = await (
         supabase.table("user_preferences")
         .select("preferred_categories, dietary_restrictions, interests, avoid_types, price_preference, travel_pace, spontaneity_score")
         .in_("user_id", member_ids)
@@ -174,7 +158,7 @@ async def find_fair_point(
     user_id = current_user["id"]
 
     # 1. Get live member positions
-    pos_res = (
+    pos_res = await (
         supabase.table("member_positions")
         .select("user_id, lat, lng, updated_at")
         .eq("trip_id", body.trip_id)
@@ -188,10 +172,10 @@ async def find_fair_point(
     points = [(p["lat"], p["lng"]) for p in positions]
 
     # 2. Compute geometric median
-    median_lat, median_lng = _weiszfeld(points)
+    median_lat, median_lng = geometric_median(points)
 
     # 3. Get group preference intersection for keyword filtering
-    group_prefs = _get_group_preference_intersection(member_ids)
+    group_prefs = await _get_group_preference_intersection(member_ids)
     keyword = body.keyword
     if not keyword and group_prefs.get("common_categories"):
         keyword = group_prefs["common_categories"][0]
@@ -216,12 +200,23 @@ async def find_fair_point(
     if max_price:
         params["maxprice"] = max_price
 
-    async with httpx.AsyncClient(timeout=10.0) as client:
+    async def fetch():
+        client = get_http_client("google")
         resp = await client.get(
             "https://maps.googleapis.com/maps/api/place/nearbysearch/json",
             params=params,
         )
-        data = resp.json()
+        return cacheable_legacy_response(resp.json())
+
+    cache_key = places_key(
+        "nearbysearch",
+        place_type=body.poi_type,
+        keyword=keyword,
+        center=(median_lat, median_lng),
+        radius=body.radius,
+        maxprice=max_price,
+    )
+    data = await places_cache.get_or_fetch(cache_key, fetch) or {}
 
     results = data.get("results", [])
 
@@ -252,7 +247,7 @@ async def find_fair_point(
     # 5. Optionally create a ranked-choice micro-poll
     poll_id = None
     if body.auto_poll and len(suggestions) >= 2:
-        poll_res = supabase.table("polls").insert({
+        poll_res = await supabase.table("polls").insert({
             "id": str(uuid.uuid4()),
             "trip_id": body.trip_id,
             "created_by": user_id,
@@ -264,7 +259,7 @@ async def find_fair_point(
         if poll_res.data:
             poll_id = poll_res.data[0]["id"]
             for s in suggestions[:5]:
-                supabase.table("poll_options").insert({
+                await supabase.table("poll_options").insert({
                     "id": str(uuid.uuid4()),
                     "poll_id": poll_id,
                     "created_by": user_id,
@@ -303,7 +298,7 @@ async def group_arrival_sync(
     Returns delay warnings + leader alert if someone is >15 min behind.
     """
     # 1. Fetch all member positions
-    pos_res = (
+    pos_res = await (
         supabase.table("member_positions")
         .select("user_id, lat, lng, updated_at")
         .eq("trip_id", body.trip_id)
@@ -314,7 +309,7 @@ async def group_arrival_sync(
         return {"status": "no_positions", "members": []}
 
     # 2. Get member info + identify leader
-    members_res = (
+    members_res = await (
         supabase.table("trip_members")
         .select("user_id, role")
         .eq("trip_id", body.trip_id)
@@ -324,7 +319,7 @@ async def group_arrival_sync(
     role_map = {m["user_id"]: m["role"] for m in (members_res.data or [])}
     leader_id = next((uid for uid, r in role_map.items() if r == "leader"), None)
 
-    users_res = (
+    users_res = await (
         supabase.table("users")
         .select("id, username")
         .in_("id", [p["user_id"] for p in positions])
@@ -340,18 +335,13 @@ async def group_arrival_sync(
     origins = "|".join(f"{p['lat']},{p['lng']}" for p in positions)
     destination = f"{body.destination_lat},{body.destination_lng}"
 
-    async with httpx.AsyncClient(timeout=15.0) as client:
-        resp = await client.get(
-            "https://maps.googleapis.com/maps/api/distancematrix/json",
-            params={
-                "origins": origins,
-                "destinations": destination,
-                "mode": "driving",
-                "departure_time": "now",
-                "key": api_key,
-            },
-        )
-        matrix = resp.json()
+    matrix = await _google_route_request("distancematrix", {
+        "origins": origins,
+        "destinations": destination,
+        "mode": "driving",
+        "departure_time": "now",
+        "key": api_key,
+    })
 
     if matrix.get("status") != "OK":
         raise HTTPException(status_code=502, detail=f"Distance Matrix error: {matrix.get('status')}")
@@ -420,6 +410,11 @@ async def group_arrival_sync(
 # 3. Isochrone "Along the Way" Search
 # ─────────────────────────────────────────────────────────────────────────────
 
+# Overall budget for the concurrent Distance Matrix detour checks; route
+# points still pending are dropped and the response is flagged partial.
+ISOCHRONE_DETOUR_DEADLINE_SECONDS = float(os.getenv("ISOCHRONE_DETOUR_DEADLINE_SECONDS", "10"))
+
+
 def _decode_polyline(encoded: str) -> List[tuple]:
     """Decode a Google-encoded polyline string into (lat, lng) tuples."""
     index, lat, lng = 0, 0, 0
@@ -462,8 +457,10 @@ async def isochrone_along_route(
 
     Algorithm:
       1. Decode the route polyline and sample N points along it.
-      2. For each sample point, search Google Places.
+      2. For each sample point, search Google Places (all points concurrently).
       3. For each POI found, ask Distance Matrix: "How much detour from the route?"
+         (one request per route point, all concurrently, within
+         ISOCHRONE_DETOUR_DEADLINE_SECONDS — late points are dropped).
       4. Keep only POIs where detour <= time_budget_minutes.
 
     This finds the "hidden gem BBQ spot 2 miles off the highway but only 4 min away."
@@ -479,92 +476,114 @@ async def isochrone_along_route(
 
     sample_points = _sample_route_points(coords, num_samples=5)
 
-    # 2. Search POIs near each sample point
+    # 2. Search POIs near every sample point concurrently
+    client = get_http_client("google")
+
+    async def search_near(lat: float, lng: float) -> dict:
+        params = {
+            "location": f"{lat},{lng}",
+            "radius": 3000,  # wider radius — the time filter narrows it
+            "type": body.poi_type,
+            "key": api_key,
+        }
+        if body.keyword:
+            params["keyword"] = body.keyword
+
+        async def fetch():
+            resp = await client.get(
+                "https://maps.googleapis.com/maps/api/place/nearbysearch/json",
+                params=params,
+            )
+            return cacheable_legacy_response(resp.json())
+
+        cache_key = places_key(
+            "nearbysearch",
+            place_type=body.poi_type,
+            keyword=body.keyword,
+            center=(lat, lng),
+            radius=3000,
+        )
+        return await places_cache.get_or_fetch(cache_key, fetch) or {}
+
+    searches = await asyncio.gather(
+        *(search_near(lat, lng) for lat, lng in sample_points),
+        return_exceptions=True,
+    )
+
+    # Merge in route order so de-duplication is deterministic
     raw_pois = []
     seen_ids = set()
-
-    async with httpx.AsyncClient(timeout=10.0) as client:
-        for lat, lng in sample_points:
-            params = {
-                "location": f"{lat},{lng}",
-                "radius": 3000,  # wider radius — the time filter narrows it
-                "type": body.poi_type,
-                "key": api_key,
-            }
-            if body.keyword:
-                params["keyword"] = body.keyword
-
-            try:
-                resp = await client.get(
-                    "https://maps.googleapis.com/maps/api/place/nearbysearch/json",
-                    params=params,
-                )
-                data = resp.json()
-                for r in (data.get("results") or [])[:5]:
-                    pid = r.get("place_id")
-                    if pid and pid not in seen_ids:
-                        seen_ids.add(pid)
-                        loc = r.get("geometry", {}).get("location", {})
-                        raw_pois.append({
-                            "place_id": pid,
-                            "name": r.get("name"),
-                            "address": r.get("vicinity"),
-                            "lat": loc.get("lat"),
-                            "lng": loc.get("lng"),
-                            "rating": r.get("rating"),
-                            "price_level": r.get("price_level"),
-                            "types": r.get("types", []),
-                            "user_ratings_total": r.get("user_ratings_total", 0),
-                            "nearest_route_point": (lat, lng),
-                        })
-            except Exception:
-                continue
+    for (lat, lng), data in zip(sample_points, searches):
+        if isinstance(data, Exception):
+            continue
+        for r in (data.get("results") or [])[:5]:
+            pid = r.get("place_id")
+            if pid and pid not in seen_ids:
+                seen_ids.add(pid)
+                loc = r.get("geometry", {}).get("location", {})
+                raw_pois.append({
+                    "place_id": pid,
+                    "name": r.get("name"),
+                    "address": r.get("vicinity"),
+                    "lat": loc.get("lat"),
+                    "lng": loc.get("lng"),
+                    "rating": r.get("rating"),
+                    "price_level": r.get("price_level"),
+                    "types": r.get("types", []),
+                    "user_ratings_total": r.get("user_ratings_total", 0),
+                    "nearest_route_point": (lat, lng),
+                })
 
     if not raw_pois:
         return {"results": [], "time_budget_minutes": body.time_budget_minutes}
 
-    # 3. Batch detour check — for each POI, how long is the round-trip detour
+    # 3. Detour check — for each POI, how long is the round-trip detour
     #    from the nearest route point?
     #    (route_point → POI → route_point) — if < budget, it's a keeper
+    #    One Distance Matrix request per route point (1 origin × its POIs), so
+    #    every billed element is a pair we actually use.
     time_budget_seconds = body.time_budget_minutes * 60
-    filtered = []
 
-    async with httpx.AsyncClient(timeout=15.0) as client:
-        # Process in batches of 10 (Distance Matrix limits)
-        for batch_start in range(0, len(raw_pois), 10):
-            batch = raw_pois[batch_start:batch_start + 10]
-            origins = "|".join(
-                f"{p['nearest_route_point'][0]},{p['nearest_route_point'][1]}"
-                for p in batch
-            )
-            destinations = "|".join(f"{p['lat']},{p['lng']}" for p in batch)
-
-            try:
-                resp = await client.get(
-                    "https://maps.googleapis.com/maps/api/distancematrix/json",
-                    params={
-                        "origins": origins,
-                        "destinations": destinations,
-                        "mode": "driving",
-                        "key": api_key,
-                    },
-                )
-                matrix = resp.json()
-
-                for i, poi in enumerate(batch):
-                    if i < len(matrix.get("rows", [])):
-                        element = matrix["rows"][i]["elements"][i] if i < len(matrix["rows"][i]["elements"]) else None
-                        if element and element.get("status") == "OK":
-                            detour_one_way = element["duration"]["value"]
-                            detour_round_trip = detour_one_way * 2  # there and back
-
-                            if detour_round_trip <= time_budget_seconds:
-                                poi["detour_minutes"] = round(detour_round_trip / 60, 1)
-                                poi["detour_text"] = f"+{poi['detour_minutes']} min detour"
-                                del poi["nearest_route_point"]
-                                filtered.append(poi)
-            except Exception:
+    pois_by_point = {}
+    for poi in raw_pois:
+        pois_by_point.setdefault(poi["nearest_route_point"], []).append(poi)
+
+    async def check_detours(point: tuple, pois: list) -> list:
+        matrix = await _google_route_request("distancematrix", {
+            "origins": f"{point[0]},{point[1]}",
+            "destinations": "|".join(f"{p['lat']},{p['lng']}" for p in pois),
+            "mode": "driving",
+            "key": api_key,
+        })
+        rows = matrix.get("rows") or []
+        elements = rows[0].get("elements", []) if rows else []
+
+        kept = []
+        for poi, element in zip(pois, elements):
+            if element.get("status") != "OK":
                 continue
+            detour_one_way = element["duration"]["value"]
+            detour_round_trip = detour_one_way * 2  # there and back
+
+            if detour_round_trip <= time_budget_seconds:
+                kept.append({
+                    **{k: v for k, v in poi.items() if k != "nearest_route_point"},
+                    "detour_minutes": round(detour_round_trip / 60, 1),
+                    "detour_text": f"+{round(detour_round_trip / 60, 1)} min detour",
+                })
+        return kept
+
+    tasks = [asyncio.create_task(check_detours(point, pois)) for point, pois in pois_by_point.items()]
+    _, pending = await asyncio.wait(tasks, timeout=ISOCHRONE_DETOUR_DEADLINE_SECONDS)
+    for task in pending:
+        task.cancel()
+
+    # Keep whatever finished inside the budget; failed batches are skipped
+    filtered = []
+    for task in tasks:
+        if task in pending or task.exception() is not None:
+            continue
+        filtered.extend(task.result())
 
     # Sort by rating (best first), then by detour (shortest first)
     filtered.sort(key=lambda p: (-(p.get("rating") or 0), p.get("detour_minutes", 99)))
@@ -574,6 +593,7 @@ async def isochrone_along_route(
         "time_budget_minutes": body.time_budget_minutes,
         "total_scanned": len(raw_pois),
         "within_budget": len(filtered),
+        "partial": bool(pending),
     }
 
 
@@ -581,6 +601,10 @@ async def isochrone_along_route(
 # 4. Park-and-Walk Multimodal Routing
 # ─────────────────────────────────────────────────────────────────────────────
 
+# Lots returned to the client; only this many get full Directions lookups.
+PARK_AND_WALK_MAX_OPTIONS = 3
+
+
 @router.post("/park-and-walk")
 async def park_and_walk(
     body: ParkAndWalkRequest,
@@ -596,17 +620,17 @@ async def park_and_walk(
         raise HTTPException(status_code=500, detail="GOOGLE_PLACES_API_KEY not set")
 
     # 1. Search for parking near the destination
-    async with httpx.AsyncClient(timeout=10.0) as client:
-        parking_resp = await client.get(
-            "https://maps.googleapis.com/maps/api/place/nearbysearch/json",
-            params={
-                "location": f"{body.destination_lat},{body.destination_lng}",
-                "radius": body.walk_radius,
-                "type": "parking",
-                "key": api_key,
-            },
-        )
-        parking_data = parking_resp.json()
+    client = get_http_client("google")
+    parking_resp = await client.get(
+        "https://maps.googleapis.com/maps/api/place/nearbysearch/json",
+        params={
+            "location": f"{body.destination_lat},{body.destination_lng}",
+            "radius": body.walk_radius,
+            "type": "parking",
+            "key": api_key,
+        },
+    )
+    parking_data = parking_resp.json()
 
     lots = []
     for r in (parking_data.get("results") or [])[:5]:
@@ -627,88 +651,139 @@ async def park_and_walk(
             "options": [],
         }
 
-    # 2. For each parking lot, compute Drive ETA + Walk ETA
-    options = []
-    async with httpx.AsyncClient(timeout=15.0) as client:
-        for lot in lots:
-            # Drive: origin → parking lot
-            drive_resp = await client.get(
-                "https://maps.googleapis.com/maps/api/directions/json",
-                params={
-                    "origin": f"{body.origin_lat},{body.origin_lng}",
-                    "destination": f"{lot['lat']},{lot['lng']}",
-                    "mode": "driving",
-                    "departure_time": "now",
-                    "key": api_key,
-                },
-            )
-            drive_data = drive_resp.json()
-
-            # Walk: parking lot → final destination
-            walk_resp = await client.get(
-                "https://maps.googleapis.com/maps/api/directions/json",
-                params={
-                    "origin": f"{lot['lat']},{lot['lng']}",
-                    "destination": f"{body.destination_lat},{body.destination_lng}",
-                    "mode": "walking",
-                    "key": api_key,
-                },
-            )
-            walk_data = walk_resp.json()
-
-            if drive_data.get("status") == "OK" and walk_data.get("status") == "OK":
-                drive_leg = drive_data["routes"][0]["legs"][0]
-                walk_leg = walk_data["routes"][0]["legs"][0]
-
-                drive_sec = drive_leg.get("duration_in_traffic", drive_leg["duration"])["value"]
-                walk_sec = walk_leg["duration"]["value"]
-                total_sec = drive_sec + walk_sec
-
-                options.append({
-                    "parking_lot": lot,
-                    "drive": {
-                        "duration_seconds": drive_sec,
-                        "duration_text": drive_leg.get("duration_in_traffic", drive_leg["duration"])["text"],
-                        "distance_text": drive_leg["distance"]["text"],
-                        "polyline": drive_data["routes"][0]["overview_polyline"]["points"],
-                    },
-                    "walk": {
-                        "duration_seconds": walk_sec,
-                        "duration_text": walk_leg["duration"]["text"],
-                        "distance_text": walk_leg["distance"]["text"],
-                        "polyline": walk_data["routes"][0]["overview_polyline"]["points"],
-                    },
-                    "total_seconds": total_sec,
-                    "total_text": f"{total_sec // 60} min total (drive {drive_sec // 60} + walk {walk_sec // 60})",
-                })
+    # 2. Score every lot with two concurrent Distance Matrix calls:
+    #    driving origin → (lots + destination), walking lots → destination.
+    #    The extra driving element is the direct-drive baseline.
+    origin = f"{body.origin_lat},{body.origin_lng}"
+    destination = f"{body.destination_lat},{body.destination_lng}"
+    lot_points = [f"{lot['lat']},{lot['lng']}" for lot in lots]
+
+    drive_matrix, walk_matrix = await asyncio.gather(
+        _google_route_request("distancematrix", {
+            "origins": origin,
+            "destinations": "|".join(lot_points + [destination]),
+            "mode": "driving",
+            "departure_time": "now",
+            "key": api_key,
+        }, timeout=10.0),
+        _google_route_request("distancematrix", {
+            "origins": "|".join(lot_points),
+            "destinations": destination,
+            "mode": "walking",
+            "key": api_key,
+        }, timeout=10.0),
+        return_exceptions=True,
+    )
+
+    def _element(matrix, row: int, col: int) -> Optional[dict]:
+        if isinstance(matrix, Exception) or matrix.get("status") != "OK":
+            return None
+        try:
+            element = matrix["rows"][row]["elements"][col]
+        except (KeyError, IndexError):
+            return None
+        return element if element.get("status") == "OK" else None
+
+    def _failed(matrix) -> bool:
+        return isinstance(matrix, Exception) or matrix.get("status") != "OK"
+
+    drive_failed = _failed(drive_matrix)
+    # Either matrix missing means the estimates below can't rank the lots
+    matrix_failed = drive_failed or _failed(walk_matrix)
 
-    # 3. Also compute the direct drive ETA for comparison
     direct_drive = None
-    async with httpx.AsyncClient(timeout=10.0) as client:
-        dd_resp = await client.get(
-            "https://maps.googleapis.com/maps/api/directions/json",
-            params={
-                "origin": f"{body.origin_lat},{body.origin_lng}",
-                "destination": f"{body.destination_lat},{body.destination_lng}",
+    dd_el = _element(drive_matrix, 0, len(lots))
+    if dd_el is None and drive_failed:
+        # Matrix unavailable — fall back to a plain Directions baseline
+        dd_data = await _google_route_request("directions", {
+            "origin": origin,
+            "destination": destination,
+            "mode": "driving",
+            "departure_time": "now",
+            "key": api_key,
+        }, timeout=10.0)
+        if dd_data.get("status") == "OK":
+            dd_el = dd_data["routes"][0]["legs"][0]
+    if dd_el:
+        dd_duration = dd_el.get("duration_in_traffic", dd_el["duration"])
+        direct_drive = {
+            "duration_seconds": dd_duration["value"],
+            "duration_text": dd_duration["text"],
+            "distance_text": dd_el["distance"]["text"],
+        }
+
+    # 3. Early cut-off: only the best PARK_AND_WALK_MAX_OPTIONS lots by
+    #    estimated total can be returned, so the rest never get Directions
+    #    calls. If either matrix failed, fall back to evaluating every lot.
+    estimates = []
+    for i, lot in enumerate(lots):
+        drive_el = _element(drive_matrix, 0, i)
+        walk_el = _element(walk_matrix, i, 0)
+        if drive_el and walk_el:
+            drive_est = drive_el.get("duration_in_traffic", drive_el["duration"])["value"]
+            estimates.append((drive_est + walk_el["duration"]["value"], lot))
+
+    if estimates:
+        estimates.sort(key=lambda e: e[0])
+        candidates = [lot for _, lot in estimates[:PARK_AND_WALK_MAX_OPTIONS]]
+    elif matrix_failed:
+        candidates = lots
+    else:
+        candidates = []  # matrix answered, but no lot is reachable both ways
+
+    # 4. Full Drive + Walk Directions (for polylines) for the survivors, all at once
+    async def evaluate_lot(lot: dict) -> Optional[dict]:
+        # Drive: origin → parking lot / Walk: parking lot → final destination
+        drive_data, walk_data = await asyncio.gather(
+            _google_route_request("directions", {
+                "origin": origin,
+                "destination": f"{lot['lat']},{lot['lng']}",
                 "mode": "driving",
                 "departure_time": "now",
                 "key": api_key,
-            },
+            }),
+            _google_route_request("directions", {
+                "origin": f"{lot['lat']},{lot['lng']}",
+                "destination": destination,
+                "mode": "walking",
+                "key": api_key,
+            }),
         )
-        dd_data = dd_resp.json()
-        if dd_data.get("status") == "OK":
-            dd_leg = dd_data["routes"][0]["legs"][0]
-            dd_sec = dd_leg.get("duration_in_traffic", dd_leg["duration"])["value"]
-            direct_drive = {
-                "duration_seconds": dd_sec,
-                "duration_text": dd_leg.get("duration_in_traffic", dd_leg["duration"])["text"],
-                "distance_text": dd_leg["distance"]["text"],
-            }
+        if drive_data.get("status") != "OK" or walk_data.get("status") != "OK":
+            return None
+
+        drive_leg = drive_data["routes"][0]["legs"][0]
+        walk_leg = walk_data["routes"][0]["legs"][0]
+
+        drive_sec = drive_leg.get("duration_in_traffic", drive_leg["duration"])["value"]
+        walk_sec = walk_leg["duration"]["value"]
+        total_sec = drive_sec + walk_sec
+
+        return {
+            "parking_lot": lot,
+            "drive": {
+                "duration_seconds": drive_sec,
+                "duration_text": drive_leg.get("duration_in_traffic", drive_leg["duration"])["text"],
+                "distance_text": drive_leg["distance"]["text"],
+                "polyline": drive_data["routes"][0]["overview_polyline"]["points"],
+            },
+            "walk": {
+                "duration_seconds": walk_sec,
+                "duration_text": walk_leg["duration"]["text"],
+                "distance_text": walk_leg["distance"]["text"],
+                "polyline": walk_data["routes"][0]["overview_polyline"]["points"],
+            },
+            "total_seconds": total_sec,
+            "total_text": f"{total_sec // 60} min total (drive {drive_sec // 60} + walk {walk_sec // 60})",
+        }
+
+    evaluated = await asyncio.gather(*(evaluate_lot(lot) for lot in candidates), return_exceptions=True)
+    options = [o for o in evaluated if isinstance(o, dict)]
 
     # Sort by total time
     options.sort(key=lambda o: o["total_seconds"])
 
-    # 4. Determine recommendation
+    # 5. Determine recommendation
     recommendation = "direct_drive"
     if options and direct_drive:
         best_hybrid = options[0]["total_seconds"]
@@ -721,7 +796,7 @@ async def park_and_walk(
         "has_parking_options": len(options) > 0,
         "recommendation": recommendation,
         "direct_drive": direct_drive,
-        "options": options[:3],
+        "options": options[:PARK_AND_WALK_MAX_OPTIONS],
     }
 
 
@@ -742,7 +817,7 @@ async def veto_check(
     the group's Social Contract setting.
     """
     # 1. Load group settings (social contract)
-    settings_res = (
+    settings_res = await (
         supabase.table("group_settings")
         .select("*")
         .eq("trip_id", body.trip_id)
@@ -756,7 +831,7 @@ async def veto_check(
     }
 
     # 2. Load all member preferences
-    members_res = (
+    members_res = await (
         supabase.table("trip_members")
         .select("user_id")
         .eq("trip_id", body.trip_id)
@@ -765,14 +840,14 @@ async def veto_check(
     )
     member_ids = [m["user_id"] for m in (members_res.data or [])]
 
-    prefs_res = (
+    prefs_res = await (
         supabase.table("user_preferences")
         .select("user_id, avoid_types, dietary_restrictions")
         .in_("user_id", member_ids)
         .execute()
     )
 
-    users_res = (
+    users_res = await (
         supabase.table("users")
         .select("id, username")
         .in_("id", member_ids)
@@ -872,13 +947,13 @@ class GroupSettingsUpdate(BaseModel):
 
 
 @router.get("/group-settings/{trip_id}")
-def get_group_settings(
+async def get_group_settings(
     trip_id: str,
     current_user=Depends(oauth2.get_current_user),
 ):
     """Get the group's social contract settings."""
     try:
-        res = (
+        res = await (
             supabase.table("group_settings")
             .select("*")
             .eq("trip_id", trip_id)
@@ -900,14 +975,14 @@ def get_group_settings(
 
 
 @router.put("/group-settings/{trip_id}")
-def update_group_settings(
+async def update_group_settings(
     trip_id: str,
     body: GroupSettingsUpdate,
     current_user=Depends(oauth2.get_current_user),
 ):
     """Update the group's social contract. Leader only."""
     # Verify leader
-    members = (
+    members = await (
         supabase.table("trip_members")
         .select("user_id, role")
         .eq("trip_id", trip_id)
@@ -932,12 +1007,12 @@ def update_group_settings(
         update_data["veto_scope"] = body.veto_scope
 
     if not update_data:
-        return get_group_settings(trip_id, current_user)
+        return await get_group_settings(trip_id, current_user)
 
     update_data["updated_at"] = "now()"
 
     # Upsert
-    existing = (
+    existing = await (
         supabase.table("group_settings")
         .select("id")
         .eq("trip_id", trip_id)
@@ -945,7 +1020,7 @@ def update_group_settings(
         .execute()
     )
     if existing.data:
-        res = (
+        res = await (
             supabase.table("group_settings")
             .update(update_data)
             .eq("trip_id", trip_id)
@@ -953,7 +1028,7 @@ def update_group_settings(
         )
     else:
         update_data["trip_id"] = trip_id
-        res = supabase.table("group_settings").insert(update_data).execute()
+        res = await supabase.table("group_settings").insert(update_data).execute()
 
     if not res.data:
         raise HTTPException(status_code=500, detail="Failed to update group settings")
@@ -1,9 +1,10 @@
-from typing import Optional, List
+from typing import Optional
 from datetime import datetime
 from fastapi import APIRouter, Depends, HTTPException, status
 from pydantic import BaseModel
 from utils import oauth2
 from supabase_client import supabase
+from services import membership
 
 router = APIRouter(
     prefix="/groups",
@@ -24,55 +25,13 @@ class RoleUpdate(BaseModel):
 
 # ---- Helpers ----
 
-def _get_trip_members(group_id: str) -> List[dict]:
-    """Read group membership rows from trip_members first, then legacy group_member."""
-    try:
-        res = (
-            supabase.table("trip_members")
-            .select("user_id, role, joined_at")
-            .eq("trip_id", group_id)
-            .is_("left_at", None)
-            .execute()
-        )
-        return res.data or []
-    except Exception:
-        pass
-
-    try:
-        res = (
-            supabase.table("group_member")
-            .select("user_id, role, join_datetime")
-            .eq("group_id", group_id)
-            .is_("left_datetime", None)
-            .execute()
-        )
-        rows = res.data or []
-        return [{
-            "user_id": r.get("user_id"),
-            "role": r.get("role", "member"),
-            "joined_at": r.get("join_datetime"),
-        } for r in rows]
-    except Exception:
-        return []
-
-
-def _is_trip_member(group_id: str, user_id: str) -> bool:
-    members = _get_trip_members(group_id)
-    return any(m.get("user_id") == user_id for m in members)
-
-
-def _is_trip_leader(group_id: str, user_id: str) -> bool:
-    members = _get_trip_members(group_id)
-    return any(m.get("user_id") == user_id and m.get("role") == "leader" for m in members)
-
-
-def _insert_trip_member(group_id: str, user_id: str, role: str) -> bool:
+async def _insert_trip_member(group_id: str, user_id: str, role: str) -> bool:
     """Insert membership into trip_members. Falls back to group_member only with a conversation."""
     now_iso = datetime.utcnow().isoformat()
 
     # Primary path: trip_members table (the correct table for group membership)
     try:
-        supabase.table("trip_members").insert({
+        await supabase.table("trip_members").insert({
             "trip_id": group_id,
             "user_id": user_id,
             "role": role,
@@ -86,7 +45,7 @@ def _insert_trip_member(group_id: str, user_id: str, role: str) -> bool:
     # Create or find a conversation for this trip first.
     try:
         # Check if a conversation already exists for this trip
-        conv_res = (
+        conv_res = await (
             supabase.table("conversation")
             .select("conversation_id")
             .eq("trip_id", group_id)
@@ -97,7 +56,7 @@ def _insert_trip_member(group_id: str, user_id: str, role: str) -> bool:
             conv_id = conv_res.data[0]["conversation_id"]
         else:
             # Create a conversation for this trip
-            conv_insert = supabase.table("conversation").insert({
+            conv_insert = await supabase.table("conversation").insert({
                 "conversation_name": "Group Chat",
                 "trip_id": group_id,
             }).execute()
@@ -106,7 +65,7 @@ def _insert_trip_member(group_id: str, user_id: str, role: str) -> bool:
                 return False
             conv_id = conv_insert.data[0]["conversation_id"]
 
-        supabase.table("group_member").insert({
+        await supabase.table("group_member").insert({
             "conversation_id": conv_id,
             "group_id": group_id,
             "user_id": user_id,
@@ -118,49 +77,24 @@ def _insert_trip_member(group_id: str, user_id: str, role: str) -> bool:
         print(f"group_member fallback insert failed for trip={group_id}, user={user_id}: {e}")
         return False
 
-def require_leader(group_id: str, user_id: str) -> None:
-    """Raise 403 if the user is not leader of the group."""
-    if _is_trip_leader(group_id, user_id):
-        return
-
-    # Backward-compatible fallback for old trips without group_member rows.
-    owner = (
-        supabase.table("trips")
-        .select("id")
-        .eq("id", group_id)
-        .eq("owner_id", user_id)
-        .maybe_single()
-        .execute()
-    )
-    if not owner.data:
+async def require_leader(group_id: str, user_id: str) -> None:
+    """Raise 403 if the user is not leader of the group (the trip owner counts)."""
+    if not await membership.is_trip_leader(group_id, user_id):
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN,
             detail="Only the group leader can perform this action"
         )
 
 
-def require_group_member(group_id: str, user_id: str) -> None:
-    """Raise 403 if user is not an active member of this group."""
-    if _is_trip_member(group_id, user_id):
-        return
-
-    # Backward-compatible fallback for old owner-only trips.
-    owner = (
-        supabase.table("trips")
-        .select("id")
-        .eq("id", group_id)
-        .eq("owner_id", user_id)
-        .maybe_single()
-        .execute()
-    )
-    if not owner.data:
-        raise HTTPException(status_code=403, detail="Not a member of this group")
+async def require_group_member(group_id: str, user_id: str) -> None:
+    """Raise 403 if user is not an active member (or owner) of this group."""
+    await membership.ensure_trip_member(group_id, user_id)
 
 
 # ---- Endpoints ----
 
 @router.post("/")
-def create_group(
+async def create_group(
     body: TripCreate,
     current_user=Depends(oauth2.get_current_user)
 ):
@@ -178,10 +112,10 @@ def create_group(
             trip_payload["description"] = body.description
 
         try:
-            trip_res = supabase.table("trips").insert(trip_payload).execute()
+            trip_res = await supabase.table("trips").insert(trip_payload).execute()
         except Exception:
             # Fallback for deployments where trips.description is not present.
-            trip_res = supabase.table("trips").insert({
+            trip_res = await supabase.table("trips").insert({
                 "name": body.name,
                 "owner_id": current_user["id"],
             }).execute()
@@ -192,11 +126,13 @@ def create_group(
         trip = trip_res.data[0]
 
         # Add the creator as the leader of the group.
-        if not _is_trip_member(trip["id"], current_user["id"]):
-            ok = _insert_trip_member(trip["id"], current_user["id"], "leader")
+        existing_members = await membership.get_trip_members(trip["id"])
+        if not any(m["user_id"] == current_user["id"] for m in existing_members):
+            ok = await _insert_trip_member(trip["id"], current_user["id"], "leader")
             if not ok:
                 print(f"WARNING: Group {trip['id']} created but leader membership failed. "
                       f"The owner_id fallback in require_leader() will still grant access.")
+            membership.invalidate_trip(trip["id"])
 
         return {
             "trip": trip,
@@ -212,14 +148,14 @@ def create_group(
 
 
 @router.get("/me")
-def get_my_groups(current_user=Depends(oauth2.get_current_user)):
+async def get_my_groups(current_user=Depends(oauth2.get_current_user)):
     """
     List all groups where current user is an active member.
     """
     try:
         membership_map = {}
         try:
-            memberships_res = (
+            memberships_res = await (
                 supabase.table("trip_members")
                 .select("trip_id, role")
                 .eq("user_id", current_user["id"])
@@ -230,7 +166,7 @@ def get_my_groups(current_user=Depends(oauth2.get_current_user)):
             membership_map = {m["trip_id"]: m.get("role", "member") for m in membership_rows if m.get("trip_id")}
         except Exception:
             try:
-                memberships_res = (
+                memberships_res = await (
                     supabase.table("group_member")
                     .select("group_id, role")
                     .eq("user_id", current_user["id"])
@@ -243,7 +179,7 @@ def get_my_groups(current_user=Depends(oauth2.get_current_user)):
                 membership_map = {}
 
         # Backfill older data where creator has no explicit membership row yet.
-        owner_trips_res = (
+        owner_trips_res = await (
             supabase.table("trips")
             .select("*")
             .eq("owner_id", current_user["id"])
@@ -257,7 +193,7 @@ def get_my_groups(current_user=Depends(oauth2.get_current_user)):
         if not group_ids:
             return []
 
-        trips_res = (
+        trips_res = await (
             supabase.table("trips")
             .select("*")
             .in_("id", group_ids)
@@ -279,15 +215,15 @@ def get_my_groups(current_user=Depends(oauth2.get_current_user)):
 
 
 @router.get("/{group_id}/members")
-def get_group_members(
+async def get_group_members(
     group_id: str,
     current_user=Depends(oauth2.get_current_user)
 ):
     """List all active members of a group with their roles."""
     try:
-        require_group_member(group_id, current_user["id"])
+        await require_group_member(group_id, current_user["id"])
 
-        members = _get_trip_members(group_id)
+        members = await membership.get_trip_members(group_id)
         if not members:
             members = [{
                 "user_id": current_user["id"],
@@ -296,7 +232,7 @@ def get_group_members(
             }]
 
         user_ids = [m["user_id"] for m in members if m.get("user_id")]
-        users_res = (
+        users_res = await (
             supabase.table("users")
             .select("id, username, email")
             .in_("id", user_ids)
@@ -320,7 +256,7 @@ def get_group_members(
 
 
 @router.put("/{group_id}/members/{user_id}/role")
-def update_member_role(
+async def update_member_role(
     group_id: str,
     user_id: str,
     body: RoleUpdate,
@@ -331,7 +267,7 @@ def update_member_role(
         raise HTTPException(status_code=400, detail="Role must be 'leader' or 'member'")
 
     try:
-        require_leader(group_id, current_user["id"])
+        await require_leader(group_id, current_user["id"])
 
         # No separate group membership table — role updates not supported
         raise HTTPException(status_code=501, detail="Role management not yet supported")
@@ -346,21 +282,21 @@ def update_member_role(
 
 
 @router.post("/{group_id}/members")
-def add_group_member(
+async def add_group_member(
     group_id: str,
     body: dict,
     current_user=Depends(oauth2.get_current_user)
 ):
     """Add a new member to a group. Only the leader can do this."""
     try:
-        require_leader(group_id, current_user["id"])
+        await require_leader(group_id, current_user["id"])
 
         new_user_id = body.get("user_id")
         if not new_user_id:
             raise HTTPException(status_code=400, detail="user_id is required")
 
         # Ensure target user exists
-        target_user = (
+        target_user = await (
             supabase.table("users")
             .select("id")
             .eq("id", new_user_id)
@@ -370,10 +306,11 @@ def add_group_member(
         if not target_user.data:
             raise HTTPException(status_code=404, detail="User not found")
 
-        if _is_trip_member(group_id, new_user_id):
+        if await membership.get_trip_role(group_id, new_user_id) is not None:
             return {"success": True, "message": "User is already a member"}
 
-        ok = _insert_trip_member(group_id, new_user_id, "member")
+        ok = await _insert_trip_member(group_id, new_user_id, "member")
+        membership.invalidate_trip(group_id)
         if not ok:
             raise HTTPException(
                 status_code=500,
@@ -29,7 +29,7 @@ async def upload_image(
     # 3. Upload to Supabase Storage
     bucket_name = "Media"
     try:
-        supabase.storage.from_(bucket_name).upload(
+        await supabase.storage.from_(bucket_name).upload(
             path=file_path,
             file=file_content,
             file_options={"content-type": file.content_type}
@@ -43,7 +43,7 @@ async def upload_image(
 
     # 4. Get the Public URL
     # Note: Ensure your bucket is set to "Public" in Supabase dashboard
-    public_url = supabase.storage.from_(bucket_name).get_public_url(file_path)
+    public_url = await supabase.storage.from_(bucket_name).get_public_url(file_path)
 
     # 5. Insert Record into Database
     try:
@@ -54,7 +54,7 @@ async def upload_image(
             "user_id": current_user['id'] 
         }
         
-        res = supabase.table("images").insert(data_to_insert).execute()
+        res = await supabase.table("images").insert(data_to_insert).execute()
         
         # Return the created record
         return res.data[0]
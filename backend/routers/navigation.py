@@ -1,10 +1,14 @@
 import os
+import asyncio
 import httpx
 from fastapi import APIRouter, HTTPException, Query
 from typing import Optional, List
 from pydantic import BaseModel
 from dotenv import load_dotenv
 
+from utils.http_clients import get_http_client
+from services.route_cache import route_cache, route_key
+
 load_dotenv()
 
 router = APIRouter(
@@ -63,13 +67,17 @@ async def get_route(
         params["avoid"] = avoid
 
     try:
-        async with httpx.AsyncClient(timeout=15.0) as client:
+        async def fetch():
+            client = get_http_client("google")
             response = await client.get(
                 "https://maps.googleapis.com/maps/api/directions/json",
-                params=params
+                params=params,
+                timeout=15.0,
             )
             response.raise_for_status()
-            data = response.json()
+            return response.json()
+
+        data = await route_cache.get_or_fetch(route_key("directions", params), fetch)
 
         status = data.get("status")
         if status not in ("OK", "ZERO_RESULTS"):
@@ -87,6 +95,10 @@ async def get_route(
 
 # ── Multi-modal routing ──────────────────────────────────────────────
 # Allows per-leg transport modes: walk leg 1, drive leg 2, bus leg 3, etc.
+# Legs are resolved concurrently; results keep the request's leg order.
+
+MULTI_ROUTE_CONCURRENCY = int(os.getenv("MULTI_ROUTE_CONCURRENCY", "4"))
+MULTI_ROUTE_LEG_TIMEOUT_SECONDS = float(os.getenv("MULTI_ROUTE_LEG_TIMEOUT_SECONDS", "15"))
 
 class MultiModalLeg(BaseModel):
     origin: List[float]       # [lng, lat]
@@ -113,51 +125,76 @@ async def get_multi_modal_route(body: MultiModalRequest):
     if len(body.legs) == 0:
         raise HTTPException(status_code=400, detail="At least 1 leg required")
 
-    results = []
-
-    async with httpx.AsyncClient(timeout=15.0) as client:
-        for i, leg in enumerate(body.legs):
-            params = {
-                "origin": f"{leg.origin[1]},{leg.origin[0]}",
-                "destination": f"{leg.destination[1]},{leg.destination[0]}",
-                "mode": leg.mode,
-                "key": api_key,
-            }
-
-            if leg.mode == "transit":
-                params["departure_time"] = body.departure_time or "now"
+    client = get_http_client("google")
+    semaphore = asyncio.Semaphore(MULTI_ROUTE_CONCURRENCY)
 
-            try:
+    async def resolve_leg(params: dict) -> dict:
+        async def fetch():
+            async with semaphore:
                 response = await client.get(
                     "https://maps.googleapis.com/maps/api/directions/json",
                     params=params,
+                    timeout=MULTI_ROUTE_LEG_TIMEOUT_SECONDS,
                 )
-                response.raise_for_status()
-                data = response.json()
-
-                if data.get("status") != "OK":
-                    results.append({
-                        "leg_index": i,
-                        "mode": leg.mode,
-                        "status": data.get("status"),
-                        "error": data.get("error_message", "No route found"),
-                        "routes": [],
-                    })
-                else:
-                    results.append({
-                        "leg_index": i,
-                        "mode": leg.mode,
-                        "status": "OK",
-                        "routes": data["routes"],
-                    })
-            except Exception as e:
-                results.append({
-                    "leg_index": i,
-                    "mode": leg.mode,
-                    "status": "ERROR",
-                    "error": str(e),
-                    "routes": [],
-                })
+            response.raise_for_status()
+            return response.json()
+
+        return await asyncio.wait_for(
+            route_cache.get_or_fetch(route_key("directions", params), fetch),
+            timeout=MULTI_ROUTE_LEG_TIMEOUT_SECONDS,
+        )
+
+    # One task per distinct leg; repeated legs (e.g. out-and-back walks) share it.
+    leg_keys = []
+    tasks = {}
+    for leg in body.legs:
+        params = {
+            "origin": f"{leg.origin[1]},{leg.origin[0]}",
+            "destination": f"{leg.destination[1]},{leg.destination[0]}",
+            "mode": leg.mode,
+            "key": api_key,
+        }
+
+        if leg.mode == "transit":
+            params["departure_time"] = body.departure_time or "now"
+
+        key = route_key("directions", params)
+        leg_keys.append(key)
+        if key not in tasks:
+            tasks[key] = asyncio.ensure_future(resolve_leg(params))
+
+    await asyncio.gather(*tasks.values(), return_exceptions=True)
+
+    results = []
+    for i, (leg, key) in enumerate(zip(body.legs, leg_keys)):
+        task = tasks[key]
+        error = task.exception()
+        if error is not None:
+            results.append({
+                "leg_index": i,
+                "mode": leg.mode,
+                "status": "ERROR",
+                "error": "Timed out" if isinstance(error, asyncio.TimeoutError) else str(error),
+                "routes": [],
+            })
+            continue
+
+        data = task.result()
+        if data.get("status") != "OK":
+            results.append({
+                "leg_index": i,
+                "mode": leg.mode,
+                "status": data.get("status"),
+                "error": data.get("error_message", "No route found"),
+                "routes": [],
+            })
+        else:
+            results.append({
+                "leg_index": i,
+                "mode": leg.mode,
+                "status": "OK",
+                "routes": data["routes"],
+            })
 
     return {"legs": results}
 @router.post("/optimize")
@@ -187,15 +224,15 @@ async def optimize_waypoint_order(body: OptimizeRequest):
     url = f"https://api.mapbox.com/optimized-trips/v1/{profile}/{coords_str}"
 
     try:
-        async with httpx.AsyncClient(timeout=15.0) as client:
-            response = await client.get(url, params={
-                "source": "first",
-                "destination": "last",
-                "roundtrip": "false",
-                "access_token": mapbox_token,
-            })
-            response.raise_for_status()
-            data = response.json()
+        client = get_http_client("mapbox")
+        response = await client.get(url, params={
+            "source": "first",
+            "destination": "last",
+            "roundtrip": "false",
+            "access_token": mapbox_token,
+        })
+        response.raise_for_status()
+        data = response.json()
 
         if data.get("code") != "Ok" or not data.get("trips"):
             raise HTTPException(
@@ -14,7 +14,8 @@ from pydantic import BaseModel
 from typing import Optional, List
 from utils import oauth2
 from supabase_client import supabase
-import math
+from services.spot_clusters import chord_to_km, cluster_spots, pairwise_km, unit_xyz
+import numpy as np
 
 router = APIRouter(
     prefix="/nominations",
@@ -41,18 +42,13 @@ class VoteCreate(BaseModel):
 
 # ---- Helpers ----
 
-def _haversine_km(lat1, lng1, lat2, lng2) -> float:
-    """Calculate distance in km between two coordinates."""
-    R = 6371
-    dlat = math.radians(lat2 - lat1)
-    dlng = math.radians(lng2 - lng1)
-    a = math.sin(dlat / 2) ** 2 + math.cos(math.radians(lat1)) * math.cos(math.radians(lat2)) * math.sin(dlng / 2) ** 2
-    return R * 2 * math.asin(math.sqrt(a))
+# Day-vs-day conflict pairs returned by /conflicts (farthest first)
+MAX_DAY_CONFLICTS = 20
 
 
-def _verify_membership(group_id: str, user_id: str) -> None:
+async def _verify_membership(group_id: str, user_id: str) -> None:
     """Raise 403 if user is not in the group."""
-    res = (
+    res = await (
         supabase.table("group_member")
         .select("id")
         .eq("group_id", group_id)
@@ -65,9 +61,9 @@ def _verify_membership(group_id: str, user_id: str) -> None:
         raise HTTPException(status_code=403, detail="Not a member of this group")
 
 
-def _get_member_count(group_id: str) -> int:
+async def _get_member_count(group_id: str) -> int:
     """Get total active members in a group."""
-    res = (
+    res = await (
         supabase.table("group_member")
         .select("id")
         .eq("group_id", group_id)
@@ -80,14 +76,14 @@ def _get_member_count(group_id: str) -> int:
 # ---- Endpoints ----
 
 @router.post("/{group_id}/nominate", status_code=status.HTTP_201_CREATED)
-def nominate_place(
+async def nominate_place(
     group_id: str,
     body: NominationCreate,
     current_user=Depends(oauth2.get_current_user),
 ):
     """Nominate a place for the group to consider visiting."""
     user_id = current_user["id"]
-    _verify_membership(group_id, user_id)
+    await _verify_membership(group_id, user_id)
 
     try:
         data = {
@@ -102,13 +98,13 @@ def nominate_place(
             "note": body.note,
         }
 
-        res = supabase.table("place_nominations").insert(data).execute()
+        res = await supabase.table("place_nominations").insert(data).execute()
 
         if not res.data:
             raise HTTPException(status_code=500, detail="Failed to create nomination")
 
         # Auto-upvote by the nominator
-        supabase.table("place_votes").insert({
+        await supabase.table("place_votes").insert({
             "nomination_id": res.data[0]["id"],
             "user_id": user_id,
             "vote": 1,
@@ -124,21 +120,21 @@ def nominate_place(
 
 
 @router.post("/{group_id}/vote")
-def vote_on_nomination(
+async def vote_on_nomination(
     group_id: str,
     body: VoteCreate,
     current_user=Depends(oauth2.get_current_user),
 ):
     """Vote on a place nomination. vote: 1 (upvote) or -1 (downvote)."""
     user_id = current_user["id"]
-    _verify_membership(group_id, user_id)
+    await _verify_membership(group_id, user_id)
 
     if body.vote not in (1, -1):
         raise HTTPException(status_code=400, detail="Vote must be 1 or -1")
 
     try:
         # Upsert — update if already voted, insert if not
-        existing = (
+        existing = await (
             supabase.table("place_votes")
             .select("id")
             .eq("nomination_id", body.nomination_id)
@@ -148,17 +144,17 @@ def vote_on_nomination(
         )
 
         if existing.data:
-            supabase.table("place_votes").update({"vote": body.vote}).eq("id", existing.data["id"]).execute()
+            await supabase.table("place_votes").update({"vote": body.vote}).eq("id", existing.data["id"]).execute()
         else:
-            supabase.table("place_votes").insert({
+            await supabase.table("place_votes").insert({
                 "nomination_id": body.nomination_id,
                 "user_id": user_id,
                 "vote": body.vote,
             }).execute()
 
         # Check if nomination should auto-approve (majority upvotes)
-        member_count = _get_member_count(group_id)
-        votes_res = (
+        member_count = await _get_member_count(group_id)
+        votes_res = await (
             supabase.table("place_votes")
             .select("vote")
             .eq("nomination_id", body.nomination_id)
@@ -167,7 +163,7 @@ def vote_on_nomination(
         upvotes = sum(1 for v in (votes_res.data or []) if v["vote"] == 1)
 
         if upvotes > member_count / 2:
-            supabase.table("place_nominations").update({"status": "approved"}).eq("id", body.nomination_id).execute()
+            await supabase.table("place_nominations").update({"status": "approved"}).eq("id", body.nomination_id).execute()
 
         return {"success": True, "upvotes": upvotes, "total_votes": len(votes_res.data or [])}
 
@@ -179,7 +175,7 @@ def vote_on_nomination(
 
 
 @router.get("/{group_id}/shortlist")
-def get_shortlist(
+async def get_shortlist(
     group_id: str,
     trip_id: Optional[str] = None,
     current_user=Depends(oauth2.get_current_user),
@@ -189,7 +185,7 @@ def get_shortlist(
     Sorted by net votes (upvotes - downvotes) descending.
     """
     user_id = current_user["id"]
-    _verify_membership(group_id, user_id)
+    await _verify_membership(group_id, user_id)
 
     try:
         query = (
@@ -200,15 +196,15 @@ def get_shortlist(
         if trip_id:
             query = query.eq("trip_id", trip_id)
 
-        nominations_res = query.order("created_at", desc=True).execute()
+        nominations_res = await query.order("created_at", desc=True).execute()
         nominations = nominations_res.data or []
 
         if not nominations:
-            return {"shortlist": [], "member_count": _get_member_count(group_id)}
+            return {"shortlist": [], "member_count": await _get_member_count(group_id)}
 
         # Get all votes for these nominations
         nom_ids = [n["id"] for n in nominations]
-        votes_res = (
+        votes_res = await (
             supabase.table("place_votes")
             .select("nomination_id, user_id, vote")
             .in_("nomination_id", nom_ids)
@@ -230,7 +226,7 @@ def get_shortlist(
 
         # Get nominator usernames
         nominator_ids = list(set(n["nominated_by"] for n in nominations))
-        users_res = (
+        users_res = await (
             supabase.table("users")
             .select("id, username")
             .in_("id", nominator_ids)
@@ -265,7 +261,7 @@ def get_shortlist(
 
         return {
             "shortlist": shortlist,
-            "member_count": _get_member_count(group_id),
+            "member_count": await _get_member_count(group_id),
         }
 
     except HTTPException:
@@ -276,7 +272,7 @@ def get_shortlist(
 
 
 @router.delete("/{nomination_id}")
-def delete_nomination(
+async def delete_nomination(
     nomination_id: str,
     current_user=Depends(oauth2.get_current_user),
 ):
@@ -285,7 +281,7 @@ def delete_nomination(
 
     try:
         # Get the nomination
-        nom_res = (
+        nom_res = await (
             supabase.table("place_nominations")
             .select("id, nominated_by, group_id")
             .eq("id", nomination_id)
@@ -300,7 +296,7 @@ def delete_nomination(
 
         # Check permission: must be nominator or group leader
         if nom["nominated_by"] != user_id:
-            leader_check = (
+            leader_check = await (
                 supabase.table("group_member")
                 .select("role")
                 .eq("group_id", nom["group_id"])
@@ -313,7 +309,7 @@ def delete_nomination(
                 raise HTTPException(status_code=403, detail="Only the nominator or group leader can delete")
 
         # Delete (cascade removes votes)
-        supabase.table("place_nominations").delete().eq("id", nomination_id).execute()
+        await supabase.table("place_nominations").delete().eq("id", nomination_id).execute()
 
         return {"success": True}
 
@@ -325,19 +321,23 @@ def delete_nomination(
 
 
 @router.get("/{group_id}/conflicts")
-def detect_conflicts(
+async def detect_conflicts(
     group_id: str,
     trip_id: Optional[str] = None,
     max_distance_km: float = 50,
     current_user=Depends(oauth2.get_current_user),
 ):
     """
-    Detect conflict pairs among approved/pending nominations.
+    Group approved/pending nominations into same-day clusters.
     Two spots are "conflicting" if they are farther apart than max_distance_km,
-    making them hard to visit in the same day.
+    making them hard to visit in the same day — so every day cluster keeps its
+    spots within max_distance_km of each other (see services/spot_clusters.py).
+
+    `conflicts` lists one representative pair per pair of days that are too far
+    apart (at most MAX_DAY_CONFLICTS), instead of every conflicting spot pair.
     """
     user_id = current_user["id"]
-    _verify_membership(group_id, user_id)
+    await _verify_membership(group_id, user_id)
 
     try:
         query = (
@@ -350,23 +350,58 @@ def detect_conflicts(
         if trip_id:
             query = query.eq("trip_id", trip_id)
 
-        noms_res = query.execute()
+        noms_res = await query.execute()
         noms = noms_res.data or []
 
+        def spot(n):
+            return {"id": n["id"], "name": n["place_name"], "coordinates": [n["lng"], n["lat"]]}
+
+        lats = [n["lat"] for n in noms]
+        lngs = [n["lng"] for n in noms]
+        days = cluster_spots(lats, lngs, max_distance_km)
+
+        # Day centroid (mean on the unit sphere) and the spot closest to it
+        xyz = unit_xyz(lats, lngs) if noms else None
+        day_clusters = []
+        representatives = []
+        for day_num, members in enumerate(days, start=1):
+            centre = xyz[members].mean(axis=0)
+            centre /= np.linalg.norm(centre)
+            from_centre = chord_to_km(np.linalg.norm(xyz[members] - centre, axis=1))
+            representatives.append(members[int(np.argmin(from_centre))])
+            day_clusters.append({
+                "day": day_num,
+                "spots": [spot(noms[i]) for i in members],
+                "centroid": [
+                    round(float(np.degrees(np.arctan2(centre[1], centre[0]))), 6),
+                    round(float(np.degrees(np.arcsin(centre[2]))), 6),
+                ],
+                "spread_km": round(float(from_centre.max()), 1),
+            })
+
         conflicts = []
-        for i in range(len(noms)):
-            for j in range(i + 1, len(noms)):
-                a, b = noms[i], noms[j]
-                dist = _haversine_km(a["lat"], a["lng"], b["lat"], b["lng"])
-                if dist > max_distance_km:
-                    conflicts.append({
-                        "place_a": {"id": a["id"], "name": a["place_name"], "coordinates": [a["lng"], a["lat"]]},
-                        "place_b": {"id": b["id"], "name": b["place_name"], "coordinates": [b["lng"], b["lat"]]},
-                        "distance_km": round(dist, 1),
-                        "suggestion": f"{a['place_name']} and {b['place_name']} are {dist:.0f}km apart — consider visiting on different days.",
-                    })
-
-        return {"conflicts": conflicts, "max_distance_km": max_distance_km}
+        if len(representatives) > 1:
+            dist = pairwise_km([lats[i] for i in representatives], [lngs[i] for i in representatives])
+            rows, cols = np.triu_indices(len(representatives), k=1)
+            far = dist[rows, cols] > max_distance_km
+            order = np.argsort(-dist[rows, cols][far])[:MAX_DAY_CONFLICTS]
+            for i, j in zip(rows[far][order], cols[far][order]):
+                a, b = noms[representatives[i]], noms[representatives[j]]
+                km = float(dist[i, j])
+                conflicts.append({
+                    "place_a": spot(a),
+                    "place_b": spot(b),
+                    "day_a": int(i) + 1,
+                    "day_b": int(j) + 1,
+                    "distance_km": round(km, 1),
+                    "suggestion": f"{a['place_name']} and {b['place_name']} are {km:.0f}km apart — consider visiting on different days.",
+                })
+
+        return {
+            "day_clusters": day_clusters,
+            "conflicts": conflicts,
+            "max_distance_km": max_distance_km,
+        }
 
     except HTTPException:
         raise
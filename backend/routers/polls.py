@@ -4,10 +4,12 @@ from typing import Optional, List
 import requests as req
 
 from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi.concurrency import run_in_threadpool
 from pydantic import BaseModel
 
 from utils import oauth2
 from supabase_client import supabase
+from services.places_cache import places_cache, places_key, cacheable_legacy_response
 
 router = APIRouter(prefix="/polls", tags=["Polls"])
 
@@ -37,8 +39,8 @@ class RankedVoteCreate(BaseModel):
 
 # ── Internal helpers ──────────────────────────────────────────────────────────
 
-def _get_trip(trip_id: str) -> dict:
-    res = (
+async def _get_trip(trip_id: str) -> dict:
+    res = await (
         supabase.table("trips")
         .select("id, name, owner_id")
         .eq("id", trip_id)
@@ -50,8 +52,8 @@ def _get_trip(trip_id: str) -> dict:
     return res.data[0]
 
 
-def _get_poll(poll_id: str) -> dict:
-    res = (
+async def _get_poll(poll_id: str) -> dict:
+    res = await (
         supabase.table("polls")
         .select("*")
         .eq("id", poll_id)
@@ -63,10 +65,10 @@ def _get_poll(poll_id: str) -> dict:
     return res.data[0]
 
 
-def _poll_with_options(poll_id: str, user_id: str) -> dict:
-    poll = _get_poll(poll_id)
+async def _poll_with_options(poll_id: str, user_id: str) -> dict:
+    poll = await _get_poll(poll_id)
 
-    opts_res = (
+    opts_res = await (
         supabase.table("poll_options")
         .select("*")
         .eq("poll_id", poll_id)
@@ -77,7 +79,7 @@ def _poll_with_options(poll_id: str, user_id: str) -> dict:
     for opt in options:
         opt["label"] = opt.get("text") or opt.get("label", "")
 
-    vote_res = (
+    vote_res = await (
         supabase.table("poll_votes")
         .select("option_id")
         .eq("poll_id", poll_id)
@@ -106,13 +108,19 @@ def _location_suggestions(trip_name: str) -> list:
             {"label": "City Center Apartments",   "value": {"type": "hotel"}},
         ]
     try:
-        resp = req.get(
-            "https://maps.googleapis.com/maps/api/place/textsearch/json",
-            params={"query": f"hotels in {trip_name}", "key": key},
-            timeout=8,
-        )
-        resp.raise_for_status()
-        results = resp.json().get("results", [])[:6]
+        query = f"hotels in {trip_name}"
+        cache_key = places_key("textsearch", keyword=query)
+        data = places_cache.get(cache_key)
+        if data is None:
+            resp = req.get(
+                "https://maps.googleapis.com/maps/api/place/textsearch/json",
+                params={"query": query, "key": key},
+                timeout=8,
+            )
+            resp.raise_for_status()
+            data = resp.json()
+            places_cache.set(cache_key, cacheable_legacy_response(data))
+        results = data.get("results", [])[:6]
         return [
             {
                 "label": r.get("name", "Unknown"),
@@ -141,13 +149,19 @@ def _activity_suggestions(trip_name: str) -> list:
             {"label": "Shopping District",       "value": {"type": "activity"}},
         ]
     try:
-        resp = req.get(
-            "https://maps.googleapis.com/maps/api/place/textsearch/json",
-            params={"query": f"top attractions things to do in {trip_name}", "key": key},
-            timeout=8,
-        )
-        resp.raise_for_status()
-        results = resp.json().get("results", [])[:6]
+        query = f"top attractions things to do in {trip_name}"
+        cache_key = places_key("textsearch", keyword=query)
+        data = places_cache.get(cache_key)
+        if data is None:
+            resp = req.get(
+                "https://maps.googleapis.com/maps/api/place/textsearch/json",
+                params={"query": query, "key": key},
+                timeout=8,
+            )
+            resp.raise_for_status()
+            data = resp.json()
+            places_cache.set(cache_key, cacheable_legacy_response(data))
+        results = data.get("results", [])[:6]
         return [
             {
                 "label": r.get("name", "Unknown"),
@@ -168,19 +182,19 @@ def _activity_suggestions(trip_name: str) -> list:
 # ── Endpoints ─────────────────────────────────────────────────────────────────
 
 @router.post("/")
-def create_poll(body: PollCreate, current_user=Depends(oauth2.get_current_user)):
+async def create_poll(body: PollCreate, current_user=Depends(oauth2.get_current_user)):
     """Create a new poll. Only the trip owner (leader) can create polls."""
     if body.poll_type not in ("length_of_stay", "location", "activity", "other", "ranked_choice"):
         raise HTTPException(status_code=400, detail="Invalid poll_type")
 
-    trip = _get_trip(body.trip_id)
+    trip = await _get_trip(body.trip_id)
     if trip["owner_id"] != current_user["id"]:
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN,
             detail="Only the trip leader can create polls",
         )
 
-    res = supabase.table("polls").insert({
+    res = await supabase.table("polls").insert({
         "id": str(uuid.uuid4()),
         "trip_id": body.trip_id,
         "created_by": current_user["id"],
@@ -195,11 +209,11 @@ def create_poll(body: PollCreate, current_user=Depends(oauth2.get_current_user))
 
 
 @router.get("/trip/{trip_id}")
-def list_polls(trip_id: str, current_user=Depends(oauth2.get_current_user)):
+async def list_polls(trip_id: str, current_user=Depends(oauth2.get_current_user)):
     """List all polls for a trip."""
-    _get_trip(trip_id)   # validates trip exists
+    await _get_trip(trip_id)   # validates trip exists
 
-    res = (
+    res = await (
         supabase.table("polls")
         .select("*")
         .eq("trip_id", trip_id)
@@ -210,7 +224,7 @@ def list_polls(trip_id: str, current_user=Depends(oauth2.get_current_user)):
 
     # Attach option count + total vote count to each poll summary
     for poll in polls:
-        opts = (
+        opts = await (
             supabase.table("poll_options")
             .select("id, vote_count")
             .eq("poll_id", poll["id"])
@@ -224,25 +238,25 @@ def list_polls(trip_id: str, current_user=Depends(oauth2.get_current_user)):
 
 
 @router.get("/{poll_id}")
-def get_poll(poll_id: str, current_user=Depends(oauth2.get_current_user)):
+async def get_poll(poll_id: str, current_user=Depends(oauth2.get_current_user)):
     """Get a single poll with all options and the caller's current vote."""
-    return _poll_with_options(poll_id, current_user["id"])
+    return await _poll_with_options(poll_id, current_user["id"])
 
 
 @router.post("/{poll_id}/options")
-def add_option(
+async def add_option(
     poll_id: str,
     body: OptionCreate,
     current_user=Depends(oauth2.get_current_user),
 ):
     """Add an option to an open poll. Any trip member can add options."""
-    poll = _get_poll(poll_id)
+    poll = await _get_poll(poll_id)
     if poll["status"] != "open":
         raise HTTPException(status_code=400, detail="Cannot add options to a closed poll")
 
-    _get_trip(poll["trip_id"])   # validate trip exists
+    await _get_trip(poll["trip_id"])   # validate trip exists
 
-    res = supabase.table("poll_options").insert({
+    res = await supabase.table("poll_options").insert({
         "id": str(uuid.uuid4()),
         "poll_id": poll_id,
         "created_by": current_user["id"],
@@ -258,17 +272,17 @@ def add_option(
 
 
 @router.delete("/{poll_id}/options/{option_id}")
-def remove_option(
+async def remove_option(
     poll_id: str,
     option_id: str,
     current_user=Depends(oauth2.get_current_user),
 ):
     """Remove an option. Owner of the option or the poll leader can remove."""
-    poll = _get_poll(poll_id)
+    poll = await _get_poll(poll_id)
     if poll["status"] != "open":
         raise HTTPException(status_code=400, detail="Poll is closed")
 
-    opt_res = (
+    opt_res = await (
         supabase.table("poll_options")
         .select("*")
         .eq("id", option_id)
@@ -285,24 +299,24 @@ def remove_option(
     if not (is_leader or is_owner):
         raise HTTPException(status_code=403, detail="Cannot remove this option")
 
-    supabase.table("poll_votes").delete().eq("option_id", option_id).execute()
-    supabase.table("poll_options").delete().eq("id", option_id).execute()
+    await supabase.table("poll_votes").delete().eq("option_id", option_id).execute()
+    await supabase.table("poll_options").delete().eq("id", option_id).execute()
     return {"success": True}
 
 
 @router.post("/{poll_id}/vote")
-def cast_vote(
+async def cast_vote(
     poll_id: str,
     body: VoteCreate,
     current_user=Depends(oauth2.get_current_user),
 ):
     """Cast or change a vote. One vote per user per poll."""
-    poll = _get_poll(poll_id)
+    poll = await _get_poll(poll_id)
     if poll["status"] != "open":
         raise HTTPException(status_code=400, detail="Poll is closed")
 
     # Verify option belongs to this poll
-    opt_res = (
+    opt_res = await (
         supabase.table("poll_options")
         .select("id, vote_count")
         .eq("id", body.option_id)
@@ -313,7 +327,7 @@ def cast_vote(
     if not opt_res.data:
         raise HTTPException(status_code=404, detail="Option not found in this poll")
 
-    existing = (
+    existing = await (
         supabase.table("poll_votes")
         .select("*")
         .eq("poll_id", poll_id)
@@ -328,7 +342,7 @@ def cast_vote(
             return {"success": True, "message": "Already voted for this option"}
 
         # Decrement old option
-        old_opt = (
+        old_opt = await (
             supabase.table("poll_options")
             .select("vote_count")
             .eq("id", old_option_id)
@@ -336,17 +350,17 @@ def cast_vote(
             .execute()
         )
         if old_opt.data:
-            supabase.table("poll_options").update(
+            await supabase.table("poll_options").update(
                 {"vote_count": max(0, old_opt.data[0]["vote_count"] - 1)}
             ).eq("id", old_option_id).execute()
 
         # Update existing vote record
-        supabase.table("poll_votes").update(
+        await supabase.table("poll_votes").update(
             {"option_id": body.option_id}
         ).eq("id", existing.data[0]["id"]).execute()
 
     else:
-        supabase.table("poll_votes").insert({
+        await supabase.table("poll_votes").insert({
             "id": str(uuid.uuid4()),
             "poll_id": poll_id,
             "option_id": body.option_id,
@@ -354,7 +368,7 @@ def cast_vote(
         }).execute()
 
     # Increment new option
-    supabase.table("poll_options").update(
+    await supabase.table("poll_options").update(
         {"vote_count": opt_res.data[0]["vote_count"] + 1}
     ).eq("id", body.option_id).execute()
 
@@ -362,13 +376,13 @@ def cast_vote(
 
 
 @router.delete("/{poll_id}/vote")
-def remove_vote(poll_id: str, current_user=Depends(oauth2.get_current_user)):
+async def remove_vote(poll_id: str, current_user=Depends(oauth2.get_current_user)):
     """Retract the current user's vote."""
-    poll = _get_poll(poll_id)
+    poll = await _get_poll(poll_id)
     if poll["status"] != "open":
         raise HTTPException(status_code=400, detail="Poll is closed")
 
-    existing = (
+    existing = await (
         supabase.table("poll_votes")
         .select("*")
         .eq("poll_id", poll_id)
@@ -380,7 +394,7 @@ def remove_vote(poll_id: str, current_user=Depends(oauth2.get_current_user)):
         return {"success": True, "message": "No vote to remove"}
 
     old_option_id = existing.data[0]["option_id"]
-    old_opt = (
+    old_opt = await (
         supabase.table("poll_options")
         .select("vote_count")
         .eq("id", old_option_id)
@@ -388,24 +402,24 @@ def remove_vote(poll_id: str, current_user=Depends(oauth2.get_current_user)):
         .execute()
     )
     if old_opt.data:
-        supabase.table("poll_options").update(
+        await supabase.table("poll_options").update(
             {"vote_count": max(0, old_opt.data[0]["vote_count"] - 1)}
         ).eq("id", old_option_id).execute()
 
-    supabase.table("poll_votes").delete().eq("id", existing.data[0]["id"]).execute()
+    await supabase.table("poll_votes").delete().eq("id", existing.data[0]["id"]).execute()
     return {"success": True}
 
 
 @router.post("/{poll_id}/close")
-def close_poll(poll_id: str, current_user=Depends(oauth2.get_current_user)):
+async def close_poll(poll_id: str, current_user=Depends(oauth2.get_current_user)):
     """Close the poll and determine the winner (highest vote count)."""
-    poll = _get_poll(poll_id)
+    poll = await _get_poll(poll_id)
     if poll["created_by"] != current_user["id"]:
         raise HTTPException(status_code=403, detail="Only the poll creator can close it")
     if poll["status"] == "closed":
         raise HTTPException(status_code=400, detail="Poll is already closed")
 
-    opts_res = (
+    opts_res = await (
         supabase.table("poll_options")
         .select("id, vote_count")
         .eq("poll_id", poll_id)
@@ -415,22 +429,22 @@ def close_poll(poll_id: str, current_user=Depends(oauth2.get_current_user)):
     options = opts_res.data or []
     winner_id = options[0]["id"] if options else None
 
-    supabase.table("polls").update({
+    await supabase.table("polls").update({
         "status": "closed",
         "winner_option_id": winner_id,
     }).eq("id", poll_id).execute()
 
-    return _poll_with_options(poll_id, current_user["id"])
+    return await _poll_with_options(poll_id, current_user["id"])
 
 
 @router.post("/{poll_id}/reopen")
-def reopen_poll(poll_id: str, current_user=Depends(oauth2.get_current_user)):
+async def reopen_poll(poll_id: str, current_user=Depends(oauth2.get_current_user)):
     """Reopen a closed poll (Retry flow from the activity diagram)."""
-    poll = _get_poll(poll_id)
+    poll = await _get_poll(poll_id)
     if poll["created_by"] != current_user["id"]:
         raise HTTPException(status_code=403, detail="Only the poll creator can reopen it")
 
-    supabase.table("polls").update({
+    await supabase.table("polls").update({
         "status": "open",
         "winner_option_id": None,
     }).eq("id", poll_id).execute()
@@ -439,10 +453,10 @@ def reopen_poll(poll_id: str, current_user=Depends(oauth2.get_current_user)):
 
 
 @router.get("/{poll_id}/suggestions")
-def get_suggestions(poll_id: str, current_user=Depends(oauth2.get_current_user)):
+async def get_suggestions(poll_id: str, current_user=Depends(oauth2.get_current_user)):
     """Return AI/system suggestions for the poll's category."""
-    poll = _get_poll(poll_id)
-    trip = _get_trip(poll["trip_id"])
+    poll = await _get_poll(poll_id)
+    trip = await _get_trip(poll["trip_id"])
     trip_name = trip.get("name", "your trip")
 
     poll_type = poll["poll_type"]
@@ -455,9 +469,9 @@ def get_suggestions(poll_id: str, current_user=Depends(oauth2.get_current_user))
             {"label": "Two Weeks",                   "value": {"days": 14}},
         ]
     elif poll_type == "location":
-        suggestions = _location_suggestions(trip_name)
+        suggestions = await run_in_threadpool(_location_suggestions, trip_name)
     elif poll_type == "activity":
-        suggestions = _activity_suggestions(trip_name)
+        suggestions = await run_in_threadpool(_activity_suggestions, trip_name)
     else:  # other
         suggestions = []
 
@@ -467,7 +481,7 @@ def get_suggestions(poll_id: str, current_user=Depends(oauth2.get_current_user))
 # ── Ranked-Choice (Borda Count) Voting ───────────────────────────────────────
 
 @router.post("/{poll_id}/ranked-vote")
-def cast_ranked_vote(
+async def cast_ranked_vote(
     poll_id: str,
     body: RankedVoteCreate,
     current_user=Depends(oauth2.get_current_user),
@@ -476,7 +490,7 @@ def cast_ranked_vote(
     Cast a Borda Count ranked-choice vote.
     User ranks options: 1st = N points, 2nd = N-1, ... last = 1 point.
     """
-    poll = _get_poll(poll_id)
+    poll = await _get_poll(poll_id)
     if poll["status"] != "open":
         raise HTTPException(status_code=400, detail="Poll is closed")
     if poll.get("poll_type") != "ranked_choice":
@@ -485,7 +499,7 @@ def cast_ranked_vote(
     user_id = current_user["id"]
 
     # Validate all option_ids belong to this poll
-    opts_res = (
+    opts_res = await (
         supabase.table("poll_options")
         .select("id")
         .eq("poll_id", poll_id)
@@ -497,11 +511,11 @@ def cast_ranked_vote(
             raise HTTPException(status_code=400, detail=f"Option {r['option_id']} not in this poll")
 
     # Clear any previous ranked votes from this user
-    supabase.table("ranked_votes").delete().eq("poll_id", poll_id).eq("user_id", user_id).execute()
+    await supabase.table("ranked_votes").delete().eq("poll_id", poll_id).eq("user_id", user_id).execute()
 
     # Insert new rankings
     for r in body.rankings:
-        supabase.table("ranked_votes").insert({
+        await supabase.table("ranked_votes").insert({
             "id": str(uuid.uuid4()),
             "poll_id": poll_id,
             "user_id": user_id,
@@ -513,7 +527,7 @@ def cast_ranked_vote(
 
 
 @router.get("/{poll_id}/borda-results")
-def get_borda_results(
+async def get_borda_results(
     poll_id: str,
     current_user=Depends(oauth2.get_current_user),
 ):
@@ -521,12 +535,12 @@ def get_borda_results(
     Compute Borda Count scores for a ranked-choice poll.
     With N options: rank 1 = N points, rank 2 = N-1, ..., rank N = 1 point.
     """
-    poll = _get_poll(poll_id)
+    poll = await _get_poll(poll_id)
     if poll.get("poll_type") != "ranked_choice":
         raise HTTPException(status_code=400, detail="Not a ranked-choice poll")
 
     # Get all options
-    opts_res = (
+    opts_res = await (
         supabase.table("poll_options")
         .select("id, text, value")
         .eq("poll_id", poll_id)
@@ -536,7 +550,7 @@ def get_borda_results(
     n_options = len(options)
 
     # Get all ranked votes
-    votes_res = (
+    votes_res = await (
         supabase.table("ranked_votes")
         .select("user_id, option_id, rank")
         .eq("poll_id", poll_id)
@@ -573,7 +587,7 @@ def get_borda_results(
 
 
 @router.post("/{poll_id}/close-ranked")
-def close_ranked_poll(
+async def close_ranked_poll(
     poll_id: str,
     current_user=Depends(oauth2.get_current_user),
 ):
@@ -581,25 +595,25 @@ def close_ranked_poll(
     Close a ranked-choice poll: compute Borda winner, record vote_history
     for the Frustration Index, and update the poll.
     """
-    poll = _get_poll(poll_id)
+    poll = await _get_poll(poll_id)
     if poll["created_by"] != current_user["id"]:
         raise HTTPException(status_code=403, detail="Only the poll creator can close it")
     if poll["status"] == "closed":
         raise HTTPException(status_code=400, detail="Poll is already closed")
 
     # Get Borda results
-    borda = get_borda_results(poll_id, current_user)
+    borda = await get_borda_results(poll_id, current_user)
     winner = borda.get("winner")
     winner_id = winner["option_id"] if winner else None
 
     # Update poll
-    supabase.table("polls").update({
+    await supabase.table("polls").update({
         "status": "closed",
         "winner_option_id": winner_id,
     }).eq("id", poll_id).execute()
 
     # Record vote_history for Frustration Index
-    votes_res = (
+    votes_res = await (
         supabase.table("ranked_votes")
         .select("user_id, option_id, rank")
         .eq("poll_id", poll_id)
@@ -612,7 +626,7 @@ def close_ranked_poll(
             user_first_picks[v["user_id"]] = v["option_id"]
 
     for uid, first_pick in user_first_picks.items():
-        supabase.table("vote_history").insert({
+        await supabase.table("vote_history").insert({
             "id": str(uuid.uuid4()),
             "trip_id": poll["trip_id"],
             "poll_id": poll_id,
@@ -630,7 +644,7 @@ def close_ranked_poll(
 # ── Frustration Index ────────────────────────────────────────────────────────
 
 @router.get("/frustration-index/{trip_id}")
-def get_frustration_index(
+async def get_frustration_index(
     trip_id: str,
     current_user=Depends(oauth2.get_current_user),
 ):
@@ -644,7 +658,7 @@ def get_frustration_index(
     Returns a weight multiplier per user: 1.0 = neutral, up to 2.0 = high frustration.
     """
     # Get all vote_history for this trip
-    history_res = (
+    history_res = await (
         supabase.table("vote_history")
         .select("user_id, voted_for_winner, created_at")
         .eq("trip_id", trip_id)
@@ -666,7 +680,7 @@ def get_frustration_index(
 
     # Get usernames
     all_uids = list(user_records.keys())
-    users_res = (
+    users_res = await (
         supabase.table("users")
         .select("id, username")
         .in_("id", all_uids)
@@ -40,10 +40,10 @@ class PreferencesOut(BaseModel):
 # ---- Endpoints ----
 
 @router.get("/me", response_model=PreferencesOut)
-def get_my_preferences(current_user=Depends(oauth2.get_current_user)):
+async def get_my_preferences(current_user=Depends(oauth2.get_current_user)):
     """Get current user's travel preferences"""
     try:
-        res = (
+        res = await (
             supabase
             .table("user_preferences")
             .select("*")
@@ -63,7 +63,7 @@ def get_my_preferences(current_user=Depends(oauth2.get_current_user)):
             "interests": [],
             "avoid_types": [],
         }
-        insert_res = supabase.table("user_preferences").insert(default).execute()
+        insert_res = await supabase.table("user_preferences").insert(default).execute()
 
         if not insert_res.data:
             raise HTTPException(status_code=500, detail="Failed to create default preferences")
@@ -78,7 +78,7 @@ def get_my_preferences(current_user=Depends(oauth2.get_current_user)):
 
 
 @router.put("/me", response_model=PreferencesOut)
-def update_my_preferences(
+async def update_my_preferences(
     prefs: PreferencesUpdate,
     current_user=Depends(oauth2.get_current_user)
 ):
@@ -111,12 +111,12 @@ def update_my_preferences(
 
         if not update_data:
             # Nothing to update, return current
-            return get_my_preferences(current_user)
+            return await get_my_preferences(current_user)
 
         update_data["updated_at"] = "now()"
 
         # Check if row exists
-        existing = (
+        existing = await (
             supabase
             .table("user_preferences")
             .select("id")
@@ -126,7 +126,7 @@ def update_my_preferences(
 
         if existing.data and len(existing.data) > 0:
             # Update existing
-            res = (
+            res = await (
                 supabase
                 .table("user_preferences")
                 .update(update_data)
@@ -136,7 +136,7 @@ def update_my_preferences(
         else:
             # Insert new
             update_data["user_id"] = current_user["id"]
-            res = (
+            res = await (
                 supabase
                 .table("user_preferences")
                 .insert(update_data)
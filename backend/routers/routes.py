@@ -4,82 +4,12 @@ from datetime import datetime
 from pydantic import BaseModel
 from utils import oauth2  
 from supabase_client import supabase 
+from services.membership import ensure_trip_member, is_trip_leader
+from services.ai_tool_cache import tool_cache
 
 router = APIRouter(prefix="/routes", tags=["Routes"])
 
 
-def _ensure_trip_member(trip_id: str, user_id: str) -> None:
-    try:
-        member = (
-            supabase.table("group_member")
-            .select("id")
-            .eq("group_id", trip_id)
-            .eq("user_id", user_id)
-            .is_("left_datetime", None)
-            .maybe_single()
-            .execute()
-        )
-        if member and member.data:
-            return
-    except Exception:
-        pass
-
-    try:
-        tm = (
-            supabase.table("trip_members")
-            .select("id")
-            .eq("trip_id", trip_id)
-            .eq("user_id", user_id)
-            .is_("left_at", None)
-            .maybe_single()
-            .execute()
-        )
-        if tm and tm.data:
-            return
-    except Exception:
-        pass
-
-    try:
-        owner = (
-            supabase.table("trips")
-            .select("id")
-            .eq("id", trip_id)
-            .eq("owner_id", user_id)
-            .maybe_single()
-            .execute()
-        )
-        if owner and owner.data:
-            return
-    except Exception:
-        pass
-
-    raise HTTPException(status_code=403, detail="Not a member of this group")
-
-
-def _is_trip_leader(trip_id: str, user_id: str) -> bool:
-    member = (
-        supabase.table("group_member")
-        .select("id")
-        .eq("group_id", trip_id)
-        .eq("user_id", user_id)
-        .eq("role", "leader")
-        .is_("left_datetime", None)
-        .maybe_single()
-        .execute()
-    )
-    if member.data:
-        return True
-
-    owner = (
-        supabase.table("trips")
-        .select("id")
-        .eq("id", trip_id)
-        .eq("owner_id", user_id)
-        .maybe_single()
-        .execute()
-    )
-    return bool(owner.data)
-
 class LocationPoint(BaseModel):
     name: str
     address: str
@@ -110,7 +40,7 @@ async def save_route(
 ):
     """Save a planned route"""
     if route.trip_id:
-        _ensure_trip_member(route.trip_id, current_user["id"])
+        await ensure_trip_member(route.trip_id, current_user["id"])
 
     route_data = {
         "trip_id": route.trip_id,
@@ -122,11 +52,12 @@ async def save_route(
         "created_by": current_user["id"]
     }
     
-    result = supabase.table("saved_routes").insert(route_data).execute()
+    result = await supabase.table("saved_routes").insert(route_data).execute()
     
     if not result.data:
         raise HTTPException(status_code=500, detail="Failed to save route")
-    
+
+    tool_cache.invalidate("saved_routes", current_user["id"])
     return result.data[0]
 
 @router.get("/", response_model=List[RouteResponse])
@@ -138,12 +69,12 @@ async def get_my_routes(
     query = supabase.table("saved_routes").select("*")
     
     if trip_id:
-        _ensure_trip_member(trip_id, current_user["id"])
+        await ensure_trip_member(trip_id, current_user["id"])
         query = query.eq("trip_id", trip_id)
     else:
         query = query.eq("created_by", current_user["id"])
     
-    result = query.order("created_at", desc=True).execute()
+    result = await query.order("created_at", desc=True).execute()
     return result.data
 
 @router.delete("/{route_id}")
@@ -152,7 +83,7 @@ async def delete_route(
     current_user=Depends(oauth2.get_current_user)
 ):
     """Delete a saved route"""
-    route_res = (
+    route_res = await (
         supabase.table("saved_routes")
         .select("id, created_by, trip_id")
         .eq("id", route_id)
@@ -165,17 +96,18 @@ async def delete_route(
     route = route_res.data
     allowed = route.get("created_by") == current_user["id"]
     if (not allowed) and route.get("trip_id"):
-        _ensure_trip_member(route["trip_id"], current_user["id"])
-        allowed = _is_trip_leader(route["trip_id"], current_user["id"])
+        await ensure_trip_member(route["trip_id"], current_user["id"])
+        allowed = await is_trip_leader(route["trip_id"], current_user["id"])
 
     if not allowed:
         raise HTTPException(status_code=403, detail="You do not have permission to delete this route")
 
-    result = (
+    result = await (
         supabase.table("saved_routes")
         .delete()
         .eq("id", route_id)
         .execute()
     )
-    
+
+    tool_cache.invalidate("saved_routes", route.get("created_by"))
     return {"message": "Route deleted successfully"}
\ No newline at end of file
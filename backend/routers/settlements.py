@@ -9,67 +9,16 @@ Endpoints:
 """
 
 from typing import List, Optional
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Query
 from pydantic import BaseModel, Field
 from supabase_client import supabase
+from services.membership import ensure_trip_member, get_trip_member_ids
+from services.currency import dominant_currency, fx_rates
 from utils import oauth2
 
 router = APIRouter(prefix="/finance", tags=["Finance — Splitting"])
 
 
-# ── Helpers ───────────────────────────────────────────────────────────────────
-
-def _get_trip_member_ids(trip_id: str) -> List[str]:
-    """Return all active member user_ids for a trip."""
-    ids = set()
-
-    try:
-        res = (
-            supabase.table("trip_members")
-            .select("user_id")
-            .eq("trip_id", trip_id)
-            .is_("left_at", None)
-            .execute()
-        )
-        ids.update(r["user_id"] for r in (res.data or []))
-    except Exception:
-        pass
-
-    try:
-        res = (
-            supabase.table("group_member")
-            .select("user_id")
-            .eq("group_id", trip_id)
-            .is_("left_datetime", None)
-            .execute()
-        )
-        ids.update(r["user_id"] for r in (res.data or []))
-    except Exception:
-        pass
-
-    # Include the trip owner
-    try:
-        owner = (
-            supabase.table("trips")
-            .select("owner_id")
-            .eq("id", trip_id)
-            .maybe_single()
-            .execute()
-        )
-        if owner.data:
-            ids.add(owner.data["owner_id"])
-    except Exception:
-        pass
-
-    return list(ids)
-
-
-def _ensure_trip_member(trip_id: str, user_id: str) -> None:
-    member_ids = _get_trip_member_ids(trip_id)
-    if user_id not in member_ids:
-        raise HTTPException(status_code=403, detail="Not a member of this trip")
-
-
 # ── Schemas ───────────────────────────────────────────────────────────────────
 
 class ShareEntry(BaseModel):
@@ -93,7 +42,7 @@ class SettleRequest(BaseModel):
 # ── Endpoints ─────────────────────────────────────────────────────────────────
 
 @router.post("/split/{expense_id}")
-def split_expense(
+async def split_expense(
     expense_id: str,
     payload: SplitRequest,
     current_user=Depends(oauth2.get_current_user),
@@ -106,7 +55,7 @@ def split_expense(
     user_id = current_user["id"]
 
     # Fetch the expense
-    exp = (
+    exp = await (
         supabase.table("expenses")
         .select("id, total, trip_id, user_id")
         .eq("id", expense_id)
@@ -121,14 +70,14 @@ def split_expense(
     if not trip_id:
         raise HTTPException(status_code=400, detail="Expense must be linked to a trip to split")
 
-    _ensure_trip_member(trip_id, user_id)
+    await ensure_trip_member(trip_id, user_id)
 
     total = float(expense["total"] or 0)
     if total <= 0:
         raise HTTPException(status_code=400, detail="Cannot split a non-positive expense")
 
     # Delete existing shares for this expense (re-split)
-    supabase.table("expense_shares").delete().eq("expense_id", expense_id).execute()
+    await supabase.table("expense_shares").delete().eq("expense_id", expense_id).execute()
 
     if payload.split_rule == "custom" and payload.shares:
         # Validate custom shares sum to total
@@ -149,7 +98,7 @@ def split_expense(
         ]
     else:
         # Equal split
-        member_ids = payload.member_ids or _get_trip_member_ids(trip_id)
+        member_ids = payload.member_ids or await get_trip_member_ids(trip_id)
         if not member_ids:
             raise HTTPException(status_code=400, detail="No members to split among")
 
@@ -167,7 +116,7 @@ def split_expense(
                 "split_rule": "equal",
             })
 
-    supabase.table("expense_shares").insert(rows).execute()
+    await supabase.table("expense_shares").insert(rows).execute()
 
     return {
         "expense_id": expense_id,
@@ -177,26 +126,31 @@ def split_expense(
 
 
 @router.get("/balances/{trip_id}")
-def get_balances(
+async def get_balances(
     trip_id: str,
+    currency: Optional[str] = Query(None, description="Currency balances are reported in (default: the trip's most used)"),
     current_user=Depends(oauth2.get_current_user),
 ):
     """
     Compute the net balances for a trip: who owes whom.
 
     Algorithm:
+    0. Convert expenses, shares (in their expense's currency) and settlements
+       into `currency` with the offline FX table. Without one, the trip's most
+       used expense currency is the report currency, so a single-currency trip
+       is never converted.
     1. For each expense with shares, the payer is owed (total - their_share).
        Each other member owes their share_amount to the payer.
     2. Subtract settlements already recorded.
     3. Minimize transactions using the greedy debt simplification algorithm.
     """
     user_id = current_user["id"]
-    _ensure_trip_member(trip_id, user_id)
+    await ensure_trip_member(trip_id, user_id)
 
-    member_ids = _get_trip_member_ids(trip_id)
+    member_ids = await get_trip_member_ids(trip_id)
 
     # Fetch usernames for display
-    users_res = (
+    users_res = await (
         supabase.table("users")
         .select("id, username")
         .in_("id", member_ids)
@@ -205,9 +159,9 @@ def get_balances(
     user_map = {u["id"]: u["username"] for u in (users_res.data or [])}
 
     # Get all expenses for this trip that have shares
-    expenses_res = (
+    expenses_res = await (
         supabase.table("expenses")
-        .select("id, user_id, total")
+        .select("id, user_id, total, currency")
         .eq("trip_id", trip_id)
         .execute()
     )
@@ -217,7 +171,7 @@ def get_balances(
     # Get all shares
     shares = []
     if expense_ids:
-        shares_res = (
+        shares_res = await (
             supabase.table("expense_shares")
             .select("expense_id, user_id, share_amount")
             .in_("expense_id", expense_ids)
@@ -225,41 +179,59 @@ def get_balances(
         )
         shares = shares_res.data or []
 
+    settlements_res = await (
+        supabase.table("settlements")
+        .select("from_user_id, to_user_id, amount, currency")
+        .eq("trip_id", trip_id)
+        .execute()
+    )
+    settlements = settlements_res.data or []
+
+    # Every amount into the report currency in one vectorized pass:
+    # expense totals, then shares (in their expense's currency), then settlements
+    expense_currency = {e["id"]: e.get("currency") for e in expenses}
+    currency = currency or dominant_currency(expense_currency.values())
+    converted, unconverted = fx_rates.convert_many(
+        [float(e["total"] or 0) for e in expenses]
+        + [float(s["share_amount"]) for s in shares]
+        + [float(s["amount"]) for s in settlements],
+        [e.get("currency") for e in expenses]
+        + [expense_currency.get(s["expense_id"]) for s in shares]
+        + [s.get("currency") for s in settlements],
+        currency,
+    )
+    converted = converted.tolist()
+    expense_totals = converted[:len(expenses)]
+    share_amounts = converted[len(expenses):len(expenses) + len(shares)]
+    settlement_amounts = converted[len(expenses) + len(shares):]
+
     # Build a net balance per user: positive = owed money, negative = owes money
     # net[user] > 0 means others owe them; net[user] < 0 means they owe others
     net = {mid: 0.0 for mid in member_ids}
 
     # Group shares by expense
     expense_shares_map = {}
-    for s in shares:
-        expense_shares_map.setdefault(s["expense_id"], []).append(s)
+    for s, amount in zip(shares, share_amounts):
+        expense_shares_map.setdefault(s["expense_id"], []).append((s["user_id"], amount))
 
-    for exp in expenses:
+    for exp, total_paid in zip(expenses, expense_totals):
         exp_shares = expense_shares_map.get(exp["id"], [])
         if not exp_shares:
             continue  # Expense not split yet
 
         payer_id = exp["user_id"]
-        total_paid = float(exp["total"] or 0)
 
         # Payer fronted the full amount
         if payer_id in net:
             net[payer_id] += total_paid
 
         # Each member's share is what they owe
-        for s in exp_shares:
-            if s["user_id"] in net:
-                net[s["user_id"]] -= float(s["share_amount"])
+        for share_user_id, share_amount in exp_shares:
+            if share_user_id in net:
+                net[share_user_id] -= share_amount
 
     # Factor in existing settlements
-    settlements_res = (
-        supabase.table("settlements")
-        .select("from_user_id, to_user_id, amount")
-        .eq("trip_id", trip_id)
-        .execute()
-    )
-    for s in (settlements_res.data or []):
-        amt = float(s["amount"])
+    for s, amt in zip(settlements, settlement_amounts):
         if s["from_user_id"] in net:
             net[s["from_user_id"]] += amt   # they paid, so they're owed less
         if s["to_user_id"] in net:
@@ -316,6 +288,9 @@ def get_balances(
 
     return {
         "trip_id": trip_id,
+        "currency": currency.upper(),
+        "unconverted_currencies": unconverted,
+        "rates_stale": fx_rates.stale,
         "member_balances": member_balances,
         "suggested_transfers": transfers,
         "all_settled": len(transfers) == 0,
@@ -323,18 +298,18 @@ def get_balances(
 
 
 @router.post("/settle")
-def record_settlement(
+async def record_settlement(
     payload: SettleRequest,
     current_user=Depends(oauth2.get_current_user),
 ):
     """Record a settlement payment from the current user to another."""
     user_id = current_user["id"]
-    _ensure_trip_member(payload.trip_id, user_id)
+    await ensure_trip_member(payload.trip_id, user_id)
 
     if payload.to_user_id == user_id:
         raise HTTPException(status_code=400, detail="Cannot settle with yourself")
 
-    _ensure_trip_member(payload.trip_id, payload.to_user_id)
+    await ensure_trip_member(payload.trip_id, payload.to_user_id)
 
     row = {
         "trip_id": payload.trip_id,
@@ -346,7 +321,7 @@ def record_settlement(
         "note": payload.note,
     }
 
-    res = supabase.table("settlements").insert(row).execute()
+    res = await supabase.table("settlements").insert(row).execute()
     if not res.data:
         raise HTTPException(status_code=500, detail="Failed to record settlement")
 
@@ -354,15 +329,15 @@ def record_settlement(
 
 
 @router.get("/settlements/{trip_id}")
-def list_settlements(
+async def list_settlements(
     trip_id: str,
     current_user=Depends(oauth2.get_current_user),
 ):
     """List all settlements for a trip."""
-    _ensure_trip_member(trip_id, current_user["id"])
+    await ensure_trip_member(trip_id, current_user["id"])
 
-    member_ids = _get_trip_member_ids(trip_id)
-    users_res = (
+    member_ids = await get_trip_member_ids(trip_id)
+    users_res = await (
         supabase.table("users")
         .select("id, username")
         .in_("id", member_ids)
@@ -370,7 +345,7 @@ def list_settlements(
     )
     user_map = {u["id"]: u["username"] for u in (users_res.data or [])}
 
-    res = (
+    res = await (
         supabase.table("settlements")
         .select("*")
         .eq("trip_id", trip_id)
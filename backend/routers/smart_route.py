@@ -9,12 +9,16 @@ Extends the existing /navigation/route endpoint with:
 
 import os
 import json
-import httpx
+import asyncio
 from datetime import datetime, timedelta
 from fastapi import APIRouter, HTTPException, Depends, Query
 from pydantic import BaseModel
 from typing import Optional, List
 from utils import oauth2
+from utils.http_clients import get_http_client
+from routers.weather import fetch_hourly_forecasts, hourly_conditions_at
+from services.places_cache import places_cache, places_key
+from services.route_cache import route_cache, route_key
 from supabase_client import supabase
 from dotenv import load_dotenv
 
@@ -48,6 +52,11 @@ PREFERENCE_POI_TYPES = {
     "budget": ["restaurant", "cafe"],  # filtered by price later
 }
 
+# Places fan-out along the route: max in-flight searches and overall deadline.
+# Searches still running at the deadline are dropped (partial results).
+POI_SEARCH_CONCURRENCY = int(os.getenv("POI_SEARCH_CONCURRENCY", "6"))
+POI_SEARCH_DEADLINE_SECONDS = float(os.getenv("POI_SEARCH_DEADLINE_SECONDS", "8"))
+
 
 # ---- Helpers ----
 
@@ -70,10 +79,13 @@ async def _get_base_route(waypoints: List[Waypoint], mode: str) -> dict:
         mid = "|".join(f"{w.coordinates[1]},{w.coordinates[0]}" for w in waypoints[1:-1])
         params["waypoints"] = mid
 
-    async with httpx.AsyncClient(timeout=15.0) as client:
-        resp = await client.get("https://maps.googleapis.com/maps/api/directions/json", params=params)
+    async def fetch():
+        client = get_http_client("google")
+        resp = await client.get("https://maps.googleapis.com/maps/api/directions/json", params=params, timeout=15.0)
         resp.raise_for_status()
-        data = resp.json()
+        return resp.json()
+
+    data = await route_cache.get_or_fetch(route_key("directions", params), fetch)
 
     if data.get("status") != "OK":
         raise HTTPException(status_code=400, detail=f"Directions API: {data.get('status')}")
@@ -84,7 +96,7 @@ async def _get_base_route(waypoints: List[Waypoint], mode: str) -> dict:
 async def _fetch_user_preferences(user_id: str) -> dict:
     """Fetch a single user's preferences for individual route optimization."""
     try:
-        res = (
+        res = await (
             supabase.table("user_preferences")
             .select("preferred_categories, dietary_restrictions, interests, avoid_types, price_preference, travel_pace, spontaneity_score")
             .eq("user_id", user_id)
@@ -100,7 +112,7 @@ async def _check_weather_for_suggestions(suggestions: list, api_key: str = None)
     """
     Check current weather at suggestion locations.
     Marks outdoor suggestions with weather warnings if conditions are poor.
-    Uses Open-Meteo (free, no key needed).
+    Uses the current hour of the cached Open-Meteo hourly forecast.
     """
     if not suggestions:
         return suggestions
@@ -108,48 +120,50 @@ async def _check_weather_for_suggestions(suggestions: list, api_key: str = None)
     outdoor_types = {"park", "natural_feature", "campground", "zoo", "amusement_park",
                      "tourist_attraction", "stadium", "hiking_area"}
 
-    async with httpx.AsyncClient(timeout=8.0) as client:
-        for sug in suggestions:
-            # Only check weather for outdoor POIs
-            sug_types = set(t.lower() for t in sug.get("types", []))
-            if not sug_types & outdoor_types:
-                continue
+    outdoor = []
+    for sug in suggestions:
+        # Only check weather for outdoor POIs
+        sug_types = set(t.lower() for t in sug.get("types", []))
+        if not sug_types & outdoor_types:
+            continue
 
-            lat = sug["coordinates"][1] if len(sug.get("coordinates", [])) > 1 else None
-            lng = sug["coordinates"][0] if len(sug.get("coordinates", [])) > 0 else None
-            if lat is None or lng is None:
-                continue
+        lat = sug["coordinates"][1] if len(sug.get("coordinates", [])) > 1 else None
+        lng = sug["coordinates"][0] if len(sug.get("coordinates", [])) > 0 else None
+        if lat is None or lng is None:
+            continue
+        outdoor.append((sug, (lat, lng)))
 
-            try:
-                resp = await client.get(
-                    "https://api.open-meteo.com/v1/forecast",
-                    params={
-                        "latitude": lat, "longitude": lng,
-                        "current": "weathercode,temperature_2m",
-                        "temperature_unit": "fahrenheit",
-                    },
-                )
-                data = resp.json()
-                code = data.get("current", {}).get("weathercode", 0)
-                temp = data.get("current", {}).get("temperature_2m")
-
-                # WMO codes: 51-67=rain, 71-77=snow, 80-82=showers, 95-99=storm
-                if code >= 95:
-                    sug["weather_warning"] = "Thunderstorm in area"
-                    sug["weather_safe"] = False
-                elif code >= 61:
-                    sug["weather_warning"] = "Rain expected"
-                    sug["weather_safe"] = False
-                elif code >= 71 and code <= 77:
-                    sug["weather_warning"] = "Snow conditions"
-                    sug["weather_safe"] = False
-                else:
-                    sug["weather_safe"] = True
-
-                if temp is not None:
-                    sug["temperature_f"] = round(temp)
-            except Exception:
-                sug["weather_safe"] = True  # Default to safe if check fails
+    if not outdoor:
+        return suggestions
+
+    # Shares the weather router's geo-tile forecast cache; one batched call on a miss.
+    hourly_by_point = await fetch_hourly_forecasts([point for _, point in outdoor])
+    now = datetime.utcnow()
+
+    for (sug, _), hourly in zip(outdoor, hourly_by_point):
+        current = hourly_conditions_at(hourly, now)
+        if current is None:
+            sug["weather_safe"] = True  # Default to safe if check fails
+            continue
+
+        code = current.get("weathercode") or 0
+        temp = current.get("temperature_2m")
+
+        # WMO codes: 51-67=rain, 71-77=snow, 80-82=showers, 95-99=storm
+        if code >= 95:
+            sug["weather_warning"] = "Thunderstorm in area"
+            sug["weather_safe"] = False
+        elif code >= 61:
+            sug["weather_warning"] = "Rain expected"
+            sug["weather_safe"] = False
+        elif code >= 71 and code <= 77:
+            sug["weather_warning"] = "Snow conditions"
+            sug["weather_safe"] = False
+        else:
+            sug["weather_safe"] = True
+
+        if temp is not None:
+            sug["temperature_f"] = round(temp)
 
     return suggestions
 
@@ -159,6 +173,8 @@ async def _search_pois_along_route(legs: list, preference: str, api_key: str, ke
     Search for POIs near the midpoint of each route leg using Google Places v1 API.
     Returns hours, ratings, and price level for each suggestion.
     Optional keyword param filters results (e.g. "vegetarian", "halal").
+    Searches run concurrently (POI_SEARCH_CONCURRENCY at a time) under
+    POI_SEARCH_DEADLINE_SECONDS; output order is leg, then POI type.
     """
     poi_types = PREFERENCE_POI_TYPES.get(preference, [])
     if not poi_types:
@@ -177,84 +193,120 @@ async def _search_pois_along_route(legs: list, preference: str, api_key: str, ke
     )
     field_mask_text = field_mask_nearby  # same fields
 
-    async with httpx.AsyncClient(timeout=10.0) as client:
-        for i, leg in enumerate(legs):
-            start = leg["start_location"]
-            end = leg["end_location"]
-            mid_lat = (start["lat"] + end["lat"]) / 2
-            mid_lng = (start["lng"] + end["lng"]) / 2
-
-            for poi_type in poi_types[:2]:
-                if use_text_search:
-                    # Text search: "vegetarian restaurant" near midpoint
-                    req_body = {
-                        "textQuery": f"{keyword} {poi_type}",
-                        "maxResultCount": 5,
-                        "locationBias": {
-                            "circle": {
-                                "center": {"latitude": mid_lat, "longitude": mid_lng},
-                                "radius": 2000.0,
-                            }
-                        },
-                    }
-                    url = v1_text_url
-                    mask = field_mask_text
-                else:
-                    req_body = {
-                        "includedTypes": [poi_type],
-                        "maxResultCount": 5,
-                        "locationRestriction": {
-                            "circle": {
-                                "center": {"latitude": mid_lat, "longitude": mid_lng},
-                                "radius": 2000.0,
-                            }
-                        },
-                    }
-                    url = v1_nearby_url
-                    mask = field_mask_nearby
-
-                # Budget filter: fetch more, filter by price
-                if preference == "budget":
-                    if not use_text_search:
-                        req_body["includedPrimaryTypes"] = [poi_type]
-                    req_body["maxResultCount"] = 8
+    # Build every (leg, type) search up front so results can be merged in
+    # leg/type order no matter which request finishes first.
+    searches = []
+    for i, leg in enumerate(legs):
+        start = leg["start_location"]
+        end = leg["end_location"]
+        mid_lat = (start["lat"] + end["lat"]) / 2
+        mid_lng = (start["lng"] + end["lng"]) / 2
+
+        for poi_type in poi_types[:2]:
+            if use_text_search:
+                # Text search: "vegetarian restaurant" near midpoint
+                req_body = {
+                    "textQuery": f"{keyword} {poi_type}",
+                    "maxResultCount": 5,
+                    "locationBias": {
+                        "circle": {
+                            "center": {"latitude": mid_lat, "longitude": mid_lng},
+                            "radius": 2000.0,
+                        }
+                    },
+                }
+                url = v1_text_url
+                mask = field_mask_text
+            else:
+                req_body = {
+                    "includedTypes": [poi_type],
+                    "maxResultCount": 5,
+                    "locationRestriction": {
+                        "circle": {
+                            "center": {"latitude": mid_lat, "longitude": mid_lng},
+                            "radius": 2000.0,
+                        }
+                    },
+                }
+                url = v1_nearby_url
+                mask = field_mask_nearby
+
+            # Budget filter: fetch more, filter by price
+            if preference == "budget":
+                if not use_text_search:
+                    req_body["includedPrimaryTypes"] = [poi_type]
+                req_body["maxResultCount"] = 8
+
+            cache_key = places_key(
+                url.rsplit("/", 1)[-1],
+                place_type=poi_type,
+                keyword=keyword if use_text_search else None,
+                center=(mid_lat, mid_lng),
+                radius=2000,
+                field_mask=mask,
+                max_results=req_body["maxResultCount"],
+                primary_only=preference == "budget" and not use_text_search,
+            )
+            searches.append((i, url, req_body, mask, cache_key))
+
+    client = get_http_client("google")
+    semaphore = asyncio.Semaphore(POI_SEARCH_CONCURRENCY)
+
+    async def run_search(leg_index: int, url: str, req_body: dict, mask: str, cache_key: str) -> list:
+        async def fetch():
+            async with semaphore:
+                resp = await client.post(
+                    url,
+                    json=req_body,
+                    headers={
+                        "X-Goog-Api-Key": api_key,
+                        "X-Goog-FieldMask": mask,
+                        "Content-Type": "application/json",
+                    },
+                )
+            return resp.json() if resp.status_code == 200 else None
+
+        data = await places_cache.get_or_fetch(cache_key, fetch) or {}
 
-                try:
-                    resp = await client.post(
-                        url,
-                        json=req_body,
-                        headers={
-                            "X-Goog-Api-Key": api_key,
-                            "X-Goog-FieldMask": mask,
-                            "Content-Type": "application/json",
-                        },
-                    )
-                    data = resp.json()
-
-                    for place in (data.get("places") or [])[:3]:
-                        loc = place.get("location", {})
-                        price = place.get("priceLevel")
-
-                        # Budget filter: skip expensive places
-                        if preference == "budget" and price in ("PRICE_LEVEL_EXPENSIVE", "PRICE_LEVEL_VERY_EXPENSIVE"):
-                            continue
-
-                        hours = place.get("regularOpeningHours", {})
-                        suggestions.append({
-                            "name": place.get("displayName", {}).get("text", "Unknown"),
-                            "coordinates": [loc.get("longitude", 0), loc.get("latitude", 0)],
-                            "types": place.get("types", []),
-                            "rating": place.get("rating"),
-                            "price_level": price,
-                            "vicinity": place.get("formattedAddress", ""),
-                            "user_ratings_total": place.get("userRatingCount", 0),
-                            "opening_hours": hours.get("weekdayDescriptions", []),
-                            "is_open": hours.get("openNow"),
-                            "leg_index": i,
-                            "preference_match": preference,
-                        })
-                except Exception:
-                    continue
+        found = []
+        for place in (data.get("places") or [])[:3]:
+            loc = place.get("location", {})
+            price = place.get("priceLevel")
+
+            # Budget filter: skip expensive places
+            if preference == "budget" and price in ("PRICE_LEVEL_EXPENSIVE", "PRICE_LEVEL_VERY_EXPENSIVE"):
+                continue
+
+            hours = place.get("regularOpeningHours", {})
+            found.append({
+                "name": place.get("displayName", {}).get("text", "Unknown"),
+                "coordinates": [loc.get("longitude", 0), loc.get("latitude", 0)],
+                "types": place.get("types", []),
+                "rating": place.get("rating"),
+                "price_level": price,
+                "vicinity": place.get("formattedAddress", ""),
+                "user_ratings_total": place.get("userRatingCount", 0),
+                "opening_hours": hours.get("weekdayDescriptions", []),
+                "is_open": hours.get("openNow"),
+                "leg_index": leg_index,
+                "preference_match": preference,
+            })
+        return found
+
+    tasks = [asyncio.create_task(run_search(*search)) for search in searches]
+    if not tasks:
+        return []
+    _, pending = await asyncio.wait(tasks, timeout=POI_SEARCH_DEADLINE_SECONDS)
+    for task in pending:
+        task.cancel()
+    if pending:
+        print(f"POI search deadline hit: {len(pending)}/{len(tasks)} searches dropped")
+
+    # Merge in (leg, type) order; failed or timed-out searches contribute nothing.
+    for task in tasks:
+        if task in pending or task.exception() is not None:
+            continue
+        suggestions.extend(task.result())
 
     # Deduplicate by name
     seen = set()
@@ -400,7 +452,7 @@ async def plan_smart_route(
                 # Try trip_members first
                 members_res = None
                 try:
-                    members_res = (
+                    members_res = await (
                         supabase.table("trip_members")
                         .select("user_id")
                         .eq("trip_id", body.group_id)
@@ -411,7 +463,7 @@ async def plan_smart_route(
                     pass
 
                 if not members_res or not members_res.data:
-                    members_res = (
+                    members_res = await (
                         supabase.table("group_member")
                         .select("user_id")
                         .eq("group_id", body.group_id)
@@ -421,7 +473,7 @@ async def plan_smart_route(
 
                 member_ids = [m["user_id"] for m in (members_res.data or [])]
                 if member_ids:
-                    prefs_res = (
+                    prefs_res = await (
                         supabase.table("user_preferences")
                         .select("avoid_types, dietary_restrictions, price_preference")
                         .in_("user_id", member_ids)
@@ -527,7 +579,7 @@ async def plan_smart_route(
         # Broadcast to group via Supabase Realtime (insert triggers the channel)
         if body.group_id:
             try:
-                supabase.table("route_broadcasts").upsert({
+                await supabase.table("route_broadcasts").upsert({
                     "trip_id": body.group_id,
                     "planned_by": user_id,
                     "route_summary": {
@@ -568,7 +620,7 @@ async def update_group_position(
     # Verify membership (try trip_members first, fallback to group_member)
     membership = None
     try:
-        membership = (
+        membership = await (
             supabase.table("trip_members")
             .select("id")
             .eq("trip_id", group_id)
@@ -582,7 +634,7 @@ async def update_group_position(
 
     if not membership or not membership.data:
         try:
-            membership = (
+            membership = await (
                 supabase.table("group_member")
                 .select("id")
                 .eq("group_id", group_id)
@@ -597,7 +649,7 @@ async def update_group_position(
     # Also check if user is the trip owner
     if not membership or not membership.data:
         try:
-            owner = (
+            owner = await (
                 supabase.table("trips")
                 .select("id")
                 .eq("id", group_id)
@@ -614,7 +666,7 @@ async def update_group_position(
         raise HTTPException(status_code=403, detail="Not a member of this group")
 
     # UPSERT position into member_positions table
-    supabase.table("member_positions").upsert(
+    await supabase.table("member_positions").upsert(
         {
             "trip_id": group_id,
             "user_id": user_id,
@@ -645,7 +697,7 @@ async def get_group_positions(
     # Try trip_members first, fallback to group_member
     members_res = None
     try:
-        members_res = (
+        members_res = await (
             supabase.table("trip_members")
             .select("user_id, role")
             .eq("trip_id", group_id)
@@ -656,7 +708,7 @@ async def get_group_positions(
         pass
 
     if not members_res or not members_res.data:
-        members_res = (
+        members_res = await (
             supabase.table("group_member")
             .select("user_id, role")
             .eq("group_id", group_id)
@@ -670,7 +722,7 @@ async def get_group_positions(
 
     role_map = {m["user_id"]: m["role"] for m in (members_res.data or [])}
 
-    users_res = (
+    users_res = await (
         supabase.table("users")
         .select("id, username")
         .in_("id", member_ids)
@@ -679,7 +731,7 @@ async def get_group_positions(
     name_map = {u["id"]: u["username"] for u in (users_res.data or [])}
 
     # Fetch actual positions from member_positions
-    pos_res = (
+    pos_res = await (
         supabase.table("member_positions")
         .select("user_id, lat, lng, heading, accuracy, updated_at")
         .eq("trip_id", group_id)
@@ -1,4 +1,5 @@
 from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi.concurrency import run_in_threadpool
 from typing import List
 
 import schemas
@@ -23,9 +24,9 @@ def read_me(current_user =  Depends(oauth2.get_current_user)):
 #get all user lists
 
 @router.get("/", response_model=List[schemas.UserOut])
-def get_users(current_user=Depends(oauth2.get_current_user)):
+async def get_users(current_user=Depends(oauth2.get_current_user)):
     try:
-        response = supabase.table("users").select("*").execute()
+        response = await supabase.table("users").select("*").execute()
         users = response.data  # list[dict]
         return users
     except Exception as e:
@@ -39,10 +40,10 @@ def get_users(current_user=Depends(oauth2.get_current_user)):
 #get user by ID
 
 @router.get("/{id}", response_model=schemas.UserOut)
-def get_user(id: int):
+async def get_user(id: int):
     try:
         # SELECT * FROM users WHERE id = id LIMIT 1;
-        response = (
+        response = await (
             supabase
             .table("users")
             .select("*")
@@ -71,10 +72,10 @@ def get_user(id: int):
 
 # create a new user in supabase
 @router.post("/", response_model=schemas.UserOut, status_code=status.HTTP_201_CREATED)
-def create_user(user: schemas.UserCreate):
+async def create_user(user: schemas.UserCreate):
     # check if email already exists
     try:
-        existing = (
+        existing = await (
             supabase
             .table("users")
             .select("id")
@@ -96,7 +97,7 @@ def create_user(user: schemas.UserCreate):
         )
 
     # Hash password
-    hashed_password = hasing.hash_password(user.password)
+    hashed_password = await run_in_threadpool(hasing.hash_password, user.password)
 
     # Insert into Supabase
     try:
@@ -112,7 +113,7 @@ def create_user(user: schemas.UserCreate):
         }
 
         # Insert and return the new row in one shot
-        response = (
+        response = await (
             supabase
             .table("users")
             .insert(insert_payload)
@@ -133,7 +134,7 @@ def create_user(user: schemas.UserCreate):
     
 # Update current user's profile
 @router.put("/me", response_model=schemas.UserOut)
-def update_me(
+async def update_me(
     user_update: schemas.UserUpdate,
     current_user=Depends(oauth2.get_current_user)
 ):
@@ -151,7 +152,7 @@ def update_me(
             return current_user  # Nothing to update
 
         # Update user in Supabase
-        response = (
+        response = await (
             supabase
             .table("users")
             .update(update_data)
@@ -159,6 +160,8 @@ def update_me(
             .execute()
         )
 
+        oauth2.invalidate_cached_user(current_user["id"])
+
         updated_user = response.data[0] if response.data else current_user
         return updated_user
 
@@ -171,29 +174,30 @@ def update_me(
     
 # Change password
 @router.put("/me/password")
-def change_password(
+async def change_password(
     password_data: schemas.PasswordChange,
     current_user=Depends(oauth2.get_current_user)
 ):
     try:
         # Verify current password
-        if not hasing.verify_password(password_data.current_password, current_user["password"]):
+        if not await run_in_threadpool(hasing.verify_password, password_data.current_password, current_user["password"]):
             raise HTTPException(
                 status_code=status.HTTP_400_BAD_REQUEST,
                 detail="Current password is incorrect"
             )
 
         # Hash new password
-        new_hashed = hasing.hash_password(password_data.new_password)
+        new_hashed = await run_in_threadpool(hasing.hash_password, password_data.new_password)
 
         # Update in Supabase
-        response = (
+        response = await (
             supabase
             .table("users")
             .update({"password": new_hashed})
             .eq("id", current_user["id"])
             .execute()
         )
+        oauth2.invalidate_cached_user(current_user["id"])
 
         return {"message": "Password changed successfully"}
 
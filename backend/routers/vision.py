@@ -3,10 +3,12 @@ from pydantic import BaseModel
 from typing import Optional
 from utils import oauth2
 from supabase_client import supabase
+from services.image_prep import get_stats as get_image_prep_stats, prepare_image
 from google import genai
 from google.genai import types
 import os
 import json
+import time
 from dotenv import load_dotenv
 
 load_dotenv()
@@ -35,8 +37,9 @@ async def analyze_receipt(
             detail=f"File type {file.content_type} not supported. Use JPEG, PNG, or WebP."
         )
 
-    # 2. Read file content
+    # 2. Read file content and shrink it for the model (rotate, crop, downscale, grayscale)
     file_content = await file.read()
+    image_data, mime_type, prep_metrics = await prepare_image(file_content, file.content_type, "receipt")
     
     # 3. Create the prompt
     prompt = """Analyze this receipt image and extract the following information.
@@ -65,13 +68,15 @@ async def analyze_receipt(
 
     # 4. Call Gemini
     try:
-        response = client.models.generate_content(
+        model_started = time.perf_counter()
+        response = await client.aio.models.generate_content(
             model="gemini-2.5-flash",
             contents=[
                 prompt,
-                types.Part.from_bytes(data=file_content, mime_type=file.content_type),
+                types.Part.from_bytes(data=image_data, mime_type=mime_type),
             ],
         )
+        prep_metrics["model_ms"] = round((time.perf_counter() - model_started) * 1000, 1)
 
         # 6. Parse the response
         response_text = response.text.strip()
@@ -90,7 +95,8 @@ async def analyze_receipt(
         return {
             "success": True,
             "data": parsed_data,
-            "raw_text": response.text
+            "raw_text": response.text,
+            "preprocessing": prep_metrics,
         }
 
     except json.JSONDecodeError:
@@ -123,6 +129,7 @@ async def analyze_document(
         )
 
     file_content = await file.read()
+    image_data, mime_type, prep_metrics = await prepare_image(file_content, file.content_type, "document")
 
     prompt = """Analyze this travel document image and extract key information.
     Return ONLY valid JSON with no extra text, no markdown backticks, no explanation.
@@ -149,13 +156,15 @@ async def analyze_document(
     If you cannot read a value, use null. Always return valid JSON."""
 
     try:
-        response = client.models.generate_content(
+        model_started = time.perf_counter()
+        response = await client.aio.models.generate_content(
             model="gemini-2.5-flash",
             contents=[
                 prompt,
-                types.Part.from_bytes(data=file_content, mime_type=file.content_type),
+                types.Part.from_bytes(data=image_data, mime_type=mime_type),
             ],
         )
+        prep_metrics["model_ms"] = round((time.perf_counter() - model_started) * 1000, 1)
 
         response_text = response.text.strip()
         if response_text.startswith("```json"):
@@ -171,7 +180,8 @@ async def analyze_document(
         return {
             "success": True,
             "data": parsed_data,
-            "raw_text": response.text
+            "raw_text": response.text,
+            "preprocessing": prep_metrics,
         }
 
     except json.JSONDecodeError:
@@ -220,11 +230,17 @@ async def save_expense(
             "currency": expense.currency,
             "payment_method": expense.payment_method,
         }
-        result = supabase.table("expenses").insert(row).execute()
+        result = await supabase.table("expenses").insert(row).execute()
         return {"success": True, "id": result.data[0]["id"] if result.data else None}
     except Exception as e:
         print(f"Save expense error: {e}")
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail="Failed to save expense"
-        )
\ No newline at end of file
+        )
+
+
+@router.get("/preprocessing-stats")
+async def get_preprocessing_stats(current_user: dict = Depends(oauth2.get_current_user)):
+    """Per-profile image preprocessing totals for this server process (see services/image_prep.py)."""
+    return get_image_prep_stats()
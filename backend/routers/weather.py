@@ -6,17 +6,24 @@ at waypoints along a route. Alerts the user if rain/snow/storms
 impact travel time or safety.
 """
 
-import httpx
+import asyncio
 from datetime import datetime, timedelta
 from fastapi import APIRouter, HTTPException, Query
-from typing import Optional
+from typing import List, Optional, Tuple
 from utils import oauth2
+from utils.http_clients import get_http_client
+from services.forecast_cache import forecast_cache
 from fastapi import Depends
 
 router = APIRouter(prefix="/weather", tags=["Weather"])
 
 OPEN_METEO_URL = "https://api.open-meteo.com/v1/forecast"
 
+# Open-Meteo accepts comma-separated coordinate lists; keep URLs a sane length.
+OPEN_METEO_BATCH_SIZE = 50
+HOURLY_FIELDS = "weathercode,temperature_2m,precipitation_probability,windspeed_10m"
+HOUR_FORMAT = "%Y-%m-%dT%H:00"  # Open-Meteo hourly time axis (GMT, no timezone param)
+
 # WMO weather codes grouped by severity
 HAZARD_CODES = {45, 48, 55, 65, 75, 95, 96, 99}  # fog, heavy rain/snow, thunderstorm, hail
 RAIN_CODES = {51, 53, 61, 63, 80, 81, 82}         # drizzle, rain, showers
@@ -60,6 +67,127 @@ def _travel_time_impact(code: int) -> dict:
     }
 
 
+# ── Forecast fetching ─────────────────────────────────────────────────────────
+
+def _hourly_params(lats: str, lngs: str) -> dict:
+    return {
+        "latitude": lats,
+        "longitude": lngs,
+        "hourly": HOURLY_FIELDS,
+        "forecast_days": 3,
+        "temperature_unit": "fahrenheit",
+        "wind_speed_unit": "mph",
+    }
+
+
+async def _fetch_hourly_single(lat: float, lng: float) -> Optional[dict]:
+    # None (never {}) on failure, so an error body isn't cached as a forecast
+    try:
+        client = get_http_client("open_meteo")
+        resp = await client.get(OPEN_METEO_URL, params=_hourly_params(str(lat), str(lng)))
+        resp.raise_for_status()
+        return resp.json().get("hourly")
+    except Exception:
+        return None
+
+
+async def _fetch_hourly_chunk(points: List[Tuple[float, float]]) -> List[Optional[dict]]:
+    """One multi-location request; falls back to concurrent single calls if it fails."""
+    try:
+        client = get_http_client("open_meteo")
+        resp = await client.get(OPEN_METEO_URL, params=_hourly_params(
+            ",".join(str(lat) for lat, _ in points),
+            ",".join(str(lng) for _, lng in points),
+        ))
+        resp.raise_for_status()
+        data = resp.json()
+        # A single location comes back as an object, several as a list.
+        results = data if isinstance(data, list) else [data]
+        if len(results) == len(points):
+            return [r.get("hourly") for r in results]
+    except Exception as e:
+        print(f"Open-Meteo batch request failed, fetching points individually: {e}")
+
+    return list(await asyncio.gather(*(_fetch_hourly_single(lat, lng) for lat, lng in points)))
+
+
+async def _fetch_hourly_uncached(points: List[Tuple[float, float]]) -> List[Optional[dict]]:
+    """
+    Points are sent in multi-location batches of OPEN_METEO_BATCH_SIZE and the
+    batches run concurrently, so latency stays flat as routes get longer.
+    """
+    chunks = [points[i:i + OPEN_METEO_BATCH_SIZE] for i in range(0, len(points), OPEN_METEO_BATCH_SIZE)]
+    chunk_results = await asyncio.gather(*(_fetch_hourly_chunk(c) for c in chunks))
+    return [hourly for chunk in chunk_results for hourly in chunk]
+
+
+async def fetch_hourly_forecasts(points: List[Tuple[float, float]]) -> List[Optional[dict]]:
+    """
+    Hourly forecasts for many (lat, lng) points, in input order.
+
+    Served from the geo-tile forecast cache; only uncached tiles hit Open-Meteo.
+    A None entry means that point's forecast could not be fetched.
+    """
+    return await forecast_cache.get_many("hourly", points, _fetch_hourly_uncached)
+
+
+async def _fetch_daily_uncached(points: List[Tuple[float, float]]) -> List[Optional[dict]]:
+    """7-day daily forecasts (the maximum the endpoint serves), sliced per request."""
+
+    async def fetch(lat: float, lng: float) -> Optional[dict]:
+        try:
+            client = get_http_client("open_meteo")
+            resp = await client.get(OPEN_METEO_URL, params={
+                "latitude": lat,
+                "longitude": lng,
+                "daily": "weathercode,temperature_2m_max,temperature_2m_min,precipitation_sum,windspeed_10m_max",
+                "forecast_days": 7,
+                "temperature_unit": "fahrenheit",
+                "wind_speed_unit": "mph",
+                "timezone": "auto",
+            })
+            resp.raise_for_status()
+            return resp.json().get("daily")
+        except Exception as e:
+            print(f"Error fetching destination forecast: {e}")
+            return None
+
+    return list(await asyncio.gather(*(fetch(lat, lng) for lat, lng in points)))
+
+
+def _hour_index(times: list, target_hour: str) -> Optional[int]:
+    """Index of target_hour in Open-Meteo's hourly time axis.
+
+    The axis is contiguous hourly steps, so the index is the hour offset from
+    the first entry; the final equality check guards against gaps.
+    """
+    if not times:
+        return None
+    try:
+        start = datetime.strptime(times[0], "%Y-%m-%dT%H:%M")
+        target = datetime.strptime(target_hour, "%Y-%m-%dT%H:%M")
+    except ValueError:
+        return None
+    idx = int((target - start).total_seconds() // 3600)
+    if 0 <= idx < len(times) and times[idx] == target_hour:
+        return idx
+    return None
+
+
+def hourly_conditions_at(hourly: Optional[dict], when: datetime) -> Optional[dict]:
+    """Pick one hour (GMT) out of a cached hourly series: weathercode, temperature_2m, ..."""
+    if not hourly:
+        return None
+    idx = _hour_index(hourly.get("time", []), when.strftime(HOUR_FORMAT))
+    if idx is None:
+        return None
+    return {
+        field: values[idx] if idx < len(values) else None
+        for field, values in hourly.items()
+        if field != "time"
+    }
+
+
 @router.get("/route-forecast")
 async def get_route_weather_forecast(
     waypoints: str = Query(..., description="Pipe-separated lat,lng pairs (e.g. 34.05,-118.24|36.17,-115.14)"),
@@ -91,70 +219,55 @@ async def get_route_weather_forecast(
     alerts = []
     forecasts = []
 
-    async with httpx.AsyncClient(timeout=10.0) as client:
-        for i, (lat, lng) in enumerate(points):
-            # Estimate arrival at this waypoint
-            fraction = i / max(len(points) - 1, 1)
-            est_arrival = dep + timedelta(minutes=total_minutes * fraction)
-            target_hour = est_arrival.strftime("%Y-%m-%dT%H:00")
-
-            try:
-                resp = await client.get(OPEN_METEO_URL, params={
-                    "latitude": lat,
-                    "longitude": lng,
-                    "hourly": "weathercode,temperature_2m,precipitation_probability,windspeed_10m",
-                    "forecast_days": 3,
-                    "temperature_unit": "fahrenheit",
-                    "wind_speed_unit": "mph",
-                })
-                data = resp.json()
-            except Exception:
-                continue
-
-            hourly = data.get("hourly", {})
-            times = hourly.get("time", [])
-            codes = hourly.get("weathercode", [])
-            precip = hourly.get("precipitation_probability", [])
-            wind = hourly.get("windspeed_10m", [])
-            temps = hourly.get("temperature_2m", [])
-
-            # Find the hour matching our estimated arrival
-            hour_idx = None
-            for j, t in enumerate(times):
-                if t == target_hour:
-                    hour_idx = j
-                    break
-
-            if hour_idx is None:
-                continue
-
-            code = codes[hour_idx] if hour_idx < len(codes) else 0
-            impact = _travel_time_impact(code)
-
-            forecast_entry = {
-                "waypoint_index": i,
-                "lat": lat,
-                "lng": lng,
-                "estimated_arrival": est_arrival.isoformat(),
-                "weather_code": code,
-                "weather_description": WMO_DESCRIPTIONS.get(code, "Unknown"),
-                "temperature_f": temps[hour_idx] if hour_idx < len(temps) else None,
-                "precipitation_pct": precip[hour_idx] if hour_idx < len(precip) else None,
-                "wind_mph": wind[hour_idx] if hour_idx < len(wind) else None,
-                "impact": impact,
-            }
-            forecasts.append(forecast_entry)
-
-            if impact["severity"] in ("high", "medium"):
-                alerts.append({
-                    **forecast_entry,
-                    "message": (
-                        f"Waypoint {i + 1}: {WMO_DESCRIPTIONS.get(code, 'Bad weather')} expected "
-                        f"around {est_arrival.strftime('%I:%M %p')}. "
-                        f"Estimated +{impact['time_increase_pct']}% travel time. "
-                        f"{impact['advice']}"
-                    ),
-                })
+    hourly_by_point = await fetch_hourly_forecasts(points)
+
+    for i, ((lat, lng), hourly) in enumerate(zip(points, hourly_by_point)):
+        if hourly is None:
+            continue
+
+        # Estimate arrival at this waypoint
+        fraction = i / max(len(points) - 1, 1)
+        est_arrival = dep + timedelta(minutes=total_minutes * fraction)
+        target_hour = est_arrival.strftime(HOUR_FORMAT)
+
+        times = hourly.get("time", [])
+        codes = hourly.get("weathercode", [])
+        precip = hourly.get("precipitation_probability", [])
+        wind = hourly.get("windspeed_10m", [])
+        temps = hourly.get("temperature_2m", [])
+
+        # Find the hour matching our estimated arrival
+        hour_idx = _hour_index(times, target_hour)
+        if hour_idx is None:
+            continue
+
+        code = codes[hour_idx] if hour_idx < len(codes) else 0
+        impact = _travel_time_impact(code)
+
+        forecast_entry = {
+            "waypoint_index": i,
+            "lat": lat,
+            "lng": lng,
+            "estimated_arrival": est_arrival.isoformat(),
+            "weather_code": code,
+            "weather_description": WMO_DESCRIPTIONS.get(code, "Unknown"),
+            "temperature_f": temps[hour_idx] if hour_idx < len(temps) else None,
+            "precipitation_pct": precip[hour_idx] if hour_idx < len(precip) else None,
+            "wind_mph": wind[hour_idx] if hour_idx < len(wind) else None,
+            "impact": impact,
+        }
+        forecasts.append(forecast_entry)
+
+        if impact["severity"] in ("high", "medium"):
+            alerts.append({
+                **forecast_entry,
+                "message": (
+                    f"Waypoint {i + 1}: {WMO_DESCRIPTIONS.get(code, 'Bad weather')} expected "
+                    f"around {est_arrival.strftime('%I:%M %p')}. "
+                    f"Estimated +{impact['time_increase_pct']}% travel time. "
+                    f"{impact['advice']}"
+                ),
+            })
 
     # Compute aggregate impact
     max_increase = max((f["impact"]["time_increase_pct"] for f in forecasts), default=0)
@@ -182,20 +295,11 @@ async def get_destination_forecast(
     Get a multi-day forecast for a destination.
     Useful for trip planning — shows daily conditions for Days 1-7.
     """
-    async with httpx.AsyncClient(timeout=10.0) as client:
-        resp = await client.get(OPEN_METEO_URL, params={
-            "latitude": lat,
-            "longitude": lng,
-            "daily": "weathercode,temperature_2m_max,temperature_2m_min,precipitation_sum,windspeed_10m_max",
-            "forecast_days": days,
-            "temperature_unit": "fahrenheit",
-            "wind_speed_unit": "mph",
-            "timezone": "auto",
-        })
-        data = resp.json()
+    daily = (await forecast_cache.get_many("daily", [(lat, lng)], _fetch_daily_uncached))[0]
+    if daily is None:
+        raise HTTPException(status_code=502, detail="Could not fetch forecast")
 
-    daily = data.get("daily", {})
-    dates = daily.get("time", [])
+    dates = daily.get("time", [])[:days]
     codes = daily.get("weathercode", [])
     highs = daily.get("temperature_2m_max", [])
     lows = daily.get("temperature_2m_min", [])
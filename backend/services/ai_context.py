@@ -0,0 +1,229 @@
+"""
+ai_context.py
+Bounded conversation context for the AI assistant.
+
+Instead of replaying every chatbot_messages row, each turn sends Gemini:
+  - a rolling summary of older turns (chatbot_conversations.summary)
+  - the last AI_CONTEXT_RECENT_TURNS turns verbatim
+  - the new message (plus this turn's tool calls/results)
+and the whole thing is trimmed to AI_CONTEXT_TOKEN_BUDGET before every model
+call. After a reply is stored, turns that slid out of the recent window are
+folded into the summary in the background, AI_CONTEXT_FOLD_BATCH messages at
+a time, so the summary is updated incrementally rather than rebuilt.
+
+    context = await load_context(conversation_id, user_id)   # None → not the user's
+    contents = build_contents(context.summary, context.recent, message)
+    enforce_budget(contents, turn_start)                      # before each call
+    await fold_older_turns(conversation_id, client, model)    # after the reply
+
+Token counts are estimated from characters (CHARS_PER_TOKEN), which is close
+enough for a budget and costs no extra API round-trip. Until
+migrations/022_chatbot_context_summary.sql is applied, the summary columns
+are missing: the context is the recent window only and folding is skipped.
+Only a schema error switches this off; a failed select just skips the summary
+for that turn.
+"""
+
+import asyncio
+import json
+import os
+from typing import List, Optional
+
+from dotenv import load_dotenv
+from google.genai import types
+
+from supabase_client import supabase
+from utils.db_errors import is_missing_schema
+
+load_dotenv()
+
+AI_CONTEXT_RECENT_TURNS = int(os.getenv("AI_CONTEXT_RECENT_TURNS", "6"))
+AI_CONTEXT_TOKEN_BUDGET = int(os.getenv("AI_CONTEXT_TOKEN_BUDGET", "8000"))
+AI_CONTEXT_FOLD_BATCH = int(os.getenv("AI_CONTEXT_FOLD_BATCH", "40"))
+AI_CONTEXT_SUMMARY_MAX_CHARS = int(os.getenv("AI_CONTEXT_SUMMARY_MAX_CHARS", "3000"))
+
+RECENT_MESSAGES = AI_CONTEXT_RECENT_TURNS * 2  # a turn is a user message + a reply
+CHARS_PER_TOKEN = 4
+
+SUMMARY_PREFIX = "[Summary of the earlier conversation]\n"
+SUMMARY_ACK = "Understood, I'll keep that in mind."
+
+SUMMARIZE_PROMPT = """You maintain the running summary of a conversation between a traveler and TravelBot, a travel assistant.
+Update the summary with the new messages below. Keep every fact that may matter later: trips, destinations,
+dates, budgets, currencies, preferences, decisions made and open questions. Drop small talk.
+Write plain prose, at most {max_words} words. Reply with the updated summary only.
+
+Current summary:
+{summary}
+
+New messages:
+{messages}"""
+
+# Flipped off the first time the summary columns are missing.
+_summary_available = True
+
+# Conversations with a fold in flight — concurrent turns skip instead of double-folding.
+_folding: set = set()
+
+
+class ChatContext:
+    def __init__(self, summary: Optional[str], recent: List[dict]):
+        self.summary = summary
+        self.recent = recent
+
+
+# ── Loading ──────────────────────────────────────────────────────────────────
+
+async def _fetch_conversation(conversation_id: str, user_id: str) -> Optional[dict]:
+    global _summary_available
+    if _summary_available:
+        try:
+            res = await supabase.table("chatbot_conversations").select(
+                "id, summary, summary_through"
+            ).eq("id", conversation_id).eq("user_id", user_id).execute()
+            return res.data[0] if res.data else None
+        except Exception as e:
+            if is_missing_schema(e):
+                print(f"Chatbot summary columns unavailable, using recent turns only: {e}")
+                _summary_available = False
+            else:
+                # Transient failure: skip the summary for this turn only
+                print(f"Chatbot summary select failed, using recent turns only: {e}")
+
+    res = await supabase.table("chatbot_conversations").select(
+        "id"
+    ).eq("id", conversation_id).eq("user_id", user_id).execute()
+    return res.data[0] if res.data else None
+
+
+async def _fetch_recent(conversation_id: str, limit: int) -> List[dict]:
+    res = await supabase.table("chatbot_messages").select(
+        "role, content, created_at"
+    ).eq("conversation_id", conversation_id).order(
+        "created_at", desc=True
+    ).limit(limit).execute()
+    return list(reversed(res.data or []))
+
+
+async def load_context(conversation_id: str, user_id: str) -> Optional[ChatContext]:
+    """Summary + recent window for a conversation, or None if the user doesn't own it."""
+    conv, recent = await asyncio.gather(
+        _fetch_conversation(conversation_id, user_id),
+        _fetch_recent(conversation_id, RECENT_MESSAGES),
+    )
+    if conv is None:
+        return None
+    return ChatContext(conv.get("summary"), recent)
+
+
+# ── Building and budgeting ───────────────────────────────────────────────────
+
+def build_contents(summary: Optional[str], recent: List[dict], message: str) -> List[types.Content]:
+    """Gemini contents: optional summary exchange, recent turns, then the new message."""
+    contents = []
+    if summary:
+        contents.append(types.Content(role="user", parts=[types.Part.from_text(text=SUMMARY_PREFIX + summary)]))
+        contents.append(types.Content(role="model", parts=[types.Part.from_text(text=SUMMARY_ACK)]))
+    for msg in recent + [{"role": "user", "content": message}]:
+        contents.append(
+            types.Content(
+                role="user" if msg["role"] == "user" else "model",
+                parts=[types.Part.from_text(text=msg["content"])],
+            )
+        )
+    return contents
+
+
+def _content_chars(content: types.Content) -> int:
+    chars = 0
+    for part in content.parts or []:
+        if part.text:
+            chars += len(part.text)
+        elif part.function_call:
+            chars += len(part.function_call.name or "") + len(json.dumps(part.function_call.args or {}, default=str))
+        elif part.function_response:
+            chars += len(json.dumps(part.function_response.response or {}, default=str))
+    return chars
+
+
+def estimate_tokens(contents: List[types.Content]) -> int:
+    return sum(_content_chars(c) for c in contents) // CHARS_PER_TOKEN
+
+
+def _has_summary(contents: List[types.Content]) -> bool:
+    parts = contents[0].parts if contents else None
+    return bool(parts and parts[0].text and parts[0].text.startswith(SUMMARY_PREFIX))
+
+
+def enforce_budget(contents: List[types.Content], turn_start: int, budget: int = AI_CONTEXT_TOKEN_BUDGET) -> int:
+    """
+    Drop the oldest history (after the summary, before `turn_start`) in place
+    until the estimate fits the budget. The current turn is never dropped.
+    History always restarts on a user message. Returns how many contents were removed.
+    """
+    head = 2 if _has_summary(contents) else 0
+    tokens = estimate_tokens(contents)
+    dropped = 0
+    while head < turn_start - dropped and (tokens > budget or contents[head].role != "user"):
+        tokens -= _content_chars(contents.pop(head)) // CHARS_PER_TOKEN
+        dropped += 1
+    return dropped
+
+
+# ── Folding ──────────────────────────────────────────────────────────────────
+
+def _format_messages(rows: List[dict]) -> str:
+    return "\n".join(
+        f"{'Traveler' if row['role'] == 'user' else 'TravelBot'}: {row['content']}" for row in rows
+    )
+
+
+async def _summarize(client, model: str, summary: Optional[str], rows: List[dict]) -> str:
+    response = await client.aio.models.generate_content(
+        model=model,
+        contents=SUMMARIZE_PROMPT.format(
+            max_words=AI_CONTEXT_SUMMARY_MAX_CHARS // 6,
+            summary=summary or "(none yet)",
+            messages=_format_messages(rows),
+        ),
+        config=types.GenerateContentConfig(temperature=0.2),
+    )
+    return (response.text or "").strip()[:AI_CONTEXT_SUMMARY_MAX_CHARS]
+
+
+async def fold_older_turns(conversation_id: str, client, model: str) -> None:
+    """Fold messages that have left the recent window into the rolling summary."""
+    if not _summary_available or conversation_id in _folding:
+        return
+    _folding.add(conversation_id)
+    try:
+        conv_res, recent = await asyncio.gather(
+            supabase.table("chatbot_conversations").select(
+                "summary, summary_through"
+            ).eq("id", conversation_id).execute(),
+            _fetch_recent(conversation_id, RECENT_MESSAGES),
+        )
+        if not conv_res.data or len(recent) < RECENT_MESSAGES:
+            return
+        conv = conv_res.data[0]
+
+        query = supabase.table("chatbot_messages").select(
+            "role, content, created_at"
+        ).eq("conversation_id", conversation_id).lt("created_at", recent[0]["created_at"])
+        if conv.get("summary_through"):
+            query = query.gt("created_at", conv["summary_through"])
+        older = (await query.order("created_at").limit(AI_CONTEXT_FOLD_BATCH).execute()).data or []
+        if not older:
+            return
+
+        summary = await _summarize(client, model, conv.get("summary"), older)
+        if not summary:
+            return
+        await supabase.table("chatbot_conversations").update({
+            "summary": summary,
+            "summary_through": older[-1]["created_at"],
+        }).eq("id", conversation_id).execute()
+    except Exception as e:
+        print(f"Error folding chatbot context: {e}")
+    finally:
+        _folding.discard(conversation_id)
@@ -0,0 +1,190 @@
+"""
+ai_prompt_cache.py
+Reusable request prefix for the AI assistant, plus per-conversation usage.
+
+The system prompt and tool declarations never change between calls, so
+they're set up once:
+  server   — a Gemini cached content (client.aio.caches) holding the system
+             instruction + tools; every call just references it by name.
+             Recreated shortly before AI_PROMPT_CACHE_TTL_SECONDS runs out.
+  template — a single GenerateContentConfig built at startup and shared by
+             every call. Used when server caching is off (AI_PROMPT_CACHE=off)
+             or the model/prefix doesn't qualify (e.g. below the minimum
+             cacheable size); creation is retried after AI_PROMPT_CACHE_RETRY_SECONDS.
+Gemini 2.5 also caches repeated prefixes implicitly, so the template path
+still gets cached-token discounts when the prefix stays byte-identical.
+Per-user details must therefore go in the contents, not the system instruction.
+
+    config = await prompt_cache.get_config()
+    ...
+    prompt_cache.record(conversation_id, chunk.usage_metadata, latency, first_chunk)
+    prompt_cache.get_usage(conversation_id)
+
+Usage per conversation (calls, prompt / cached / output tokens, latency) is
+kept in memory for AI_USAGE_TTL_SECONDS after the last call.
+"""
+
+import asyncio
+import os
+import time
+from typing import Optional
+
+from cachetools import TTLCache
+from dotenv import load_dotenv
+from google.genai import errors, types
+
+load_dotenv()
+
+AI_PROMPT_CACHE = os.getenv("AI_PROMPT_CACHE", "auto")
+AI_PROMPT_CACHE_TTL_SECONDS = int(os.getenv("AI_PROMPT_CACHE_TTL_SECONDS", "3600"))
+AI_PROMPT_CACHE_RETRY_SECONDS = int(os.getenv("AI_PROMPT_CACHE_RETRY_SECONDS", "900"))
+AI_USAGE_TTL_SECONDS = int(os.getenv("AI_USAGE_TTL_SECONDS", "86400"))
+AI_USAGE_MAX_CONVERSATIONS = int(os.getenv("AI_USAGE_MAX_CONVERSATIONS", "10000"))
+
+# Stop handing out a server cache this long before it expires
+_REFRESH_MARGIN_SECONDS = 60
+
+
+def is_cache_rejection(e: Exception) -> bool:
+    """True if a call failed because its cached content is gone or unusable (not e.g. 429 / 503)."""
+    if not isinstance(e, errors.ClientError):
+        return False
+    if e.code == 404:
+        return True
+    # 400 / 403 name the cache, e.g. "Cached content ... not found / expired"
+    message = (e.message or str(e)).lower()
+    return e.code in (400, 403) and ("cached content" in message or "cachedcontent" in message)
+
+
+class _Usage:
+    def __init__(self):
+        self.calls = 0
+        self.server_cache_calls = 0
+        self.prompt_tokens = 0
+        self.cached_tokens = 0
+        self.output_tokens = 0
+        self.latency_total = 0.0
+        self.first_chunk_total = 0.0
+
+    def snapshot(self) -> dict:
+        return {
+            "calls": self.calls,
+            "server_cache_calls": self.server_cache_calls,
+            "prompt_tokens": self.prompt_tokens,
+            "cached_tokens": self.cached_tokens,
+            "uncached_prompt_tokens": self.prompt_tokens - self.cached_tokens,
+            "output_tokens": self.output_tokens,
+            "cached_ratio": round(self.cached_tokens / self.prompt_tokens, 4) if self.prompt_tokens else 0.0,
+            "avg_latency_ms": round(self.latency_total / self.calls * 1000, 1) if self.calls else 0.0,
+            "avg_first_chunk_ms": round(self.first_chunk_total / self.calls * 1000, 1) if self.calls else 0.0,
+        }
+
+
+class PromptCache:
+    def __init__(self, client, model: str, system_instruction: str, tools: list, temperature: float):
+        self.client = client
+        self.model = model
+        self.system_instruction = system_instruction
+        self.tools = tools
+        self.temperature = temperature
+        # Built once; every call that can't use the server cache shares it
+        self.template = types.GenerateContentConfig(
+            system_instruction=system_instruction,
+            tools=tools,
+            temperature=temperature,
+        )
+        self._cached_config: Optional[types.GenerateContentConfig] = None
+        self._cache_name: Optional[str] = None
+        self._expires_at = 0.0
+        self._retry_at = 0.0
+        self._lock = asyncio.Lock()
+        self._usage: TTLCache = TTLCache(maxsize=AI_USAGE_MAX_CONVERSATIONS, ttl=AI_USAGE_TTL_SECONDS)
+        self.stats = {"server_cache_created": 0, "server_cache_failures": 0}
+
+    async def get_config(self) -> types.GenerateContentConfig:
+        if AI_PROMPT_CACHE == "off":
+            return self.template
+        now = time.monotonic()
+        if self._cached_config is not None and now < self._expires_at - _REFRESH_MARGIN_SECONDS:
+            return self._cached_config
+        if now < self._retry_at:
+            return self.template
+
+        async with self._lock:
+            # Another caller may have refreshed it while we waited
+            now = time.monotonic()
+            if self._cached_config is not None and now < self._expires_at - _REFRESH_MARGIN_SECONDS:
+                return self._cached_config
+            if now < self._retry_at:
+                return self.template
+            try:
+                cache = await self.client.aio.caches.create(
+                    model=self.model,
+                    config=types.CreateCachedContentConfig(
+                        display_name="travelbot-prefix",
+                        system_instruction=self.system_instruction,
+                        tools=self.tools,
+                        ttl=f"{AI_PROMPT_CACHE_TTL_SECONDS}s",
+                    ),
+                )
+            except Exception as e:
+                print(f"Gemini context cache unavailable, using request template: {e}")
+                self.stats["server_cache_failures"] += 1
+                self._retry_at = now + AI_PROMPT_CACHE_RETRY_SECONDS
+                self._cached_config = None
+                return self.template
+
+            # The old cache (if any) expires on its own; in-flight calls may still reference it
+            self._cache_name = cache.name
+            self._expires_at = now + AI_PROMPT_CACHE_TTL_SECONDS
+            self._cached_config = types.GenerateContentConfig(
+                cached_content=cache.name,
+                temperature=self.temperature,
+            )
+            self.stats["server_cache_created"] += 1
+            return self._cached_config
+
+    def invalidate(self) -> None:
+        """Drop a server cache the API rejected (e.g. expired early) and back off."""
+        self._cached_config = None
+        self._retry_at = time.monotonic() + AI_PROMPT_CACHE_RETRY_SECONDS
+
+    def record(self, conversation_id: str, usage_metadata, config: types.GenerateContentConfig,
+               latency: float, first_chunk: float) -> None:
+        usage = self._usage.get(conversation_id)
+        if usage is None:
+            usage = _Usage()
+        usage.calls += 1
+        if config.cached_content:
+            usage.server_cache_calls += 1
+        if usage_metadata is not None:
+            usage.prompt_tokens += usage_metadata.prompt_token_count or 0
+            usage.cached_tokens += usage_metadata.cached_content_token_count or 0
+            usage.output_tokens += usage_metadata.candidates_token_count or 0
+        usage.latency_total += latency
+        usage.first_chunk_total += first_chunk
+        # Re-set so the TTL counts from the latest call
+        self._usage[conversation_id] = usage
+
+    def get_usage(self, conversation_id: str) -> dict:
+        usage = self._usage.get(conversation_id)
+        return (usage or _Usage()).snapshot()
+
+    def get_stats(self) -> dict:
+        return {
+            **self.stats,
+            "mode": "server" if self._cached_config is not None else "template",
+            "cache_name": self._cache_name if self._cached_config is not None else None,
+            "conversations_tracked": len(self._usage),
+        }
+
+    async def close(self) -> None:
+        """Delete the server cache so it stops accruing storage. Called on shutdown."""
+        if self._cache_name is None:
+            return
+        try:
+            await self.client.aio.caches.delete(name=self._cache_name)
+        except Exception as e:
+            print(f"Error deleting Gemini context cache: {e}")
+        self._cache_name = None
+        self._cached_config = None
@@ -0,0 +1,118 @@
+"""
+ai_tool_cache.py
+Memoized AI assistant tool results, per conversation.
+
+Gemini often asks for the same lookup several times — across the tool rounds
+of one message and again on the next turn. Results of the read-only data
+tools are cached per (conversation, tool, args) for AI_TOOL_CACHE_TTL_SECONDS.
+Identical calls already in flight (e.g. two in the same round) are coalesced.
+
+Each entry carries dependency tags, e.g. ("booking", trip_id). Routers that
+write those tables call invalidate(kind, key), and any entry fetched before
+the write is treated as a miss from then on:
+
+    result = await tool_cache.get_or_run(conversation_id, name, args, tags, run)
+    tool_cache.invalidate("booking", trip_id)       # booking router, after a write
+
+Tool errors are never cached. Invalidation is per process, so another
+worker's entries can stay stale until their TTL runs out.
+"""
+
+import asyncio
+import itertools
+import json
+import os
+from typing import Awaitable, Callable, Iterable, Tuple
+
+from cachetools import TTLCache
+from dotenv import load_dotenv
+
+load_dotenv()
+
+AI_TOOL_CACHE_TTL_SECONDS = int(os.getenv("AI_TOOL_CACHE_TTL_SECONDS", "120"))
+AI_TOOL_CACHE_MAX_ENTRIES = int(os.getenv("AI_TOOL_CACHE_MAX_ENTRIES", "5000"))
+
+Tag = Tuple[str, str]
+
+
+def _is_error(result: str) -> bool:
+    return result.startswith('{"error"')
+
+
+class ToolResultCache:
+    def __init__(self, ttl: int, max_entries: int):
+        # key -> (result, tags, fetched_seq)
+        self._entries: TTLCache = TTLCache(maxsize=max_entries, ttl=ttl)
+        # tag -> seq of its latest invalidation; older ones can't matter once entries expire
+        self._invalidated: TTLCache = TTLCache(maxsize=max_entries, ttl=ttl)
+        self._seq = itertools.count(1)
+        self._inflight: dict = {}
+        self.stats = {"hits": 0, "misses": 0, "coalesced": 0, "stale": 0, "invalidations": 0}
+        self.tool_stats: dict = {}
+
+    def _fresh(self, tags: Iterable[Tag], fetched_seq: int) -> bool:
+        return all(self._invalidated.get(tag, 0) < fetched_seq for tag in tags)
+
+    def _count(self, tool: str, outcome: str) -> None:
+        self.stats[outcome] += 1
+        per_tool = self.tool_stats.setdefault(tool, {"hits": 0, "misses": 0, "coalesced": 0, "stale": 0})
+        per_tool[outcome] += 1
+
+    async def get_or_run(self, conversation_id: str, tool: str, args: dict, tags: Iterable[Tag],
+                         run: Callable[[], Awaitable[str]]) -> str:
+        tags = tuple((kind, str(key)) for kind, key in tags)
+        key = (conversation_id, tool, json.dumps(args, sort_keys=True, default=str))
+
+        cached = self._entries.get(key)
+        if cached is not None:
+            result, _, fetched_seq = cached
+            if self._fresh(tags, fetched_seq):
+                self._count(tool, "hits")
+                return result
+            self._entries.pop(key, None)
+            self._count(tool, "stale")
+
+        task = self._inflight.get(key)
+        if task is not None:
+            self._count(tool, "coalesced")
+        else:
+            self._count(tool, "misses")
+            task = asyncio.create_task(self._run(key, tags, run))
+            self._inflight[key] = task
+        # shield: one caller giving up must not cancel the call for the others
+        return await asyncio.shield(task)
+
+    async def _run(self, key: tuple, tags: Tuple[Tag, ...], run: Callable[[], Awaitable[str]]) -> str:
+        # Taken before the query, so a write that lands mid-query still invalidates it
+        fetched_seq = next(self._seq)
+        try:
+            result = await run()
+            if not _is_error(result):
+                self._entries[key] = (result, tags, fetched_seq)
+            return result
+        finally:
+            self._inflight.pop(key, None)
+
+    def invalidate(self, kind: str, key) -> None:
+        """Mark everything tagged (kind, key) as stale, e.g. after a booking write."""
+        if key is None:
+            return
+        self._invalidated[(kind, str(key))] = next(self._seq)
+        self.stats["invalidations"] += 1
+
+    def get_stats(self) -> dict:
+        def with_rate(counts: dict) -> dict:
+            # "stale" lookups are also counted as the miss/coalesce that followed
+            lookups = counts["hits"] + counts["misses"] + counts["coalesced"]
+            saved = counts["hits"] + counts["coalesced"]
+            return {**counts, "hit_rate": round(saved / lookups, 4) if lookups else 0.0}
+
+        return {
+            **with_rate(self.stats),
+            "entries": len(self._entries),
+            "inflight": len(self._inflight),
+            "tools": {tool: with_rate(counts) for tool, counts in self.tool_stats.items()},
+        }
+
+
+tool_cache = ToolResultCache(AI_TOOL_CACHE_TTL_SECONDS, AI_TOOL_CACHE_MAX_ENTRIES)
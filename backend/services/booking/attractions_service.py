@@ -2,6 +2,8 @@ import os
 import httpx
 from dotenv import load_dotenv
 
+from utils.http_clients import get_http_client
+
 load_dotenv()
 
 GOOGLE_API_KEY = os.getenv("GOOGLE_PLACES_API_KEY", "")
@@ -15,18 +17,18 @@ async def search_activities(lat: float, lng: float, radius: int = 5) -> dict:
     Returns up to 15 activities near the given coordinates.
     """
     try:
-        async with httpx.AsyncClient(timeout=10.0) as client:
-            resp = await client.get(
-                NEARBY_URL,
-                params={
-                    "location": f"{lat},{lng}",
-                    "radius": radius * 1000,   # km → metres
-                    "type": "tourist_attraction",
-                    "key": GOOGLE_API_KEY,
-                },
-            )
-            resp.raise_for_status()
-            data = resp.json()
+        client = get_http_client("google")
+        resp = await client.get(
+            NEARBY_URL,
+            params={
+                "location": f"{lat},{lng}",
+                "radius": radius * 1000,   # km → metres
+                "type": "tourist_attraction",
+                "key": GOOGLE_API_KEY,
+            },
+        )
+        resp.raise_for_status()
+        data = resp.json()
 
         if data.get("status") not in ("OK", "ZERO_RESULTS"):
             return {"data": None, "error": data.get("status", "Places API error")}
@@ -63,17 +65,17 @@ async def get_activity_details(activity_id: str) -> dict:
     Google Places Details for a specific place_id.
     """
     try:
-        async with httpx.AsyncClient(timeout=10.0) as client:
-            resp = await client.get(
-                "https://maps.googleapis.com/maps/api/place/details/json",
-                params={
-                    "place_id": activity_id,
-                    "fields": "name,formatted_address,rating,geometry,editorial_summary,url,photos",
-                    "key": GOOGLE_API_KEY,
-                },
-            )
-            resp.raise_for_status()
-            data = resp.json()
+        client = get_http_client("google")
+        resp = await client.get(
+            "https://maps.googleapis.com/maps/api/place/details/json",
+            params={
+                "place_id": activity_id,
+                "fields": "name,formatted_address,rating,geometry,editorial_summary,url,photos",
+                "key": GOOGLE_API_KEY,
+            },
+        )
+        resp.raise_for_status()
+        data = resp.json()
         return {"data": data.get("result"), "error": None}
     except httpx.HTTPError as e:
         return {"data": None, "error": str(e)}
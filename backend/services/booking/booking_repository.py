@@ -1,8 +1,7 @@
 """
 booking_repository.py
 Raw Supabase CRUD for public.bookings and public.booking_participants.
-All functions are async-compatible but the Supabase Python client is sync
-(no await needed on its calls).
+All functions await the shared async Supabase client.
 """
 
 import sys
@@ -49,7 +48,7 @@ async def create_booking(
         }
         # strip None values so Supabase uses column defaults where applicable
         payload = {k: v for k, v in payload.items() if v is not None}
-        res = supabase.table("bookings").insert(payload).execute()
+        res = await supabase.table("bookings").insert(payload).execute()
         if not res.data:
             return {"data": None, "error": "Insert returned no data"}
         return {"data": res.data[0], "error": None}
@@ -59,7 +58,7 @@ async def create_booking(
 
 async def get_bookings_by_trip(trip_id: str) -> dict:
     try:
-        res = (
+        res = await (
             supabase.table("bookings")
             .select("*")
             .eq("trip_id", trip_id)
@@ -73,7 +72,7 @@ async def get_bookings_by_trip(trip_id: str) -> dict:
 
 async def get_booking(booking_id: str) -> dict:
     try:
-        res = (
+        res = await (
             supabase.table("bookings")
             .select("*")
             .eq("id", booking_id)
@@ -87,7 +86,7 @@ async def get_booking(booking_id: str) -> dict:
 
 async def update_booking_status(booking_id: str, status: str) -> dict:
     try:
-        res = (
+        res = await (
             supabase.table("bookings")
             .update({"status": status})
             .eq("id", booking_id)
@@ -111,7 +110,7 @@ async def add_participants(booking_id: str, user_ids: list) -> dict:
         return {"data": [], "error": None}
     try:
         rows = [{"booking_id": booking_id, "user_id": uid} for uid in user_ids]
-        res = supabase.table("booking_participants").insert(rows).execute()
+        res = await supabase.table("booking_participants").insert(rows).execute()
         return {"data": res.data or [], "error": None}
     except Exception as e:
         return {"data": None, "error": str(e)}
@@ -2,6 +2,9 @@ import os
 import httpx
 from dotenv import load_dotenv
 
+from utils.http_clients import get_http_client
+from services.places_cache import places_cache, places_key, cacheable_legacy_response
+
 load_dotenv()
 
 GOOGLE_API_KEY = os.getenv("GOOGLE_PLACES_API_KEY", "")
@@ -25,13 +28,13 @@ async def search_city(city_name: str) -> dict:
     Used by both hotel search and activity search in the frontend.
     """
     try:
-        async with httpx.AsyncClient(timeout=10.0) as client:
-            resp = await client.get(
-                GEOCODE_URL,
-                params={"address": city_name, "key": GOOGLE_API_KEY},
-            )
-            resp.raise_for_status()
-            data = resp.json()
+        client = get_http_client("google")
+        resp = await client.get(
+            GEOCODE_URL,
+            params={"address": city_name, "key": GOOGLE_API_KEY},
+        )
+        resp.raise_for_status()
+        data = resp.json()
 
         if data.get("status") not in ("OK", "ZERO_RESULTS"):
             return {"data": None, "error": data.get("status", "Geocoding error")}
@@ -75,7 +78,10 @@ async def search_hotels(
     but are not sent to Google (use them to prefill the save form).
     """
     try:
-        async with httpx.AsyncClient(timeout=10.0) as client:
+        cache_key = places_key("nearbysearch", place_type="lodging", center=(lat, lng), radius=10000)
+        data = await places_cache.aget(cache_key)
+        if data is None:
+            client = get_http_client("google")
             resp = await client.get(
                 NEARBY_URL,
                 params={
@@ -87,6 +93,7 @@ async def search_hotels(
             )
             resp.raise_for_status()
             data = resp.json()
+            await places_cache.aset(cache_key, cacheable_legacy_response(data))
 
         if data.get("status") not in ("OK", "ZERO_RESULTS"):
             return {"data": None, "error": data.get("status", "Places API error")}
@@ -122,17 +129,17 @@ async def get_hotel_offer(place_id: str) -> dict:
     Google Places Details — fetch full details for a specific place.
     """
     try:
-        async with httpx.AsyncClient(timeout=10.0) as client:
-            resp = await client.get(
-                "https://maps.googleapis.com/maps/api/place/details/json",
-                params={
-                    "place_id": place_id,
-                    "fields": "name,formatted_address,rating,price_level,geometry,url",
-                    "key": GOOGLE_API_KEY,
-                },
-            )
-            resp.raise_for_status()
-            data = resp.json()
+        client = get_http_client("google")
+        resp = await client.get(
+            "https://maps.googleapis.com/maps/api/place/details/json",
+            params={
+                "place_id": place_id,
+                "fields": "name,formatted_address,rating,price_level,geometry,url",
+                "key": GOOGLE_API_KEY,
+            },
+        )
+        resp.raise_for_status()
+        data = resp.json()
         return {"data": data.get("result"), "error": None}
     except httpx.HTTPError as e:
         return {"data": None, "error": str(e)}
@@ -0,0 +1,277 @@
+"""
+chat_backplane.py
+Cross-process pub/sub for chat broadcasts.
+
+Each worker's chat_broadcaster only knows the sockets it holds itself. The
+backplane carries every broadcast to every worker (CHAT_BACKPLANE):
+  memory — single process; publish goes straight to the local broadcaster (default)
+  redis  — any server speaking the Redis protocol (Redis, Valkey, KeyDB, or a
+           local stand-in) at CHAT_BACKPLANE_URL:
+               redis://[user:password@]host:port   or   unix:///path/to/socket
+           Every worker PSUBSCRIBEs to "<CHAT_BACKPLANE_PREFIX>*" and fans the
+           messages out to its own sockets, so a message posted on worker A
+           reaches sockets held by worker B.
+
+Payloads are serialized once by the publishing worker and forwarded verbatim.
+A publish that provably never reached the server (no connection within
+CHAT_BACKPLANE_TIMEOUT seconds, or an error reply) is delivered to this
+worker's sockets only. Once the frame has been written, a lost or late reply
+is not retried or delivered locally: the server may already have published
+it, and doing either would show the message twice. Clients recover anything
+missed through the reconnect replay.
+
+Control messages (cache invalidations) travel the same way on
+"<prefix>_control:<kind>" and reach every worker's handler for that kind,
+including the publisher's. When the subscriber (re)connects, handlers are
+called with None, since invalidations may have been missed while it was down.
+
+    await chat_backplane.start()                       # app lifespan
+    await chat_backplane.publish(conversation_id, text)
+    chat_backplane.on_control("public_key", handler)   # handler(payload | None)
+    await chat_backplane.publish_control("public_key", user_id)
+    await chat_backplane.close()
+"""
+
+import asyncio
+import os
+from typing import Callable, Dict, Optional, Tuple
+from urllib.parse import unquote, urlparse
+
+from dotenv import load_dotenv
+
+from services.chat_broadcaster import ChatBroadcaster, chat_broadcaster
+
+load_dotenv()
+
+CHAT_BACKPLANE = os.getenv("CHAT_BACKPLANE", "memory")
+CHAT_BACKPLANE_URL = os.getenv("CHAT_BACKPLANE_URL", "redis://localhost:6379")
+CHAT_BACKPLANE_PREFIX = os.getenv("CHAT_BACKPLANE_PREFIX", "chat:")
+CHAT_BACKPLANE_TIMEOUT = float(os.getenv("CHAT_BACKPLANE_TIMEOUT", "2.0"))
+
+RECONNECT_BASE_SECONDS = 0.5
+RECONNECT_MAX_SECONDS = 10.0
+
+# Conversation ids are uuids, so this channel suffix can't collide with a room
+_CONTROL = "_control:"
+
+
+class _ControlHandlers:
+    def __init__(self):
+        self._handlers: Dict[str, Callable[[Optional[str]], None]] = {}
+
+    def on_control(self, kind: str, handler: Callable[[Optional[str]], None]) -> None:
+        self._handlers[kind] = handler
+
+    def _dispatch(self, kind: str, payload: Optional[str]) -> None:
+        handler = self._handlers.get(kind)
+        if handler is None:
+            return
+        try:
+            handler(payload)
+        except Exception as e:
+            print(f"Chat backplane control handler {kind!r} failed: {e}")
+
+    def _dispatch_all(self, payload: Optional[str]) -> None:
+        for kind in list(self._handlers):
+            self._dispatch(kind, payload)
+
+
+class InMemoryBackplane(_ControlHandlers):
+    """Single-process backplane: publishing is local delivery."""
+
+    def __init__(self, broadcaster: ChatBroadcaster):
+        super().__init__()
+        self.broadcaster = broadcaster
+
+    async def start(self) -> None:
+        pass
+
+    async def publish(self, room_id: str, text: str) -> None:
+        self.broadcaster.publish_text(room_id, text)
+
+    async def publish_control(self, kind: str, payload: str) -> None:
+        self._dispatch(kind, payload)
+
+    async def close(self) -> None:
+        pass
+
+
+# ── Redis protocol (RESP2) ────────────────────────────────────────────────────
+
+def _encode_command(*args) -> bytes:
+    out = [b"*%d\r\n" % len(args)]
+    for arg in args:
+        data = arg if isinstance(arg, bytes) else str(arg).encode()
+        out.append(b"$%d\r\n%s\r\n" % (len(data), data))
+    return b"".join(out)
+
+
+class ReplyError(Exception):
+    """Error reply ("-ERR ...") — the server did not run the command."""
+
+
+async def _read_reply(reader: asyncio.StreamReader):
+    line = await reader.readline()
+    if not line:
+        raise ConnectionError("Backplane connection closed")
+    kind, body = line[:1], line[1:-2]
+    if kind == b"+":
+        return body.decode()
+    if kind == b"-":
+        raise ReplyError(body.decode())
+    if kind == b":":
+        return int(body)
+    if kind == b"$":
+        size = int(body)
+        if size < 0:
+            return None
+        data = await reader.readexactly(size + 2)
+        return data[:-2]
+    if kind == b"*":
+        size = int(body)
+        if size < 0:
+            return None
+        return [await _read_reply(reader) for _ in range(size)]
+    raise ConnectionError(f"Unexpected backplane reply: {line!r}")
+
+
+class RedisBackplane(_ControlHandlers):
+    """Pub/sub over a Redis-protocol server (TCP or unix socket)."""
+
+    def __init__(self, url: str, prefix: str, broadcaster: ChatBroadcaster):
+        super().__init__()
+        self.url = urlparse(url)
+        self.prefix = prefix
+        self.broadcaster = broadcaster
+        self._pub: Optional[Tuple[asyncio.StreamReader, asyncio.StreamWriter]] = None
+        self._pub_lock = asyncio.Lock()
+        self._listener: Optional[asyncio.Task] = None
+
+    async def _connect(self) -> Tuple[asyncio.StreamReader, asyncio.StreamWriter]:
+        if self.url.scheme == "unix":
+            reader, writer = await asyncio.open_unix_connection(self.url.path)
+        else:
+            reader, writer = await asyncio.open_connection(self.url.hostname or "localhost", self.url.port or 6379)
+        if self.url.password:
+            args = ("AUTH", unquote(self.url.username), unquote(self.url.password)) if self.url.username \
+                else ("AUTH", unquote(self.url.password))
+            writer.write(_encode_command(*args))
+            await _read_reply(reader)
+        return reader, writer
+
+    async def start(self) -> None:
+        if self._listener is None:
+            self._listener = asyncio.create_task(self._listen())
+
+    async def _ensure_pub(self) -> Tuple[asyncio.StreamReader, asyncio.StreamWriter]:
+        if self._pub is not None:
+            reader, writer = self._pub
+            # The server closed an idle connection; nothing has been sent on it yet
+            if reader.at_eof() or writer.is_closing():
+                await self._close_pub()
+        if self._pub is None:
+            self._pub = await self._connect()
+        return self._pub
+
+    async def _await_reply(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        await writer.drain()
+        await _read_reply(reader)
+
+    async def _publish(self, channel: str, payload: bytes) -> bool:
+        """True if the server may have published the message (its subscribers then deliver it)."""
+        try:
+            # A publish stuck ahead of us holds the lock; don't queue behind it forever
+            await asyncio.wait_for(self._pub_lock.acquire(), CHAT_BACKPLANE_TIMEOUT)
+        except asyncio.TimeoutError:
+            print("Chat backplane busy")
+            return False
+
+        try:
+            try:
+                reader, writer = await asyncio.wait_for(self._ensure_pub(), CHAT_BACKPLANE_TIMEOUT)
+            except Exception as e:
+                print(f"Chat backplane unreachable: {e!r}")
+                await self._close_pub()
+                return False
+
+            try:
+                writer.write(_encode_command("PUBLISH", channel, payload))
+                await asyncio.wait_for(self._await_reply(reader, writer), CHAT_BACKPLANE_TIMEOUT)
+                return True
+            except ReplyError as e:
+                print(f"Chat backplane rejected publish: {e}")
+                return False
+            except asyncio.CancelledError:
+                await self._close_pub()
+                raise
+            except Exception as e:
+                # Sent but unconfirmed; a late reply would desync the connection
+                print(f"Chat backplane publish unconfirmed, not delivering locally: {e!r}")
+                await self._close_pub()
+                return True
+        finally:
+            self._pub_lock.release()
+
+    async def publish(self, room_id: str, text: str) -> None:
+        if not await self._publish(self.prefix + room_id, text.encode()):
+            # Backplane down — at least reach the sockets on this worker
+            self.broadcaster.publish_text(room_id, text)
+
+    async def publish_control(self, kind: str, payload: str) -> None:
+        if not await self._publish(self.prefix + _CONTROL + kind, payload.encode()):
+            self._dispatch(kind, payload)
+
+    async def _listen(self) -> None:
+        delay = RECONNECT_BASE_SECONDS
+        while True:
+            writer = None
+            try:
+                reader, writer = await self._connect()
+                writer.write(_encode_command("PSUBSCRIBE", self.prefix + "*"))
+                await writer.drain()
+                delay = RECONNECT_BASE_SECONDS
+                # Anything published while we weren't subscribed is gone
+                self._dispatch_all(None)
+                while True:
+                    reply = await _read_reply(reader)
+                    # ["pmessage", pattern, channel, payload]
+                    if isinstance(reply, list) and reply and reply[0] == b"pmessage":
+                        channel = reply[2].decode()[len(self.prefix):]
+                        if channel.startswith(_CONTROL):
+                            self._dispatch(channel[len(_CONTROL):], reply[3].decode())
+                        else:
+                            self.broadcaster.publish_text(channel, reply[3].decode())
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                print(f"Chat backplane subscriber error: {e}")
+            finally:
+                if writer is not None:
+                    writer.close()
+            await asyncio.sleep(delay)
+            delay = min(RECONNECT_MAX_SECONDS, delay * 2)
+
+    async def _close_pub(self) -> None:
+        if self._pub is not None:
+            self._pub[1].close()
+            self._pub = None
+
+    async def close(self) -> None:
+        if self._listener is not None:
+            self._listener.cancel()
+            try:
+                await self._listener
+            except asyncio.CancelledError:
+                pass
+            self._listener = None
+        async with self._pub_lock:
+            await self._close_pub()
+
+
+def _make_backplane():
+    if CHAT_BACKPLANE == "redis":
+        return RedisBackplane(CHAT_BACKPLANE_URL, CHAT_BACKPLANE_PREFIX, chat_broadcaster)
+    return InMemoryBackplane(chat_broadcaster)
+
+
+chat_backplane = _make_backplane()
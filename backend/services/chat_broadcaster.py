@@ -0,0 +1,228 @@
+"""
+chat_broadcaster.py
+Per-room WebSocket fan-out for the chat.
+
+A message is serialized once, and the same text frame is pushed into a
+bounded queue for each connection. Every connection has its own writer task,
+so a slow client only delays itself. When a connection's queue is full, the
+backpressure policy applies (CHAT_BACKPRESSURE_POLICY):
+  disconnect — close the slow socket with 1013 "try again later"; the client
+               reconnects and re-syncs history (default)
+  drop       — discard that socket's oldest queued frame and keep going
+
+A socket joined with paused=True (history replay in progress) collects live
+frames in a backlog of up to CHAT_REPLAY_BACKLOG_SIZE instead, so a long
+replay doesn't trip the policy. resume() sends the backlog first, minus any
+frames the caller says were already replayed.
+
+    conn = chat_broadcaster.join(conversation_id, websocket)
+    chat_broadcaster.publish(conversation_id, message)
+    await chat_broadcaster.leave(conn)
+
+get_stats() reports, per live room: published, delivered, dropped and
+disconnected counts, plus enqueue→sent latency (avg / p95 / max over the last
+CHAT_LATENCY_SAMPLES deliveries).
+"""
+
+import asyncio
+import json
+import os
+import time
+from collections import deque
+from typing import Callable, Dict, Optional, Set
+
+from dotenv import load_dotenv
+from fastapi import WebSocket
+
+load_dotenv()
+
+CHAT_SEND_QUEUE_SIZE = int(os.getenv("CHAT_SEND_QUEUE_SIZE", "64"))
+CHAT_BACKPRESSURE_POLICY = os.getenv("CHAT_BACKPRESSURE_POLICY", "disconnect")
+CHAT_SEND_TIMEOUT_SECONDS = float(os.getenv("CHAT_SEND_TIMEOUT_SECONDS", "10"))
+CHAT_LATENCY_SAMPLES = int(os.getenv("CHAT_LATENCY_SAMPLES", "500"))
+CHAT_REPLAY_BACKLOG_SIZE = int(os.getenv("CHAT_REPLAY_BACKLOG_SIZE", "2000"))
+
+_CLOSE_TRY_AGAIN_LATER = 1013
+
+
+def serialize(message: dict) -> str:
+    # Same encoding Starlette's send_json uses for text frames
+    return json.dumps(message, separators=(",", ":"), ensure_ascii=False)
+
+
+class _RoomMetrics:
+    def __init__(self):
+        self.published = 0
+        self.delivered = 0
+        self.dropped = 0
+        self.disconnected = 0
+        self.max_latency = 0.0
+        self.latencies: deque = deque(maxlen=CHAT_LATENCY_SAMPLES)
+
+    def record_delivery(self, latency: float) -> None:
+        self.delivered += 1
+        self.latencies.append(latency)
+        self.max_latency = max(self.max_latency, latency)
+
+    def snapshot(self) -> dict:
+        samples = sorted(self.latencies)
+        return {
+            "published": self.published,
+            "delivered": self.delivered,
+            "dropped": self.dropped,
+            "disconnected": self.disconnected,
+            "latency_ms": {
+                "avg": round(sum(samples) / len(samples) * 1000, 2) if samples else 0.0,
+                "p95": round(samples[int(0.95 * (len(samples) - 1))] * 1000, 2) if samples else 0.0,
+                "max": round(self.max_latency * 1000, 2),
+            },
+        }
+
+
+class _Connection:
+    def __init__(self, room_id: str, websocket: WebSocket, queue_size: int):
+        self.room_id = room_id
+        self.websocket = websocket
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=queue_size)
+        self.writer: asyncio.Task = None
+        self.backlog: Optional[list] = None  # frames held while paused
+
+
+class ChatBroadcaster:
+    def __init__(self, queue_size: int, policy: str, send_timeout: float, backlog_size: int):
+        self.queue_size = queue_size
+        self.backlog_size = backlog_size
+        self.policy = policy
+        self.send_timeout = send_timeout
+        self.rooms: Dict[str, Set[_Connection]] = {}
+        self.metrics: Dict[str, _RoomMetrics] = {}
+        self._closing: set = set()  # strong refs to in-flight close() tasks
+
+    def join(self, room_id: str, websocket: WebSocket, paused: bool = False) -> _Connection:
+        """
+        Register a socket in a room. With paused=True live frames are queued but
+        not sent until resume(), so the caller can replay history first.
+        """
+        conn = _Connection(room_id, websocket, self.queue_size)
+        self.rooms.setdefault(room_id, set()).add(conn)
+        self.metrics.setdefault(room_id, _RoomMetrics())
+        if paused:
+            conn.backlog = []
+        else:
+            self.resume(conn)
+        return conn
+
+    def resume(self, conn: _Connection, skip: Optional[Callable[[str], bool]] = None) -> None:
+        """Start delivery; frames held while paused go first, except those skip(text) rejects."""
+        if conn.writer is not None:
+            return
+        backlog, conn.backlog = conn.backlog or [], None
+        if skip is not None:
+            backlog = [item for item in backlog if not skip(item[0])]
+        conn.writer = asyncio.create_task(self._drain(conn, backlog))
+
+    async def leave(self, conn: _Connection) -> None:
+        self._discard(conn)
+        if conn.writer is None:
+            return
+        conn.writer.cancel()
+        try:
+            await conn.writer
+        except (asyncio.CancelledError, Exception):
+            pass
+
+    def publish(self, room_id: str, message: dict) -> int:
+        """Queue a message for every socket in the room; returns how many accepted it."""
+        return self.publish_text(room_id, serialize(message))
+
+    def publish_text(self, room_id: str, text: str) -> int:
+        """Same as publish() for an already-serialized frame (e.g. from the backplane)."""
+        conns = self.rooms.get(room_id)
+        if not conns:
+            return 0
+        metrics = self.metrics[room_id]
+        metrics.published += 1
+        item = (text, time.monotonic())
+
+        accepted = 0
+        for conn in list(conns):
+            if conn.backlog is not None:
+                if len(conn.backlog) < self.backlog_size:
+                    conn.backlog.append(item)
+                    accepted += 1
+                else:
+                    metrics.disconnected += 1
+                    self._disconnect(conn)
+                continue
+            try:
+                conn.queue.put_nowait(item)
+                accepted += 1
+            except asyncio.QueueFull:
+                if self.policy == "drop":
+                    conn.queue.get_nowait()
+                    conn.queue.put_nowait(item)
+                    metrics.dropped += 1
+                    accepted += 1
+                else:
+                    metrics.disconnected += 1
+                    self._disconnect(conn)
+        return accepted
+
+    async def _drain(self, conn: _Connection, backlog: list) -> None:
+        # The room may have emptied (and its metrics gone) while this socket was
+        # paused; count into a detached object rather than re-adding the room
+        metrics = self.metrics.get(conn.room_id) or _RoomMetrics()
+        try:
+            for text, enqueued_at in backlog:
+                await asyncio.wait_for(conn.websocket.send_text(text), self.send_timeout)
+                metrics.record_delivery(time.monotonic() - enqueued_at)
+            while True:
+                text, enqueued_at = await conn.queue.get()
+                await asyncio.wait_for(conn.websocket.send_text(text), self.send_timeout)
+                metrics.record_delivery(time.monotonic() - enqueued_at)
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            # Broken or stalled socket — stop delivering to it
+            print(f"Chat socket writer stopped: {e}")
+            self._discard(conn)
+
+    def _disconnect(self, conn: _Connection) -> None:
+        self._discard(conn)
+        if conn.writer is not None:
+            conn.writer.cancel()
+        task = asyncio.create_task(self._close_socket(conn.websocket))
+        self._closing.add(task)
+        task.add_done_callback(self._closing.discard)
+
+    async def _close_socket(self, websocket: WebSocket) -> None:
+        try:
+            await websocket.close(code=_CLOSE_TRY_AGAIN_LATER)
+        except Exception:
+            pass
+
+    def _discard(self, conn: _Connection) -> None:
+        conns = self.rooms.get(conn.room_id)
+        if conns is None:
+            return
+        conns.discard(conn)
+        if not conns:
+            self.rooms.pop(conn.room_id, None)
+            self.metrics.pop(conn.room_id, None)
+
+    async def close(self) -> None:
+        """Stop every writer. Called from the app lifespan on shutdown."""
+        conns = [c for room in self.rooms.values() for c in room]
+        for conn in conns:
+            await self.leave(conn)
+
+    def get_stats(self) -> dict:
+        return {
+            room_id: {"connections": len(self.rooms.get(room_id, ())), **metrics.snapshot()}
+            for room_id, metrics in self.metrics.items()
+        }
+
+
+chat_broadcaster = ChatBroadcaster(
+    CHAT_SEND_QUEUE_SIZE, CHAT_BACKPRESSURE_POLICY, CHAT_SEND_TIMEOUT_SECONDS, CHAT_REPLAY_BACKLOG_SIZE,
+)
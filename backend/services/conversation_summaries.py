@@ -0,0 +1,128 @@
+"""
+conversation_summaries.py
+Chat inbox rows in one round-trip.
+
+A single embedded PostgREST select over group_member → conversation returns
+each of the user's conversations with its last-message time/sender and the
+member's unread count. Those fields are maintained incrementally by the
+message INSERT trigger in migrations/021_conversation_summaries.sql.
+
+    rows = await get_conversation_summaries(user_id, trip_id=None)
+    await mark_conversation_read(conversation_id, user_id)
+
+Until the migration is applied, the summary columns are missing. The first
+select that fails with a schema error switches to the plain membership
+query, and the summary fields come back as None / 0. Other failures (timeouts,
+network errors) fall back for that call only.
+"""
+
+from datetime import datetime, timezone
+from typing import List, Optional
+
+from supabase_client import supabase
+from utils.db_errors import is_missing_schema
+
+_SUMMARY_SELECT = """
+    conversation_id,
+    role,
+    unread_count,
+    last_read_datetime,
+    conversation:conversation_id (
+      conversation_id,
+      conversation_name,
+      trip_id,
+      last_message_datetime,
+      last_message_from
+    )
+"""
+
+_BASIC_SELECT = """
+    conversation_id,
+    role,
+    conversation:conversation_id (
+      conversation_id,
+      conversation_name,
+      trip_id
+    )
+"""
+
+# Flipped off the first time the summary columns are missing.
+_summaries_available = True
+
+
+async def _fetch_memberships(user_id: str) -> List[dict]:
+    global _summaries_available
+    if _summaries_available:
+        try:
+            res = await (
+                supabase.from_("group_member")
+                .select(_SUMMARY_SELECT)
+                .eq("user_id", user_id)
+                .is_("left_datetime", None)
+                .execute()
+            )
+            return res.data or []
+        except Exception as e:
+            if is_missing_schema(e):
+                print(f"Conversation summary columns unavailable, using plain memberships: {e}")
+                _summaries_available = False
+            else:
+                print(f"Conversation summary select failed, using plain memberships: {e}")
+
+    res = await (
+        supabase.from_("group_member")
+        .select(_BASIC_SELECT)
+        .eq("user_id", user_id)
+        .is_("left_datetime", None)
+        .execute()
+    )
+    return res.data or []
+
+
+async def get_conversation_summaries(user_id: str, trip_id: Optional[str] = None) -> List[dict]:
+    """The user's conversations, most recent activity first."""
+    summaries = {}
+    for row in await _fetch_memberships(user_id):
+        convo = row.get("conversation")
+        if not convo or not convo.get("conversation_id"):
+            continue
+        if trip_id and str(convo.get("trip_id") or "") != str(trip_id):
+            continue
+        summaries[convo["conversation_id"]] = {
+            "conversation_id": convo["conversation_id"],
+            "conversation_name": convo.get("conversation_name"),
+            "trip_id": convo.get("trip_id"),
+            "role": row.get("role") or "member",
+            "last_message_datetime": convo.get("last_message_datetime"),
+            "last_message_from": convo.get("last_message_from"),
+            "unread_count": row.get("unread_count") or 0,
+            "last_read_datetime": row.get("last_read_datetime"),
+        }
+
+    # ISO timestamps sort lexically; conversations without messages go last
+    return sorted(
+        summaries.values(),
+        key=lambda s: s["last_message_datetime"] or "",
+        reverse=True,
+    )
+
+
+async def mark_conversation_read(conversation_id: str, user_id: str) -> None:
+    """Reset the member's unread counter."""
+    global _summaries_available
+    if not _summaries_available:
+        return
+    try:
+        await (
+            supabase.from_("group_member")
+            .update({"unread_count": 0, "last_read_datetime": datetime.now(timezone.utc).isoformat()})
+            .eq("conversation_id", conversation_id)
+            .eq("user_id", user_id)
+            .is_("left_datetime", None)
+            .execute()
+        )
+    except Exception as e:
+        if not is_missing_schema(e):
+            raise
+        print(f"Conversation summary columns unavailable, skipping read marker: {e}")
+        _summaries_available = False
@@ -0,0 +1,205 @@
+"""
+currency.py
+Offline FX rate table for conversions and mixed-currency totals.
+
+One USD-based rate table (units per USD) is held in memory as a NumPy array
+with a code → index map. A cross rate is rates[to] / rates[from], an O(1)
+lookup, and bulk conversion is a single vectorized pass with no network calls
+on the request path:
+
+    fx_rates.convert(100, "USD", "EUR")                    # -> float | None
+    values, unknown = fx_rates.convert_many(amounts, codes, "USD")
+    report = dominant_currency(codes)                      # default report currency
+
+The table is loaded from FX_RATES_PATH at startup and refreshed from
+FX_RATES_URL (open.er-api.com's free feed) every FX_REFRESH_SECONDS. Each
+refresh is written back atomically, so restarts and API outages keep the
+last good table. Rates older than FX_STALE_SECONDS are still used but
+reported as stale.
+
+    await fx_rates.start()   # app lifespan
+    await fx_rates.close()
+"""
+
+import asyncio
+import json
+import os
+import time
+from collections import Counter
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+from dotenv import load_dotenv
+from fastapi.concurrency import run_in_threadpool
+
+from utils.http_clients import get_http_client
+
+load_dotenv()
+
+FX_RATES_URL = os.getenv("FX_RATES_URL", "https://open.er-api.com/v6/latest/USD")
+FX_RATES_PATH = os.getenv("FX_RATES_PATH", ".cache/fx_rates.json")
+FX_REFRESH_SECONDS = int(os.getenv("FX_REFRESH_SECONDS", "21600"))
+FX_STALE_SECONDS = int(os.getenv("FX_STALE_SECONDS", "172800"))
+
+BASE_CURRENCY = "USD"
+DEFAULT_CURRENCY = "USD"  # expenses.currency / settlements.currency column default
+
+RETRY_SECONDS = 300
+
+
+def _code(currency: Optional[str]) -> str:
+    return (currency or DEFAULT_CURRENCY).strip().upper()
+
+
+def dominant_currency(currencies: Iterable[Optional[str]]) -> str:
+    """Most common code among the amounts, so a single-currency trip needs no conversion."""
+    counts = Counter(_code(c) for c in currencies)
+    return counts.most_common(1)[0][0] if counts else DEFAULT_CURRENCY
+
+
+class FxRates:
+    def __init__(self, url: str, path: str, refresh_seconds: int):
+        self.url = url
+        self.path = path
+        self.refresh_seconds = refresh_seconds
+        self._index: Dict[str, int] = {}
+        self._rates = np.empty(0)
+        self.updated_at = 0.0  # provider's publication time (unix)
+        self.fetched_at = 0.0
+        self._refresher: Optional[asyncio.Task] = None
+        self.stats = {"refreshes": 0, "refresh_failures": 0}
+
+    # ── Table ────────────────────────────────────────────────────────────────
+
+    def _install(self, rates: Dict[str, float], updated_at: float, fetched_at: float) -> None:
+        codes = sorted(code for code, rate in rates.items() if rate and rate > 0)
+        if BASE_CURRENCY not in codes:
+            raise ValueError("Rate table has no base currency")
+        # Swap both in one go so readers never see a half-built table
+        self._index, self._rates = (
+            {code: i for i, code in enumerate(codes)},
+            np.array([float(rates[code]) for code in codes]),
+        )
+        self.updated_at = updated_at
+        self.fetched_at = fetched_at
+
+    def _load_file(self) -> None:
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                saved = json.load(f)
+            self._install(saved["rates"], saved.get("updated_at", 0), saved.get("fetched_at", 0))
+        except FileNotFoundError:
+            return
+        except (OSError, ValueError, KeyError) as e:
+            print(f"FX rate table unreadable, waiting for a refresh: {e}")
+
+    def _save_file(self, rates: Dict[str, float]) -> None:
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        tmp = f"{self.path}.{os.getpid()}.tmp"
+        try:
+            with open(tmp, "w", encoding="utf-8") as f:
+                json.dump({"updated_at": self.updated_at, "fetched_at": self.fetched_at, "rates": rates}, f)
+            os.replace(tmp, self.path)
+        except OSError as e:
+            print(f"FX rate table write failed: {e}")
+
+    async def refresh(self) -> bool:
+        try:
+            resp = await get_http_client("exchange_rates").get(self.url)
+            data = resp.json()
+            if resp.status_code != 200 or data.get("result") != "success":
+                raise ValueError(f"provider answered {resp.status_code} {data.get('error-type', '')}")
+            if data.get("base_code", BASE_CURRENCY) != BASE_CURRENCY:
+                raise ValueError(f"expected {BASE_CURRENCY}-based rates, got {data.get('base_code')}")
+            rates = data["rates"]
+            self._install(rates, float(data.get("time_last_update_unix") or time.time()), time.time())
+        except Exception as e:
+            print(f"FX rate refresh failed: {e}")
+            self.stats["refresh_failures"] += 1
+            return False
+
+        self.stats["refreshes"] += 1
+        await run_in_threadpool(self._save_file, rates)
+        return True
+
+    async def _refresh_loop(self) -> None:
+        while True:
+            age = time.time() - self.fetched_at
+            if age >= self.refresh_seconds:
+                ok = await self.refresh()
+                delay = self.refresh_seconds if ok else RETRY_SECONDS
+            else:
+                delay = self.refresh_seconds - age
+            await asyncio.sleep(delay)
+
+    async def start(self) -> None:
+        """Load the persisted table and keep it refreshed in the background."""
+        await run_in_threadpool(self._load_file)
+        if self._refresher is None:
+            self._refresher = asyncio.create_task(self._refresh_loop())
+
+    async def close(self) -> None:
+        if self._refresher is not None:
+            self._refresher.cancel()
+            try:
+                await self._refresher
+            except asyncio.CancelledError:
+                pass
+            self._refresher = None
+
+    # ── Lookups ──────────────────────────────────────────────────────────────
+
+    def supports(self, currency: Optional[str]) -> bool:
+        return _code(currency) in self._index
+
+    def rate(self, from_currency: Optional[str], to_currency: Optional[str]) -> Optional[float]:
+        """Units of to_currency per one from_currency, or None if either is unknown."""
+        src = self._index.get(_code(from_currency))
+        dst = self._index.get(_code(to_currency))
+        if src is None or dst is None:
+            return None
+        return float(self._rates[dst] / self._rates[src])
+
+    def convert(self, amount: float, from_currency: Optional[str], to_currency: Optional[str]) -> Optional[float]:
+        rate = self.rate(from_currency, to_currency)
+        return None if rate is None else float(amount) * rate
+
+    def convert_many(self, amounts: Iterable[float], currencies: Iterable[Optional[str]],
+                     to_currency: Optional[str]) -> Tuple[np.ndarray, List[str]]:
+        """
+        Convert amounts[i] from currencies[i] into to_currency in one pass.
+        Amounts in unknown currencies are passed through unconverted; their
+        codes are returned so callers can flag the total as approximate.
+        """
+        values = np.asarray(list(amounts), dtype=float)
+        codes = [_code(c) for c in currencies]
+        dst = self._index.get(_code(to_currency))
+        if dst is None:
+            return values, sorted(set(codes) - {_code(to_currency)})
+
+        # Code → table index once per distinct code, then a single gather
+        distinct = {code: self._index.get(code, -1) for code in set(codes)}
+        idx = np.fromiter((distinct[code] for code in codes), dtype=np.intp, count=len(codes))
+        known = idx >= 0
+        factors = np.ones(len(codes))
+        factors[known] = self._rates[dst] / self._rates[idx[known]]
+        unknown = sorted(code for code, i in distinct.items() if i < 0)
+        return values * factors, unknown
+
+    @property
+    def stale(self) -> bool:
+        return not self._index or time.time() - self.updated_at > FX_STALE_SECONDS
+
+    def get_status(self) -> dict:
+        return {
+            "base": BASE_CURRENCY,
+            "currencies": len(self._index),
+            "updated_at": int(self.updated_at) or None,
+            "stale": self.stale,
+            **self.stats,
+        }
+
+
+fx_rates = FxRates(FX_RATES_URL, FX_RATES_PATH, FX_REFRESH_SECONDS)
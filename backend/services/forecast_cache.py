@@ -0,0 +1,133 @@
+"""
+forecast_cache.py
+Geo-tile cache for Open-Meteo forecasts.
+
+Nearby coordinates are snapped to a tile (FORECAST_TILE_DEGREES, ~5 km at
+0.05°) so a whole group planning the same trip shares one cached forecast
+per tile. Entries stay fresh until the next model-update boundary
+(FORECAST_CACHE_CADENCE_SECONDS). After that they are served stale for up
+to FORECAST_CACHE_STALE_SECONDS while a background refresh runs. The cache
+is LRU-bounded to FORECAST_CACHE_MAX_ENTRIES.
+
+    tiles = await forecast_cache.get_many("hourly", points, fetch_many)
+
+`fetch_many(tile_centers)` must return one result per tile centre, in order;
+a None result is not cached.
+"""
+
+import asyncio
+import math
+import os
+import time
+from collections import OrderedDict
+from typing import Awaitable, Callable, List, Optional, Tuple
+
+from dotenv import load_dotenv
+
+load_dotenv()
+
+FORECAST_TILE_DEGREES = float(os.getenv("FORECAST_TILE_DEGREES", "0.05"))
+FORECAST_CACHE_CADENCE_SECONDS = int(os.getenv("FORECAST_CACHE_CADENCE_SECONDS", "3600"))
+FORECAST_CACHE_STALE_SECONDS = int(os.getenv("FORECAST_CACHE_STALE_SECONDS", "3600"))
+FORECAST_CACHE_MAX_ENTRIES = int(os.getenv("FORECAST_CACHE_MAX_ENTRIES", "5000"))
+
+Point = Tuple[float, float]
+FetchMany = Callable[[List[Point]], Awaitable[List[Optional[dict]]]]
+
+
+class ForecastTileCache:
+    def __init__(self, tile_degrees: float, cadence_seconds: int, stale_seconds: int, max_entries: int):
+        self.tile_degrees = tile_degrees
+        self.cadence_seconds = cadence_seconds
+        self.stale_seconds = stale_seconds
+        self.max_entries = max_entries
+        # key -> (value, fresh_until, stale_until)
+        self._entries: "OrderedDict[tuple, tuple]" = OrderedDict()
+        self._refreshing: set = set()
+        self._tasks: set = set()  # strong refs so background refreshes aren't GC'd
+        self.stats = {"hits": 0, "stale_hits": 0, "misses": 0, "refreshes": 0}
+
+    def tile(self, lat: float, lng: float) -> Point:
+        """Centre of the tile containing (lat, lng)."""
+        step = self.tile_degrees
+        return (
+            round((math.floor(lat / step) + 0.5) * step, 4),
+            round((math.floor(lng / step) + 0.5) * step, 4),
+        )
+
+    def _expiry(self, now: float) -> Tuple[float, float]:
+        # Fresh until the next model-update boundary, then stale for a grace window.
+        fresh_until = (math.floor(now / self.cadence_seconds) + 1) * self.cadence_seconds
+        return fresh_until, fresh_until + self.stale_seconds
+
+    def _store(self, key: tuple, value: dict, now: float) -> None:
+        fresh_until, stale_until = self._expiry(now)
+        self._entries[key] = (value, fresh_until, stale_until)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    async def _refresh(self, kind: str, tiles: List[Point], fetch_many: FetchMany) -> None:
+        try:
+            results = await fetch_many(tiles)
+            now = time.time()
+            for tile, value in zip(tiles, results):
+                if value is not None:
+                    self._store((kind, tile), value, now)
+            self.stats["refreshes"] += 1
+        except Exception as e:
+            print(f"Forecast cache refresh failed: {e}")
+        finally:
+            for tile in tiles:
+                self._refreshing.discard((kind, tile))
+
+    async def get_many(self, kind: str, points: List[Point], fetch_many: FetchMany) -> List[Optional[dict]]:
+        """Cached values for each point (input order); misses are fetched in one call."""
+        now = time.time()
+        tiles = [self.tile(lat, lng) for lat, lng in points]
+        found: dict = {}
+        missing: List[Point] = []
+        stale: List[Point] = []
+
+        for tile in dict.fromkeys(tiles):
+            key = (kind, tile)
+            entry = self._entries.get(key)
+            if entry is not None and now < entry[2]:
+                value, fresh_until, _ = entry
+                self._entries.move_to_end(key)
+                found[tile] = value
+                if now < fresh_until:
+                    self.stats["hits"] += 1
+                else:
+                    self.stats["stale_hits"] += 1
+                    if key not in self._refreshing:
+                        self._refreshing.add(key)
+                        stale.append(tile)
+            else:
+                self.stats["misses"] += 1
+                missing.append(tile)
+
+        if stale:
+            task = asyncio.create_task(self._refresh(kind, stale, fetch_many))
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+
+        if missing:
+            results = await fetch_many(missing)
+            for tile, value in zip(missing, results):
+                found[tile] = value
+                if value is not None:
+                    self._store((kind, tile), value, now)
+
+        return [found.get(tile) for tile in tiles]
+
+    def get_stats(self) -> dict:
+        return {**self.stats, "entries": len(self._entries)}
+
+
+forecast_cache = ForecastTileCache(
+    tile_degrees=FORECAST_TILE_DEGREES,
+    cadence_seconds=FORECAST_CACHE_CADENCE_SECONDS,
+    stale_seconds=FORECAST_CACHE_STALE_SECONDS,
+    max_entries=FORECAST_CACHE_MAX_ENTRIES,
+)
@@ -0,0 +1,229 @@
+"""
+image_prep.py
+Shrinks uploaded photos before they're sent to Gemini vision.
+
+Phone photos of receipts and tickets are often 5–12 MB, far more detail than
+the model reads. Each image goes through these steps in a process pool
+(Pillow work is CPU-bound and would otherwise stall the event loop):
+  1. EXIF rotation applied (phones store portrait shots sideways + a tag)
+  2. optional crop to the document (IMAGE_PREP_CROP, off by default): bounding
+     box of the strong edges found on a small preview, used only when it's
+     clearly tighter than the frame. Faint print near the frame edge can fall
+     below the edge threshold and be cut, so enable it only for sources that
+     photograph documents against a plain background
+  3. downscale so the long edge is at most IMAGE_PREP_MAX_EDGE
+  4. grayscale for receipts; colour kept for documents (logos, seat maps)
+  5. re-encode as IMAGE_PREP_FORMAT (jpeg | webp) at IMAGE_PREP_QUALITY
+
+    data, mime_type, metrics = await prepare_image(file_bytes, content_type, "receipt")
+
+Inputs under IMAGE_PREP_MIN_BYTES, PDFs and formats Pillow can't open
+(e.g. HEIC without a plugin) are passed through unchanged. If re-encoding
+doesn't make the file smaller, the original is kept. Per-profile totals
+(bytes in/out, prep and queue time) are in get_stats(), served at
+GET /vision/preprocessing-stats.
+"""
+
+import asyncio
+import io
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Optional, Tuple
+
+from dotenv import load_dotenv
+
+load_dotenv()
+
+IMAGE_PREP_WORKERS = int(os.getenv("IMAGE_PREP_WORKERS", str(min(4, os.cpu_count() or 1))))
+IMAGE_PREP_MAX_EDGE = int(os.getenv("IMAGE_PREP_MAX_EDGE", "1600"))
+IMAGE_PREP_FORMAT = os.getenv("IMAGE_PREP_FORMAT", "jpeg").lower()
+IMAGE_PREP_QUALITY = int(os.getenv("IMAGE_PREP_QUALITY", "80"))
+IMAGE_PREP_MIN_BYTES = int(os.getenv("IMAGE_PREP_MIN_BYTES", "300000"))
+IMAGE_PREP_CROP = os.getenv("IMAGE_PREP_CROP", "false").lower() == "true"
+
+PROFILES = {
+    "receipt": {"grayscale": True},
+    "document": {"grayscale": False},
+}
+
+_SKIP_TYPES = {"application/pdf"}
+_EXIF_ORIENTATION = 0x0112
+_OUTPUT_MIME = {"jpeg": "image/jpeg", "webp": "image/webp"}
+
+# Document crop: edges are found on a preview this size, and a crop is used
+# only if it keeps at least MIN_AREA of the frame but drops at least MIN_GAIN.
+_CROP_PREVIEW_EDGE = 512
+_CROP_EDGE_THRESHOLD = 48
+_CROP_MIN_AREA = 0.2
+_CROP_MIN_GAIN = 0.1
+_CROP_MARGIN = 0.02
+
+_pool: Optional[ProcessPoolExecutor] = None
+
+
+# ── Worker (runs in the process pool) ─────────────────────────────────────────
+
+def _document_bbox(img) -> Optional[Tuple[int, int, int, int]]:
+    from PIL import Image, ImageFilter
+
+    preview = img.convert("L")
+    preview.thumbnail((_CROP_PREVIEW_EDGE, _CROP_PREVIEW_EDGE), Image.Resampling.BILINEAR)
+    edges = preview.filter(ImageFilter.MedianFilter(3)).filter(ImageFilter.FIND_EDGES)
+    # FIND_EDGES lights up the outermost pixels; ignore a 1px frame
+    w, h = edges.size
+    edges = edges.crop((1, 1, w - 1, h - 1))
+    bbox = edges.point(lambda p: 255 if p > _CROP_EDGE_THRESHOLD else 0).getbbox()
+    if bbox is None:
+        return None
+
+    left, top, right, bottom = bbox[0] + 1, bbox[1] + 1, bbox[2] + 1, bbox[3] + 1
+    area = (right - left) * (bottom - top) / float(w * h)
+    if area < _CROP_MIN_AREA or area > 1 - _CROP_MIN_GAIN:
+        return None
+
+    sx, sy = img.width / float(w), img.height / float(h)
+    mx, my = img.width * _CROP_MARGIN, img.height * _CROP_MARGIN
+    return (
+        max(0, int(left * sx - mx)),
+        max(0, int(top * sy - my)),
+        min(img.width, int(right * sx + mx)),
+        min(img.height, int(bottom * sy + my)),
+    )
+
+
+def _process(data: bytes, grayscale: bool, max_edge: int, fmt: str, quality: int, crop: bool) -> tuple:
+    """Returns (bytes, steps, prep_seconds); bytes is None if Pillow can't read the input."""
+    from PIL import Image, ImageOps, UnidentifiedImageError
+
+    started = time.perf_counter()
+    try:
+        img = Image.open(io.BytesIO(data))
+        img.load()
+    except (UnidentifiedImageError, OSError):
+        return None, [], time.perf_counter() - started
+
+    steps = []
+    if img.getexif().get(_EXIF_ORIENTATION, 1) != 1:
+        img = ImageOps.exif_transpose(img)
+        steps.append("exif_rotate")
+
+    if crop:
+        bbox = _document_bbox(img)
+        if bbox is not None:
+            img = img.crop(bbox)
+            steps.append("crop")
+
+    if max(img.size) > max_edge:
+        img.thumbnail((max_edge, max_edge), Image.Resampling.LANCZOS)
+        steps.append("downscale")
+
+    if grayscale:
+        if img.mode != "L":
+            img = img.convert("L")
+            steps.append("grayscale")
+    elif img.mode not in ("RGB", "L"):
+        img = img.convert("RGB")
+
+    out = io.BytesIO()
+    if fmt == "webp":
+        img.save(out, format="WEBP", quality=quality, method=4)
+    else:
+        img.save(out, format="JPEG", quality=quality, optimize=True, progressive=True)
+    steps.append(fmt)
+    return out.getvalue(), steps, time.perf_counter() - started
+
+
+# ── Async API ─────────────────────────────────────────────────────────────────
+
+class _ProfileStats:
+    def __init__(self):
+        self.images = 0
+        self.processed = 0
+        self.bytes_in = 0
+        self.bytes_out = 0
+        self.prep_seconds = 0.0
+        self.wall_seconds = 0.0
+
+    def snapshot(self) -> dict:
+        return {
+            "images": self.images,
+            "processed": self.processed,
+            "bytes_in": self.bytes_in,
+            "bytes_out": self.bytes_out,
+            "size_ratio": round(self.bytes_out / self.bytes_in, 4) if self.bytes_in else 1.0,
+            "avg_prep_ms": round(self.prep_seconds / self.processed * 1000, 1) if self.processed else 0.0,
+            "avg_wall_ms": round(self.wall_seconds / self.processed * 1000, 1) if self.processed else 0.0,
+        }
+
+
+_stats = {profile: _ProfileStats() for profile in PROFILES}
+
+
+def _get_pool() -> ProcessPoolExecutor:
+    global _pool
+    if _pool is None:
+        _pool = ProcessPoolExecutor(max_workers=IMAGE_PREP_WORKERS)
+    return _pool
+
+
+async def prepare_image(data: bytes, mime_type: str, profile: str) -> Tuple[bytes, str, dict]:
+    """Shrink an upload for a vision call. Returns (bytes, mime_type, metrics)."""
+    options = PROFILES[profile]
+    stats = _stats[profile]
+    stats.images += 1
+    stats.bytes_in += len(data)
+    metrics = {"bytes_in": len(data), "bytes_out": len(data), "steps": [], "prep_ms": 0.0, "wall_ms": 0.0}
+
+    if mime_type in _SKIP_TYPES or len(data) < IMAGE_PREP_MIN_BYTES:
+        stats.bytes_out += len(data)
+        return data, mime_type, metrics
+
+    started = time.perf_counter()
+    pool = _get_pool()
+    try:
+        out, steps, prep_seconds = await asyncio.get_running_loop().run_in_executor(
+            pool, _process, data, options["grayscale"], IMAGE_PREP_MAX_EDGE,
+            IMAGE_PREP_FORMAT, IMAGE_PREP_QUALITY, IMAGE_PREP_CROP,
+        )
+    except BrokenProcessPool as e:
+        # A worker died (e.g. OOM on a huge image); the pool is unusable until rebuilt
+        print(f"Image preprocessing pool broke, sending original and restarting it: {e}")
+        _reset_pool(pool)
+        out, steps, prep_seconds = None, [], 0.0
+    except Exception as e:
+        print(f"Image preprocessing failed, sending original: {e}")
+        out, steps, prep_seconds = None, [], 0.0
+    wall_seconds = time.perf_counter() - started
+
+    metrics["prep_ms"] = round(prep_seconds * 1000, 1)
+    metrics["wall_ms"] = round(wall_seconds * 1000, 1)
+    if out is None or len(out) >= len(data):
+        stats.bytes_out += len(data)
+        return data, mime_type, metrics
+
+    stats.processed += 1
+    stats.bytes_out += len(out)
+    stats.prep_seconds += prep_seconds
+    stats.wall_seconds += wall_seconds
+    metrics.update({"bytes_out": len(out), "steps": steps})
+    return out, _OUTPUT_MIME.get(IMAGE_PREP_FORMAT, "image/jpeg"), metrics
+
+
+def get_stats() -> dict:
+    return {profile: stats.snapshot() for profile, stats in _stats.items()}
+
+
+def _reset_pool(broken: Optional[ProcessPoolExecutor] = None) -> None:
+    """Drop the pool so the next call builds a new one; with `broken`, only if it's still current."""
+    global _pool
+    if _pool is None or (broken is not None and _pool is not broken):
+        return
+    _pool.shutdown(wait=False, cancel_futures=True)
+    _pool = None
+
+
+def shutdown_image_pool() -> None:
+    """Stop the worker processes. Called from the app lifespan on shutdown."""
+    _reset_pool()
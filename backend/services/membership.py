@@ -0,0 +1,251 @@
+"""
+membership.py
+Trip membership resolution shared by the routers.
+
+A trip's roster — active trip_members rows, legacy group_member rows and the
+trip owner — is loaded in one round-trip through the trip_roster() SQL
+function (migrations/020_trip_roster.sql), then answered locally:
+
+  get_trip_role(trip_id, user_id)   -> "leader" | "member" | None
+  ensure_trip_member(trip_id, uid)  -> raises 403 for non-members
+  is_trip_leader(trip_id, user_id)  -> bool
+  get_trip_member_ids(trip_id)      -> active member ids incl. owner
+  get_trip_members(trip_id)         -> membership rows (user_id, role, joined_at)
+
+Rosters are memoized per HTTP request (MembershipScopeMiddleware) and across
+requests for TRIP_MEMBERSHIP_TTL_SECONDS. Routers that change membership call
+invalidate_trip() so the next check sees the new roster. A roster built while
+one of the fallback table reads failed is used for that request only, never
+cached.
+"""
+
+import asyncio
+import os
+from contextvars import ContextVar
+from typing import List, Optional, Tuple
+
+from cachetools import TTLCache
+from dotenv import load_dotenv
+from fastapi import HTTPException
+
+from supabase_client import supabase
+from utils.db_errors import is_missing_function, is_missing_schema
+
+load_dotenv()
+
+TRIP_MEMBERSHIP_TTL_SECONDS = int(os.getenv("TRIP_MEMBERSHIP_TTL_SECONDS", "30"))
+TRIP_MEMBERSHIP_CACHE_SIZE = int(os.getenv("TRIP_MEMBERSHIP_CACHE_SIZE", "4096"))
+
+_roster_cache: TTLCache = TTLCache(maxsize=TRIP_MEMBERSHIP_CACHE_SIZE, ttl=TRIP_MEMBERSHIP_TTL_SECONDS)
+
+# trip_id -> roster for the current HTTP request (None outside a request scope)
+_request_rosters: ContextVar[Optional[dict]] = ContextVar("trip_rosters", default=None)
+
+# Flipped off the first time the RPC is missing so we stop paying for the failed call.
+_rpc_available = True
+
+
+# ── Loading ───────────────────────────────────────────────────────────────────
+
+def _build_roster(trip_id: str, rows: List[dict]) -> dict:
+    """Fold trip_roster() rows into {owner_id, trip_exists, members}.
+
+    trip_members wins over legacy group_member when a user appears in both.
+    """
+    roster = {"trip_id": trip_id, "owner_id": None, "trip_exists": False, "members": {}}
+    for r in rows:
+        source = r.get("source")
+        user_id = r.get("user_id")
+        if source == "owner":
+            roster["trip_exists"] = True
+            roster["owner_id"] = user_id
+            continue
+        if not user_id:
+            continue
+        existing = roster["members"].get(user_id)
+        if existing and existing["source"] == "trip_members":
+            continue
+        roster["members"][user_id] = {
+            "role": r.get("role") or "member",
+            "joined_at": r.get("joined_at"),
+            "source": source,
+        }
+    return roster
+
+
+async def _fetch_rows_fallback(trip_id: str) -> Tuple[List[dict], bool]:
+    """
+    Same rows as trip_roster(), via three concurrent table reads. Returns
+    (rows, complete); complete is False if a read failed for any reason other
+    than its table being absent.
+    """
+    failures = []
+
+    def failed(source: str, e: Exception) -> list:
+        if not is_missing_schema(e):
+            print(f"Roster read from {source} failed for {trip_id}: {e}")
+            failures.append(source)
+        return []
+
+    async def trip_members():
+        try:
+            res = await (
+                supabase.table("trip_members")
+                .select("user_id, role, joined_at")
+                .eq("trip_id", trip_id)
+                .is_("left_at", None)
+                .execute()
+            )
+            return [{**r, "source": "trip_members"} for r in (res.data or [])]
+        except Exception as e:
+            return failed("trip_members", e)
+
+    async def group_members():
+        try:
+            res = await (
+                supabase.table("group_member")
+                .select("user_id, role, join_datetime")
+                .eq("group_id", trip_id)
+                .is_("left_datetime", None)
+                .execute()
+            )
+            return [{
+                "user_id": r.get("user_id"),
+                "role": r.get("role"),
+                "joined_at": r.get("join_datetime"),
+                "source": "group_member",
+            } for r in (res.data or [])]
+        except Exception as e:
+            return failed("group_member", e)
+
+    async def owner():
+        try:
+            res = await (
+                supabase.table("trips")
+                .select("owner_id")
+                .eq("id", trip_id)
+                .maybe_single()
+                .execute()
+            )
+            if res and res.data:
+                return [{"user_id": res.data.get("owner_id"), "role": "leader", "source": "owner"}]
+        except Exception as e:
+            return failed("trips", e)
+        return []
+
+    parts = await asyncio.gather(trip_members(), group_members(), owner())
+    return [row for part in parts for row in part], not failures
+
+
+async def _load_roster(trip_id: str) -> Tuple[dict, bool]:
+    """Returns (roster, cacheable)."""
+    global _rpc_available
+    if _rpc_available:
+        try:
+            res = await supabase.rpc("trip_roster", {"p_trip_id": trip_id}).execute()
+            return _build_roster(trip_id, res.data or []), True
+        except Exception as e:
+            if is_missing_function(e):
+                print(f"trip_roster RPC unavailable, falling back to table reads: {e}")
+                _rpc_available = False
+            else:
+                # Transient or per-request failure: fall back for this call only
+                print(f"trip_roster RPC failed for {trip_id}, using table reads: {e}")
+    rows, complete = await _fetch_rows_fallback(trip_id)
+    return _build_roster(trip_id, rows), complete
+
+
+async def get_trip_roster(trip_id: str) -> dict:
+    """Return the cached roster for a trip, loading it on a miss."""
+    trip_id = str(trip_id)
+
+    scoped = _request_rosters.get()
+    if scoped is not None and trip_id in scoped:
+        return scoped[trip_id]
+
+    roster = _roster_cache.get(trip_id)
+    if roster is None:
+        roster, cacheable = await _load_roster(trip_id)
+        # A partial roster would 403 real members for the whole TTL
+        if cacheable:
+            _roster_cache[trip_id] = roster
+
+    if scoped is not None:
+        scoped[trip_id] = roster
+    return roster
+
+
+def invalidate_trip(trip_id: str) -> None:
+    """Forget a trip's roster after its membership changed."""
+    trip_id = str(trip_id)
+    _roster_cache.pop(trip_id, None)
+    scoped = _request_rosters.get()
+    if scoped is not None:
+        scoped.pop(trip_id, None)
+
+
+# ── Queries ───────────────────────────────────────────────────────────────────
+
+async def get_trip_role(trip_id: str, user_id: str) -> Optional[str]:
+    """Resolve (trip_id, user_id) -> role. The trip owner is always a leader."""
+    roster = await get_trip_roster(trip_id)
+    user_id = str(user_id)
+    if user_id == roster["owner_id"]:
+        return "leader"
+    member = roster["members"].get(user_id)
+    return member["role"] if member else None
+
+
+async def ensure_trip_member(trip_id: str, user_id: str, detail: str = "Not a member of this group") -> None:
+    """Raise 403 if the user is not an active member or the owner of the trip."""
+    if await get_trip_role(trip_id, user_id) is None:
+        raise HTTPException(status_code=403, detail=detail)
+
+
+async def is_trip_leader(trip_id: str, user_id: str) -> bool:
+    return await get_trip_role(trip_id, user_id) == "leader"
+
+
+async def trip_exists(trip_id: str) -> bool:
+    return (await get_trip_roster(trip_id))["trip_exists"]
+
+
+async def get_trip_member_ids(trip_id: str) -> List[str]:
+    """All active member user_ids for a trip, including the owner."""
+    roster = await get_trip_roster(trip_id)
+    ids = list(roster["members"].keys())
+    if roster["owner_id"] and roster["owner_id"] not in roster["members"]:
+        ids.append(roster["owner_id"])
+    return ids
+
+
+async def get_trip_members(trip_id: str) -> List[dict]:
+    """Explicit membership rows (user_id, role, joined_at); the owner is not synthesized."""
+    roster = await get_trip_roster(trip_id)
+    return [
+        {"user_id": uid, "role": m["role"], "joined_at": m["joined_at"]}
+        for uid, m in roster["members"].items()
+    ]
+
+
+# ── Request scope ─────────────────────────────────────────────────────────────
+
+class MembershipScopeMiddleware:
+    """Give each HTTP request its own roster memo.
+
+    WebSocket connections are long-lived, so they skip the per-request memo
+    and rely on the TTL cache alone.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        token = _request_rosters.set({})
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            _request_rosters.reset(token)
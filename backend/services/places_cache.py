@@ -0,0 +1,240 @@
+"""
+places_cache.py
+Shared response cache for Google Places searches.
+
+Keys are normalized from the parts that decide a Places answer:
+(endpoint, type, keyword, center rounded to PLACES_CACHE_CENTER_DECIMALS,
+radius, field mask, extras). Two searches a few metres apart for the same
+thing therefore share one entry. The API key is never part of the key.
+
+Backends (PLACES_CACHE_BACKEND):
+  memory — in-process LRU with per-entry TTL (default)
+  file   — JSON files under PLACES_CACHE_DIR; survives restarts and is
+           shared by workers on one host. LRU by file mtime, enforced by a
+           sweep every PLACES_CACHE_EVICT_EVERY writes. File reads and writes
+           run in the threadpool when called through get_or_fetch/aget/aset.
+
+    key = places_key("nearbysearch", place_type="cafe", center=(lat, lng), radius=2000)
+    data = await places_cache.get_or_fetch(key, fetch)
+    data = await places_cache.aget(key)          # async code without a fetch closure
+    await places_cache.aset(key, data)
+
+`fetch` returns the decoded response, or None for responses that must not
+be cached (errors, quota failures).
+"""
+
+import hashlib
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Awaitable, Callable, Optional, Tuple
+
+from dotenv import load_dotenv
+from fastapi.concurrency import run_in_threadpool
+
+load_dotenv()
+
+PLACES_CACHE_BACKEND = os.getenv("PLACES_CACHE_BACKEND", "memory")
+PLACES_CACHE_DIR = os.getenv("PLACES_CACHE_DIR", ".cache/places")
+PLACES_CACHE_TTL_SECONDS = int(os.getenv("PLACES_CACHE_TTL_SECONDS", "3600"))
+PLACES_CACHE_MAX_ENTRIES = int(os.getenv("PLACES_CACHE_MAX_ENTRIES", "5000"))
+PLACES_CACHE_EVICT_EVERY = int(os.getenv("PLACES_CACHE_EVICT_EVERY", "100"))
+# 3 decimals ≈ 110 m — well inside every search radius we use.
+PLACES_CACHE_CENTER_DECIMALS = int(os.getenv("PLACES_CACHE_CENTER_DECIMALS", "3"))
+
+
+def places_key(
+    endpoint: str,
+    place_type: Optional[str] = None,
+    keyword: Optional[str] = None,
+    center: Optional[Tuple[float, float]] = None,
+    radius: Optional[float] = None,
+    field_mask: Optional[str] = None,
+    **extra,
+) -> str:
+    """Normalized cache key for one Places search."""
+    parts = [
+        endpoint,
+        (place_type or "").lower(),
+        " ".join((keyword or "").lower().split()),
+        "" if center is None else ",".join(
+            f"{round(float(c), PLACES_CACHE_CENTER_DECIMALS):.{PLACES_CACHE_CENTER_DECIMALS}f}" for c in center
+        ),
+        "" if radius is None else f"{float(radius):g}",
+        ",".join(sorted(f.strip() for f in (field_mask or "").split(",") if f.strip())),
+    ]
+    parts.extend(f"{k}={extra[k]}" for k in sorted(extra) if extra[k] is not None)
+    return "|".join(parts)
+
+
+# ── Backends ──────────────────────────────────────────────────────────────────
+
+class MemoryBackend:
+    blocking = False
+
+    def __init__(self, max_entries: int):
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[str, tuple]" = OrderedDict()  # key -> (expires_at, value)
+
+    def get(self, key: str) -> Optional[dict]:
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        if entry[0] <= time.time():
+            self._entries.pop(key, None)
+            return None
+        self._entries.move_to_end(key)
+        return entry[1]
+
+    def set(self, key: str, value: dict, ttl: int) -> None:
+        self._entries[key] = (time.time() + ttl, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def size(self) -> int:
+        return len(self._entries)
+
+
+class FileBackend:
+    blocking = True  # disk I/O — keep it off the event loop
+
+    def __init__(self, directory: str, max_entries: int, evict_every: int):
+        self.directory = directory
+        self.max_entries = max_entries
+        self.evict_every = evict_every
+        self._writes = 0
+        self._writes_lock = threading.Lock()  # set() runs on several threadpool workers
+        os.makedirs(directory, exist_ok=True)
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.directory, hashlib.sha1(key.encode()).hexdigest() + ".json")
+
+    def get(self, key: str) -> Optional[dict]:
+        path = self._path(key)
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                entry = json.load(f)
+        except (OSError, ValueError):
+            return None
+        if entry.get("key") != key or entry.get("expires_at", 0) <= time.time():
+            return None
+        os.utime(path)  # mtime doubles as LRU recency
+        return entry.get("value")
+
+    def set(self, key: str, value: dict, ttl: int) -> None:
+        path = self._path(key)
+        # Unique per writer: threads in this process may write the same key at once
+        tmp = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        try:
+            with open(tmp, "w", encoding="utf-8") as f:
+                json.dump({"key": key, "expires_at": time.time() + ttl, "value": value}, f)
+            os.replace(tmp, path)
+        except OSError as e:
+            print(f"Places cache write failed: {e}")
+            try:
+                os.remove(tmp)
+            except OSError:
+                pass
+            return
+        # A full directory scan per write is too much; sweep every N writes
+        # and let the directory overshoot max_entries by at most that many.
+        with self._writes_lock:
+            self._writes += 1
+            evict = self._writes >= self.evict_every
+            if evict:
+                self._writes = 0
+        if evict:
+            self._evict()
+
+    def _evict(self) -> None:
+        try:
+            files = [e for e in os.scandir(self.directory) if e.name.endswith(".json")]
+        except OSError:
+            return
+        overflow = len(files) - self.max_entries
+        if overflow <= 0:
+            return
+        def mtime(entry) -> float:
+            try:
+                return entry.stat().st_mtime
+            except OSError:  # removed by a concurrent sweep
+                return 0.0
+
+        files.sort(key=mtime)
+        for entry in files[:overflow]:
+            try:
+                os.remove(entry.path)
+            except OSError:
+                pass
+
+    def size(self) -> int:
+        try:
+            return sum(1 for e in os.scandir(self.directory) if e.name.endswith(".json"))
+        except OSError:
+            return 0
+
+
+# ── Cache ─────────────────────────────────────────────────────────────────────
+
+class PlacesCache:
+    def __init__(self, backend, ttl: int):
+        self.backend = backend
+        self.ttl = ttl
+        self.stats = {"hits": 0, "misses": 0}
+
+    def get(self, key: str) -> Optional[dict]:
+        value = self.backend.get(key)
+        self.stats["hits" if value is not None else "misses"] += 1
+        return value
+
+    def set(self, key: str, value: Optional[dict]) -> None:
+        if value is not None:
+            self.backend.set(key, value, self.ttl)
+
+    # get()/set() block on disk with the file backend; async callers use these.
+    async def aget(self, key: str) -> Optional[dict]:
+        if self.backend.blocking:
+            return await run_in_threadpool(self.get, key)
+        return self.get(key)
+
+    async def aset(self, key: str, value: Optional[dict]) -> None:
+        if value is None:
+            return
+        if self.backend.blocking:
+            await run_in_threadpool(self.set, key, value)
+        else:
+            self.set(key, value)
+
+    async def get_or_fetch(self, key: str, fetch: Callable[[], Awaitable[Optional[dict]]]) -> Optional[dict]:
+        cached = await self.aget(key)
+        if cached is not None:
+            return cached
+        value = await fetch()
+        await self.aset(key, value)
+        return value
+
+    def get_stats(self) -> dict:
+        lookups = self.stats["hits"] + self.stats["misses"]
+        return {
+            **self.stats,
+            "hit_rate": round(self.stats["hits"] / lookups, 4) if lookups else 0.0,
+            "entries": self.backend.size(),
+            "backend": type(self.backend).__name__,
+        }
+
+
+def _make_backend():
+    if PLACES_CACHE_BACKEND == "file":
+        return FileBackend(PLACES_CACHE_DIR, PLACES_CACHE_MAX_ENTRIES, PLACES_CACHE_EVICT_EVERY)
+    return MemoryBackend(PLACES_CACHE_MAX_ENTRIES)
+
+
+places_cache = PlacesCache(_make_backend(), PLACES_CACHE_TTL_SECONDS)
+
+
+def cacheable_legacy_response(data: dict) -> Optional[dict]:
+    """Legacy Places (/maps/api/place/*) responses are cacheable only on OK / ZERO_RESULTS."""
+    return data if data.get("status") in ("OK", "ZERO_RESULTS") else None
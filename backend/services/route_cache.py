@@ -0,0 +1,126 @@
+"""
+route_cache.py
+Memoization for Google Directions / Distance Matrix calls.
+
+Keys are derived from the request params:
+  - origin / destination / waypoints / origins / destinations: every "lat,lng"
+    is snapped to ROUTE_CACHE_SNAP_DECIMALS (4 ≈ 11 m), so GPS jitter between
+    group members doesn't defeat the cache; non-coordinate values (addresses)
+    are lower-cased
+  - departure_time: "now" and unix timestamps fall into
+    ROUTE_CACHE_DEPARTURE_BUCKET_SECONDS buckets, so traffic-aware answers are
+    reused only within the same window
+  - everything else (mode, avoid, alternatives, ...) verbatim; the API key is dropped
+
+Identical requests already in flight are coalesced (single-flight): the
+first caller fetches, the rest await the same result.
+
+    data = await route_cache.get_or_fetch(route_key("directions", params), fetch)
+"""
+
+import asyncio
+import os
+import time
+from typing import Awaitable, Callable, Optional
+
+from cachetools import TTLCache
+from dotenv import load_dotenv
+
+load_dotenv()
+
+ROUTE_CACHE_TTL_SECONDS = int(os.getenv("ROUTE_CACHE_TTL_SECONDS", "300"))
+ROUTE_CACHE_MAX_ENTRIES = int(os.getenv("ROUTE_CACHE_MAX_ENTRIES", "2000"))
+ROUTE_CACHE_SNAP_DECIMALS = int(os.getenv("ROUTE_CACHE_SNAP_DECIMALS", "4"))
+ROUTE_CACHE_DEPARTURE_BUCKET_SECONDS = int(os.getenv("ROUTE_CACHE_DEPARTURE_BUCKET_SECONDS", "300"))
+
+_LOCATION_PARAMS = {"origin", "destination", "waypoints", "origins", "destinations"}
+
+
+def _snap_location(value: str) -> str:
+    """Snap a pipe-separated list of "lat,lng" (or free-text) locations."""
+    snapped = []
+    for loc in str(value).split("|"):
+        parts = loc.split(",")
+        try:
+            if len(parts) != 2:
+                raise ValueError
+            lat, lng = float(parts[0]), float(parts[1])
+            snapped.append(f"{lat:.{ROUTE_CACHE_SNAP_DECIMALS}f},{lng:.{ROUTE_CACHE_SNAP_DECIMALS}f}")
+        except ValueError:
+            snapped.append(" ".join(loc.lower().split()))
+    return "|".join(snapped)
+
+
+def _departure_bucket(value) -> str:
+    if value is None:
+        return ""
+    try:
+        ts = time.time() if str(value) == "now" else float(value)
+    except ValueError:
+        return str(value)
+    return str(int(ts // ROUTE_CACHE_DEPARTURE_BUCKET_SECONDS))
+
+
+def route_key(endpoint: str, params: dict) -> str:
+    """Normalized cache key for a Directions / Distance Matrix request."""
+    parts = [endpoint]
+    for name in sorted(params):
+        if name == "key":
+            continue
+        value = params[name]
+        if name in _LOCATION_PARAMS:
+            value = _snap_location(value)
+        elif name == "departure_time":
+            value = _departure_bucket(value)
+        parts.append(f"{name}={value}")
+    return "|".join(parts)
+
+
+def _cacheable(data: Optional[dict]) -> bool:
+    # OK / ZERO_RESULTS are stable answers; quota and transient errors are not.
+    return bool(data) and data.get("status") in ("OK", "ZERO_RESULTS")
+
+
+class RouteCache:
+    def __init__(self, ttl: int, max_entries: int):
+        self._entries: TTLCache = TTLCache(maxsize=max_entries, ttl=ttl)
+        self._inflight: dict = {}
+        self.stats = {"hits": 0, "misses": 0, "coalesced": 0}
+
+    async def get_or_fetch(self, key: str, fetch: Callable[[], Awaitable[dict]]) -> dict:
+        cached = self._entries.get(key)
+        if cached is not None:
+            self.stats["hits"] += 1
+            return cached
+
+        task = self._inflight.get(key)
+        if task is not None:
+            self.stats["coalesced"] += 1
+        else:
+            self.stats["misses"] += 1
+            task = asyncio.create_task(self._fetch(key, fetch))
+            self._inflight[key] = task
+        # shield: one caller giving up must not cancel the fetch for the others
+        return await asyncio.shield(task)
+
+    async def _fetch(self, key: str, fetch: Callable[[], Awaitable[dict]]) -> dict:
+        try:
+            data = await fetch()
+            if _cacheable(data):
+                self._entries[key] = data
+            return data
+        finally:
+            self._inflight.pop(key, None)
+
+    def get_stats(self) -> dict:
+        lookups = self.stats["hits"] + self.stats["misses"] + self.stats["coalesced"]
+        saved = self.stats["hits"] + self.stats["coalesced"]
+        return {
+            **self.stats,
+            "hit_rate": round(saved / lookups, 4) if lookups else 0.0,
+            "entries": len(self._entries),
+            "inflight": len(self._inflight),
+        }
+
+
+route_cache = RouteCache(ROUTE_CACHE_TTL_SECONDS, ROUTE_CACHE_MAX_ENTRIES)
@@ -0,0 +1,92 @@
+"""
+spot_clusters.py
+Groups nominated spots into "same-day" clusters with a spatial index.
+
+Spots are placed on the unit sphere (x, y, z) and bucketed into a uniform
+grid whose cell edge equals the query radius as a chord length. A radius
+query checks only the 27 neighbouring cells, and the distances inside them
+are computed in one vectorized step. Cost is roughly O(n · k) for k
+neighbours rather than O(n²) over every pair.
+
+Clustering is greedy "leader" clustering. The spot with the most neighbours
+within max_distance_km / 2 seeds a day, and takes every unassigned spot in
+that radius. This repeats until every spot has a day. By the triangle
+inequality, no two spots on the same day are more than max_distance_km
+apart.
+
+    days = cluster_spots(lats, lngs, max_distance_km=50)   # [[idx, ...], ...]
+"""
+
+from collections import defaultdict
+from typing import Dict, List, Sequence, Tuple
+
+import numpy as np
+
+EARTH_RADIUS_KM = 6371.0
+
+
+def unit_xyz(lats: Sequence[float], lngs: Sequence[float]) -> np.ndarray:
+    """(n, 3) unit-sphere coordinates for lat/lng degrees."""
+    lat = np.radians(np.asarray(lats, dtype=float))
+    lng = np.radians(np.asarray(lngs, dtype=float))
+    cos_lat = np.cos(lat)
+    return np.stack([cos_lat * np.cos(lng), cos_lat * np.sin(lng), np.sin(lat)], axis=1)
+
+
+def km_to_chord(km: float) -> float:
+    """Straight-line (chord) length on the unit sphere for a great-circle distance."""
+    return 2.0 * np.sin(min(km / EARTH_RADIUS_KM, np.pi) / 2.0)
+
+
+def chord_to_km(chord) -> np.ndarray:
+    return 2.0 * EARTH_RADIUS_KM * np.arcsin(np.clip(np.asarray(chord) / 2.0, 0.0, 1.0))
+
+
+class SphereGrid:
+    """Uniform grid over unit-sphere points for fixed-radius neighbour queries."""
+
+    def __init__(self, xyz: np.ndarray, radius_chord: float):
+        self.xyz = xyz
+        self.radius_sq = radius_chord * radius_chord
+        self.cell = max(radius_chord, 1e-9)
+        self._cells: Dict[Tuple[int, int, int], List[int]] = defaultdict(list)
+        for i, key in enumerate(map(tuple, np.floor(xyz / self.cell).astype(int))):
+            self._cells[key].append(i)
+
+    def neighbours(self, i: int) -> np.ndarray:
+        """Indices of every point within the radius of point i (including i)."""
+        cx, cy, cz = np.floor(self.xyz[i] / self.cell).astype(int)
+        candidates = [
+            j
+            for dx in (-1, 0, 1) for dy in (-1, 0, 1) for dz in (-1, 0, 1)
+            for j in self._cells.get((cx + dx, cy + dy, cz + dz), ())
+        ]
+        idx = np.fromiter(candidates, dtype=int, count=len(candidates))
+        diff = self.xyz[idx] - self.xyz[i]
+        return idx[np.einsum("ij,ij->i", diff, diff) <= self.radius_sq]
+
+
+def cluster_spots(lats: Sequence[float], lngs: Sequence[float], max_distance_km: float) -> List[List[int]]:
+    """Partition spot indices into days whose members are all within max_distance_km."""
+    if not len(lats):
+        return []
+    xyz = unit_xyz(lats, lngs)
+    grid = SphereGrid(xyz, km_to_chord(max_distance_km / 2.0))
+    neighbours = [grid.neighbours(i) for i in range(len(xyz))]
+
+    assigned = np.zeros(len(xyz), dtype=bool)
+    days = []
+    # Densest seeds first; ties keep input order
+    for seed in sorted(range(len(xyz)), key=lambda i: -len(neighbours[i])):
+        if assigned[seed]:
+            continue
+        members = neighbours[seed][~assigned[neighbours[seed]]]
+        assigned[members] = True
+        days.append(sorted(members.tolist()))
+    return days
+
+
+def pairwise_km(lats: Sequence[float], lngs: Sequence[float]) -> np.ndarray:
+    """Full (n, n) great-circle distance matrix — for small n such as day centroids."""
+    xyz = unit_xyz(lats, lngs)
+    return chord_to_km(np.linalg.norm(xyz[:, None, :] - xyz[None, :, :], axis=2))
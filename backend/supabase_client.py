@@ -1,8 +1,26 @@
 # supabase_client.py
-from supabase import create_client, Client
+"""
+Async Supabase data-access layer.
+
+Every router imports the shared `supabase` client from here and awaits its
+queries, e.g. `res = await supabase.table("trips").select("*").execute()`.
+
+PostgREST traffic goes through one pooled `httpx.AsyncClient`:
+  - bounded connection pool with keep-alive, so requests reuse TCP/TLS sessions
+  - per-request time budget covering connect, write, reading the whole
+    response body and any retries
+  - automatic retry of connection failures: any method when the connection
+    was never established; idempotent reads/deletes also when an idle pooled
+    connection turned out dead ("Server disconnected"). A POST/PATCH that lost
+    its connection mid-flight may already be committed, so it is not replayed.
+"""
+
+import asyncio
 import os
+
 import httpx
 from dotenv import load_dotenv
+from supabase import AsyncClient, AsyncClientOptions
 
 load_dotenv()
 
@@ -12,15 +30,109 @@ SUPABASE_ANON_KEY = os.getenv("VITE_SUPABASE_ANON_KEY")
 if not SUPABASE_URL or not SUPABASE_ANON_KEY:
     raise RuntimeError("Supabase URL or anon key not set in environment")
 
-supabase: Client = create_client(SUPABASE_URL, SUPABASE_ANON_KEY)
+# Pool / budget tuning (all optional)
+DB_POOL_SIZE = int(os.getenv("SUPABASE_POOL_SIZE", "20"))
+DB_KEEPALIVE_CONNECTIONS = int(os.getenv("SUPABASE_KEEPALIVE_CONNECTIONS", "10"))
+# Supabase's load balancer drops idle connections after ~60s; expire ours first.
+DB_KEEPALIVE_EXPIRY = float(os.getenv("SUPABASE_KEEPALIVE_EXPIRY", "30"))
+DB_REQUEST_BUDGET = float(os.getenv("SUPABASE_REQUEST_TIMEOUT", "10"))
+DB_MAX_RETRIES = int(os.getenv("SUPABASE_MAX_RETRIES", "2"))
+
+# The request never left this process — safe to replay regardless of method.
+_CONNECT_ERRORS = (
+    httpx.ConnectError,
+    httpx.ConnectTimeout,
+)
+
+# The connection dropped after the request may have been sent. Only replayed
+# for methods where doing it twice is harmless.
+_STALE_CONNECTION_ERRORS = _CONNECT_ERRORS + (httpx.RemoteProtocolError,)
+_IDEMPOTENT_METHODS = {"GET", "HEAD", "OPTIONS", "DELETE"}
+
+
+class _RetryingTransport(httpx.AsyncHTTPTransport):
+    """HTTP transport that replays requests lost to stale pooled connections.
+
+    The whole exchange — every attempt plus backoff — must fit inside
+    `budget` seconds, so a slow Supabase never holds a request open longer
+    than the caller's timeout.
+    """
+
+    def __init__(self, *, retries: int, budget: float, backoff: float = 0.05, **kwargs):
+        super().__init__(**kwargs)
+        self._retries = retries
+        self._budget = budget
+        self._backoff = backoff
 
-# Replace the postgrest httpx session with one that uses HTTP/1.1.
-# The default session uses HTTP/2 (h2 is installed), which causes
-# "Server disconnected" errors when idle connections are reused after
-# Supabase closes them server-side.
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        try:
+            return await asyncio.wait_for(self._send_and_read(request), self._budget)
+        except asyncio.TimeoutError as e:
+            raise httpx.ReadTimeout(
+                f"Supabase request exceeded {self._budget:.1f}s budget", request=request
+            ) from e
+
+    async def _send_and_read(self, request: httpx.Request) -> httpx.Response:
+        response = await self._send_with_retries(request)
+        try:
+            # Read the body here so it counts against the budget too
+            await response.aread()
+        except BaseException:
+            await response.aclose()
+            raise
+        return response
+
+    async def _send_with_retries(self, request: httpx.Request) -> httpx.Response:
+        retryable = _STALE_CONNECTION_ERRORS if request.method in _IDEMPOTENT_METHODS else _CONNECT_ERRORS
+        attempt = 0
+        while True:
+            try:
+                return await super().handle_async_request(request)
+            except retryable:
+                if attempt >= self._retries:
+                    raise
+                await asyncio.sleep(self._backoff * (2 ** attempt))
+                attempt += 1
+
+
+def _build_session(base_url: str, headers: dict) -> httpx.AsyncClient:
+    """Pooled keep-alive session for PostgREST."""
+    transport = _RetryingTransport(
+        retries=DB_MAX_RETRIES,
+        budget=DB_REQUEST_BUDGET,
+        # HTTP/1.1 on purpose: HTTP/2 (h2 is installed) multiplexes everything
+        # over one connection, and when Supabase closes it server-side every
+        # in-flight request fails at once.
+        http2=False,
+        limits=httpx.Limits(
+            max_connections=DB_POOL_SIZE,
+            max_keepalive_connections=DB_KEEPALIVE_CONNECTIONS,
+            keepalive_expiry=DB_KEEPALIVE_EXPIRY,
+        ),
+    )
+    return httpx.AsyncClient(
+        base_url=base_url,
+        headers=headers,
+        transport=transport,
+        timeout=httpx.Timeout(DB_REQUEST_BUDGET, connect=min(3.0, DB_REQUEST_BUDGET)),
+    )
+
+
+supabase: AsyncClient = AsyncClient(
+    SUPABASE_URL,
+    SUPABASE_ANON_KEY,
+    options=AsyncClientOptions(postgrest_client_timeout=DB_REQUEST_BUDGET),
+)
+
+# Replace the default postgrest session with the pooled, retrying one.
 _old_session = supabase.postgrest.session
-supabase.postgrest.session = httpx.Client(
+supabase.postgrest.session = _build_session(
     base_url=str(_old_session.base_url),
     headers=dict(_old_session.headers),
-    http2=False,
 )
+
+
+async def close_supabase() -> None:
+    """Release pooled connections. Called from the app lifespan on shutdown."""
+    await supabase.postgrest.session.aclose()
+    await _old_session.aclose()
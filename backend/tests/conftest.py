@@ -0,0 +1,5 @@
+import os
+import sys
+
+# Tests import modules the same way the app does (run from backend/)
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
@@ -0,0 +1,113 @@
+import asyncio
+import json
+
+import pytest
+
+pytest.importorskip("cachetools")
+pytest.importorskip("dotenv")
+
+from services.ai_tool_cache import ToolResultCache  # noqa: E402
+
+TAGS = [("booking", "trip-1")]
+
+
+def _counter():
+    calls = {"n": 0}
+
+    async def run():
+        calls["n"] += 1
+        return json.dumps({"n": calls["n"]})
+
+    return calls, run
+
+
+def test_hit_until_invalidated():
+    async def scenario():
+        cache = ToolResultCache(ttl=60, max_entries=100)
+        calls, run = _counter()
+
+        first = await cache.get_or_run("c1", "get_bookings", {"trip_id": "trip-1"}, TAGS, run)
+        again = await cache.get_or_run("c1", "get_bookings", {"trip_id": "trip-1"}, TAGS, run)
+        assert first == again and calls["n"] == 1
+
+        cache.invalidate("booking", "trip-1")
+        fresh = await cache.get_or_run("c1", "get_bookings", {"trip_id": "trip-1"}, TAGS, run)
+        assert calls["n"] == 2 and fresh != first
+        assert cache.stats["stale"] == 1
+
+    asyncio.run(scenario())
+
+
+def test_write_during_fetch_invalidates_result():
+    async def scenario():
+        cache = ToolResultCache(ttl=60, max_entries=100)
+        started, release = asyncio.Event(), asyncio.Event()
+        calls = {"n": 0}
+
+        async def slow_run():
+            calls["n"] += 1
+            started.set()
+            await release.wait()
+            return json.dumps({"n": calls["n"]})
+
+        fetch = asyncio.create_task(cache.get_or_run("c1", "get_bookings", {}, TAGS, slow_run))
+        await started.wait()
+        # The write lands after the query started: its seq is newer than the fetch's
+        cache.invalidate("booking", "trip-1")
+        release.set()
+        await fetch
+
+        await cache.get_or_run("c1", "get_bookings", {}, TAGS, slow_run)
+        assert calls["n"] == 2
+
+    asyncio.run(scenario())
+
+
+def test_invalidation_before_fetch_does_not_affect_it():
+    async def scenario():
+        cache = ToolResultCache(ttl=60, max_entries=100)
+        calls, run = _counter()
+
+        cache.invalidate("booking", "trip-1")
+        await cache.get_or_run("c1", "get_bookings", {}, TAGS, run)
+        await cache.get_or_run("c1", "get_bookings", {}, TAGS, run)
+        assert calls["n"] == 1
+
+    asyncio.run(scenario())
+
+
+def test_other_tags_and_conversations_are_independent():
+    async def scenario():
+        cache = ToolResultCache(ttl=60, max_entries=100)
+        calls, run = _counter()
+
+        await cache.get_or_run("c1", "get_bookings", {}, TAGS, run)
+        await cache.get_or_run("c2", "get_bookings", {}, TAGS, run)
+        assert calls["n"] == 2
+
+        cache.invalidate("booking", "trip-2")
+        cache.invalidate("checklist", "trip-1")
+        await cache.get_or_run("c1", "get_bookings", {}, TAGS, run)
+        assert calls["n"] == 2
+
+    asyncio.run(scenario())
+
+
+def test_identical_inflight_calls_coalesce_and_errors_are_not_cached():
+    async def scenario():
+        cache = ToolResultCache(ttl=60, max_entries=100)
+        calls = {"n": 0}
+
+        async def failing():
+            calls["n"] += 1
+            await asyncio.sleep(0)
+            return json.dumps({"error": "boom"})
+
+        results = await asyncio.gather(*(cache.get_or_run("c1", "t", {}, TAGS, failing) for _ in range(3)))
+        assert calls["n"] == 1 and len(set(results)) == 1
+        assert cache.stats["coalesced"] == 2
+
+        await cache.get_or_run("c1", "t", {}, TAGS, failing)
+        assert calls["n"] == 2
+
+    asyncio.run(scenario())
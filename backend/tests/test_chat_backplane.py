@@ -0,0 +1,218 @@
+import asyncio
+
+import pytest
+
+pytest.importorskip("dotenv")
+pytest.importorskip("fastapi")
+
+from services import chat_backplane  # noqa: E402
+from services.chat_backplane import RedisBackplane, ReplyError, _encode_command, _read_reply  # noqa: E402
+
+
+def _parse(data: bytes):
+    async def scenario():
+        reader = asyncio.StreamReader()
+        reader.feed_data(data)
+        reader.feed_eof()
+        return await _read_reply(reader)
+
+    return asyncio.run(scenario())
+
+
+def test_encode_command():
+    assert _encode_command("PUBLISH", "chat:r1", "hi") == b"*3\r\n$7\r\nPUBLISH\r\n$7\r\nchat:r1\r\n$2\r\nhi\r\n"
+    # Lengths are bytes, not characters
+    assert _encode_command("é".encode()) == b"*1\r\n$2\r\n\xc3\xa9\r\n"
+
+
+@pytest.mark.parametrize("data, expected", [
+    (b"+OK\r\n", "OK"),
+    (b":3\r\n", 3),
+    (b"$5\r\nhe\r\nl\r\n", b"he\r\nl"),
+    (b"$-1\r\n", None),
+    (b"*-1\r\n", None),
+    (b"*4\r\n$8\r\npmessage\r\n$6\r\nchat:*\r\n$7\r\nchat:r1\r\n$2\r\n{}\r\n",
+     [b"pmessage", b"chat:*", b"chat:r1", b"{}"]),
+])
+def test_read_reply(data, expected):
+    assert _parse(data) == expected
+
+
+def test_read_reply_errors():
+    with pytest.raises(ReplyError):
+        _parse(b"-ERR unknown command\r\n")
+    with pytest.raises(ConnectionError):
+        _parse(b"")
+    with pytest.raises(ConnectionError):
+        _parse(b"?what\r\n")
+
+
+class _Broadcaster:
+    def __init__(self):
+        self.delivered = []
+
+    def publish_text(self, room_id, text):
+        self.delivered.append((room_id, text))
+        return 1
+
+
+async def _server(reply):
+    """Fake server: answers every PUBLISH with `reply` (None = read and never answer)."""
+    received = []
+
+    async def handle(reader, writer):
+        while True:
+            try:
+                command = await _read_command(reader)
+            except (asyncio.IncompleteReadError, ConnectionError):
+                break
+            received.append(command)
+            if reply is not None:
+                writer.write(reply)
+                await writer.drain()
+        writer.close()
+
+    server = await asyncio.start_server(handle, "127.0.0.1", 0)
+    return server, server.sockets[0].getsockname()[1], received
+
+
+async def _read_command(reader):
+    reply = await _read_reply(reader)
+    return [part.decode() for part in reply]
+
+
+def _publish(monkeypatch, reply):
+    monkeypatch.setattr(chat_backplane, "CHAT_BACKPLANE_TIMEOUT", 0.2)
+
+    async def scenario():
+        server, port, received = await _server(reply)
+        broadcaster = _Broadcaster()
+        backplane = RedisBackplane(f"redis://127.0.0.1:{port}", "chat:", broadcaster)
+        try:
+            await backplane.publish("r1", "hello")
+            await backplane.publish("r1", "again")
+        finally:
+            await backplane.close()
+            server.close()
+        return received, broadcaster.delivered
+
+    return asyncio.run(scenario())
+
+
+def test_confirmed_publish_is_not_delivered_locally(monkeypatch):
+    received, delivered = _publish(monkeypatch, b":1\r\n")
+    assert received == [["PUBLISH", "chat:r1", "hello"], ["PUBLISH", "chat:r1", "again"]]
+    assert delivered == []
+
+
+def test_unconfirmed_publish_is_neither_retried_nor_delivered_locally(monkeypatch):
+    received, delivered = _publish(monkeypatch, None)
+    assert received == [["PUBLISH", "chat:r1", "hello"], ["PUBLISH", "chat:r1", "again"]]
+    assert delivered == []
+
+
+def test_rejected_publish_falls_back_to_local_delivery(monkeypatch):
+    _, delivered = _publish(monkeypatch, b"-ERR no\r\n")
+    assert delivered == [("r1", "hello"), ("r1", "again")]
+
+
+def test_unreachable_server_falls_back_to_local_delivery(monkeypatch):
+    monkeypatch.setattr(chat_backplane, "CHAT_BACKPLANE_TIMEOUT", 0.2)
+
+    async def scenario():
+        # Grab a free port, then close it so nothing is listening
+        server = await asyncio.start_server(lambda r, w: None, "127.0.0.1", 0)
+        port = server.sockets[0].getsockname()[1]
+        server.close()
+        await server.wait_closed()
+
+        broadcaster = _Broadcaster()
+        backplane = RedisBackplane(f"redis://127.0.0.1:{port}", "chat:", broadcaster)
+        await backplane.publish("r1", "hello")
+        await backplane.close()
+        return broadcaster.delivered
+
+    assert asyncio.run(scenario()) == [("r1", "hello")]
+
+
+def test_reconnects_when_server_closed_idle_connection(monkeypatch):
+    monkeypatch.setattr(chat_backplane, "CHAT_BACKPLANE_TIMEOUT", 0.5)
+
+    async def scenario():
+        received = []
+
+        async def handle(reader, writer):
+            # Answer one PUBLISH, then hang up like an idle-timeout would
+            received.append(await _read_command(reader))
+            writer.write(b":1\r\n")
+            await writer.drain()
+            writer.close()
+
+        server = await asyncio.start_server(handle, "127.0.0.1", 0)
+        port = server.sockets[0].getsockname()[1]
+        broadcaster = _Broadcaster()
+        backplane = RedisBackplane(f"redis://127.0.0.1:{port}", "chat:", broadcaster)
+        await backplane.publish("r1", "one")
+        await asyncio.sleep(0.05)  # let the FIN arrive
+        await backplane.publish("r1", "two")
+        await backplane.close()
+        server.close()
+        return received, broadcaster.delivered
+
+    received, delivered = asyncio.run(scenario())
+    assert [command[2] for command in received] == ["one", "two"]
+    assert delivered == []
+
+
+async def _pubsub_server():
+    """Minimal PSUBSCRIBE / PUBLISH fan-out (prefix patterns only)."""
+    subscribers = []
+
+    async def handle(reader, writer):
+        while True:
+            try:
+                command = await _read_command(reader)
+            except (asyncio.IncompleteReadError, ConnectionError):
+                break
+            if command[0] == "PSUBSCRIBE":
+                subscribers.append((command[1], writer))
+                writer.write(_encode_command("psubscribe", command[1], 1))
+            elif command[0] == "PUBLISH":
+                matched = [(p, w) for p, w in subscribers if command[1].startswith(p.rstrip("*"))]
+                for pattern, sub in matched:
+                    sub.write(_encode_command("pmessage", pattern, command[1], command[2]))
+                writer.write(b":%d\r\n" % len(matched))
+            await writer.drain()
+        writer.close()
+
+    server = await asyncio.start_server(handle, "127.0.0.1", 0)
+    return server, server.sockets[0].getsockname()[1]
+
+
+def test_control_messages_reach_every_worker(monkeypatch):
+    monkeypatch.setattr(chat_backplane, "CHAT_BACKPLANE_TIMEOUT", 0.5)
+
+    async def scenario():
+        server, port = await _pubsub_server()
+        seen = {"a": [], "b": []}
+        workers = {}
+        for name in seen:
+            backplane = RedisBackplane(f"redis://127.0.0.1:{port}", "chat:", _Broadcaster())
+            backplane.on_control("public_key", seen[name].append)
+            await backplane.start()
+            workers[name] = backplane
+        await asyncio.sleep(0.1)  # let both subscriptions land
+
+        await workers["a"].publish_control("public_key", "user-1")
+        await workers["a"].publish("room-1", "hi")
+        await asyncio.sleep(0.1)
+
+        for backplane in workers.values():
+            await backplane.close()
+        server.close()
+        return seen, workers
+
+    seen, workers = asyncio.run(scenario())
+    # None first: a fresh subscription drops whatever may have been missed
+    assert seen == {"a": [None, "user-1"], "b": [None, "user-1"]}
+    assert workers["b"].broadcaster.delivered == [("room-1", "hi")]
@@ -0,0 +1,73 @@
+import asyncio
+import json
+
+import pytest
+
+pytest.importorskip("dotenv")
+pytest.importorskip("fastapi")
+
+from services.chat_broadcaster import ChatBroadcaster, serialize  # noqa: E402
+
+
+class _Socket:
+    def __init__(self):
+        self.sent = []
+        self.closed_with = None
+
+    async def send_text(self, text):
+        self.sent.append(json.loads(text)["n"])
+
+    async def close(self, code=None):
+        self.closed_with = code
+
+
+def test_resume_after_room_emptied_keeps_writer_alive():
+    async def scenario():
+        broadcaster = ChatBroadcaster(4, "disconnect", 1.0, 10)
+        conn = broadcaster.join("r", _Socket(), paused=True)
+        broadcaster._discard(conn)  # room emptied and its metrics dropped while paused
+
+        broadcaster.resume(conn)
+        await asyncio.sleep(0.01)
+        alive = not conn.writer.done()
+        await broadcaster.leave(conn)
+        return alive, broadcaster.metrics
+
+    alive, metrics = asyncio.run(scenario())
+    assert alive
+    assert metrics == {}
+
+
+def test_paused_backlog_is_sent_first_minus_skipped():
+    async def scenario():
+        broadcaster = ChatBroadcaster(2, "disconnect", 1.0, 10)
+        socket = _Socket()
+        conn = broadcaster.join("r", socket, paused=True)
+        # More than the send queue holds, but within the backlog
+        for n in range(5):
+            broadcaster.publish("r", {"n": n})
+
+        broadcaster.resume(conn, skip=lambda text: json.loads(text)["n"] < 2)
+        broadcaster.publish("r", {"n": 5})
+        await asyncio.sleep(0.01)
+        await broadcaster.leave(conn)
+        return socket
+
+    socket = asyncio.run(scenario())
+    assert socket.sent == [2, 3, 4, 5]
+    assert socket.closed_with is None
+
+
+def test_backlog_overflow_applies_disconnect():
+    async def scenario():
+        broadcaster = ChatBroadcaster(2, "disconnect", 1.0, 3)
+        socket = _Socket()
+        broadcaster.join("r", socket, paused=True)
+        for n in range(4):
+            broadcaster.publish_text("r", serialize({"n": n}))
+        await asyncio.sleep(0.01)
+        return socket, broadcaster
+
+    socket, broadcaster = asyncio.run(scenario())
+    assert socket.closed_with == 1013
+    assert "r" not in broadcaster.rooms
@@ -0,0 +1,59 @@
+import time
+
+import numpy as np
+import pytest
+
+pytest.importorskip("dotenv")
+pytest.importorskip("fastapi")
+pytest.importorskip("httpx")
+
+from services.currency import FxRates, dominant_currency  # noqa: E402
+
+
+@pytest.fixture
+def rates(tmp_path):
+    fx = FxRates("http://rates.invalid", str(tmp_path / "fx.json"), refresh_seconds=3600)
+    fx._install({"USD": 1.0, "EUR": 0.5, "JPY": 100.0}, updated_at=time.time(), fetched_at=time.time())
+    return fx
+
+
+def test_convert_many_passes_unknown_codes_through(rates):
+    values, unknown = rates.convert_many([10, 20, 30, 5], ["USD", "eur", "XYZ", None], "EUR")
+
+    # None is the column default (USD); XYZ isn't in the table and stays as-is
+    np.testing.assert_allclose(values, [5.0, 20.0, 30.0, 2.5])
+    assert unknown == ["XYZ"]
+
+
+def test_convert_many_unknown_target_converts_nothing(rates):
+    values, unknown = rates.convert_many([1, 2, 3], ["USD", "JPY", "ABC"], "QQQ")
+
+    np.testing.assert_allclose(values, [1.0, 2.0, 3.0])
+    assert unknown == ["ABC", "JPY", "USD"]
+
+
+def test_convert_many_matches_scalar_convert(rates):
+    amounts = [12.5, 7.0, 1000.0]
+    codes = ["JPY", "EUR", "USD"]
+    values, unknown = rates.convert_many(amounts, codes, "JPY")
+
+    assert unknown == []
+    np.testing.assert_allclose(values, [rates.convert(a, c, "JPY") for a, c in zip(amounts, codes)])
+
+
+def test_convert_many_empty(rates):
+    values, unknown = rates.convert_many([], [], "USD")
+    assert values.shape == (0,)
+    assert unknown == []
+
+
+def test_stale_without_table(tmp_path):
+    fx = FxRates("http://rates.invalid", str(tmp_path / "fx.json"), refresh_seconds=3600)
+    assert fx.stale
+    assert fx.get_status()["stale"]
+
+
+def test_dominant_currency():
+    assert dominant_currency(["eur", "EUR", "USD", None]) == "EUR"
+    assert dominant_currency([None, None, "JPY"]) == "USD"
+    assert dominant_currency([]) == "USD"
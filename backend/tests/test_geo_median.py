@@ -0,0 +1,94 @@
+import random
+
+import numpy as np
+import pytest
+
+from services import geo_median
+from services.geo_median import (
+    _SCALAR_MAX_POINTS,
+    _legacy_weiszfeld,
+    geometric_median,
+    geometric_median_batch,
+)
+
+
+def _group(rng, n, lat=None, lng=None, spread=0.2):
+    lat = rng.uniform(-60, 60) if lat is None else lat
+    lng = rng.uniform(-179, 179) if lng is None else lng
+    return [(lat + rng.uniform(-spread, spread), lng + rng.uniform(-spread, spread)) for _ in range(n)]
+
+
+def _total_m(points, est, weights=None):
+    weights = weights or [1.0] * len(points)
+    lat0 = np.radians(est[0])
+    return sum(
+        w * np.hypot(np.radians(p[1] - est[1]) * np.cos(lat0), np.radians(p[0] - est[0])) * geo_median.EARTH_RADIUS_M
+        for p, w in zip(points, weights)
+    )
+
+
+@pytest.mark.parametrize("n", [1, 2, 3, 8, 25, _SCALAR_MAX_POINTS])
+def test_scalar_path_matches_batched_solve(n):
+    rng = random.Random(n)
+    group = _group(rng, n)
+    other = _group(rng, 5)
+
+    scalar = geometric_median(group)                    # lone small group -> _solve_scalar
+    batched = geometric_median_batch([group, other])[0]  # several groups -> _solve
+
+    assert scalar == pytest.approx(batched, abs=1e-6)
+
+
+def test_matches_legacy_weiszfeld_near_equator():
+    # At the equator cos(lat) ~ 1, so planar degrees and the local metric plane agree
+    rng = random.Random(7)
+    for n in (3, 6, 15):
+        group = _group(rng, n, lat=0.0, lng=30.0, spread=0.05)
+        assert geometric_median(group) == pytest.approx(_legacy_weiszfeld(group), abs=1e-5)
+
+
+def test_result_beats_nearby_candidates():
+    rng = random.Random(3)
+    group = _group(rng, 12, lat=48.85, lng=2.35)
+    est = geometric_median(group)
+    best = _total_m(group, est)
+    for dlat, dlng in ((1e-3, 0), (-1e-3, 0), (0, 1e-3), (0, -1e-3)):
+        assert best <= _total_m(group, (est[0] + dlat, est[1] + dlng))
+
+
+def test_single_point_and_duplicates():
+    assert geometric_median([(51.5, -0.12)]) == pytest.approx((51.5, -0.12))
+    assert geometric_median([(51.5, -0.12)] * 4) == pytest.approx((51.5, -0.12))
+
+
+def test_dominant_weight_pulls_median_onto_point():
+    group = [(40.0, -74.0), (40.1, -74.0), (40.0, -73.9)]
+    est = geometric_median(group, weights=[10.0, 1.0, 1.0])
+    assert est == pytest.approx(group[0], abs=1e-6)
+
+
+def test_antimeridian_group_stays_in_range():
+    lat, lng = geometric_median([(-17.0, 179.9), (-17.0, -179.9), (-17.1, 179.95)])
+    assert -180.0 <= lng < 180.0
+    assert abs(abs(lng) - 180.0) < 0.2
+    assert lat == pytest.approx(-17.0, abs=0.1)
+
+
+def test_batch_handles_mixed_sizes():
+    rng = random.Random(11)
+    groups = [_group(rng, n) for n in (1, 3, 9, 40)]
+    medians = geometric_median_batch(groups)
+    assert len(medians) == len(groups)
+    for group, median in zip(groups, medians):
+        assert median == pytest.approx(geometric_median(group), abs=1e-6)
+
+
+@pytest.mark.parametrize("groups, weights", [
+    ([[]], None),
+    ([[(0.0, 0.0)]], [[-1.0]]),
+    ([[(0.0, 0.0)]], [[0.0]]),
+    ([[(0.0, 0.0), (1.0, 1.0)]], [[1.0]]),
+])
+def test_rejects_bad_input(groups, weights):
+    with pytest.raises(ValueError):
+        geometric_median_batch(groups, weights)
@@ -0,0 +1,134 @@
+import asyncio
+import io
+from concurrent.futures.process import BrokenProcessPool
+
+import pytest
+
+pytest.importorskip("dotenv")
+Image = pytest.importorskip("PIL.Image")
+ImageDraw = pytest.importorskip("PIL.ImageDraw")
+
+from services import image_prep  # noqa: E402
+from services.image_prep import _EXIF_ORIENTATION, _process, prepare_image  # noqa: E402
+
+
+def _encode(img, fmt="PNG", exif=None) -> bytes:
+    out = io.BytesIO()
+    if exif is not None:
+        img.save(out, format=fmt, exif=exif)
+    else:
+        img.save(out, format=fmt)
+    return out.getvalue()
+
+
+def _photo(size=(3000, 2000)) -> "Image.Image":
+    # Noise makes it big and hard to compress, like a real photo
+    return Image.effect_noise(size, 40).convert("RGB")
+
+
+def _receipt_on_table(faint_total: bool = True) -> "Image.Image":
+    """Dark table, white receipt in the middle, totals line near the receipt's bottom edge."""
+    img = Image.new("RGB", (2000, 3000), (40, 30, 25))
+    draw = ImageDraw.Draw(img)
+    paper = (500, 300, 1500, 2700)
+    draw.rectangle(paper, fill=(250, 250, 245))
+    for y in range(400, 2400, 80):
+        draw.rectangle((560, y, 1300, y + 20), fill=(30, 30, 30))
+    ink = (205, 205, 200) if faint_total else (30, 30, 30)  # faded thermal print
+    draw.rectangle((560, 2600, 1440, 2630), fill=ink)
+    return img
+
+
+def test_downscale_and_grayscale_keep_aspect():
+    data = _encode(_photo())
+    out, steps, _ = _process(data, True, 1600, "jpeg", 80, False)
+
+    result = Image.open(io.BytesIO(out))
+    assert result.size == (1600, 1067)
+    assert result.mode == "L"
+    assert steps == ["downscale", "grayscale", "jpeg"]
+
+
+def test_document_profile_keeps_colour_and_webp():
+    data = _encode(_photo((1000, 800)))
+    out, steps, _ = _process(data, False, 1600, "webp", 80, False)
+
+    result = Image.open(io.BytesIO(out))
+    assert result.format == "WEBP" and result.mode == "RGB"
+    assert steps == ["webp"]
+
+
+def test_exif_rotation_applied():
+    img = _photo((1200, 800))
+    exif = img.getexif()
+    exif[_EXIF_ORIENTATION] = 6  # rotate 90° clockwise on display
+    out, steps, _ = _process(_encode(img, "JPEG", exif=exif), True, 1600, "jpeg", 80, False)
+
+    assert Image.open(io.BytesIO(out)).size == (800, 1200)
+    assert steps[0] == "exif_rotate"
+
+
+def test_unreadable_input_returns_none():
+    out, steps, _ = _process(b"not an image", True, 1600, "jpeg", 80, False)
+    assert out is None and steps == []
+
+
+def test_crop_off_keeps_whole_frame():
+    out, steps, _ = _process(_encode(_receipt_on_table()), True, 1600, "jpeg", 80, False)
+    assert "crop" not in steps
+    assert Image.open(io.BytesIO(out)).size == (1067, 1600)
+
+
+def test_crop_keeps_the_totals_line():
+    img = _receipt_on_table()
+    out, steps, _ = _process(_encode(img), True, 10_000, "jpeg", 95, True)
+    assert "crop" in steps
+
+    cropped = Image.open(io.BytesIO(out))
+    # The whole receipt, including the faint totals line at y=2600..2630, survives
+    assert cropped.width >= 1000 and cropped.height >= 2400
+    assert cropped.width < img.width and cropped.height < img.height
+    bottom = cropped.crop((0, int(cropped.height * 0.85), cropped.width, cropped.height))
+    assert bottom.getextrema()[0] < 220
+
+
+def _run(coro):
+    try:
+        return asyncio.run(coro)
+    finally:
+        image_prep.shutdown_image_pool()
+
+
+def test_prepare_image_passes_small_and_pdf_inputs_through():
+    small = _encode(Image.new("RGB", (10, 10)))
+    data, mime, metrics = _run(prepare_image(small, "image/png", "receipt"))
+    assert data == small and mime == "image/png" and metrics["steps"] == []
+
+    pdf = b"%PDF-1.4" + b"0" * 400_000
+    data, mime, _ = _run(prepare_image(pdf, "application/pdf", "document"))
+    assert data == pdf and mime == "application/pdf"
+
+
+def test_prepare_image_shrinks_large_photo():
+    data = _encode(_photo())
+    out, mime, metrics = _run(prepare_image(data, "image/png", "receipt"))
+
+    assert mime == "image/jpeg"
+    assert metrics["bytes_out"] == len(out) < len(data)
+    assert image_prep.get_stats()["receipt"]["processed"] >= 1
+
+
+def test_broken_pool_is_rebuilt(monkeypatch):
+    class BrokenPool:
+        def submit(self, *args, **kwargs):
+            raise BrokenProcessPool("worker died")
+
+        def shutdown(self, wait=True, cancel_futures=False):
+            pass
+
+    data = _encode(_photo())
+    monkeypatch.setattr(image_prep, "_pool", BrokenPool())
+
+    out, mime, _ = _run(prepare_image(data, "image/png", "receipt"))
+    assert out == data and mime == "image/png"  # original sent this time
+    assert image_prep._pool is None              # next call builds a fresh pool
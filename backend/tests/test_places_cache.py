@@ -0,0 +1,33 @@
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+pytest.importorskip("dotenv")
+pytest.importorskip("fastapi")
+
+from services.places_cache import FileBackend  # noqa: E402
+
+
+def test_concurrent_writes_to_one_key(tmp_path):
+    backend = FileBackend(str(tmp_path), max_entries=100, evict_every=1000)
+
+    def write(i):
+        backend.set("same-key", {"i": i}, ttl=60)
+
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        list(pool.map(write, range(400)))
+
+    assert backend.get("same-key")["i"] in range(400)
+    assert [name for name in os.listdir(tmp_path) if name.endswith(".tmp")] == []
+
+
+def test_eviction_counter_is_exact_under_threads(tmp_path):
+    backend = FileBackend(str(tmp_path), max_entries=10, evict_every=7)
+
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        list(pool.map(lambda i: backend.set(f"key-{i}", {"i": i}, ttl=60), range(700)))
+
+    # 700 writes is exactly 100 sweeps, the last one after the final write
+    assert backend._writes == 0
+    assert backend.size() <= 10
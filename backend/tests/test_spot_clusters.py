@@ -0,0 +1,56 @@
+import random
+
+import numpy as np
+import pytest
+
+from services.spot_clusters import EARTH_RADIUS_KM, cluster_spots, pairwise_km
+
+KM_PER_DEG = np.pi * EARTH_RADIUS_KM / 180.0
+
+
+def _north_of(lat, lng, km):
+    return lat + km / KM_PER_DEG, lng
+
+
+def test_empty():
+    assert cluster_spots([], [], 50) == []
+
+
+def test_spot_just_inside_seed_radius_joins_day():
+    # Seed radius is max_distance_km / 2 = 25 km
+    lats, lngs = zip((10.0, 20.0), _north_of(10.0, 20.0, 24.9), _north_of(10.0, 20.0, -24.9))
+    assert cluster_spots(lats, lngs, 50) == [[0, 1, 2]]
+
+
+def test_spot_just_outside_seed_radius_gets_its_own_day():
+    lats, lngs = zip((10.0, 20.0), _north_of(10.0, 20.0, 25.1))
+    days = cluster_spots(lats, lngs, 50)
+    assert sorted(days) == [[0], [1]]
+
+
+def test_days_never_exceed_max_distance():
+    rng = random.Random(5)
+    lats = [45.0 + rng.uniform(-1.5, 1.5) for _ in range(300)]
+    lngs = [7.0 + rng.uniform(-1.5, 1.5) for _ in range(300)]
+    max_km = 40.0
+
+    days = cluster_spots(lats, lngs, max_km)
+
+    assert sorted(i for day in days for i in day) == list(range(300))
+    dist = pairwise_km(lats, lngs)
+    for day in days:
+        assert dist[np.ix_(day, day)].max() <= max_km + 1e-6
+
+
+def test_clusters_across_antimeridian():
+    lats, lngs = [0.0, 0.0, 0.0], [179.95, -179.95, 10.0]
+    days = cluster_spots(lats, lngs, 50)
+    assert sorted(days) == [[0, 1], [2]]
+
+
+def test_pairwise_km_known_distance():
+    # One degree of latitude along a meridian
+    dist = pairwise_km([0.0, 1.0], [0.0, 0.0])
+    assert dist[0, 1] == pytest.approx(KM_PER_DEG, rel=1e-9)
+    assert dist[0, 0] == pytest.approx(0.0, abs=1e-9)
+    assert np.allclose(dist, dist.T)
@@ -1,7 +1,8 @@
+import asyncio
 import os
 from supabase_client import supabase
 
-def upload_and_save_image(filepath: str):
+async def upload_and_save_image(filepath: str):
     filename = os.path.basename(filepath)
     bucket_name = "Media"
 
@@ -9,7 +10,7 @@ def upload_and_save_image(filepath: str):
         # Upload to Storage Bucket
         # We open the file in binary mode ('rb')
         with open(filepath, 'rb') as f:
-            response = supabase.storage.from_(bucket_name).upload(
+            response = await supabase.storage.from_(bucket_name).upload(
                 path=filename,
                 file=f,
                 file_options={"content-type": "image/jpeg"} # Change based on file type
@@ -17,7 +18,7 @@ def upload_and_save_image(filepath: str):
         
         # Construct the Public URL
         # (Only works if bucket is Public)
-        public_url = supabase.storage.from_(bucket_name).get_public_url(filename)
+        public_url = await supabase.storage.from_(bucket_name).get_public_url(filename)
         print(f"Uploaded to Bucket: {public_url}")
 
         # Insert Record into Database
@@ -27,7 +28,7 @@ def upload_and_save_image(filepath: str):
         }
         
         # This inserts the row and returns the created data
-        db_response = supabase.table("images").insert(data).execute()
+        db_response = await supabase.table("images").insert(data).execute()
         
         print("Database Record Created:")
         print(db_response.data)
@@ -38,4 +39,4 @@ def upload_and_save_image(filepath: str):
 # Usage
 if __name__ == "__main__":
     # Ensure you have a dummy image named 'test_image.jpg' in the same folder
-    upload_and_save_image("test_image.jpg")
\ No newline at end of file
+    asyncio.run(upload_and_save_image("test_image.jpg"))
\ No newline at end of file
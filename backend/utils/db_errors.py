@@ -0,0 +1,34 @@
+"""
+Classify PostgREST / Postgres errors raised by supabase queries.
+
+Services that fall back when a migration hasn't been applied must only do
+so for schema errors. A timeout, a network blip or a bad parameter
+(22P02 invalid uuid) is a failure of that one call, not a missing feature.
+
+    except Exception as e:
+        if is_missing_function(e):
+            _rpc_available = False
+"""
+
+from typing import Optional
+
+# Function not found (PostgREST schema cache / Postgres)
+_MISSING_FUNCTION = {"PGRST202", "42883"}
+# Undefined column / relation, or a column PostgREST doesn't know about
+_MISSING_SCHEMA = {"42703", "42P01", "PGRST204", "PGRST200"}
+
+
+def error_code(e: Exception) -> Optional[str]:
+    """SQLSTATE / PGRST code from a postgrest APIError, if there is one."""
+    code = getattr(e, "code", None)
+    if code is None and e.args and isinstance(e.args[0], dict):
+        code = e.args[0].get("code")
+    return str(code) if code else None
+
+
+def is_missing_function(e: Exception) -> bool:
+    return error_code(e) in _MISSING_FUNCTION
+
+
+def is_missing_schema(e: Exception) -> bool:
+    return error_code(e) in _MISSING_SCHEMA
@@ -0,0 +1,159 @@
+"""
+Shared outbound HTTP clients — one pooled httpx.AsyncClient per provider.
+
+Routers and services used to open a fresh AsyncClient per request, paying
+DNS + TCP + TLS setup on every Google/Mapbox/Open-Meteo call. Clients here
+live for the whole app (closed from the FastAPI lifespan) and keep
+connections alive between requests.
+
+    from utils.http_clients import get_http_client
+
+    client = get_http_client("google")
+    resp = await client.get(url, params=params)            # provider default timeout
+    resp = await client.get(url, params=params, timeout=8.0)  # per-call override
+
+Each provider has its own pool limits, timeouts and retry policy. Retries
+cover dropped/refused connections and 429/5xx responses, with exponential
+backoff (Retry-After is honoured up to the backoff cap).
+"""
+
+import asyncio
+import random
+
+import httpx
+
+# Per-provider pool and retry policy.
+#   retry_methods: methods safe to replay on a 429/5xx (Places v1 searches are POST reads)
+PROVIDER_POLICIES = {
+    "google": {
+        "timeout": 10.0,
+        "connect_timeout": 5.0,
+        "max_connections": 50,
+        "max_keepalive": 20,
+        "retries": 2,
+        "retry_methods": {"GET", "POST"},
+    },
+    "mapbox": {
+        "timeout": 15.0,
+        "connect_timeout": 5.0,
+        "max_connections": 10,
+        "max_keepalive": 5,
+        "retries": 2,
+        "retry_methods": {"GET"},
+    },
+    "open_meteo": {
+        "timeout": 10.0,
+        "connect_timeout": 5.0,
+        "max_connections": 20,
+        "max_keepalive": 10,
+        "retries": 2,
+        "retry_methods": {"GET"},
+    },
+    "exchange_rates": {
+        "timeout": 10.0,
+        "connect_timeout": 5.0,
+        "max_connections": 2,
+        "max_keepalive": 1,
+        "retries": 2,
+        "retry_methods": {"GET"},
+    },
+}
+
+KEEPALIVE_EXPIRY_SECONDS = 30.0
+BACKOFF_BASE_SECONDS = 0.2
+BACKOFF_MAX_SECONDS = 2.0
+
+_RETRY_STATUS = {429, 500, 502, 503, 504}
+
+# Failures where the request never reached the server — always safe to replay.
+_CONNECT_ERRORS = (httpx.ConnectError, httpx.ConnectTimeout)
+
+# The connection dropped after the request may have been processed (e.g. a
+# stale keep-alive). Only replayed for methods where doing it twice is harmless.
+_STALE_CONNECTION_ERRORS = _CONNECT_ERRORS + (httpx.RemoteProtocolError,)
+_SAFE_METHODS = {"GET", "HEAD", "OPTIONS"}
+
+_clients: dict = {}
+
+
+class _RetryTransport(httpx.AsyncHTTPTransport):
+    """Pooled transport with retry/backoff for transient provider failures."""
+
+    def __init__(self, *, retries: int, retry_methods: set, **kwargs):
+        super().__init__(**kwargs)
+        self._retries = retries
+        self._retry_methods = retry_methods
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        retryable = _STALE_CONNECTION_ERRORS if request.method in _SAFE_METHODS else _CONNECT_ERRORS
+        attempt = 0
+        while True:
+            try:
+                response = await super().handle_async_request(request)
+            except retryable:
+                if attempt >= self._retries:
+                    raise
+                await asyncio.sleep(_backoff(attempt))
+                attempt += 1
+                continue
+
+            if (
+                response.status_code not in _RETRY_STATUS
+                or request.method not in self._retry_methods
+                or attempt >= self._retries
+            ):
+                return response
+
+            delay = _retry_after(response) or _backoff(attempt)
+            await response.aclose()
+            await asyncio.sleep(delay)
+            attempt += 1
+
+
+def _backoff(attempt: int) -> float:
+    delay = min(BACKOFF_MAX_SECONDS, BACKOFF_BASE_SECONDS * (2 ** attempt))
+    return delay * (0.5 + random.random() / 2)
+
+
+def _retry_after(response: httpx.Response) -> float | None:
+    value = response.headers.get("Retry-After")
+    try:
+        return min(BACKOFF_MAX_SECONDS, max(0.0, float(value))) if value else None
+    except ValueError:
+        return None
+
+
+def _build_client(provider: str) -> httpx.AsyncClient:
+    policy = PROVIDER_POLICIES[provider]
+    transport = _RetryTransport(
+        retries=policy["retries"],
+        retry_methods=policy["retry_methods"],
+        limits=httpx.Limits(
+            max_connections=policy["max_connections"],
+            max_keepalive_connections=policy["max_keepalive"],
+            keepalive_expiry=KEEPALIVE_EXPIRY_SECONDS,
+        ),
+    )
+    return httpx.AsyncClient(
+        transport=transport,
+        timeout=httpx.Timeout(policy["timeout"], connect=policy["connect_timeout"]),
+    )
+
+
+def get_http_client(provider: str) -> httpx.AsyncClient:
+    """Return the shared client for a provider, creating it on first use."""
+    client = _clients.get(provider)
+    if client is None or client.is_closed:
+        if provider not in PROVIDER_POLICIES:
+            raise ValueError(f"Unknown HTTP provider: {provider}")
+        client = _build_client(provider)
+        _clients[provider] = client
+    return client
+
+
+async def close_http_clients() -> None:
+    """Close every provider pool. Called from the app lifespan on shutdown."""
+    clients = list(_clients.values())
+    _clients.clear()
+    for client in clients:
+        await client.aclose()
@@ -8,6 +8,8 @@ from fastapi.security import OAuth2PasswordBearer
 from dotenv import load_dotenv
 import os
 
+from cachetools import TTLCache
+
 import schemas
 from supabase_client import supabase 
 
@@ -23,6 +25,41 @@ ACCESS_TOKEN_EXPIRE_MINUTES = int(os.getenv("JWT_ACCESS_TOKEN_EXPIRE_MINUTES", "
 
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="login")
 
+# Authenticated-user cache: token subject (user id) -> users row.
+# Short TTL bounds staleness for edits made outside the invalidation hooks.
+USER_CACHE_TTL_SECONDS = int(os.getenv("USER_CACHE_TTL_SECONDS", "60"))
+USER_CACHE_MAX_SIZE = int(os.getenv("USER_CACHE_MAX_SIZE", "2048"))
+
+_user_cache: TTLCache = TTLCache(maxsize=USER_CACHE_MAX_SIZE, ttl=USER_CACHE_TTL_SECONDS)
+_user_cache_stats = {"hits": 0, "misses": 0, "invalidations": 0}
+
+
+def invalidate_cached_user(user_id: str | None = None, email: str | None = None):
+    """
+    Drop a user from the auth cache after their row changes.
+
+    Pass the user id when known; otherwise entries are matched by email
+    (used by the OTP password reset, which only knows the email).
+    """
+    if user_id is not None:
+        if _user_cache.pop(str(user_id), None) is not None:
+            _user_cache_stats["invalidations"] += 1
+    if email is not None:
+        for key, cached in list(_user_cache.items()):
+            if cached.get("email") == email:
+                _user_cache.pop(key, None)
+                _user_cache_stats["invalidations"] += 1
+
+
+def get_user_cache_stats() -> dict:
+    """Hit/miss counters for the auth cache."""
+    lookups = _user_cache_stats["hits"] + _user_cache_stats["misses"]
+    return {
+        **_user_cache_stats,
+        "size": len(_user_cache),
+        "hit_rate": round(_user_cache_stats["hits"] / lookups, 4) if lookups else 0.0,
+    }
+
 
 #create jwt access token
 def create_access_token(data: dict, expires_delta: timedelta | None = None):
@@ -85,7 +122,7 @@ def verify_access_token(token: str, credentials_exception):
 
 
 # get current user from token
-def get_current_user(token: str = Depends(oauth2_scheme)):
+async def get_current_user(token: str = Depends(oauth2_scheme)):
     """
     Get the current user from the JWT token (Supabase-backed).
 
@@ -107,9 +144,15 @@ def get_current_user(token: str = Depends(oauth2_scheme)):
     # verify and decode the token
     token_data = verify_access_token(token, credentials_exception)
 
+    cached = _user_cache.get(token_data.id)
+    if cached is not None:
+        _user_cache_stats["hits"] += 1
+        return dict(cached)
+    _user_cache_stats["misses"] += 1
+
     # fetch user from Supabase using the id from the token
     try:
-        res = (
+        res = await (
             supabase
             .table("users")
             .select("*")
@@ -124,5 +167,7 @@ def get_current_user(token: str = Depends(oauth2_scheme)):
     if not user:
         raise credentials_exception
 
-    # return the user object 
-    return user
+    _user_cache[token_data.id] = user
+
+    # return a copy so handlers can't mutate the cached row
+    return dict(user)
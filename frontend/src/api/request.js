@@ -3,7 +3,8 @@
 import { API_BASE } from "../config.js";
 
 export async function request(url, options = {}) {
-  const { method = "GET", body, headers = {} } = options;
+  // withHeaders: resolve to { data, headers } instead of just the body
+  const { method = "GET", body, headers = {}, withHeaders = false } = options;
 
   const authHeaders = {};
   const token = localStorage.getItem("token"); // Assumes token is stored here
@@ -44,7 +45,6 @@ export async function request(url, options = {}) {
   }
 
   // If DELETE or some POST returns no body
-  if (response.status === 204) return null;
-
-  return response.json();
+  const data = response.status === 204 ? null : await response.json();
+  return withHeaders ? { data, headers: response.headers } : data;
 }
@@ -1,7 +1,7 @@
 import { useState, useEffect, useRef, useCallback } from "react";
 import { useNavigate, useLocation } from "react-router-dom";
 import {
-  sendMessage,
+  sendMessageStream,
   getConversations,
   getConversationMessages,
   deleteConversation,
@@ -104,18 +104,28 @@ function ChatWidget() {
     ]);
     setLoading(true);
 
+    // Streamed reply: the bubble appears on the first chunk and grows in place
+    const botId = "b-" + Date.now();
+    let streamed = "";
+    const showReply = (content) =>
+      setMessages((prev) =>
+        prev.some((m) => m.id === botId)
+          ? prev.map((m) => (m.id === botId ? { ...m, content } : m))
+          : [...prev, { role: "assistant", content, id: botId }]
+      );
+
     try {
-      const data = await sendMessage(messageText, activeConversationId);
+      const data = await sendMessageStream(messageText, activeConversationId, (chunk) => {
+        streamed += chunk;
+        showReply(streamed);
+      });
 
       if (!activeConversationId) {
         setActiveConversationId(data.conversation_id);
       }
 
       const botReply = data.response;
-      setMessages((prev) => [
-        ...prev,
-        { role: "assistant", content: botReply, id: "b-" + Date.now() },
-      ]);
+      showReply(botReply);
 
       // If widget is closed, show unread dot
       if (!isOpen) setHasUnread(true);
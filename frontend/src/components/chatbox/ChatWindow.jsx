@@ -12,6 +12,8 @@ export default function ChatWindow({
   currentUserId,
   members,
   messages,
+  prevCursor,
+  hasOlder,
   error,
   conversationID,
 }) {
@@ -21,7 +23,12 @@ export default function ChatWindow({
   const [localMessages,   setLocalMessages]   = useState(messages || []);
   const [encryptionError, setEncryptionError] = useState(null);
   const [sending,         setSending]         = useState(false);
+  const [olderCursor,     setOlderCursor]     = useState(prevCursor || null);
+  const [hasMoreOlder,    setHasMoreOlder]    = useState(!!hasOlder);
+  const [loadingOlder,    setLoadingOlder]    = useState(false);
   const retryRef = useRef(null);
+  const lastMessageRef = useRef(null);
+  const scrollAnchorRef = useRef(null);
 
   const sendMessage = async () => {
     const trimmed = text.trim();
@@ -41,6 +48,39 @@ export default function ChatWindow({
   };
 
   useEffect(() => { setLocalMessages(messages || []); }, [messages, conversationID]);
+  useEffect(() => {
+    setOlderCursor(prevCursor || null);
+    setHasMoreOlder(!!hasOlder);
+  }, [prevCursor, hasOlder, conversationID]);
+  useEffect(() => {
+    lastMessageRef.current = localMessages[localMessages.length - 1] || null;
+  }, [localMessages]);
+
+  const mergeMessages = (prev, incoming, prepend = false) => {
+    const seen = new Set(prev.map((m) => m.message_id));
+    const fresh = incoming.filter((m) => m.message_id && !seen.has(m.message_id));
+    if (!fresh.length) return prev;
+    return prepend ? [...fresh, ...prev] : [...prev, ...fresh];
+  };
+
+  const loadOlder = async () => {
+    if (!olderCursor || loadingOlder) return;
+    setLoadingOlder(true);
+    try {
+      const page = await chatApi.getMessages(conversationID, { before: olderCursor });
+      // Keep the viewport on the same message once older ones are prepended
+      if (listRef.current && page.messages.length) {
+        scrollAnchorRef.current = listRef.current.scrollHeight - listRef.current.scrollTop;
+      }
+      setLocalMessages((prev) => mergeMessages(prev, page.messages, true));
+      setOlderCursor(page.prevCursor);
+      setHasMoreOlder(page.hasMore);
+    } catch (err) {
+      console.error("Load older messages error:", err);
+    } finally {
+      setLoadingOlder(false);
+    }
+  };
 
   // Stop any pending key-wait retry when conversation changes
   useEffect(() => {
@@ -133,29 +173,79 @@ export default function ChatWindow({
     initSessionKey();
   }, [conversationID, members]);
 
-  // WebSocket real-time updates
+  // WebSocket real-time updates. On reconnect the server replays anything
+  // sent after our last message (?after=<cursor>&token=<jwt>) before going live.
   useEffect(() => {
     if (!conversationID) return;
     let isActive = true;
+    let ws = null;
+    let ping = null;
+    let reconnectTimer = null;
+    let attempts = 0;
     const wsBase = API_BASE.replace(/^http/, "ws");
-    const ws = new WebSocket(`${wsBase}/api/ws/conversations/${conversationID}`);
-    ws.onmessage = (event) => {
-      if (!isActive) return;
-      const msg = JSON.parse(event.data);
-      setLocalMessages((prev) => {
-        if (prev.some((m) => m.message_id === msg.message_id)) return prev;
-        return [...prev, msg];
-      });
+
+    // Replay stops at the server's cap; fetch the rest over REST
+    const catchUp = async (cursor) => {
+      let after = cursor;
+      let more = true;
+      while (isActive && after && more) {
+        const page = await chatApi.getMessages(conversationID, { after });
+        if (!isActive) return;
+        setLocalMessages((prev) => mergeMessages(prev, page.messages));
+        after = page.nextCursor;
+        more = page.hasMore;
+      }
+    };
+
+    const connect = () => {
+      const params = new URLSearchParams();
+      const last = lastMessageRef.current;
+      const token = localStorage.getItem("token");
+      if (last?.conversation_id === conversationID && token) {
+        params.append("after", chatApi.messageCursor(last));
+        params.append("token", token);
+      }
+      const query = params.toString() ? `?${params}` : "";
+      ws = new WebSocket(`${wsBase}/api/ws/conversations/${conversationID}${query}`);
+      ws.onopen = () => { attempts = 0; };
+      ws.onmessage = (event) => {
+        if (!isActive) return;
+        const msg = JSON.parse(event.data);
+        if (msg.type === "replay_complete") {
+          if (msg.has_more) catchUp(msg.cursor).catch((e) => console.error("Chat catch-up error:", e));
+          return;
+        }
+        setLocalMessages((prev) => mergeMessages(prev, [msg]));
+      };
+      ws.onerror = (e) => { if (isActive) console.error("WebSocket error:", e); };
+      ws.onclose = (e) => {
+        clearInterval(ping);
+        if (!isActive) return;
+        // 1008: bad cursor / token or no longer a member — don't retry
+        if (e.code === 1008) { console.log("WebSocket closed"); return; }
+        const delay = Math.min(10000, 500 * 2 ** attempts++);
+        reconnectTimer = setTimeout(connect, delay);
+      };
+      ping = setInterval(() => { if (ws.readyState === WebSocket.OPEN) ws.send("ping"); }, 25000);
+    };
+
+    connect();
+    return () => {
+      isActive = false;
+      clearInterval(ping);
+      clearTimeout(reconnectTimer);
+      ws?.close();
     };
-    ws.onerror  = (e) => { if (isActive) console.error("WebSocket error:", e); };
-    ws.onclose  = ()  => { if (isActive) console.log("WebSocket closed"); };
-    const ping  = setInterval(() => { if (ws.readyState === WebSocket.OPEN) ws.send("ping"); }, 25000);
-    return () => { isActive = false; clearInterval(ping); ws.close(); };
   }, [conversationID]);
 
-  // Scroll to bottom on new messages
+  // Scroll to bottom on new messages; stay put when older ones are prepended
   useEffect(() => {
     if (!listRef.current) return;
+    if (scrollAnchorRef.current != null) {
+      listRef.current.scrollTop = listRef.current.scrollHeight - scrollAnchorRef.current;
+      scrollAnchorRef.current = null;
+      return;
+    }
     listRef.current.scrollTop = listRef.current.scrollHeight;
   }, [localMessages?.length]);
 
@@ -218,11 +308,25 @@ export default function ChatWindow({
         ) : error ? (
           <EmptyState title="Could not load messages" subtitle={error} />
         ) : (
-          <MessageList
-            messages={localMessages}
-            currentUserId={currentUserId}
-            conversationId={conversationID}
-          />
+          <>
+            {hasMoreOlder && olderCursor && (
+              <div className="flex justify-center mb-3">
+                <button
+                  onClick={loadOlder}
+                  disabled={loadingOlder}
+                  className="text-[11px] font-medium px-3 py-1 rounded-full transition disabled:opacity-50"
+                  style={{ background: "rgba(24,58,55,0.08)", color: "#183a37" }}
+                >
+                  {loadingOlder ? "Loading…" : "Load older messages"}
+                </button>
+              </div>
+            )}
+            <MessageList
+              messages={localMessages}
+              currentUserId={currentUserId}
+              conversationId={conversationID}
+            />
+          </>
         )}
       </div>
 
@@ -78,6 +78,14 @@ export default function ConversationList({
                   {sub}
                 </p>
               </div>
+              {c.unread_count > 0 && !isActive && (
+                <span
+                  className="shrink-0 min-w-[18px] h-[18px] px-1 rounded-full text-[10px] font-semibold flex items-center justify-center"
+                  style={{ background: "#183a37", color: "#ffffff" }}
+                >
+                  {c.unread_count > 99 ? "99+" : c.unread_count}
+                </span>
+              )}
             </RowButton>
           );
         })}
@@ -20,11 +20,40 @@ export const chatApi = {
       { method: "POST" }
     ),
 
+  markRead: (conversationId) =>
+    request(`/api/conversations/${encodeURIComponent(conversationId)}/read`, { method: "POST" }),
+
   getMembers: (conversationId) =>
     request(`/api/conversations/${encodeURIComponent(conversationId)}/members`),
 
-  getMessages: (conversationId) =>
-    request(`/api/conversations/${encodeURIComponent(conversationId)}/messages`),
+  /**
+   * One page of messages, oldest first. Latest page by default; { before }
+   * pages back, { after } / { since } catch up.
+   * → { messages, prevCursor, nextCursor, hasMore }
+   */
+  getMessages: async (conversationId, { before, after, since, limit } = {}) => {
+    const params = new URLSearchParams();
+    if (before) params.append("before", before);
+    if (after) params.append("after", after);
+    if (since) params.append("since", since);
+    if (limit) params.append("limit", limit.toString());
+    const query = params.toString() ? `?${params}` : "";
+    const { data, headers } = await request(
+      `/api/conversations/${encodeURIComponent(conversationId)}/messages${query}`,
+      { withHeaders: true }
+    );
+    return {
+      messages: Array.isArray(data) ? data : [],
+      prevCursor: headers.get("X-Prev-Cursor"),
+      nextCursor: headers.get("X-Next-Cursor"),
+      hasMore: headers.get("X-Has-More") === "true",
+    };
+  },
+
+  // Same encoding as the backend's encode_message_cursor (url-safe base64 of "sent|id")
+  messageCursor: (message) =>
+    btoa(`${message.sent_datetime}|${message.message_id}`)
+      .replace(/\+/g, "-").replace(/\//g, "_").replace(/=+$/, ""),
 
   // ── Messages ───────────────────────────────────────────────────────────────
 
@@ -68,6 +97,13 @@ export const chatApi = {
   getMemberPublicKey: (userId) =>
     request(`/api/users/${encodeURIComponent(userId)}/public-key`),
 
+  /**
+   * Every member's public key in one call, plus who still lacks a session key.
+   * → { public_keys: {userId: key}, missing_public_key: [...], missing_session_key: [...] }
+   */
+  getMemberPublicKeys: (conversationId) =>
+    request(`/api/conversations/${encodeURIComponent(conversationId)}/public-keys`),
+
   // ── Session key distribution ───────────────────────────────────────────────
 
   /**
@@ -91,6 +127,26 @@ export const chatApi = {
     return sessionKey;
   },
 
+  /**
+   * Fetch the current user's session key blobs for all conversations in one
+   * call, decrypt them locally and cache them, so opening a conversation
+   * doesn't need its own key request. Blobs that fail to decrypt are skipped
+   * (ChatWindow's per-conversation flow handles rotation).
+   */
+  prefetchSessionKeys: async () => {
+    const keypair = encryptionUtils.getKeypair();
+    if (!keypair) return;
+
+    const { session_keys: sessionKeys = {} } = await request("/api/users/me/session-keys");
+    for (const [conversationId, encryptedKey] of Object.entries(sessionKeys)) {
+      if (encryptionUtils.getCachedSessionKey(conversationId)) continue;
+      try {
+        const sessionKey = encryptionUtils.decryptKeyForUser(encryptedKey, keypair.private_key);
+        if (sessionKey) encryptionUtils.cacheSessionKey(conversationId, sessionKey);
+      } catch { /* left for ChatWindow */ }
+    }
+  },
+
   /**
    * Generate a session key client-side, encrypt it for every member who has a
    * public key, then POST the blobs to the server.
@@ -104,18 +160,14 @@ export const chatApi = {
   setupConversationEncryption: async (conversationId, memberIds) => {
     const sessionKey = encryptionUtils.generateConversationKey();
 
-    // Use allSettled so a single missing public key doesn't abort the whole setup
-    const results = await Promise.allSettled(
-      memberIds.map(async (userId) => {
-        const res = await chatApi.getMemberPublicKey(userId);
-        const encryptedKey = encryptionUtils.encryptKeyForUser(sessionKey, res.public_key);
-        return { user_id: userId, encrypted_key: encryptedKey };
-      })
-    );
-
-    const keys = results
-      .filter((r) => r.status === "fulfilled")
-      .map((r) => r.value);
+    // One bulk lookup; members without a public key are simply skipped
+    const { public_keys: publicKeys = {} } = await chatApi.getMemberPublicKeys(conversationId);
+    const keys = memberIds
+      .filter((userId) => publicKeys[userId])
+      .map((userId) => ({
+        user_id: userId,
+        encrypted_key: encryptionUtils.encryptKeyForUser(sessionKey, publicKeys[userId]),
+      }));
 
     if (keys.length > 0) {
       await request(`/api/conversations/${encodeURIComponent(conversationId)}/session-key`, {
@@ -143,20 +195,18 @@ export const chatApi = {
   distributeToMissingMembers: async (conversationId, sessionKey, memberIds) => {
     if (!memberIds.length) return;
 
-    // Check which members are missing a key by trying to fetch their public key
-    // and cross-referencing. Simpler: try to encrypt for everyone and let the
-    // backend skip users who already have a key (upsert-style via partial insert).
-    const results = await Promise.allSettled(
-      memberIds.map(async (userId) => {
-        const res = await chatApi.getMemberPublicKey(userId);
-        const encryptedKey = encryptionUtils.encryptKeyForUser(sessionKey, res.public_key);
-        return { user_id: userId, encrypted_key: encryptedKey };
-      })
-    );
-
-    const keys = results
-      .filter((r) => r.status === "fulfilled")
-      .map((r) => r.value);
+    // One bulk lookup tells us who is missing a session key and their public key;
+    // encrypt only for those (the backend still skips users who already have one).
+    const {
+      public_keys: publicKeys = {},
+      missing_session_key: missing = [],
+    } = await chatApi.getMemberPublicKeys(conversationId);
+    const keys = memberIds
+      .filter((userId) => missing.includes(userId) && publicKeys[userId])
+      .map((userId) => ({
+        user_id: userId,
+        encrypted_key: encryptionUtils.encryptKeyForUser(sessionKey, publicKeys[userId]),
+      }));
 
     if (keys.length > 0) {
       await request(`/api/conversations/${encodeURIComponent(conversationId)}/session-key`, {
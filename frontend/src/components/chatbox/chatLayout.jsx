@@ -26,6 +26,8 @@ export default function ChatLayout({ currentUser, onNewChat, tripId }) {
         const list = Array.isArray(data) ? data : data.conversations || [];
         setConversations(list);
         setSelectedId((prev) => prev ?? list[0]?.conversation_id ?? null);
+        // Warm every conversation's session key in one request (non-critical)
+        chatApi.prefetchSessionKeys().catch(() => {});
       } catch (e) {
         if (alive) setError(e.message || "Failed to load conversations");
       } finally {
@@ -39,6 +41,11 @@ export default function ChatLayout({ currentUser, onNewChat, tripId }) {
   useEffect(() => {
     if (!selectedId) return;
     let alive = true;
+    // Opening a conversation reads it — clear the badge locally and on the server
+    setConversations((prev) =>
+      prev.map((c) => (c.conversation_id === selectedId ? { ...c, unread_count: 0 } : c))
+    );
+    chatApi.markRead(selectedId).catch(() => {});
     (async () => {
       try {
         setLoadingRight(true);
@@ -49,12 +56,10 @@ export default function ChatLayout({ currentUser, onNewChat, tripId }) {
           setMembersByConversation((prev) => ({ ...prev, [selectedId]: normalizeUsers(members) }));
         }
         if (!messagesByConversation[selectedId]) {
-          const msgs = await chatApi.getMessages(selectedId);
+          // Latest page; ChatWindow pages further back with prevCursor
+          const page = await chatApi.getMessages(selectedId);
           if (!alive) return;
-          setMessagesByConversation((prev) => ({
-            ...prev,
-            [selectedId]: Array.isArray(msgs) ? msgs : msgs.messages || [],
-          }));
+          setMessagesByConversation((prev) => ({ ...prev, [selectedId]: page }));
         }
       } catch (e) {
         if (alive) setError(e.message || "Failed to load conversation");
@@ -66,7 +71,7 @@ export default function ChatLayout({ currentUser, onNewChat, tripId }) {
   }, [selectedId]);
 
   const selectedMembers  = membersByConversation[selectedId]  || [];
-  const selectedMessages = messagesByConversation[selectedId] || [];
+  const selectedPage     = messagesByConversation[selectedId];
 
   const conversationTitle = useMemo(() => {
     if (!selectedId) return "";
@@ -122,7 +127,9 @@ export default function ChatLayout({ currentUser, onNewChat, tripId }) {
             title={displayTitle}
             currentUserId={currentUser?.id}
             members={selectedMembers}
-            messages={selectedMessages}
+            messages={selectedPage?.messages}
+            prevCursor={selectedPage?.prevCursor}
+            hasOlder={selectedPage?.hasMore}
             error={error}
             conversationID={selectedId}
           />
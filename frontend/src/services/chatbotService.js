@@ -22,6 +22,54 @@ export async function sendMessage(message, conversationId = null) {
   return response.json();
 }
 
+// Streams the reply over Server-Sent Events; onDelta(text) fires per chunk.
+// Resolves with the same { conversation_id, response } as sendMessage.
+export async function sendMessageStream(message, conversationId = null, onDelta = () => {}) {
+  const token = getToken();
+  const response = await fetch(`${BASE_URL}/ai-chat/send/stream`, {
+    method: "POST",
+    headers: {
+      Authorization: `Bearer ${token}`,
+      "Content-Type": "application/json",
+    },
+    body: JSON.stringify({
+      message,
+      conversation_id: conversationId,
+    }),
+  });
+  if (!response.ok || !response.body) throw new Error("Failed to send message");
+
+  const reader = response.body.getReader();
+  const decoder = new TextDecoder();
+  let buffer = "";
+  let result = null;
+
+  while (true) {
+    const { done, value } = await reader.read();
+    if (done) break;
+    buffer += decoder.decode(value, { stream: true });
+
+    let boundary;
+    while ((boundary = buffer.indexOf("\n\n")) !== -1) {
+      const frame = buffer.slice(0, boundary);
+      buffer = buffer.slice(boundary + 2);
+      let event = "message";
+      let data = "";
+      for (const line of frame.split("\n")) {
+        if (line.startsWith("event: ")) event = line.slice(7);
+        else if (line.startsWith("data: ")) data += line.slice(6);
+      }
+      if (!data) continue;
+      const payload = JSON.parse(data);
+      if (event === "delta") onDelta(payload.text);
+      else if (event === "done") result = payload;
+    }
+  }
+
+  if (!result) throw new Error("Stream ended unexpectedly");
+  return result;
+}
+
 export async function getConversations() {
   const token = getToken();
   const response = await fetch(`${BASE_URL}/ai-chat/conversations`, {